@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Bulk Writer for Vanta Ledger Ingestion
+======================================
+
+Shared batched writer for the ingestion scripts that store processed
+documents in PostgreSQL and MongoDB. Instead of an INSERT, a company
+UPSERT, an UPDATE and an insert_one per document, each with its own commit,
+results are buffered and written in batches:
+
+- A batch is flushed when it reaches ``batch_size`` rows or when its oldest
+  row is ``max_delay`` seconds old, whichever comes first
+- Each batch goes through a list of stages (e.g. companies, postgres,
+  mongo, rollups), each one multi-row statement or bulk call
+- A failed stage is retried with backoff; stages that already succeeded for
+  the batch are not repeated, and every stage is written to be safe to run
+  again (one transaction per Postgres stage, client-side ``_id`` values and
+  duplicate-key tolerance for Mongo)
+- When a required stage still fails, the ``undo`` of every stage already
+  committed for the batch runs in reverse order (e.g. the Postgres rows are
+  deleted when the Mongo insert never succeeds), so a failed batch leaves
+  no half-written documents and a rerun does not insert duplicates
+- Per-batch metrics (rows, seconds per stage, attempts) are kept for reports
+
+Helpers for the stages live here too: ``execute_values_returning`` for
+multi-row Postgres inserts, ``insert_many_idempotent`` for Mongo,
+``delete_ids`` and ``delete_inserted`` for undoing either, and
+``CompanyIdCache`` for resolving company names to ids once per run.
+"""
+
+import time
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Stage:
+    """One step of a batch write"""
+    name: str
+    write: Callable[[List[Dict[str, Any]]], None]
+    # Retry on failure; only for stages that are safe to run twice
+    retry: bool = True
+    # A failed required stage fails the batch and skips later stages
+    required: bool = True
+    # Reverts this stage's committed write when a later required stage fails
+    undo: Optional[Callable[[List[Dict[str, Any]]], None]] = None
+
+
+class BulkWriter:
+    """Buffers rows and writes them through ``stages`` in size/time-bounded batches"""
+
+    def __init__(self, stages: Sequence[Stage], batch_size: int = 500,
+                 max_delay: float = 5.0, max_retries: int = 3,
+                 retry_backoff: float = 0.5, name: str = 'bulk_writer',
+                 on_failed: Optional[Callable[[List[Dict[str, Any]]], None]] = None):
+        self.stages = list(stages)
+        # Called with the rows of a batch that could not be written
+        self.on_failed = on_failed
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.name = name
+
+        self._rows: List[Dict[str, Any]] = []
+        self._oldest: Optional[float] = None
+        self._lock = threading.RLock()
+        self._closed = threading.Event()
+        self._ticker: Optional[threading.Thread] = None
+
+        self.stats = {
+            'batches': 0,
+            'rows_written': 0,
+            'rows_failed': 0,
+            'retries': 0,
+            'undone': 0,
+            'seconds': 0.0,
+        }
+        # Most recent batches, for reports
+        self.batches = deque(maxlen=100)
+
+    def add(self, row: Dict[str, Any]):
+        """Buffer one row; flushes when the batch is full"""
+        with self._lock:
+            self._rows.append(row)
+            if self._oldest is None:
+                self._oldest = time.time()
+            if len(self._rows) >= self.batch_size:
+                self.flush()
+        self._start_ticker()
+
+    def extend(self, rows: Iterable[Dict[str, Any]]):
+        for row in rows:
+            self.add(row)
+
+    def flush(self):
+        """Write everything buffered now"""
+        with self._lock:
+            rows, self._rows = self._rows, []
+            self._oldest = None
+            if rows:
+                self._write_batch(rows)
+
+    def close(self):
+        """Flush what is left and stop the flush timer"""
+        self._closed.set()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _start_ticker(self):
+        if self._ticker is None and self.max_delay > 0:
+            self._ticker = threading.Thread(target=self._tick, name=f'{self.name}-flush',
+                                            daemon=True)
+            self._ticker.start()
+
+    def _tick(self):
+        # Flush a partial batch once its oldest row has waited max_delay
+        while not self._closed.wait(self.max_delay / 2):
+            with self._lock:
+                if self._oldest is not None and time.time() - self._oldest >= self.max_delay:
+                    self.flush()
+
+    def _write_batch(self, rows: List[Dict[str, Any]]):
+        started = time.time()
+        batch = {
+            'batch': self.stats['batches'] + 1,
+            'rows': len(rows),
+            'attempts': 0,
+            'stages': {},
+            'ok': True,
+        }
+
+        completed = []
+        for stage in self.stages:
+            attempt = 0
+            while True:
+                attempt += 1
+                batch['attempts'] += 1
+                stage_started = time.time()
+                try:
+                    stage.write(rows)
+                    batch['stages'][stage.name] = round(time.time() - stage_started, 4)
+                    completed.append(stage)
+                    break
+                except Exception as e:
+                    if stage.retry and attempt <= self.max_retries:
+                        self.stats['retries'] += 1
+                        logger.warning(f"⚠️ {self.name}: {stage.name} failed for "
+                                       f"{len(rows)} rows (attempt {attempt}), retrying: {e}")
+                        time.sleep(self.retry_backoff * 2 ** (attempt - 1))
+                        continue
+                    logger.error(f"❌ {self.name}: {stage.name} failed for {len(rows)} rows: {e}")
+                    batch['stages'][stage.name] = None
+                    if stage.required:
+                        batch['ok'] = False
+                        batch['error'] = f"{stage.name}: {e}"
+                    break
+            if not batch['ok']:
+                self._undo(completed, rows)
+                break
+
+        batch['seconds'] = round(time.time() - started, 4)
+        self.stats['batches'] += 1
+        self.stats['seconds'] += batch['seconds']
+        if batch['ok']:
+            self.stats['rows_written'] += len(rows)
+        else:
+            self.stats['rows_failed'] += len(rows)
+            if self.on_failed:
+                try:
+                    self.on_failed(rows)
+                except Exception as e:
+                    logger.error(f"❌ {self.name}: failed-batch handler raised: {e}")
+        self.batches.append(batch)
+        logger.info(f"💾 {self.name}: batch {batch['batch']} of {len(rows)} rows "
+                    f"{'written' if batch['ok'] else 'FAILED'} in {batch['seconds']:.2f}s")
+
+    def _undo(self, completed: List[Stage], rows: List[Dict[str, Any]]):
+        for stage in reversed(completed):
+            if stage.undo is None:
+                continue
+            try:
+                stage.undo(rows)
+                self.stats['undone'] += 1
+            except Exception as e:
+                logger.error(f"❌ {self.name}: could not undo {stage.name} for "
+                             f"{len(rows)} rows: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['pending'] = len(self._rows)
+        stats['rows_per_second'] = (
+            stats['rows_written'] / stats['seconds'] if stats['seconds'] > 0 else 0
+        )
+        stats['recent_batches'] = list(self.batches)[-10:]
+        return stats
+
+
+def execute_values_returning(conn, sql: str, rows: List[tuple],
+                             template: Optional[str] = None) -> List[tuple]:
+    """
+    Run a multi-row ``INSERT ... VALUES %s [RETURNING ...]`` in one transaction
+
+    All rows go in a single statement, so RETURNING rows come back in input
+    order. Rolled back on error so the stage can simply be run again.
+    """
+    from psycopg2.extras import execute_values
+
+    try:
+        with conn.cursor() as cur:
+            fetch = 'RETURNING' in sql.upper()
+            result = execute_values(cur, sql, rows, template=template,
+                                    page_size=max(len(rows), 1), fetch=fetch)
+        conn.commit()
+        return result or []
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def delete_ids(conn, table: str, ids: List[int]):
+    """Delete rows by id in one transaction; undo for an insert stage"""
+    if not ids:
+        return
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"DELETE FROM {table} WHERE id = ANY(%s)", (list(ids),))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def insert_many_idempotent(collection, documents: List[Dict[str, Any]]):
+    """
+    ``insert_many(ordered=False)`` that can be repeated
+
+    ``_id`` values are assigned up front and kept on the documents, so a
+    retry after a partial write only reports duplicate keys for the
+    documents already stored, which are ignored.
+    """
+    from bson import ObjectId
+    from pymongo.errors import BulkWriteError
+
+    if not documents:
+        return
+    for document in documents:
+        document.setdefault('_id', ObjectId())
+    try:
+        collection.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        details = e.details or {}
+        errors = [error for error in details.get('writeErrors', []) if error.get('code') != 11000]
+        if errors or details.get('writeConcernErrors'):
+            raise
+
+
+def delete_inserted(collection, documents: List[Dict[str, Any]]):
+    """Delete documents written by ``insert_many_idempotent``; undo for a Mongo stage"""
+    ids = [document['_id'] for document in documents if '_id' in document]
+    if ids:
+        collection.delete_many({'_id': {'$in': ids}})
+
+
+class CompanyIdCache:
+    """Company name -> id for a run, creating missing companies in bulk"""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+
+    def resolve(self, conn, names: Iterable[str]) -> Dict[str, int]:
+        names = set(names)
+        missing = sorted(name for name in names if name not in self.ids)
+        if missing:
+            from psycopg2.extras import execute_values
+            try:
+                with conn.cursor() as cur:
+                    execute_values(cur, """
+                        INSERT INTO companies (name, created_at) VALUES %s
+                        ON CONFLICT (name) DO NOTHING
+                    """, [(name, datetime.now()) for name in missing])
+                    cur.execute("SELECT name, id FROM companies WHERE name = ANY(%s)", (missing,))
+                    found = dict(cur.fetchall())
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            # Only committed ids are cached
+            self.ids.update(found)
+        return {name: self.ids[name] for name in names}
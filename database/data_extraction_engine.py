@@ -24,6 +24,9 @@ from sqlalchemy import create_engine, text
 from pymongo import MongoClient
 from pymongo.errors import DuplicateKeyError
 
+from bulk_writer import (BulkWriter, Stage, delete_ids, delete_inserted,
+                         execute_values_returning, insert_many_idempotent)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -59,10 +62,16 @@ class ExtractedData:
 class DataExtractionEngine:
     """Advanced data extraction engine for financial documents"""
     
-    def __init__(self):
+    def __init__(self, batch_size: int = 500):
         self.postgres_engine = None
+        self.postgres_conn = None
         self.mongo_client = None
         self.mongo_db = None
+        # Extracted rows are saved in batches: one INSERT and one insert_many each
+        self.writer = BulkWriter([
+            Stage('postgres', self._save_to_postgresql, undo=self._delete_from_postgresql),
+            Stage('mongo', self._save_to_mongodb, undo=self._delete_from_mongodb),
+        ], batch_size=batch_size, name='extraction_writer')
         self.extraction_patterns = self._load_extraction_patterns()
         self.company_patterns = self._load_company_patterns()
         
@@ -71,6 +80,8 @@ class DataExtractionEngine:
         try:
             # Connect to PostgreSQL
             self.postgres_engine = create_engine(POSTGRES_URI)
+            # DBAPI connection for the writer's multi-row inserts
+            self.postgres_conn = self.postgres_engine.raw_connection()
             logger.info("✅ Connected to PostgreSQL")
             
             # Connect to MongoDB
@@ -347,11 +358,8 @@ class DataExtractionEngine:
         try:
             extracted_data = self.extract_data_from_text(text_content, document_id, filename)
             
-            # Save to PostgreSQL
-            self._save_to_postgresql(extracted_data)
-            
-            # Save to MongoDB
-            self._save_to_mongodb(extracted_data, text_content)
+            # Saved to PostgreSQL and MongoDB with the next batch
+            self.writer.add({'data': extracted_data, 'text': text_content})
             
             logger.info(f"✅ Processed document {filename} (ID: {document_id}) - Confidence: {extracted_data.confidence_score:.2f}")
             return extracted_data
@@ -360,48 +368,45 @@ class DataExtractionEngine:
             logger.error(f"❌ Failed to process document {filename}: {e}")
             raise
     
-    def _save_to_postgresql(self, data: ExtractedData):
-        """Save extracted data to PostgreSQL"""
-        try:
-            with self.postgres_engine.begin() as conn:
-                # Insert into extracted_data table
-                conn.execute(text("""
-                    INSERT INTO extracted_data 
-                    (document_id, company_name, transaction_date, amount, currency, 
-                     transaction_type, category, description, reference_number, 
-                     vendor_name, invoice_number, tax_amount, payment_method, 
-                     confidence_score, extraction_method, extracted_at)
-                    VALUES (:document_id, :company_name, :transaction_date, :amount, :currency,
-                           :transaction_type, :category, :description, :reference_number,
-                           :vendor_name, :invoice_number, :tax_amount, :payment_method,
-                           :confidence_score, :extraction_method, :extracted_at)
-                """), {
-                    "document_id": data.document_id,
-                    "company_name": data.company_name,
-                    "transaction_date": data.transaction_date,
-                    "amount": data.amount,
-                    "currency": data.currency,
-                    "transaction_type": data.transaction_type,
-                    "category": data.category,
-                    "description": data.description,
-                    "reference_number": data.reference_number,
-                    "vendor_name": data.vendor_name,
-                    "invoice_number": data.invoice_number,
-                    "tax_amount": data.tax_amount,
-                    "payment_method": data.payment_method,
-                    "confidence_score": data.confidence_score,
-                    "extraction_method": data.extraction_method,
-                    "extracted_at": data.extracted_at
-                })
-                
-        except Exception as e:
-            logger.error(f"❌ Failed to save to PostgreSQL: {e}")
-            raise
+    def _save_to_postgresql(self, batch: List[Dict[str, Any]]):
+        """Writer stage: extracted data for a batch in one INSERT"""
+        rows = [(
+            data.document_id, data.company_name, data.transaction_date, data.amount,
+            data.currency, data.transaction_type, data.category, data.description,
+            data.reference_number, data.vendor_name, data.invoice_number,
+            data.tax_amount, data.payment_method, data.confidence_score,
+            data.extraction_method, data.extracted_at
+        ) for data in (item['data'] for item in batch)]
+        ids = execute_values_returning(self.postgres_conn, """
+            INSERT INTO extracted_data 
+            (document_id, company_name, transaction_date, amount, currency, 
+             transaction_type, category, description, reference_number, 
+             vendor_name, invoice_number, tax_amount, payment_method, 
+             confidence_score, extraction_method, extracted_at)
+            VALUES %s
+            RETURNING id
+        """, rows)
+        for item, (row_id,) in zip(batch, ids):
+            item['extracted_id'] = row_id
     
-    def _save_to_mongodb(self, data: ExtractedData, original_text: str):
-        """Save extracted data to MongoDB"""
-        try:
-            mongo_document = {
+    def _delete_from_postgresql(self, batch: List[Dict[str, Any]]):
+        """Undo for the postgres stage: a failed batch leaves no extracted_data rows"""
+        delete_ids(self.postgres_conn, 'extracted_data',
+                   [item['extracted_id'] for item in batch if 'extracted_id' in item])
+        for item in batch:
+            item.pop('extracted_id', None)
+    
+    def _delete_from_mongodb(self, batch: List[Dict[str, Any]]):
+        """Undo for the mongo stage"""
+        delete_inserted(self.mongo_db.extracted_data,
+                        [item['mongo_document'] for item in batch if 'mongo_document' in item])
+    
+    def _save_to_mongodb(self, batch: List[Dict[str, Any]]):
+        """Writer stage: extracted data and original text for a batch in one insert_many"""
+        for item in batch:
+            data = item['data']
+            # Built once so a retried batch reuses the same _id values
+            item.setdefault('mongo_document', {
                 "postgres_id": data.document_id,
                 "filename": data.filename,
                 "extracted_data": {
@@ -420,15 +425,11 @@ class DataExtractionEngine:
                     "confidence_score": data.confidence_score,
                     "extraction_method": data.extraction_method
                 },
-                "original_text": original_text,
+                "original_text": item['text'],
                 "extracted_at": data.extracted_at
-            }
-            
-            self.mongo_db.extracted_data.insert_one(mongo_document)
-            
-        except Exception as e:
-            logger.error(f"❌ Failed to save to MongoDB: {e}")
-            raise
+            })
+        insert_many_idempotent(self.mongo_db.extracted_data,
+                               [item['mongo_document'] for item in batch])
     
     def process_all_documents(self, limit: int = None) -> Dict[str, Any]:
         """Process all documents in the database"""
@@ -457,10 +458,18 @@ class DataExtractionEngine:
             for i in range(0, len(documents), batch_size):
                 batch = documents[i:i + batch_size]
                 
+                # Get the batch's document texts from MongoDB in one query
+                mongo_docs = {
+                    mongo_doc["postgres_id"]: mongo_doc
+                    for mongo_doc in self.mongo_db.documents.find(
+                        {"postgres_id": {"$in": [doc[0] for doc in batch]}},
+                        {"postgres_id": 1, "analysis.text": 1}
+                    )
+                }
+                
                 for doc in batch:
                     try:
-                        # Get document text from MongoDB
-                        mongo_doc = self.mongo_db.documents.find_one({"postgres_id": doc[0]})
+                        mongo_doc = mongo_docs.get(doc[0])
                         if mongo_doc and mongo_doc.get("analysis"):
                             text_content = mongo_doc["analysis"].get("text", "")
                         else:
@@ -477,6 +486,12 @@ class DataExtractionEngine:
                 
                 logger.info(f"📊 Progress: {processed_count}/{len(documents)} documents processed")
             
+            # Write the last partial batch; rows in failed batches count as failures
+            self.writer.close()
+            write_stats = self.writer.get_stats()
+            processed_count -= write_stats['rows_failed']
+            failed_count += write_stats['rows_failed']
+            
             # Calculate statistics
             avg_confidence = total_confidence / processed_count if processed_count > 0 else 0.0
             
@@ -486,6 +501,8 @@ class DataExtractionEngine:
                 "failed_count": failed_count,
                 "success_rate": f"{(processed_count / len(documents) * 100):.2f}%" if documents else "0%",
                 "average_confidence": f"{avg_confidence:.2f}",
+                "database_batches": write_stats['batches'],
+                "database_retries": write_stats['retries'],
                 "extraction_date": datetime.now(timezone.utc).isoformat()
             }
             
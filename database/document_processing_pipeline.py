@@ -17,7 +17,6 @@ import os
 import sys
 import json
 import re
-import hashlib
 from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional, Tuple
 import logging
@@ -43,6 +42,10 @@ import spacy
 from transformers import pipeline
 import openai
 
+from bulk_writer import (BulkWriter, Stage, delete_ids, delete_inserted,
+                         execute_values_returning, insert_many_idempotent)
+from ingestion_manifest import IngestionManifest, hash_file
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -53,7 +56,8 @@ logger = logging.getLogger(__name__)
 class DocumentProcessingPipeline:
     """Comprehensive document processing pipeline for Vanta Ledger"""
     
-    def __init__(self, postgres_engine, mongo_client, organized_data_path):
+    def __init__(self, postgres_engine, mongo_client, organized_data_path, batch_size: int = 500,
+                 manifest_path: str = 'document_ingestion_manifest.sqlite'):
         self.postgres_engine = postgres_engine
         self.mongo_client = mongo_client
         self.mongo_db = mongo_client.vanta_ledger
@@ -61,6 +65,26 @@ class DocumentProcessingPipeline:
         self.processed_count = 0
         self.error_count = 0
         
+        # Files already ingested, for incremental runs; a file is checkpointed
+        # in the manifest once the batch holding it has been written
+        self.manifest = IngestionManifest(manifest_path)
+        # Content queued for writing but not yet written, and copies of it
+        # found meanwhile, which are decided once the first copy is written
+        self._pending_hashes = set()
+        self._deferred = []
+        # Hashes stored before the manifest existed, for a dry run of an
+        # unseeded manifest (a dry run does not seed it)
+        self._unseeded_hashes = set()
+        
+        # Documents are saved in batches: one INSERT and one insert_many each
+        self._postgres_conn = None
+        self.writer = BulkWriter([
+            Stage('postgres', self._insert_documents, undo=self._delete_documents),
+            Stage('mongo', self._insert_mongo_documents, undo=self._delete_mongo_documents),
+            Stage('manifest', self._checkpoint_documents),
+        ], batch_size=batch_size, name='pipeline_writer',
+            on_failed=self._release_documents)
+        
         # Initialize AI models
         try:
             self.nlp = spacy.load("en_core_web_sm")
@@ -348,7 +372,8 @@ class DocumentProcessingPipeline:
             logger.error(f"Error analyzing document content: {e}")
             return {}
     
-    def process_single_document(self, file_path: Path, company_name: str, category: str) -> Dict[str, Any]:
+    def process_single_document(self, file_path: Path, company_name: str, category: str,
+                                file_hash: Optional[str] = None) -> Dict[str, Any]:
         """Process a single document and extract all relevant data"""
         try:
             # Get company ID
@@ -357,6 +382,11 @@ class DocumentProcessingPipeline:
                 logger.warning(f"Company not found in database: {company_name}")
                 return {}
             
+            # Hash the content before any extraction or OCR
+            file_stat = file_path.stat()
+            if file_hash is None:
+                file_hash = hash_file(file_path)
+            
             # Extract text
             text = self.extract_text_from_file(file_path)
             
@@ -369,14 +399,11 @@ class DocumentProcessingPipeline:
             # Analyze content
             content_analysis = self.analyze_document_content(text)
             
-            # Generate document hash
-            file_hash = hashlib.md5(file_path.read_bytes()).hexdigest()
-            
             # Prepare document data
             document_data = {
                 'filename': file_path.name,
                 'original_path': str(file_path),
-                'file_size': file_path.stat().st_size,
+                'file_size': file_stat.st_size,
                 'mime_type': mimetypes.guess_type(str(file_path))[0],
                 'company_id': company_id,
                 'company_name': company_name,
@@ -387,7 +414,8 @@ class DocumentProcessingPipeline:
                 'content_analysis': content_analysis,
                 'file_hash': file_hash,
                 'processing_date': datetime.now(),
-                'status': 'processed'
+                'status': 'processed',
+                'file_stat': file_stat
             }
             
             return document_data
@@ -397,74 +425,156 @@ class DocumentProcessingPipeline:
             return {}
     
     def save_document_to_database(self, document_data: Dict[str, Any]) -> bool:
-        """Save processed document to both PostgreSQL and MongoDB"""
+        """Queue a processed document for the next batch write to PostgreSQL and MongoDB"""
         try:
-            # Save metadata to PostgreSQL
-            with self.postgres_engine.begin() as conn:
-                result = conn.execute(text("""
-                    INSERT INTO documents 
-                    (company_id, document_type, document_category, filename, original_path, 
-                     file_size, mime_type, processing_status, extracted_data, ai_analysis)
-                    VALUES (:company_id, :doc_type, :category, :filename, :original_path,
-                           :file_size, :mime_type, :status, :extracted_data, :ai_analysis)
-                    RETURNING id
-                """), {
-                    'company_id': document_data['company_id'],
-                    'doc_type': document_data['document_type'],
-                    'category': document_data['category'],
-                    'filename': document_data['filename'],
-                    'original_path': document_data['original_path'],
-                    'file_size': document_data['file_size'],
-                    'mime_type': document_data['mime_type'],
-                    'status': document_data['status'],
-                    'extracted_data': json.dumps(document_data['financial_data']),
-                    'ai_analysis': json.dumps(document_data['content_analysis'])
-                })
-                
-                document_id = result.fetchone()[0]
-            
-            # Save full document to MongoDB
-            documents_collection = self.mongo_db.documents
-            mongo_doc = {
-                'postgres_id': document_id,
-                'company_id': document_data['company_id'],
-                'company_name': document_data['company_name'],
-                'filename': document_data['filename'],
-                'original_path': document_data['original_path'],
-                'category': document_data['category'],
-                'document_type': document_data['document_type'],
-                'extracted_text': document_data['extracted_text'],
-                'financial_data': document_data['financial_data'],
-                'content_analysis': document_data['content_analysis'],
-                'file_hash': document_data['file_hash'],
-                'processing_date': document_data['processing_date'],
-                'status': document_data['status']
-            }
-            
-            documents_collection.insert_one(mongo_doc)
-            
-            # Update PostgreSQL with MongoDB document ID
-            with self.postgres_engine.begin() as conn:
-                conn.execute(text("""
-                    UPDATE documents 
-                    SET mongo_document_id = :mongo_id 
-                    WHERE id = :postgres_id
-                """), {
-                    'mongo_id': str(mongo_doc['_id']),
-                    'postgres_id': document_id
-                })
-            
+            self.writer.add(document_data)
             return True
-            
         except Exception as e:
             logger.error(f"Error saving document to database: {e}")
             return False
     
-    def process_company_documents(self, company_path: Path) -> Dict[str, int]:
-        """Process all documents for a single company"""
+    def _raw_postgres_connection(self):
+        """DBAPI connection for multi-row inserts, held for the pipeline's lifetime"""
+        if self._postgres_conn is None:
+            self._postgres_conn = self.postgres_engine.raw_connection()
+        return self._postgres_conn
+    
+    def _insert_documents(self, batch: List[Dict[str, Any]]):
+        """Writer stage: document metadata for a batch in one INSERT"""
+        from bson import ObjectId
+        
+        rows = []
+        for document_data in batch:
+            # The MongoDB id is chosen up front, so no UPDATE is needed afterwards
+            document_data.setdefault('mongo_id', ObjectId())
+            rows.append((
+                document_data['company_id'],
+                document_data['document_type'],
+                document_data['category'],
+                document_data['filename'],
+                document_data['original_path'],
+                document_data['file_size'],
+                document_data['mime_type'],
+                document_data['status'],
+                json.dumps(document_data['financial_data']),
+                json.dumps(document_data['content_analysis']),
+                str(document_data['mongo_id'])
+            ))
+        
+        ids = execute_values_returning(self._raw_postgres_connection(), """
+            INSERT INTO documents 
+            (company_id, document_type, document_category, filename, original_path, 
+             file_size, mime_type, processing_status, extracted_data, ai_analysis,
+             mongo_document_id)
+            VALUES %s
+            RETURNING id
+        """, rows)
+        for document_data, (document_id,) in zip(batch, ids):
+            document_data['postgres_id'] = document_id
+    
+    def _delete_documents(self, batch: List[Dict[str, Any]]):
+        """Undo for the postgres stage: a failed batch leaves no document rows"""
+        delete_ids(self._raw_postgres_connection(), 'documents',
+                   [document_data['postgres_id'] for document_data in batch
+                    if 'postgres_id' in document_data])
+        for document_data in batch:
+            document_data.pop('postgres_id', None)
+    
+    def _delete_mongo_documents(self, batch: List[Dict[str, Any]]):
+        """Undo for the mongo stage"""
+        delete_inserted(self.mongo_db.documents,
+                        [{'_id': document_data['mongo_id']} for document_data in batch])
+    
+    def _insert_mongo_documents(self, batch: List[Dict[str, Any]]):
+        """Writer stage: full documents for a batch in one insert_many"""
+        insert_many_idempotent(self.mongo_db.documents, [{
+            '_id': document_data['mongo_id'],
+            'postgres_id': document_data['postgres_id'],
+            'company_id': document_data['company_id'],
+            'company_name': document_data['company_name'],
+            'filename': document_data['filename'],
+            'original_path': document_data['original_path'],
+            'category': document_data['category'],
+            'document_type': document_data['document_type'],
+            'extracted_text': document_data['extracted_text'],
+            'financial_data': document_data['financial_data'],
+            'content_analysis': document_data['content_analysis'],
+            'file_hash': document_data['file_hash'],
+            'processing_date': document_data['processing_date'],
+            'status': document_data['status']
+        } for document_data in batch])
+    
+    def _checkpoint_documents(self, batch: List[Dict[str, Any]]):
+        """Writer stage: mark a written batch's files as ingested in the manifest"""
+        self.manifest.record_many([
+            (document_data['original_path'], document_data['file_stat'],
+             document_data['file_hash'], 'ingested')
+            for document_data in batch
+        ])
+        # Now in the manifest's skip index
+        self._pending_hashes.difference_update(document_data['file_hash'] for document_data in batch)
+    
+    def _release_documents(self, batch: List[Dict[str, Any]]):
+        """A batch failed: its content is no longer pending, so copies get processed"""
+        self._pending_hashes.difference_update(document_data['file_hash'] for document_data in batch)
+    
+    def seed_manifest(self, dry_run: bool = False):
+        """
+        Add the hashes of documents stored before the manifest existed (once)
+        
+        A dry run keeps them in memory instead of writing them to the manifest.
+        """
+        source = 'mongo.documents'
+        if self.manifest.is_seeded(source):
+            return
+        cursor = self.mongo_db.documents.find(
+            {'file_hash': {'$exists': True}}, {'file_hash': 1, '_id': 0}
+        )
+        hashes = (document.get('file_hash') for document in cursor)
+        if dry_run:
+            self._unseeded_hashes = set(hashes)
+        else:
+            self.manifest.seed_hashes(hashes, source=source)
+    
+    def plan_file(self, file_path: Path) -> Tuple[str, os.stat_result, Optional[str]]:
+        """
+        Decide whether a file needs processing
+        
+        Returns ``(action, stat, file_hash)`` where action is 'unchanged',
+        'duplicate', 'pending', 'new' or 'changed'. Files whose size, mtime
+        and inode match the manifest are not opened; anything else is hashed
+        by streaming it, and is a duplicate only if that content has been
+        written. 'pending' means the same content is queued in this run but
+        not written yet.
+        """
+        stat = file_path.stat()
+        entry = self.manifest.get(file_path)
+        if self.manifest.unchanged(entry, stat):
+            return 'unchanged', stat, entry['file_hash']
+        
+        content_hash = hash_file(file_path)
+        if entry and entry['file_hash'] == content_hash and entry['status'] in ('ingested', 'duplicate'):
+            # Touched or copied back in place, same content
+            return 'unchanged', stat, content_hash
+        if self.manifest.is_ingested(content_hash) or content_hash in self._unseeded_hashes:
+            return 'duplicate', stat, content_hash
+        if content_hash in self._pending_hashes:
+            return 'pending', stat, content_hash
+        return ('changed' if entry else 'new'), stat, content_hash
+    
+    def process_company_documents(self, company_path: Path, incremental: bool = True,
+                                  dry_run: bool = False,
+                                  report: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+        """
+        Process all documents for a single company
+        
+        With ``incremental`` only new or changed content is processed (see
+        ``plan_file``). With ``dry_run`` nothing is processed or written;
+        files that would be processed are added to ``report``.
+        """
         try:
             company_name = company_path.name.replace('_', ' ').replace('-', ' ')
-            stats = {'processed': 0, 'errors': 0, 'total': 0}
+            stats = self._empty_stats()
             
             logger.info(f"Processing documents for company: {company_name}")
             
@@ -478,58 +588,171 @@ class DocumentProcessingPipeline:
                     for file_path in category_path.iterdir():
                         if file_path.is_file():
                             stats['total'] += 1
-                            
-                            try:
-                                # Process document
-                                document_data = self.process_single_document(file_path, company_name, category)
-                                
-                                if document_data:
-                                    # Save to database
-                                    if self.save_document_to_database(document_data):
-                                        stats['processed'] += 1
-                                        self.processed_count += 1
-                                    else:
-                                        stats['errors'] += 1
-                                        self.error_count += 1
-                                else:
-                                    stats['errors'] += 1
-                                    self.error_count += 1
-                                    
-                            except Exception as e:
-                                logger.error(f"Error processing {file_path}: {e}")
-                                stats['errors'] += 1
-                                self.error_count += 1
+                            self._ingest_file(file_path, company_name, category, stats,
+                                              incremental, dry_run, report)
             
             return stats
             
         except Exception as e:
             logger.error(f"Error processing company documents for {company_path}: {e}")
-            return {'processed': 0, 'errors': 0, 'total': 0}
+            return self._empty_stats()
+    
+    @staticmethod
+    def _empty_stats() -> Dict[str, int]:
+        return {'processed': 0, 'errors': 0, 'total': 0, 'unchanged': 0, 'duplicates': 0}
+    
+    def _ingest_file(self, file_path: Path, company_name: str, category: str,
+                     stats: Dict[str, int], incremental: bool, dry_run: bool,
+                     report: Optional[Dict[str, Any]]):
+        """Plan, process and queue one file, counting the outcome in ``stats``"""
+        file_hash = None
+        try:
+            if incremental:
+                action, stat, file_hash = self.plan_file(file_path)
+                if action == 'unchanged':
+                    stats['unchanged'] += 1
+                    return
+                if action == 'duplicate':
+                    stats['duplicates'] += 1
+                    if not dry_run:
+                        self.manifest.record(file_path, stat, file_hash, 'duplicate')
+                    return
+                if action == 'pending':
+                    if dry_run:
+                        # A copy of a file this dry run would process
+                        stats['duplicates'] += 1
+                    else:
+                        self._deferred.append((file_path, company_name, category))
+                    return
+                self._pending_hashes.add(file_hash)
+            else:
+                action, stat = 'new', file_path.stat()
+            
+            if dry_run:
+                stats['processed'] += 1
+                if report is not None:
+                    report['files'].append({
+                        'path': str(file_path),
+                        'action': action,
+                        'size': stat.st_size
+                    })
+                return
+            
+            # Process document
+            document_data = self.process_single_document(file_path, company_name,
+                                                         category, file_hash)
+            
+            if document_data and self.save_document_to_database(document_data):
+                stats['processed'] += 1
+                self.processed_count += 1
+                return
+            
+            if not document_data:
+                # Not skipped next run: only finished statuses are
+                self.manifest.record(file_path, stat, file_hash, 'failed')
+            self._pending_hashes.discard(file_hash)
+            stats['errors'] += 1
+            self.error_count += 1
+            
+        except Exception as e:
+            logger.error(f"Error processing {file_path}: {e}")
+            self._pending_hashes.discard(file_hash)
+            stats['errors'] += 1
+            self.error_count += 1
+    
+    def _ingest_deferred(self, stats: Dict[str, int]):
+        """
+        Decide the copies whose content was pending when they were found
+        
+        Writing the queued batch settles each one: a duplicate if the first
+        copy was written, processed now if it failed.
+        """
+        while self._deferred:
+            self.writer.flush()
+            deferred, self._deferred = self._deferred, []
+            for file_path, company_name, category in deferred:
+                self._ingest_file(file_path, company_name, category, stats,
+                                  incremental=True, dry_run=False, report=None)
     
-    def run_complete_processing(self) -> Dict[str, Any]:
-        """Run complete document processing pipeline"""
+    def run_complete_processing(self, incremental: bool = True, dry_run: bool = False) -> Dict[str, Any]:
+        """
+        Run complete document processing pipeline
+        
+        Incremental runs skip files the manifest has already seen and content
+        already stored; an interrupted run picks up after the last written
+        batch. ``incremental=False`` reprocesses every file. ``dry_run``
+        returns a report of what would be processed without processing it.
+        """
         try:
             logger.info("🚀 Starting complete document processing pipeline...")
             
             start_time = datetime.now()
-            total_stats = {'processed': 0, 'errors': 0, 'total': 0, 'companies': 0}
+            total_stats = dict(self._empty_stats(), companies=0)
+            report = {'files': []}
+            self._pending_hashes = set()
+            self._deferred = []
+            self._unseeded_hashes = set()
+            
+            if incremental:
+                self.seed_manifest(dry_run=dry_run)
             
             # Process each company
-            for company_path in self.organized_data_path.iterdir():
-                if company_path.is_dir() and not company_path.name.startswith('.'):
-                    company_stats = self.process_company_documents(company_path)
-                    
-                    total_stats['processed'] += company_stats['processed']
-                    total_stats['errors'] += company_stats['errors']
-                    total_stats['total'] += company_stats['total']
-                    total_stats['companies'] += 1
-                    
-                    logger.info(f"Company {company_path.name}: {company_stats['processed']} processed, {company_stats['errors']} errors")
+            try:
+                for company_path in self.organized_data_path.iterdir():
+                    if company_path.is_dir() and not company_path.name.startswith('.'):
+                        company_stats = self.process_company_documents(company_path, incremental,
+                                                                       dry_run, report)
+                        
+                        for key in ('processed', 'errors', 'total', 'unchanged', 'duplicates'):
+                            total_stats[key] += company_stats[key]
+                        total_stats['companies'] += 1
+                        
+                        logger.info(f"Company {company_path.name}: {company_stats['processed']} processed, "
+                                    f"{company_stats['unchanged']} unchanged, "
+                                    f"{company_stats['duplicates']} duplicates, {company_stats['errors']} errors")
+                
+                if not dry_run:
+                    deferred_stats = self._empty_stats()
+                    self._ingest_deferred(deferred_stats)
+                    for key in ('processed', 'errors', 'unchanged', 'duplicates'):
+                        total_stats[key] += deferred_stats[key]
+            except KeyboardInterrupt:
+                # Write and checkpoint what is queued so the next run resumes after it
+                logger.warning("🛑 Interrupted: writing queued documents before stopping")
+                self.writer.close()
+                raise
+            
+            if dry_run:
+                actions = [entry['action'] for entry in report['files']]
+                summary = {
+                    'dry_run': True,
+                    'total_documents': total_stats['total'],
+                    'new_documents': actions.count('new'),
+                    'changed_documents': actions.count('changed'),
+                    'unchanged_documents': total_stats['unchanged'],
+                    'duplicate_documents': total_stats['duplicates'],
+                    'bytes_to_process': sum(entry['size'] for entry in report['files']),
+                    'files': report['files']
+                }
+                logger.info(f"📋 Dry run: {len(actions)} of {total_stats['total']} documents would be processed "
+                            f"({summary['new_documents']} new, {summary['changed_documents']} changed), "
+                            f"{summary['unchanged_documents']} unchanged, "
+                            f"{summary['duplicate_documents']} duplicates")
+                return summary
+            
+            # Write the last partial batch; documents in failed batches are errors
+            self.writer.close()
+            write_stats = self.writer.get_stats()
+            total_stats['processed'] -= write_stats['rows_failed']
+            total_stats['errors'] += write_stats['rows_failed']
+            self.processed_count -= write_stats['rows_failed']
+            self.error_count += write_stats['rows_failed']
             
             end_time = datetime.now()
             processing_time = end_time - start_time
             
-            # Generate summary
+            # Generate summary; skipped files are not counted against the success rate
+            attempted = total_stats['total'] - total_stats['unchanged'] - total_stats['duplicates']
             summary = {
                 'processing_date': start_time,
                 'processing_time_seconds': processing_time.total_seconds(),
@@ -537,7 +760,12 @@ class DocumentProcessingPipeline:
                 'total_documents': total_stats['total'],
                 'processed_documents': total_stats['processed'],
                 'error_documents': total_stats['errors'],
-                'success_rate': (total_stats['processed'] / total_stats['total'] * 100) if total_stats['total'] > 0 else 0
+                'unchanged_documents': total_stats['unchanged'],
+                'duplicate_documents': total_stats['duplicates'],
+                'success_rate': (total_stats['processed'] / attempted * 100) if attempted > 0 else 0,
+                'database_batches': write_stats['batches'],
+                'database_retries': write_stats['retries'],
+                'database_write_seconds': write_stats['seconds']
             }
             
             # Save processing summary to MongoDB
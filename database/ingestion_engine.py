@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Process-Pool Ingestion Engine for Vanta Ledger
+=============================================
+
+Runs EnhancedDocumentProcessor in worker processes instead of threads, so
+OCR, regex extraction and transformers inference use one core per worker
+instead of sharing the GIL:
+
+- Each worker process loads the models once, in its initializer, and keeps
+  them for every document it processes
+- File paths are handed out through a bounded window of in-flight jobs, so
+  a large directory is never queued up front
+- Workers return plain result dicts; all database writes happen in the
+  calling thread (a single writer), so no worker opens a connection
+- drain() stops handing out new paths; documents already in flight finish
+  and are written before run() returns
+"""
+
+import os
+import time
+import logging
+import threading
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Set in each worker process by _init_worker
+_processor = None
+
+
+def _init_worker():
+    """Load the document processor once per worker process"""
+    global _processor
+    import signal
+
+    # The parent owns shutdown: a Ctrl+C or SIGTERM sent to the process group
+    # must not kill documents that are already being processed
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+
+    try:
+        import torch
+        # One process per core; stop each one spreading over every core
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
+
+    from enhanced_document_processor import EnhancedDocumentProcessor
+    _processor = EnhancedDocumentProcessor()
+
+
+def _process(file_path: str) -> Dict[str, Any]:
+    """Process one document in a worker process"""
+    started = time.time()
+    result = _processor.process_document(Path(file_path))
+    result['worker_id'] = os.getpid()
+    result['processing_time'] = time.time() - started
+    return result
+
+
+class IngestionEngine:
+    """Process documents in a process pool and hand results to one writer"""
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 initializer: Callable[[], None] = _init_worker,
+                 task: Callable[[str], Dict[str, Any]] = _process):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # Enough queued work to keep every worker busy between results
+        self.max_pending = max_pending or self.max_workers * 2
+        # Worker setup and per-document work; module-level functions, since
+        # spawned workers import them by name
+        self.initializer = initializer
+        self.task = task
+        self.draining = threading.Event()
+        self.stats = {
+            'submitted': 0,
+            'processed': 0,
+            'failed': 0,
+            'skipped': 0,
+            'first_result_at': None,
+            'finished_at': None,
+        }
+
+    def drain(self):
+        """Stop handing out documents; in-flight ones still finish"""
+        if not self.draining.is_set():
+            logger.info("🛑 Draining ingestion: no new documents will be started")
+        self.draining.set()
+
+    def run(self, file_paths: Iterable[Path],
+            on_result: Callable[[Dict[str, Any]], None],
+            on_error: Optional[Callable[[Path, Exception], None]] = None) -> Dict[str, Any]:
+        """
+        Process ``file_paths`` and call ``on_result`` for each result
+
+        Callbacks run in the calling thread, one at a time.
+        """
+        paths = iter(file_paths)
+        pending = set()
+        context = multiprocessing.get_context('spawn')
+
+        with ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context,
+                                 initializer=self.initializer) as pool:
+            for file_path in paths:
+                if self.draining.is_set():
+                    self.stats['skipped'] += 1 + sum(1 for _ in paths)
+                    break
+                while len(pending) >= self.max_pending:
+                    pending = self._collect(pending, on_result, on_error)
+                future = pool.submit(self.task, str(file_path))
+                future.file_path = file_path
+                pending.add(future)
+                self.stats['submitted'] += 1
+
+            while pending:
+                pending = self._collect(pending, on_result, on_error)
+
+        self.stats['finished_at'] = time.time()
+        return self.stats
+
+    def _collect(self, pending, on_result, on_error):
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            try:
+                result = future.result()
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.error(f"❌ Processing failed for {future.file_path}: {e}")
+                if on_error:
+                    on_error(future.file_path, e)
+                continue
+
+            if self.stats['first_result_at'] is None:
+                self.stats['first_result_at'] = time.time()
+            self.stats['processed'] += 1
+            try:
+                on_result(result)
+            except Exception as e:
+                logger.error(f"❌ Result handler failed for {future.file_path}: {e}")
+        return pending
+
+    def throughput(self) -> float:
+        """Documents per second once the workers had loaded their models"""
+        first, last = self.stats['first_result_at'], self.stats['finished_at']
+        if not first or not last or last <= first or self.stats['processed'] < 2:
+            return 0.0
+        return (self.stats['processed'] - 1) / (last - first)
+
+
+def measure_scaling(file_paths: List[Path], worker_counts: Iterable[int],
+                    **engine_options) -> List[Dict[str, Any]]:
+    """Docs/sec for the same documents at each worker count, without writing results"""
+    results = []
+    for workers in worker_counts:
+        engine = IngestionEngine(max_workers=workers, **engine_options)
+        engine.run(file_paths, on_result=lambda result: None)
+        docs_per_second = engine.throughput()
+        results.append({
+            'workers': workers,
+            'documents': engine.stats['processed'],
+            'docs_per_second': docs_per_second,
+            'docs_per_second_per_worker': docs_per_second / workers,
+        })
+        logger.info(f"📊 {workers} workers: {docs_per_second:.2f} docs/sec")
+    return results
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Ingestion Manifest for Vanta Ledger
+===================================
+
+SQLite record of every file an ingestion run has seen, so later runs only
+process what is new or changed:
+
+- Change detection from ``os.stat`` alone (size, mtime, inode); unchanged
+  files are skipped without being opened
+- Content hashes computed by streaming the file in chunks, before any text
+  extraction or OCR
+- A skip index of content hashes already ingested, so copies of a document
+  under another name or company folder are not processed twice
+- A file is only marked ingested once its database batch has been written,
+  so an interrupted run resumes from the last written batch
+"""
+
+import os
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Statuses that mean "nothing left to do" for an unchanged file
+DONE_STATUSES = ('ingested', 'duplicate')
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file_path: Path, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """MD5 of a file's content, read in chunks (matches the stored ``file_hash``)"""
+    digest = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class IngestionManifest:
+    """Files seen and content hashes ingested, persisted in SQLite"""
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        # Used from the bulk writer's flush thread as well as the main thread
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    inode INTEGER NOT NULL,
+                    file_hash TEXT,
+                    status TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS hashes (
+                    file_hash TEXT PRIMARY KEY,
+                    path TEXT
+                );
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            """)
+
+    def get(self, path: Path) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, inode, file_hash, status FROM files WHERE path = ?",
+                (str(path),)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('size', 'mtime_ns', 'inode', 'file_hash', 'status'), row))
+
+    @staticmethod
+    def unchanged(entry: Optional[Dict[str, Any]], stat: os.stat_result) -> bool:
+        """True when ``stat`` matches a finished entry"""
+        return (
+            entry is not None
+            and entry['status'] in DONE_STATUSES
+            and entry['size'] == stat.st_size
+            and entry['mtime_ns'] == stat.st_mtime_ns
+            and entry['inode'] == stat.st_ino
+        )
+
+    def is_ingested(self, content_hash: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM hashes WHERE file_hash = ?", (content_hash,)
+            ).fetchone() is not None
+
+    def record(self, path: Path, stat: os.stat_result, content_hash: Optional[str], status: str):
+        """Record one file's state"""
+        self.record_many([(path, stat, content_hash, status)])
+
+    def record_many(self, entries: Iterable[tuple]):
+        """Record ``(path, stat, content_hash, status)`` entries in one transaction"""
+        now = time.time()
+        file_rows, hash_rows = [], []
+        for path, stat, content_hash, status in entries:
+            file_rows.append((str(path), stat.st_size, stat.st_mtime_ns, stat.st_ino,
+                              content_hash, status, now))
+            if status == 'ingested' and content_hash:
+                hash_rows.append((content_hash, str(path)))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?)", file_rows
+            )
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO hashes VALUES (?, ?)", hash_rows
+            )
+
+    def is_seeded(self, source: str) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM meta WHERE key = ?", (f'seeded:{source}',)
+            ).fetchone() is not None
+
+    def seed_hashes(self, hashes: Iterable[str], source: str):
+        """Add hashes ingested before the manifest existed; done once per source"""
+        if self.is_seeded(source):
+            return 0
+        rows = [(content_hash, None) for content_hash in hashes if content_hash]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR IGNORE INTO hashes VALUES (?, ?)", rows)
+            self._conn.execute("INSERT INTO meta VALUES (?, ?)", (f'seeded:{source}', str(time.time())))
+        logger.info(f"📒 Seeded manifest with {len(rows)} hashes from {source}")
+        return len(rows)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            statuses = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM files GROUP BY status"
+            ).fetchall())
+            hashes = self._conn.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+        return {'files': statuses, 'hashes': hashes, 'path': str(self.path)}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Analytics Backfill Script
+Normalizes extracted amounts on documents processed before ingest-time
+normalization and rebuilds the per-company, per-day dashboard rollups
+"""
+
+import sys
+import argparse
+import logging
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from vanta_ledger.config import settings
+from vanta_ledger.database import get_mongo_client
+from vanta_ledger.services.analytics_pipelines import backfill_amount_values
+from vanta_ledger.services.analytics_rollups import rebuild_rollups
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """Backfill ``entities.amount_values`` and rebuild the analytics rollups"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--company", help="Only rebuild rollups for this company")
+    parser.add_argument(
+        "--skip-rollups", action="store_true", help="Only normalize amounts"
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    try:
+        db = get_mongo_client()[settings.DATABASE_NAME]
+        company_filter = {"company": args.company} if args.company else None
+
+        updated = backfill_amount_values(db.processed_documents, company_filter)
+        logger.info(f"✅ Normalized amounts on {updated} processed documents")
+
+        db.processed_documents.create_index([("company", 1), ("processing_date", -1)])
+        logger.info("✅ Dashboard aggregation index ensured")
+
+        if not args.skip_rollups:
+            folded = rebuild_rollups(db, args.company, args.batch_size)
+            logger.info(f"✅ Rollups rebuilt from {folded} processed documents")
+            if not settings.ANALYTICS_ROLLUPS_ENABLED:
+                logger.info(
+                    "Set ANALYTICS_ROLLUPS_ENABLED=true to serve dashboards from them"
+                )
+
+    except Exception as e:
+        logger.error(f"❌ Analytics backfill failed: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
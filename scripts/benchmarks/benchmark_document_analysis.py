@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Document Analysis Benchmark
+Documents per second through ``DocumentProcessor`` analysis when every
+spaCy extractor parses the text itself (the previous behaviour), when one
+parse is shared, and in batch mode through ``nlp.pipe``
+
+    python scripts/benchmarks/benchmark_document_analysis.py \\
+        --documents 200 --processes 2
+"""
+
+import sys
+import argparse
+import logging
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from vanta_ledger.services import document_processor as module
+from vanta_ledger.services.document_processor import DocumentProcessor
+
+SAMPLE_DOCUMENT = """
+SERVICE AGREEMENT AND INVOICE {n:04d}
+
+This agreement is made between Vanta Construction Ltd of Nairobi, Kenya and
+Acme Fuel Supplies Ltd for the supply of diesel to Project Thika Road. The
+effective date is 12/03/2024 and the agreement terminates on March 31, 2025
+unless renewed by both parties.
+
+Acme Fuel Supplies Ltd will deliver 1,200 litres per week to the site office.
+The total amount due for the first month is $21,600.00, with a discount of
+5% applied to payments made within 14 days. Late payments attract interest of
+1.5 percent per month. Queries go to accounts@acmefuel.co.ke or +1 (555)
+010-4477, and the full terms are published at https://acmefuel.co.ke/terms.
+
+Signed for Vanta Construction Ltd by Jane Wanjiru, Finance Manager, and for
+Acme Fuel Supplies Ltd by Peter Otieno, Director, on 1 March 2024.
+"""
+
+
+def analyze_separately(processor: DocumentProcessor, text: str, doc_id: str):
+    """The analysis as it ran before: each spaCy extractor parses the text"""
+    return {
+        "doc_id": doc_id,
+        "type": processor._classify_document(text),
+        "keywords": processor._extract_keywords(text),
+        "dates": processor._extract_dates(text),
+        "companies": processor._extract_companies(text),
+        "financial_data": processor._extract_financial_data(text),
+        "projects": processor._extract_projects(text),
+        "entities": processor._extract_entities(text),
+        "summary": processor._generate_summary(text),
+        "metadata": processor._extract_metadata(text),
+        "processed_at": datetime.now().isoformat(),
+    }
+
+
+def run(mode: str, processor: DocumentProcessor, texts, args) -> float:
+    start = time.perf_counter()
+    if mode == "separate":
+        for n, text in enumerate(texts):
+            analyze_separately(processor, text, f"doc-{n}")
+    elif mode == "single":
+        for n, text in enumerate(texts):
+            processor._analyze_document(text, f"doc-{n}")
+    else:
+        items = [(text, f"doc-{n}") for n, text in enumerate(texts)]
+        for _ in processor.analyze_texts(
+            items, n_process=args.processes, batch_size=args.batch_size
+        ):
+            pass
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    if not module.NLP_AVAILABLE:
+        sys.exit("spaCy and en_core_web_sm are required for this benchmark")
+
+    texts = [SAMPLE_DOCUMENT.format(n=n) for n in range(args.documents)]
+    with tempfile.TemporaryDirectory() as workdir:
+        processor = DocumentProcessor(
+            upload_dir=f"{workdir}/uploads", processed_dir=f"{workdir}/processed"
+        )
+        # Warm up the pipeline before timing
+        processor._analyze_document(texts[0], "warmup")
+
+        results = {}
+        for mode in ("separate", "single", "pipe"):
+            results[mode] = run(mode, processor, texts, args)
+            print(f"{mode:>10}: {results[mode]:,.1f} docs/sec")
+
+    print(
+        f"{'single':>10}: {results['single'] / results['separate']:.2f}x, "
+        f"pipe: {results['pipe'] / results['separate']:.2f}x the previous rate"
+    )
+
+
+if __name__ == "__main__":
+    main()
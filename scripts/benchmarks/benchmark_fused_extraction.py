@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Fused Extraction Benchmark
+Prompt tokens evaluated, tokens generated and wall time per document for
+the four-call extraction path and the single-prompt fused path, run through
+``LocalLLMService`` on a real GGUF model
+
+    python scripts/benchmarks/benchmark_fused_extraction.py \\
+        --model models/phi3/phi-3-mini-4k-instruct.Q4_K_M.gguf --documents 5
+"""
+
+import sys
+import argparse
+import asyncio
+import logging
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+from llama_cpp import Llama
+
+from vanta_ledger.services.local_llm_service import local_llm_service
+
+SAMPLE_DOCUMENT = """
+TAX INVOICE                                   Invoice No: INV-2024-{n:04d}
+Acme Fuel Supplies Ltd, P.O. Box 4411, Nairobi    Date: 12/03/2024
+Bill to: Vanta Construction Ltd                   Due date: 11/04/2024
+Email: accounts@acmefuel.co.ke  Phone: +254722000111
+
+Description                         Qty     Unit price      Amount
+Diesel (litres)                     1200    KSh 180.00      KSh 216,000.00
+Delivery to site, Thika road           1    KSh 4,500.00    KSh 4,500.00
+
+Subtotal                                                    KSh 220,500.00
+VAT 16%                                                     KSh 35,280.00
+Total due                                                   KSh 255,780.00
+Account code: 5100 (Fuel and lubricants)
+"""
+
+
+class CountingModel:
+    """Wraps ``Llama`` and totals the token usage it reports"""
+
+    def __init__(self, llama: Llama):
+        self.llama = llama
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.calls = 0
+
+    def __call__(self, prompt, **kwargs):
+        response = self.llama(prompt, **kwargs)
+        self.prompt_tokens += response["usage"]["prompt_tokens"]
+        self.completion_tokens += response["usage"]["completion_tokens"]
+        self.calls += 1
+        return response
+
+
+async def run(model: CountingModel, mode: str, documents: int) -> dict:
+    context = local_llm_service.company_context_manager._get_default_context()
+    context.update(
+        extraction_mode=mode,
+        customers=[{"code": "C001", "name": "Vanta Construction Ltd"}],
+        vendors=[{"code": "V001", "name": "Acme Fuel Supplies Ltd"}],
+        financial_accounts=[{"code": "5100", "name": "Fuel and lubricants"}],
+    )
+    model.prompt_tokens = model.completion_tokens = model.calls = 0
+
+    start = time.perf_counter()
+    for n in range(documents):
+        document = SimpleNamespace(extracted_text=SAMPLE_DOCUMENT.format(n=n))
+        await local_llm_service._process_with_company_context(document, context)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "generations": model.calls / documents,
+        "prompt_tokens": model.prompt_tokens / documents,
+        "completion_tokens": model.completion_tokens / documents,
+        "seconds": elapsed / documents,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", required=True, help="Path to a GGUF model")
+    parser.add_argument("--documents", type=int, default=5)
+    parser.add_argument("--n-ctx", type=int, default=4096)
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    model = CountingModel(
+        Llama(
+            model_path=args.model,
+            n_ctx=args.n_ctx,
+            n_threads=args.threads,
+            verbose=False,
+        )
+    )
+    # Serve both the primary and secondary roles from the one model
+    recommended = local_llm_service.hardware_config["recommended_models"]
+    for role in ("primary", "secondary"):
+        recommended[role]["name"] = "benchmark"
+    local_llm_service.models["benchmark"] = model
+    local_llm_service.executor.register("benchmark", model)
+
+    results = {}
+    for mode in ("separate", "fused"):
+        results[mode] = asyncio.run(run(model, mode, args.documents))
+        r = results[mode]
+        print(
+            f"{mode:>10}: {r['generations']:.0f} generations, "
+            f"{r['prompt_tokens']:,.0f} prompt tokens, "
+            f"{r['completion_tokens']:,.0f} generated tokens, "
+            f"{r['seconds']:.2f}s per document"
+        )
+
+    local_llm_service.executor.shutdown()
+    separate, fused = results["separate"], results["fused"]
+    print(
+        f"{'fused':>10}: {fused['prompt_tokens'] / separate['prompt_tokens']:.0%} of "
+        f"the prompt tokens, {separate['seconds'] / fused['seconds']:.2f}x faster"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Middleware Benchmark
+Requests/sec through the previous ``BaseHTTPMiddleware`` stack and the
+pure ASGI stack, measured in-process with httpx's ASGI transport so no
+network or server overhead is included
+
+    python scripts/benchmarks/benchmark_middleware.py --requests 5000
+"""
+
+import sys
+import argparse
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+
+# Add the src directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+
+# Benchmark the in-process limiter with limits that never trigger
+os.environ.setdefault("RATE_LIMIT_REDIS_ENABLED", "False")
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "100000000")
+os.environ.setdefault("RATE_LIMIT_PER_HOUR", "100000000")
+
+import httpx
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from vanta_ledger.middleware import (
+    LoggingMiddleware,
+    RateLimitMiddleware,
+    SecurityHeadersMiddleware,
+)
+from vanta_ledger.utils.rate_limiter import RateLimiter
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    """Same limiter behind ``BaseHTTPMiddleware``"""
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.limiter = RateLimiter()
+
+    async def dispatch(self, request: Request, call_next):
+        result = await self.limiter.hit(request.client.host)
+        response = await call_next(request)
+        response.headers["X-RateLimit-Remaining-Minute"] = str(result.remaining[0])
+        response.headers["X-RateLimit-Remaining-Hour"] = str(result.remaining[1])
+        return response
+
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        for key, value in SecurityHeadersMiddleware.DEFAULT_HEADERS:
+            response.headers[key.decode()] = value.decode()
+        return response
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        logging.getLogger(__name__).info(f"Request: {request.method} {request.url}")
+        response = await call_next(request)
+        logging.getLogger(__name__).info(
+            f"Response: {response.status_code} in {time.time() - start_time:.3f}s"
+        )
+        return response
+
+
+def build_app(middleware) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"item_id": item_id}
+
+    for cls in middleware:
+        app.add_middleware(cls)
+    return app
+
+
+async def run(app: FastAPI, requests: int, concurrency: int) -> float:
+    """Return requests/sec for ``requests`` GETs at ``concurrency``"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        # Warm up route matching and the middleware stack
+        await client.get("/items/0")
+
+        async def worker(count):
+            for i in range(count):
+                await client.get(f"/items/{i}")
+
+        start = time.perf_counter()
+        per_worker = requests // concurrency
+        await asyncio.gather(*[worker(per_worker) for _ in range(concurrency)])
+        return per_worker * concurrency / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    # Measure middleware cost, not log handler I/O
+    logging.disable(logging.INFO)
+
+    stacks = {
+        "BaseHTTPMiddleware": [
+            LegacySecurityHeadersMiddleware,
+            LegacyRateLimitMiddleware,
+            LegacyLoggingMiddleware,
+        ],
+        "pure ASGI": [
+            SecurityHeadersMiddleware,
+            RateLimitMiddleware,
+            LoggingMiddleware,
+        ],
+    }
+    results = {}
+    for name, middleware in stacks.items():
+        results[name] = asyncio.run(
+            run(build_app(middleware), args.requests, args.concurrency)
+        )
+        print(f"{name:>20}: {results[name]:,.0f} req/s")
+
+    speedup = results["pure ASGI"] / results["BaseHTTPMiddleware"]
+    print(f"{'speedup':>20}: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
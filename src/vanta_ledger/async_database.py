@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Async Database Access Layer
+Non-blocking repositories for MongoDB (Motor), PostgreSQL (asyncpg) and Redis
+(redis.asyncio) used by the FastAPI routes.
+
+The synchronous helpers in ``database.py`` remain the entry point for scripts,
+background workers and services that run outside of the event loop.
+"""
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import asyncpg
+import redis.asyncio as aioredis
+from motor.motor_asyncio import (
+    AsyncIOMotorClient,
+    AsyncIOMotorCollection,
+    AsyncIOMotorDatabase,
+)
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncConnectionPools:
+    """Event-loop-bound registry for the async MongoDB, PostgreSQL and Redis pools"""
+
+    def __init__(self):
+        self._mongo_client: Optional[AsyncIOMotorClient] = None
+        self._postgres_pool: Optional[asyncpg.Pool] = None
+        self._redis: Optional[aioredis.Redis] = None
+        self._postgres_lock = asyncio.Lock()
+
+    async def open(self):
+        """
+        Create every pool (called from the application lifespan)
+
+        Like ``ConnectionPools.open``, a pool that cannot be opened is logged
+        and created again on first use instead of failing startup.
+        """
+        for name, opener in (
+            ("MongoDB", lambda: self.mongo_client),
+            ("Redis", lambda: self.redis),
+        ):
+            try:
+                opener()
+            except Exception as e:
+                logger.error(f"Could not open the async {name} pool: {e}")
+        if settings.POSTGRES_URI:
+            try:
+                await self.get_postgres_pool()
+            except Exception as e:
+                logger.error(f"Could not open the async PostgreSQL pool: {e}")
+        logger.info("Async connection pools opened")
+
+    async def close(self):
+        """Close every pool"""
+        if self._postgres_pool is not None:
+            await self._postgres_pool.close()
+            self._postgres_pool = None
+        if self._mongo_client is not None:
+            self._mongo_client.close()
+            self._mongo_client = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+        logger.info("Async connection pools closed")
+
+    @property
+    def mongo_client(self) -> AsyncIOMotorClient:
+        """Shared Motor client"""
+        if self._mongo_client is None:
+            self._mongo_client = AsyncIOMotorClient(
+                settings.MONGO_URI,
+                maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+                minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+                serverSelectionTimeoutMS=5000,
+                connectTimeoutMS=5000,
+            )
+        return self._mongo_client
+
+    @property
+    def mongo_db(self) -> AsyncIOMotorDatabase:
+        """Application MongoDB database"""
+        return self.mongo_client[settings.DATABASE_NAME]
+
+    @property
+    def redis(self) -> aioredis.Redis:
+        """Shared asyncio Redis client backed by its own connection pool"""
+        if self._redis is None:
+            self._redis = aioredis.Redis.from_url(
+                settings.REDIS_URI,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                decode_responses=True,
+            )
+        return self._redis
+
+    async def get_postgres_pool(self) -> asyncpg.Pool:
+        """Shared asyncpg pool, created on first use"""
+        if self._postgres_pool is None:
+            async with self._postgres_lock:
+                if self._postgres_pool is None:
+                    self._postgres_pool = await asyncpg.create_pool(
+                        settings.POSTGRES_URI,
+                        min_size=settings.POSTGRES_POOL_MIN_SIZE,
+                        max_size=settings.POSTGRES_POOL_MAX_SIZE,
+                        timeout=settings.POSTGRES_POOL_TIMEOUT,
+                    )
+        return self._postgres_pool
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Return async pool utilisation figures for monitoring"""
+        postgres = {"max_connections": settings.POSTGRES_POOL_MAX_SIZE}
+        if self._postgres_pool is not None:
+            postgres["size"] = self._postgres_pool.get_size()
+            postgres["idle"] = self._postgres_pool.get_idle_size()
+        return {
+            "postgres": postgres,
+            "mongodb": {"open": self._mongo_client is not None},
+        }
+
+
+# Global registry
+async_pools = AsyncConnectionPools()
+
+
+class MongoRepository:
+    """Async access to a single MongoDB collection"""
+
+    def __init__(self, collection_name: str):
+        self.collection_name = collection_name
+
+    @property
+    def collection(self) -> AsyncIOMotorCollection:
+        return async_pools.mongo_db[self.collection_name]
+
+    async def find(
+        self,
+        query: Optional[Dict[str, Any]] = None,
+        projection: Optional[Dict[str, Any]] = None,
+        sort: Optional[List[tuple]] = None,
+        skip: int = 0,
+        limit: int = 0,
+    ) -> List[Dict[str, Any]]:
+        """Return matching documents as a list (``limit=0`` means no limit)"""
+        cursor = self.collection.find(query or {}, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        if skip:
+            cursor = cursor.skip(skip)
+        if limit:
+            cursor = cursor.limit(limit)
+        return await cursor.to_list(length=limit or None)
+
+    def iterate(
+        self,
+        query: Optional[Dict[str, Any]] = None,
+        projection: Optional[Dict[str, Any]] = None,
+        sort: Optional[List[tuple]] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Return an async cursor that fetches documents in batches"""
+        cursor = self.collection.find(query or {}, projection, batch_size=batch_size)
+        if sort:
+            cursor = cursor.sort(sort)
+        return cursor
+
+    async def find_one(
+        self,
+        query: Dict[str, Any],
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one(query, projection)
+
+    async def count(self, query: Optional[Dict[str, Any]] = None) -> int:
+        return await self.collection.count_documents(query or {})
+
+    async def aggregate(
+        self, pipeline: List[Dict[str, Any]], **kwargs
+    ) -> List[Dict[str, Any]]:
+        return await self.collection.aggregate(pipeline, **kwargs).to_list(length=None)
+
+    async def insert_one(self, document: Dict[str, Any]) -> Any:
+        result = await self.collection.insert_one(document)
+        return result.inserted_id
+
+    async def update_one(
+        self, query: Dict[str, Any], update: Dict[str, Any], upsert: bool = False
+    ) -> int:
+        result = await self.collection.update_one(query, update, upsert=upsert)
+        return result.modified_count
+
+
+class PostgresRepository:
+    """Async access to the PostgreSQL tables shared with ``HybridDatabaseManager``"""
+
+    async def fetch(self, query: str, *args) -> List[Dict[str, Any]]:
+        pool = await async_pools.get_postgres_pool()
+        rows = await pool.fetch(query, *args)
+        return [dict(row) for row in rows]
+
+    async def fetchrow(self, query: str, *args) -> Optional[Dict[str, Any]]:
+        pool = await async_pools.get_postgres_pool()
+        row = await pool.fetchrow(query, *args)
+        return dict(row) if row is not None else None
+
+    async def fetchval(self, query: str, *args) -> Any:
+        pool = await async_pools.get_postgres_pool()
+        return await pool.fetchval(query, *args)
+
+    async def execute(self, query: str, *args) -> str:
+        pool = await async_pools.get_postgres_pool()
+        return await pool.execute(query, *args)
+
+    async def ping(self) -> bool:
+        return await self.fetchval("SELECT 1") == 1
+
+    # Companies
+
+    async def count_companies(self) -> int:
+        return await self.fetchval("SELECT COUNT(*) FROM companies")
+
+    async def get_companies_page(self, limit: int, offset: int) -> List[Dict[str, Any]]:
+        return await self.fetch(
+            "SELECT postgres_id AS id, name, industry, revenue FROM companies "
+            "ORDER BY name LIMIT $1 OFFSET $2",
+            limit,
+            offset,
+        )
+
+    async def get_company(self, company_id: int) -> Optional[Dict[str, Any]]:
+        return await self.fetchrow(
+            "SELECT postgres_id AS id, name, industry, revenue FROM companies "
+            "WHERE postgres_id = $1",
+            company_id,
+        )
+
+    # Projects
+
+    async def get_projects(self, limit: int = 50) -> List[Dict[str, Any]]:
+        return await self.fetch(
+            "SELECT postgres_id AS id, name, status, budget FROM projects LIMIT $1",
+            limit,
+        )
+
+    async def get_project(self, project_id: int) -> Optional[Dict[str, Any]]:
+        return await self.fetchrow(
+            "SELECT postgres_id AS id, name, status, budget FROM projects "
+            "WHERE postgres_id = $1",
+            project_id,
+        )
+
+    # Documents and financial transactions
+
+    async def count_documents(self) -> int:
+        return await self.fetchval("SELECT COUNT(*) FROM documents")
+
+    async def get_transaction_stats(self) -> Optional[Dict[str, Any]]:
+        return await self.fetchrow("""
+            SELECT
+                COUNT(*) as total_transactions,
+                SUM(amount) as total_amount,
+                AVG(amount) as avg_amount,
+                MIN(amount) as min_amount,
+                MAX(amount) as max_amount
+            FROM financial_transactions
+            """)
+
+    # Ledger entries
+
+    async def get_ledger_entries(
+        self,
+        company_id: Optional[int] = None,
+        project_id: Optional[int] = None,
+        entry_type: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        query = """
+            SELECT le.id, le.company_id, le.project_id, le.entry_type, le.category,
+                   le.description, le.amount, le.currency, le.reference_number,
+                   le.transaction_date, le.approval_status, le.created_at,
+                   c.name as company_name, p.name as project_name
+            FROM ledger_entries le
+            JOIN companies c ON le.company_id = c.id
+            LEFT JOIN projects p ON le.project_id = p.id
+            WHERE 1=1
+        """
+        args: List[Any] = []
+        for column, value in (
+            ("le.company_id", company_id),
+            ("le.project_id", project_id),
+            ("le.entry_type", entry_type),
+        ):
+            if value:
+                args.append(value)
+                query += f" AND {column} = ${len(args)}"
+        args.append(limit)
+        query += f" ORDER BY le.transaction_date DESC LIMIT ${len(args)}"
+        return await self.fetch(query, *args)
+
+
+# Repositories
+processed_documents_repo = MongoRepository("processed_documents")
+documents_repo = MongoRepository("documents")
+invoices_repo = MongoRepository("invoices")
+journal_entries_repo = MongoRepository("journal_entries")
+ledger_entries_repo = MongoRepository("ledger_entries")
+extracted_data_repo = MongoRepository("extracted_data")
+ai_reports_repo = MongoRepository("ai_reports")
+system_analytics_repo = MongoRepository("system_analytics")
+postgres_repo = PostgresRepository()
+
+
+# FastAPI dependencies
+
+
+def get_async_mongo_db() -> AsyncIOMotorDatabase:
+    """FastAPI dependency returning the Motor database"""
+    return async_pools.mongo_db
+
+
+async def get_async_postgres_pool() -> asyncpg.Pool:
+    """FastAPI dependency returning the asyncpg pool"""
+    return await async_pools.get_postgres_pool()
+
+
+def get_async_redis() -> aioredis.Redis:
+    """FastAPI dependency returning the asyncio Redis client"""
+    return async_pools.redis
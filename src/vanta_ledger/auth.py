@@ -10,13 +10,15 @@ import uuid
 from datetime import datetime, timedelta
 from typing import Any, Dict, Optional
 
-import redis
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from .config import settings
+from .database import get_redis_client
+from .utils.token_cache import token_cache
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -27,8 +29,8 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # JWT token security
 security = HTTPBearer()
 
-# Redis client for token blacklisting
-redis_client = redis.Redis.from_url(settings.REDIS_URI, decode_responses=True)
+# Redis client for token blacklisting (shares the process-wide pool)
+redis_client = get_redis_client()
 
 
 # Convenience functions for backward compatibility
@@ -169,6 +171,11 @@ class AuthService:
                 token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
             )
 
+            # Recently verified tokens skip the blacklist round-trip
+            if token_cache.get(payload.get("jti")) is not None:
+                return payload
+            generation = token_cache.generation
+
             # Check if token is blacklisted
             if AuthService.is_token_blacklisted(payload.get("jti")):
                 raise HTTPException(
@@ -176,6 +183,7 @@ class AuthService:
                     detail="Token has been revoked",
                 )
 
+            token_cache.put(payload, generation)
             return payload
         except JWTError:
             raise HTTPException(
@@ -192,6 +200,7 @@ class AuthService:
                 expires_in = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
 
             redis_client.setex(f"blacklist:{jti}", expires_in, "1")
+            token_cache.invalidate_token(jti)
             return True
         except Exception as e:
             logger.error("Error blacklisting token: Internal error")
@@ -395,7 +404,12 @@ async def get_current_user(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
             )
 
-        user = await get_user_by_id(user_id)
+        principal = token_cache.get(payload.get("jti"))
+        user = principal.user if principal is not None else None
+        if user is None:
+            user = await run_in_threadpool(get_user_by_id, user_id)
+            if user is not None and user.is_active:
+                token_cache.set_user(payload.get("jti"), user)
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found"
@@ -19,6 +19,14 @@ class Settings:
     REDIS_URI: str = os.getenv("REDIS_URI", "redis://localhost:6379/0")
     DATABASE_NAME: str = os.getenv("DATABASE_NAME", "vanta_ledger")
 
+    # Connection Pools
+    POSTGRES_POOL_MIN_SIZE: int = int(os.getenv("POSTGRES_POOL_MIN_SIZE", "1"))
+    POSTGRES_POOL_MAX_SIZE: int = int(os.getenv("POSTGRES_POOL_MAX_SIZE", "20"))
+    POSTGRES_POOL_TIMEOUT: float = float(os.getenv("POSTGRES_POOL_TIMEOUT", "10"))
+    MONGO_MIN_POOL_SIZE: int = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+    MONGO_MAX_POOL_SIZE: int = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+
     # Security - Generate secure defaults if not provided (dev only)
     SECRET_KEY: str = os.getenv(
         "SECRET_KEY",
@@ -33,6 +41,9 @@ class Settings:
         os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
     )
     REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
+    # Verified-token cache (revocations are pushed over Redis pub/sub)
+    AUTH_CACHE_TTL: int = int(os.getenv("AUTH_CACHE_TTL", "30"))
+    AUTH_CACHE_SIZE: int = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
 
     # Password Security
     MIN_PASSWORD_LENGTH: int = int(os.getenv("MIN_PASSWORD_LENGTH", "8"))
@@ -49,6 +60,13 @@ class Settings:
     LOGIN_RATE_LIMIT_PER_MINUTE: int = int(
         os.getenv("LOGIN_RATE_LIMIT_PER_MINUTE", "5")
     )
+    RATE_LIMIT_REDIS_ENABLED: bool = (
+        os.getenv("RATE_LIMIT_REDIS_ENABLED", "True").lower() == "true"
+    )
+    # Clients tracked by the in-process fallback limiter
+    RATE_LIMIT_MAX_CLIENTS: int = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "10000"))
+    # Seconds to stay on the in-process limiter after a Redis failure
+    RATE_LIMIT_REDIS_RETRY: int = int(os.getenv("RATE_LIMIT_REDIS_RETRY", "30"))
 
     # File Storage
     UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "data/uploads")
@@ -56,15 +74,46 @@ class Settings:
         "PROCESSED_DOCUMENTS_DIR", "data/processed_documents"
     )
     MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", "10485760"))  # 10MB
+    # Bytes read, hashed and written at a time when storing an upload
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", "1048576"))
     ALLOWED_FILE_EXTENSIONS: list = os.getenv(
         "ALLOWED_FILE_EXTENSIONS", ".pdf,.docx,.doc,.txt,.png,.jpg,.jpeg,.tiff,.bmp"
     ).split(",")
 
+    # Document analysis: texts per spaCy batch and worker processes used by
+    # batch analysis (each loads its own copy of the model)
+    NLP_BATCH_SIZE: int = int(os.getenv("NLP_BATCH_SIZE", "32"))
+    NLP_PROCESSES: int = int(os.getenv("NLP_PROCESSES", "1"))
+
+    # PDF OCR: rasterization DPI and colour, worker processes for page OCR,
+    # and the text-layer length below which a page is treated as a scan
+    OCR_DPI: int = int(os.getenv("OCR_DPI", "300"))
+    OCR_GRAYSCALE: bool = os.getenv("OCR_GRAYSCALE", "True").lower() == "true"
+    OCR_PROCESSES: int = int(os.getenv("OCR_PROCESSES", "2"))
+    OCR_MIN_TEXT_CHARS: int = int(os.getenv("OCR_MIN_TEXT_CHARS", "16"))
+
     # Cache
     CACHE_DURATION: int = int(os.getenv("CACHE_DURATION", "300"))  # 5 minutes
+    DASHBOARD_CACHE_TTL: int = int(
+        os.getenv("DASHBOARD_CACHE_TTL", str(CACHE_DURATION))
+    )
+    # Window after the TTL in which stale payloads are served while refreshing
+    DASHBOARD_CACHE_STALE_TTL: int = int(os.getenv("DASHBOARD_CACHE_STALE_TTL", "60"))
+    DASHBOARD_CACHE_L1_SIZE: int = int(os.getenv("DASHBOARD_CACHE_L1_SIZE", "512"))
+
+    # Analytics; enable rollups once scripts/backfill_analytics.py has built
+    # them from the existing processed documents. The rollups only count
+    # processed_documents, which only the production ingestion pipeline
+    # (database/production_ai_system.py) writes; documents uploaded through the
+    # API (DocumentProcessor, HybridDatabaseManager) are never counted
+    ANALYTICS_ROLLUPS_ENABLED: bool = (
+        os.getenv("ANALYTICS_ROLLUPS_ENABLED", "False").lower() == "true"
+    )
 
     # Pagination
     DEFAULT_PAGE_SIZE: int = int(os.getenv("DEFAULT_PAGE_SIZE", "100"))
+    # Cursor batch size for streamed exports
+    EXPORT_BATCH_SIZE: int = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
     MAX_PAGE_SIZE: int = int(os.getenv("MAX_PAGE_SIZE", "1000"))
 
     # CORS
@@ -92,10 +141,63 @@ class Settings:
     # Local LLM Configuration
     ENABLE_LOCAL_LLM: bool = os.getenv("ENABLE_LOCAL_LLM", "True").lower() == "true"
     LLM_MODELS_DIR: str = os.getenv("LLM_MODELS_DIR", "models")
-    LLM_CACHE_TTL: int = int(os.getenv("LLM_CACHE_TTL", "3600"))  # 1 hour
+    # Seconds a cached LLM result lives in Redis (0 keeps it until evicted)
+    LLM_CACHE_TTL: int = int(os.getenv("LLM_CACHE_TTL", "2592000"))  # 30 days
     LLM_MAX_CONTEXT_LENGTH: int = int(os.getenv("LLM_MAX_CONTEXT_LENGTH", "4096"))
     LLM_DEFAULT_TEMPERATURE: float = float(os.getenv("LLM_DEFAULT_TEMPERATURE", "0.7"))
     LLM_USE_GPU: bool = os.getenv("LLM_USE_GPU", "True").lower() == "true"
+    # Models (names or roles such as "primary") loaded in the background at
+    # startup; everything else loads on first use
+    LLM_PRELOAD_MODELS: str = os.getenv("LLM_PRELOAD_MODELS", "primary")
+    # RAM kept free when deciding whether to evict idle models before a load
+    LLM_MEMORY_RESERVE_MB: int = int(os.getenv("LLM_MEMORY_RESERVE_MB", "1024"))
+    LLM_MAX_LOADED_MODELS: int = int(os.getenv("LLM_MAX_LOADED_MODELS", "0"))  # 0 = no cap
+    # Jobs allowed to wait per loaded model before new work is rejected
+    LLM_EXECUTOR_QUEUE_SIZE: int = int(os.getenv("LLM_EXECUTOR_QUEUE_SIZE", "16"))
+    # Seconds a job may wait and run before it is dropped, per priority class
+    LLM_INTERACTIVE_TIMEOUT: float = float(os.getenv("LLM_INTERACTIVE_TIMEOUT", "120"))
+    LLM_BACKGROUND_TIMEOUT: float = float(os.getenv("LLM_BACKGROUND_TIMEOUT", "1800"))
+    # Jobs sharing a prompt prefix run back to back, up to this many at a time
+    LLM_SCHEDULER_MAX_GROUP: int = int(os.getenv("LLM_SCHEDULER_MAX_GROUP", "8"))
+    # Prompt tokens evaluated per llama.cpp decode call
+    LLM_N_BATCH: int = int(os.getenv("LLM_N_BATCH", "512"))
+    # "separate" (four generations) or "fused" (one schema-constrained
+    # generation); companies override it with their llm_extraction_mode field
+    LLM_EXTRACTION_MODE: str = os.getenv("LLM_EXTRACTION_MODE", "separate")
+    LLM_FUSED_MAX_TOKENS: int = int(os.getenv("LLM_FUSED_MAX_TOKENS", "768"))
+    # Memory for saved llama.cpp states of company prompt prefixes (0 disables)
+    LLM_PREFIX_CACHE_MB: int = int(os.getenv("LLM_PREFIX_CACHE_MB", "512"))
+    # Document results kept in process, and Redis memory before LRU eviction
+    LLM_RESULT_CACHE_L1_SIZE: int = int(os.getenv("LLM_RESULT_CACHE_L1_SIZE", "256"))
+    LLM_RESULT_CACHE_MB: int = int(os.getenv("LLM_RESULT_CACHE_MB", "256"))
+    # Company context snapshots: in-process entries, seconds between version
+    # checks, Redis lifetime, prompt projection length, and whether to follow
+    # a Mongo change stream (replica sets only) besides the write hooks
+    LLM_CONTEXT_CACHE_SIZE: int = int(os.getenv("LLM_CONTEXT_CACHE_SIZE", "256"))
+    LLM_CONTEXT_RECHECK_SECONDS: float = float(
+        os.getenv("LLM_CONTEXT_RECHECK_SECONDS", "5")
+    )
+    LLM_CONTEXT_SNAPSHOT_TTL: int = int(os.getenv("LLM_CONTEXT_SNAPSHOT_TTL", "86400"))
+    LLM_CONTEXT_PROMPT_CHARS: int = int(os.getenv("LLM_CONTEXT_PROMPT_CHARS", "1500"))
+    LLM_CONTEXT_CHANGE_STREAM: bool = (
+        os.getenv("LLM_CONTEXT_CHANGE_STREAM", "False").lower() == "true"
+    )
+    # Lowest fuzzy score (0-1) at which an extracted name is linked to a
+    # customer or vendor
+    LLM_ENTITY_MATCH_THRESHOLD: float = float(
+        os.getenv("LLM_ENTITY_MATCH_THRESHOLD", "0.6")
+    )
+    # LayoutLMv3: pages per forward pass, rasterization DPI, pages analysed
+    # per document, cached page results, and int8 dynamic quantization on CPU
+    LLM_LAYOUT_BATCH_SIZE: int = int(os.getenv("LLM_LAYOUT_BATCH_SIZE", "4"))
+    LLM_LAYOUT_DPI: int = int(os.getenv("LLM_LAYOUT_DPI", "144"))
+    LLM_LAYOUT_MAX_PAGES: int = int(os.getenv("LLM_LAYOUT_MAX_PAGES", "200"))
+    LLM_LAYOUT_PAGE_CACHE_SIZE: int = int(
+        os.getenv("LLM_LAYOUT_PAGE_CACHE_SIZE", "4096")
+    )
+    LLM_LAYOUT_QUANTIZE: bool = (
+        os.getenv("LLM_LAYOUT_QUANTIZE", "True").lower() == "true"
+    )
 
     def validate_required_config(self):
         """
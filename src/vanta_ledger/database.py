@@ -2,41 +2,292 @@
 """
 Database connection utilities
 Handles connections to PostgreSQL, MongoDB, and Redis
+
+All connections are served from a single process-wide pool registry. The
+registry is opened and closed by the FastAPI lifespan in ``main.py``; the
+accessors below lazily open it so scripts and background services keep working
+outside of the web application.
 """
 
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Generator, Optional
+
 import psycopg2
 import pymongo
 import redis
+from psycopg2 import pool as pg_pool
 
 from .config import settings
 
+logger = logging.getLogger(__name__)
+
+
+class PoolExhaustedError(RuntimeError):
+    """Raised when no PostgreSQL connection becomes available in time"""
+
+
+class ConnectionPools:
+    """Process-wide registry owning the PostgreSQL, MongoDB and Redis pools"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postgres_pool: Optional[pg_pool.ThreadedConnectionPool] = None
+        self._postgres_slots: Optional[threading.BoundedSemaphore] = None
+        self._mongo_client: Optional[pymongo.MongoClient] = None
+        self._redis_pool: Optional[redis.ConnectionPool] = None
+
+        # Utilisation counters (read by the /metrics collectors)
+        self.postgres_in_use = 0
+        self.postgres_checkouts = 0
+        self.postgres_timeouts = 0
+        self.postgres_wait_seconds = 0.0
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def open(self):
+        """
+        Eagerly create every pool (called from the application lifespan)
+
+        A pool whose server is unreachable is logged and left unopened, so the
+        application still starts degraded; its accessor retries on first use.
+        """
+        openers = {
+            "MongoDB": lambda: self.mongo_client,
+            "Redis": lambda: self.redis_pool,
+        }
+        if settings.POSTGRES_URI:
+            openers["PostgreSQL"] = lambda: self.postgres_pool
+        for name, opener in openers.items():
+            try:
+                opener()
+            except Exception as e:
+                logger.error(f"Could not open the {name} pool: {e}")
+        logger.info("Connection pools opened")
+
+    def close(self):
+        """Close every pool; subsequent accessors will lazily reopen them"""
+        with self._lock:
+            if self._postgres_pool is not None:
+                self._postgres_pool.closeall()
+                self._postgres_pool = None
+                self._postgres_slots = None
+            if self._mongo_client is not None:
+                self._mongo_client.close()
+                self._mongo_client = None
+            if self._redis_pool is not None:
+                self._redis_pool.disconnect()
+                self._redis_pool = None
+        logger.info("Connection pools closed")
+
+    # ------------------------------------------------------------------
+    # Pools
+    # ------------------------------------------------------------------
+
+    @property
+    def postgres_pool(self) -> pg_pool.ThreadedConnectionPool:
+        """Bounded, thread-safe psycopg2 connection pool"""
+        if self._postgres_pool is None:
+            with self._lock:
+                if self._postgres_pool is None:
+                    self._postgres_pool = pg_pool.ThreadedConnectionPool(
+                        settings.POSTGRES_POOL_MIN_SIZE,
+                        settings.POSTGRES_POOL_MAX_SIZE,
+                        settings.POSTGRES_URI,
+                        connect_timeout=5,
+                    )
+                    self._postgres_slots = threading.BoundedSemaphore(
+                        settings.POSTGRES_POOL_MAX_SIZE
+                    )
+        return self._postgres_pool
+
+    @property
+    def mongo_client(self) -> pymongo.MongoClient:
+        """Single shared MongoClient (pymongo pools sockets internally)"""
+        if self._mongo_client is None:
+            with self._lock:
+                if self._mongo_client is None:
+                    self._mongo_client = pymongo.MongoClient(
+                        settings.MONGO_URI,
+                        maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
+                        minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+                        serverSelectionTimeoutMS=5000,
+                        connectTimeoutMS=5000,
+                    )
+        return self._mongo_client
+
+    @property
+    def redis_pool(self) -> redis.ConnectionPool:
+        """Shared Redis connection pool"""
+        if self._redis_pool is None:
+            with self._lock:
+                if self._redis_pool is None:
+                    self._redis_pool = redis.ConnectionPool.from_url(
+                        settings.REDIS_URI,
+                        max_connections=settings.REDIS_MAX_CONNECTIONS,
+                        decode_responses=True,
+                        socket_keepalive=True,
+                        retry_on_timeout=True,
+                    )
+        return self._redis_pool
+
+    # ------------------------------------------------------------------
+    # PostgreSQL checkout
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def postgres_connection(self) -> Generator[Any, None, None]:
+        """
+        Borrow a PostgreSQL connection from the pool for the duration of the block.
+
+        Waits up to ``POSTGRES_POOL_TIMEOUT`` seconds for a free slot instead of
+        failing immediately when the pool is saturated. Any open transaction is
+        rolled back before the connection is returned.
+        """
+        pg = self.postgres_pool
+        slots = self._postgres_slots
+        started = time.perf_counter()
+        if not slots.acquire(timeout=settings.POSTGRES_POOL_TIMEOUT):
+            with self._lock:
+                self.postgres_timeouts += 1
+            raise PoolExhaustedError("Timed out waiting for a PostgreSQL connection")
+        with self._lock:
+            self.postgres_wait_seconds += time.perf_counter() - started
+
+        conn = None
+        broken = False
+        try:
+            conn = pg.getconn()
+            with self._lock:
+                self.postgres_in_use += 1
+                self.postgres_checkouts += 1
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        finally:
+            if conn is not None:
+                with self._lock:
+                    self.postgres_in_use -= 1
+                if not broken and not conn.closed:
+                    try:
+                        conn.rollback()
+                    except Exception:
+                        broken = True
+                pg.putconn(conn, close=broken or bool(conn.closed))
+            slots.release()
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return pool utilisation figures for monitoring"""
+        redis_stats = {"max_connections": settings.REDIS_MAX_CONNECTIONS}
+        if self._redis_pool is not None:
+            redis_stats["in_use"] = len(self._redis_pool._in_use_connections)
+            redis_stats["idle"] = len(self._redis_pool._available_connections)
+
+        return {
+            "postgres": {
+                "max_connections": settings.POSTGRES_POOL_MAX_SIZE,
+                "in_use": self.postgres_in_use,
+                "checkouts": self.postgres_checkouts,
+                "timeouts": self.postgres_timeouts,
+                "wait_seconds": round(self.postgres_wait_seconds, 6),
+            },
+            "mongodb": {
+                "max_connections": settings.MONGO_MAX_POOL_SIZE,
+                "open": self._mongo_client is not None,
+            },
+            "redis": redis_stats,
+        }
 
-def get_postgres_connection():
+
+# Global registry
+pools = ConnectionPools()
+
+
+@contextmanager
+def postgres_connection() -> Generator[Any, None, None]:
     """
-    Establish and return a new connection to the PostgreSQL database using the configured URI.
+    Borrow a pooled PostgreSQL connection for the duration of a ``with`` block.
 
-    Returns:
-        connection: A new psycopg2 connection object to the PostgreSQL database.
+    Yields:
+        connection: A psycopg2 connection that is returned to the pool on exit.
     """
-    return psycopg2.connect(settings.POSTGRES_URI)
+    with pools.postgres_connection() as conn:
+        yield conn
 
 
 def get_mongo_client():
     """
-    Create and return a MongoDB client instance using the configured connection URI.
+    Return the shared, process-wide MongoDB client.
+
+    The client maintains its own connection pool and must not be closed by callers.
 
     Returns:
-        MongoClient: A client connected to the MongoDB server specified in the configuration.
+        MongoClient: The shared client connected to the configured MongoDB server.
+    """
+    return pools.mongo_client
+
+
+class MongoDatabase:
+    """
+    Service attribute resolving the application database on every access.
+
+    Services are created at import; holding a ``Database`` or ``Collection``
+    would keep the client that ``pools.close()`` closes on shutdown, so every
+    use after it would fail instead of reopening the pool.
     """
-    return pymongo.MongoClient(settings.MONGO_URI)
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return get_mongo_db()
+
+
+class MongoCollection(MongoDatabase):
+    """Service attribute resolving one collection on every access"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return get_mongo_db()[self.name]
 
 
 def get_redis_client():
     """
-    Create and return a Redis client instance connected using the configured URI.
+    Return a Redis client backed by the shared connection pool.
 
     The client is set to decode responses as strings.
     Returns:
-        Redis: A Redis client instance connected to the specified URI.
+        Redis: A Redis client using the process-wide connection pool.
     """
-    return redis.Redis.from_url(settings.REDIS_URI, decode_responses=True)
+    return redis.Redis(connection_pool=pools.redis_pool)
+
+
+# FastAPI dependencies
+
+
+def get_postgres_db() -> Generator[Any, None, None]:
+    """FastAPI dependency yielding a pooled PostgreSQL connection per request"""
+    with pools.postgres_connection() as conn:
+        yield conn
+
+
+def get_mongo_db():
+    """FastAPI dependency returning the application MongoDB database"""
+    return pools.mongo_client[settings.DATABASE_NAME]
+
+
+def get_redis():
+    """FastAPI dependency returning a pooled Redis client"""
+    return get_redis_client()
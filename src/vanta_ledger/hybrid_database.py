@@ -40,6 +40,8 @@ from sqlalchemy import (
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from .services.dashboard_cache import invalidate_dashboards
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
@@ -354,6 +356,9 @@ class HybridDatabaseManager:
                     },
                 )
 
+            # 4. The dashboards include the PostgreSQL document counts
+            invalidate_dashboards(str(file_data["company_id"]))
+
             return {
                 "postgres_id": postgres_id,
                 "mongo_id": str(mongo_result.inserted_id),
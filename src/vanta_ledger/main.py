@@ -37,30 +37,35 @@ For simplified/testing versions, see:
 
 import logging
 import os
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
 from typing import Optional
 
 import prometheus_client
-import psycopg2
-import pymongo
-import redis
 from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import jwt
-from prometheus_client import Counter, Histogram
+from prometheus_client import Gauge
 
 # Import authentication
 from .auth import AuthService
 
 # Import settings and middleware
+from .async_database import async_pools
 from .config import settings
+from .database import get_mongo_client, get_redis_client, pools, postgres_connection
 from .middleware import (
     LoggingMiddleware,
     RateLimitMiddleware,
     SecurityHeadersMiddleware,
 )
+from .services.dashboard_cache import dashboard_cache
+from .services.llm.context_snapshots import context_snapshots
+from .services.llm.inference_executor import inference_executor
+from .services.ocr_pipeline import ocr_pipeline
+from .utils.token_cache import token_cache
 
 # Import AI analytics
 from .routes.ai_analytics import router as ai_analytics_router
@@ -95,32 +100,50 @@ from .startup import health_check, initialize_services
 
 
 
-# Initialize FastAPI app
-app = FastAPI(
-    title="Vanta Ledger API",
-    description="Advanced document processing and financial data management system with AI analytics and local LLM",
-    version=settings.VERSION,
-)
-
-
-# Startup event
-@app.on_event("startup")
-async def startup_event():
+@asynccontextmanager
+async def lifespan(app: FastAPI):
     """
-    Initializes required services asynchronously when the application starts.
+    Own the application lifecycle: validate configuration, open the shared
+    sync and async connection pools and initialize services on startup, and
+    close the pools on shutdown.
     """
     # Validate required runtime configuration now (not at import time)
     settings.validate_required_config()
     if not settings.DEBUG and not settings.SECRET_KEY:
         # Defensive check: validate_required_config should have raised
         raise RuntimeError("SECRET_KEY must be configured in production")
+    pools.open()
+    await async_pools.open()
+    await dashboard_cache.start(async_pools.redis)
+    token_cache.start(get_redis_client())
+    if settings.LLM_CONTEXT_CHANGE_STREAM:
+        context_snapshots.watch(get_mongo_client()[settings.DATABASE_NAME])
     await initialize_services()
+    try:
+        yield
+    finally:
+        inference_executor.shutdown()
+        ocr_pipeline.shutdown()
+        context_snapshots.stop()
+        token_cache.stop()
+        await dashboard_cache.stop()
+        await async_pools.close()
+        pools.close()
 
 
-# Add middleware
-app.add_middleware(LoggingMiddleware)
+# Initialize FastAPI app
+app = FastAPI(
+    title="Vanta Ledger API",
+    description="Advanced document processing and financial data management system with AI analytics and local LLM",
+    version=settings.VERSION,
+    lifespan=lifespan,
+)
+
+
+# Add middleware (pure ASGI; logging outermost so rate-limited requests are counted)
 app.add_middleware(SecurityHeadersMiddleware)
 app.add_middleware(RateLimitMiddleware)
+app.add_middleware(LoggingMiddleware)
 
 # CORS middleware
 app.add_middleware(
@@ -166,41 +189,37 @@ app.include_router(simple_auth_router)
 app.include_router(extracted_data_router)
 app.include_router(paperless_router)
 
-# Prometheus metrics
-REQUEST_COUNT = Counter(
-    "http_requests_total", "Total HTTP requests", ["method", "endpoint", "status"]
-)
-REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency")
+# Prometheus metrics (request count and latency are recorded by LoggingMiddleware)
 
+# Connection pool utilisation
+DB_POOL_IN_USE = Gauge(
+    "db_pool_connections_in_use", "Pooled connections currently checked out", ["pool"]
+)
+DB_POOL_MAX = Gauge("db_pool_connections_max", "Configured maximum pool size", ["pool"])
+DB_POOL_IN_USE.labels("postgres").set_function(lambda: pools.postgres_in_use)
+DB_POOL_IN_USE.labels("redis").set_function(
+    lambda: pools.get_stats()["redis"].get("in_use", 0)
+)
+DB_POOL_MAX.labels("postgres").set(settings.POSTGRES_POOL_MAX_SIZE)
+DB_POOL_MAX.labels("mongodb").set(settings.MONGO_MAX_POOL_SIZE)
+DB_POOL_MAX.labels("redis").set(settings.REDIS_MAX_CONNECTIONS)
+DB_POOL_TIMEOUTS = Gauge(
+    "db_pool_checkout_timeouts", "PostgreSQL pool checkouts that timed out"
+)
+DB_POOL_TIMEOUTS.set_function(lambda: pools.postgres_timeouts)
 
-# Database connections
-def get_mongo_client():
-    """
-    Create and return a MongoDB client with a 5-second server selection and connection timeout.
-
-    Returns:
-        MongoClient: A configured MongoDB client instance.
-    """
-    return pymongo.MongoClient(
-        settings.MONGO_URI, serverSelectionTimeoutMS=5000, connectTimeoutMS=5000
+# Dashboard cache effectiveness
+DASHBOARD_CACHE_EVENTS = Gauge(
+    "dashboard_cache_events", "Dashboard cache lookups and invalidations", ["event"]
+)
+for _event in dashboard_cache.stats:
+    DASHBOARD_CACHE_EVENTS.labels(_event).set_function(
+        lambda event=_event: dashboard_cache.stats[event]
     )
-
-
-def get_postgres_connection():
-    """
-    Establish and return a new PostgreSQL database connection with a 5-second timeout.
-
-    Returns:
-        connection: A psycopg2 connection object to the PostgreSQL database.
-    """
-    return psycopg2.connect(settings.POSTGRES_URI, connect_timeout=5)
-
-
-def get_redis_client():
-    """
-    Create and return a Redis client instance configured with response decoding enabled.
-    """
-    return redis.Redis.from_url(settings.REDIS_URI, decode_responses=True)
+DASHBOARD_CACHE_ENTRIES = Gauge(
+    "dashboard_cache_l1_entries", "Dashboard payloads held in the in-process cache"
+)
+DASHBOARD_CACHE_ENTRIES.set_function(lambda: dashboard_cache.get_stats()["l1_entries"])
 
 
 # Authentication - using the new AuthService
@@ -305,12 +324,11 @@ async def test_postgres():
         HTTPException: If the connection or query fails, returns a 500 error with details.
     """
     try:
-        conn = get_postgres_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT version();")
-        version = cursor.fetchone()
-        cursor.close()
-        conn.close()
+        with postgres_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT version();")
+            version = cursor.fetchone()
+            cursor.close()
         return {"status": "PostgreSQL connection successful", "version": version[0]}
     except Exception as e:
         logger.error("PostgreSQL connection failed: Connection error")
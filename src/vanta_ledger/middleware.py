@@ -3,14 +3,16 @@ import logging
 # Configure logging
 import os
 import time
-from collections import defaultdict
-from typing import Dict, Tuple
 
-from fastapi import HTTPException, Request
-from fastapi.responses import Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from typing import List, Optional, Tuple
 
+from fastapi.responses import JSONResponse
+from prometheus_client import Counter, Histogram
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .async_database import async_pools
 from .config import settings
+from .utils.rate_limiter import RateLimiter
 
 # Ensure log directory exists
 log_dir = os.path.dirname(settings.LOG_FILE)
@@ -25,112 +27,177 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Rate limiting middleware"""
+# Prometheus metrics, observed by LoggingMiddleware
+REQUEST_COUNT = Counter(
+    "http_requests_total", "Total HTTP requests", ["method", "endpoint", "status"]
+)
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency")
 
-    def __init__(self, app):
-        super().__init__(app)
-        self.requests_per_minute: Dict[str, list] = defaultdict(list)
-        self.requests_per_hour: Dict[str, list] = defaultdict(list)
+Headers = List[Tuple[bytes, bytes]]
 
-    async def dispatch(self, request: Request, call_next):
-        # Determine client IP (basic proxy-aware)
-        xff = request.headers.get("x-forwarded-for")
-        client_ip = xff.split(",")[0].strip() if xff else request.client.host
 
-        # Check rate limits
-        current_time = time.time()
+def _get_header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
 
-        # Clean old requests
-        self.requests_per_minute[client_ip] = [
-            req_time
-            for req_time in self.requests_per_minute[client_ip]
-            if current_time - req_time < 60
-        ]
 
-        self.requests_per_hour[client_ip] = [
-            req_time
-            for req_time in self.requests_per_hour[client_ip]
-            if current_time - req_time < 3600
-        ]
+def _client_ip(scope: Scope) -> str:
+    # Determine client IP (basic proxy-aware)
+    xff = _get_header(scope, b"x-forwarded-for")
+    if xff:
+        return xff.split(",")[0].strip()
+    client = scope.get("client")
+    return client[0] if client else "unknown"
 
-        # Check limits
-        if len(self.requests_per_minute[client_ip]) >= settings.RATE_LIMIT_PER_MINUTE:
-            logger.warning(f"Rate limit exceeded for IP: {client_ip}")
-            raise HTTPException(status_code=429, detail="Rate limit exceeded")
 
-        if len(self.requests_per_hour[client_ip]) >= settings.RATE_LIMIT_PER_HOUR:
-            logger.warning(f"Hourly rate limit exceeded for IP: {client_ip}")
-            raise HTTPException(status_code=429, detail="Hourly rate limit exceeded")
+def _with_headers(send: Send, headers: Headers) -> Send:
+    """
+    Wrap ``send`` to set ``headers`` on the response start message
 
-        # Add current request
-        self.requests_per_minute[client_ip].append(current_time)
-        self.requests_per_hour[client_ip].append(current_time)
+    Headers the response already carries under the same names are replaced,
+    so a response never sends two ``X-Frame-Options`` or CSP values.
+    """
+    names = {name.lower() for name, _ in headers}
 
-        # Process request
-        response = await call_next(request)
+    async def send_wrapper(message: Message):
+        if message["type"] == "http.response.start":
+            message["headers"] = [
+                *(
+                    (name, value)
+                    for name, value in message.get("headers", [])
+                    if name.lower() not in names
+                ),
+                *headers,
+            ]
+        await send(message)
 
-        # Add rate limit headers
-        response.headers["X-RateLimit-Limit-Minute"] = str(
-            settings.RATE_LIMIT_PER_MINUTE
-        )
-        response.headers["X-RateLimit-Remaining-Minute"] = str(
-            settings.RATE_LIMIT_PER_MINUTE - len(self.requests_per_minute[client_ip])
-        )
-        response.headers["X-RateLimit-Limit-Hour"] = str(settings.RATE_LIMIT_PER_HOUR)
-        response.headers["X-RateLimit-Remaining-Hour"] = str(
-            settings.RATE_LIMIT_PER_HOUR - len(self.requests_per_hour[client_ip])
-        )
+    return send_wrapper
 
-        return response
 
+class RateLimitMiddleware:
+    """Rate limiting middleware (sliding window, shared through Redis)"""
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Add security headers to responses"""
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.limiter = RateLimiter()
+        self.limit_headers = [
+            (b"x-ratelimit-limit-minute", str(settings.RATE_LIMIT_PER_MINUTE).encode()),
+            (b"x-ratelimit-limit-hour", str(settings.RATE_LIMIT_PER_HOUR).encode()),
+        ]
 
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        # Security headers
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        response.headers["Strict-Transport-Security"] = (
-            "max-age=31536000; includeSubDomains"
-        )
-        # Simplified CSP for compatibility
-        if request.url.path == "/docs":
-            response.headers["Content-Security-Policy"] = (
-                "default-src 'self'; script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; img-src 'self' https://fastapi.tiangolo.com; font-src 'self' https://cdn.jsdelivr.net"
+        client_ip = _client_ip(scope)
+        redis = async_pools.redis if settings.RATE_LIMIT_REDIS_ENABLED else None
+        result = await self.limiter.hit(client_ip, redis)
+
+        if not result.allowed:
+            hourly = result.window >= 3600
+            logger.warning(
+                f"{'Hourly rate' if hourly else 'Rate'} limit exceeded for IP: {client_ip}"
             )
-        else:
-            response.headers["Content-Security-Policy"] = (
-                "default-src 'self'; script-src 'self'; style-src 'self'"
+            response = JSONResponse(
+                status_code=429,
+                content={
+                    "detail": (
+                        "Hourly rate limit exceeded"
+                        if hourly
+                        else "Rate limit exceeded"
+                    )
+                },
+                headers={"Retry-After": str(result.retry_after)},
             )
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        response.headers["Permissions-Policy"] = (
-            "geolocation=(), microphone=(), camera=()"
-        )
+            await response(scope, receive, send)
+            return
+
+        remaining_minute, remaining_hour = result.remaining
+        headers = [
+            *self.limit_headers,
+            (b"x-ratelimit-remaining-minute", str(remaining_minute).encode()),
+            (b"x-ratelimit-remaining-hour", str(remaining_hour).encode()),
+        ]
+        await self.app(scope, receive, _with_headers(send, headers))
 
-        return response
 
+class SecurityHeadersMiddleware:
+    """Add security headers to responses"""
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Log all requests"""
+    COMMON_HEADERS: Headers = [
+        (b"x-content-type-options", b"nosniff"),
+        (b"x-frame-options", b"DENY"),
+        (b"x-xss-protection", b"1; mode=block"),
+        (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+        (b"referrer-policy", b"strict-origin-when-cross-origin"),
+        (b"permissions-policy", b"geolocation=(), microphone=(), camera=()"),
+    ]
+    # Simplified CSP for compatibility
+    DOCS_HEADERS: Headers = COMMON_HEADERS + [
+        (
+            b"content-security-policy",
+            b"default-src 'self'; script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net; img-src 'self' https://fastapi.tiangolo.com; font-src 'self' https://cdn.jsdelivr.net",
+        )
+    ]
+    DEFAULT_HEADERS: Headers = COMMON_HEADERS + [
+        (
+            b"content-security-policy",
+            b"default-src 'self'; script-src 'self'; style-src 'self'",
+        )
+    ]
 
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-        # Log request
-        logger.info(
-            f"Request: {request.method} {request.url} from {request.headers.get('x-forwarded-for') or request.client.host}"
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = (
+            self.DOCS_HEADERS if scope["path"] == "/docs" else self.DEFAULT_HEADERS
         )
+        await self.app(scope, receive, _with_headers(send, headers))
+
+
+class LoggingMiddleware:
+    """Log all requests and record request metrics"""
 
-        # Process request
-        response = await call_next(request)
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-        # Log response
-        process_time = time.time() - start_time
-        logger.info(f"Response: {response.status_code} in {process_time:.3f}s")
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        return response
+        start_time = time.perf_counter()
+        status_code = 500
+        method = scope["method"]
+
+        # Log request
+        query = scope.get("query_string", b"")
+        target = scope["path"] + (f"?{query.decode('latin-1')}" if query else "")
+        logger.info(f"Request: {method} {target} from {_client_ip(scope)}")
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            process_time = time.perf_counter() - start_time
+            # Label by route template so path parameters don't explode cardinality
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            REQUEST_COUNT.labels(method, endpoint, str(status_code)).inc()
+            REQUEST_LATENCY.observe(process_time)
+
+            # Log response
+            logger.info(f"Response: {status_code} in {process_time:.3f}s")
@@ -14,11 +14,9 @@ from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Any, Callable, Dict, List, Optional
 
-import redis
-from pymongo import MongoClient
-from pymongo.database import Database
 
-from ..config import settings
+from ..database import MongoDatabase, get_mongo_client, get_redis_client, pools
+from ..services.analytics_rollups import ensure_rollup_indexes
 
 logger = logging.getLogger(__name__)
 
@@ -26,12 +24,11 @@ logger = logging.getLogger(__name__)
 class PerformanceOptimizer:
     """Performance optimization utilities"""
 
+    # Resolved on every use, so a closed and reopened pool is picked up
+    db = MongoDatabase()
+
     def __init__(self):
-        self.redis_client = redis.Redis.from_url(
-            settings.REDIS_URI, decode_responses=True
-        )
-        self.mongo_client = MongoClient(settings.MONGO_URI)
-        self.db: Database = self.mongo_client[settings.DATABASE_NAME]
+        self.redis_client = get_redis_client()
         self.executor = ThreadPoolExecutor(max_workers=4)
 
         # Cache settings
@@ -134,6 +131,12 @@ class PerformanceOptimizer:
                 [("entry_date", -1), ("is_posted", 1), ("created_by", 1)]
             )
 
+            # Dashboard aggregations (company dashboard, daily trends)
+            self.db.processed_documents.create_index(
+                [("company", 1), ("processing_date", -1)]
+            )
+            ensure_rollup_indexes(self.db)
+
             # Search optimization
             self.db.documents.create_index(
                 [("metadata.title", "text"), ("extracted_text", "text")]
@@ -235,17 +238,12 @@ class PerformanceOptimizer:
         """Optimize database connection pools"""
         try:
             # Optimize MongoDB connection pool
-            self.mongo_client.admin.command(
+            get_mongo_client().admin.command(
                 {"setParameter": 1, "maxTransactionLockRequestTimeoutMillis": 5000}
             )
 
-            # Optimize Redis connection pool
-            pool = redis.ConnectionPool.from_url(
-                settings.REDIS_URI,
-                max_connections=20,
-                retry_on_timeout=True,
-                socket_keepalive=True,
-            )
+            # Redis/PostgreSQL pools are shared process-wide; report utilisation
+            logger.info(f"Connection pool utilisation: {pools.get_stats()}")
 
             logger.info("Connection pool optimization completed")
 
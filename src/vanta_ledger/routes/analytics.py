@@ -1,15 +1,46 @@
+import asyncio
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
 
 from ..auth import AuthService
-from ..database import get_mongo_client, get_postgres_connection
+from ..async_database import (
+    ai_reports_repo,
+    async_pools,
+    postgres_repo,
+    processed_documents_repo,
+    system_analytics_repo,
+)
 from ..services.ai_analytics_service import enhanced_ai_analytics_service
 from ..services.analytics_dashboard import analytics_dashboard
+from ..services.dashboard_cache import (
+    GLOBAL_TAG,
+    cache_key,
+    company_tag,
+    dashboard_cache,
+)
 
 router = APIRouter(tags=["Analytics"])
 
 
+async def _cached(current_user: dict, kind: str, compute, company_id: str = None):
+    """
+    Serve a dashboard payload from the dashboard cache.
+
+    Payloads are keyed per requesting role and company. Company dashboards are
+    tagged with their company; cross-company payloads are tagged global, so a
+    write for any company invalidates them.
+    """
+    role = current_user.get("role")
+    if company_id is not None:
+        key = cache_key(kind, company_id, role, current_user.get("company_id"))
+        tags = [company_tag(company_id)]
+    else:
+        key = cache_key(kind, role, current_user.get("company_id"))
+        tags = [GLOBAL_TAG]
+    return await dashboard_cache.get_or_compute(key, tags, compute)
+
+
 @router.get("/extracted-data/analytics")
 async def get_analytics(current_user: dict = Depends(AuthService.verify_token)):
     """
@@ -26,35 +57,18 @@ async def get_analytics(current_user: dict = Depends(AuthService.verify_token)):
     if current_user.get("role") != "admin":
         raise HTTPException(status_code=403, detail="Insufficient permissions")
 
-    conn = get_postgres_connection()
-    cursor = conn.cursor()
-    try:
-        cursor.execute(
-            """
-            SELECT
-                COUNT(*) as total_transactions,
-                SUM(amount) as total_amount,
-                AVG(amount) as avg_amount,
-                MIN(amount) as min_amount,
-                MAX(amount) as max_amount
-            FROM financial_transactions
-        """
-        )
-        result = cursor.fetchone()
-        if not result:
-            raise HTTPException(status_code=404, detail="No financial data found")
-        return {
-            "total_transactions": result[0] or 0,
-            "total_amount": (
-                str(result[1]) if result[1] else "0"
-            ),  # Return as string to preserve precision
-            "average_amount": str(result[2]) if result[2] else "0",
-            "min_amount": str(result[3]) if result[3] else "0",
-            "max_amount": str(result[4]) if result[4] else "0",
-        }
-    finally:
-        cursor.close()
-        conn.close()
+    result = await postgres_repo.get_transaction_stats()
+    if not result:
+        raise HTTPException(status_code=404, detail="No financial data found")
+    return {
+        "total_transactions": result["total_transactions"] or 0,
+        "total_amount": (
+            str(result["total_amount"]) if result["total_amount"] else "0"
+        ),  # Return as string to preserve precision
+        "average_amount": str(result["avg_amount"]) if result["avg_amount"] else "0",
+        "min_amount": str(result["min_amount"]) if result["min_amount"] else "0",
+        "max_amount": str(result["max_amount"]) if result["max_amount"] else "0",
+    }
 
 
 @router.post("/ai/analyze-document/{document_id}")
@@ -74,32 +88,26 @@ async def analyze_document_ai(
     Raises:
         HTTPException: If document not found or access denied.
     """
-    client = get_mongo_client()
-    db = client.vanta_ledger
-    collection = db.processed_documents
-
-    try:
-        document = collection.find_one({"document_id": document_id})
-        if not document:
-            raise HTTPException(status_code=404, detail="Document not found")
-
-        # Enforce company isolation - users can only access documents from their company
-        if current_user.get("role") != "admin":
-            user_company = current_user.get("company_id")
-            if not user_company or document.get("company_id") != user_company:
-                raise HTTPException(
-                    status_code=403, detail="Access denied to this document"
-                )
-
-        analysis = await enhanced_ai_analytics_service.analyze_document_intelligence(
-            document
-        )
-        collection.update_one(
-            {"document_id": document_id}, {"$set": {"ai_analysis": analysis}}
-        )
-        return analysis
-    finally:
-        client.close()
+    document = await processed_documents_repo.find_one({"document_id": document_id})
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    # Enforce company isolation - users can only access documents from their company
+    if current_user.get("role") != "admin":
+        user_company = current_user.get("company_id")
+        if not user_company or document.get("company_id") != user_company:
+            raise HTTPException(
+                status_code=403, detail="Access denied to this document"
+            )
+
+    analysis = await enhanced_ai_analytics_service.analyze_document_intelligence(
+        document
+    )
+    await processed_documents_repo.update_one(
+        {"document_id": document_id}, {"$set": {"ai_analysis": analysis}}
+    )
+    await dashboard_cache.invalidate(document.get("company"))
+    return analysis
 
 
 @router.get("/ai/company-report/{company_id}")
@@ -118,17 +126,14 @@ async def generate_company_report(
     Raises:
         HTTPException: If no documents are found for the specified company.
     """
-    client = get_mongo_client()
-    db = client.vanta_ledger
-    collection = db.processed_documents
     # Limit to prevent unbounded reads - max 1000 documents per company
-    documents = list(collection.find({"company": company_id}).limit(1000))
+    documents = await processed_documents_repo.find({"company": company_id}, limit=1000)
     if not documents:
         raise HTTPException(status_code=404, detail="No documents found for company")
     report = await enhanced_ai_analytics_service.generate_company_report(
         company_id, documents
     )
-    db.ai_reports.insert_one(report)
+    await ai_reports_repo.insert_one(report)
     return report
 
 
@@ -145,17 +150,14 @@ async def generate_system_analytics(
     Returns:
         dict: The generated system analytics report.
     """
-    client = get_mongo_client()
-    db = client.vanta_ledger
-    collection = db.processed_documents
     # Limit to prevent unbounded reads - max 5000 documents for system analytics
-    all_documents = list(collection.find({}).limit(5000))
+    all_documents = await processed_documents_repo.find({}, limit=5000)
     if not all_documents:
         raise HTTPException(status_code=404, detail="No documents found")
     analytics = await enhanced_ai_analytics_service.generate_system_analytics(
         all_documents
     )
-    db.system_analytics.insert_one(analytics)
+    await system_analytics_repo.insert_one(analytics)
     return analytics
 
 
@@ -167,10 +169,10 @@ async def list_ai_reports(current_user: dict = Depends(AuthService.verify_token)
     Returns:
         dict: A dictionary containing up to 20 company reports and up to 10 system analytics reports from the database.
     """
-    client = get_mongo_client()
-    db = client.vanta_ledger
-    company_reports = list(db.ai_reports.find({}, {"_id": 0}).limit(20))
-    system_analytics = list(db.system_analytics.find({}, {"_id": 0}).limit(10))
+    company_reports, system_analytics = await asyncio.gather(
+        ai_reports_repo.find({}, {"_id": 0}, limit=20),
+        system_analytics_repo.find({}, {"_id": 0}, limit=10),
+    )
     return {"company_reports": company_reports, "system_analytics": system_analytics}
 
 
@@ -192,12 +194,12 @@ async def get_ai_report(
     Raises:
         HTTPException: If no report is found with the given ID.
     """
-    client = get_mongo_client()
-    db = client.vanta_ledger
-    report = db.ai_reports.find_one({"company_id": report_id}, {"_id": 0})
+    report = await ai_reports_repo.find_one({"company_id": report_id}, {"_id": 0})
     if report:
         return report
-    report = db.system_analytics.find_one({"report_date": report_id}, {"_id": 0})
+    report = await system_analytics_repo.find_one(
+        {"report_date": report_id}, {"_id": 0}
+    )
     if report:
         return report
     raise HTTPException(status_code=404, detail="Report not found")
@@ -213,12 +215,13 @@ async def get_dashboard_overview(
     Returns:
         dict: A summary of key analytics metrics for the dashboard overview.
     """
-    mongo_client = get_mongo_client()
-    postgres_conn = get_postgres_connection()
-    overview = await analytics_dashboard.get_dashboard_overview(
-        mongo_client, postgres_conn
+    overview = await _cached(
+        current_user,
+        "overview",
+        lambda: analytics_dashboard.get_dashboard_overview(
+            async_pools.mongo_db, postgres_repo
+        ),
     )
-    postgres_conn.close()
     return overview
 
 
@@ -235,12 +238,14 @@ async def get_company_dashboard(
     Returns:
         dict: The aggregated dashboard data for the specified company.
     """
-    mongo_client = get_mongo_client()
-    postgres_conn = get_postgres_connection()
-    company_dashboard = await analytics_dashboard.get_company_dashboard(
-        company_id, mongo_client, postgres_conn
+    company_dashboard = await _cached(
+        current_user,
+        "company",
+        lambda: analytics_dashboard.get_company_dashboard(
+            company_id, async_pools.mongo_db, postgres_repo
+        ),
+        company_id=company_id,
     )
-    postgres_conn.close()
     return company_dashboard
 
 
@@ -254,14 +259,15 @@ async def get_financial_analytics(
     Returns:
         dict: Aggregated financial analytics combining data from MongoDB and PostgreSQL.
     """
-    mongo_client = get_mongo_client()
-    postgres_conn = get_postgres_connection()
-    mongo_data = await analytics_dashboard._get_mongo_analytics(mongo_client)
-    postgres_data = await analytics_dashboard._get_postgres_analytics(postgres_conn)
-    financial_analytics = analytics_dashboard._combine_financial_data(
-        mongo_data, postgres_data
-    )
-    postgres_conn.close()
+
+    async def compute():
+        mongo_amounts, postgres_data = await asyncio.gather(
+            analytics_dashboard.get_metric(async_pools.mongo_db, "financial"),
+            analytics_dashboard._get_postgres_analytics(postgres_repo),
+        )
+        return analytics_dashboard._combine_financial_data(mongo_amounts, postgres_data)
+
+    financial_analytics = await _cached(current_user, "analytics:financial", compute)
     return financial_analytics
 
 
@@ -275,9 +281,11 @@ async def get_compliance_analytics(
     Returns:
         dict: Compliance analytics metrics extracted from MongoDB analytics data.
     """
-    mongo_client = get_mongo_client()
-    mongo_data = await analytics_dashboard._get_mongo_analytics(mongo_client)
-    compliance_analytics = analytics_dashboard._get_compliance_metrics(mongo_data)
+    compliance_analytics = await _cached(
+        current_user,
+        "analytics:compliance",
+        lambda: analytics_dashboard.get_metric(async_pools.mongo_db, "compliance"),
+    )
     return compliance_analytics
 
 
@@ -291,9 +299,11 @@ async def get_processing_analytics(
     Returns:
         dict: Processing analytics metrics extracted from MongoDB analytics data.
     """
-    mongo_client = get_mongo_client()
-    mongo_data = await analytics_dashboard._get_mongo_analytics(mongo_client)
-    processing_analytics = analytics_dashboard._get_processing_metrics(mongo_data)
+    processing_analytics = await _cached(
+        current_user,
+        "analytics:processing",
+        lambda: analytics_dashboard.get_metric(async_pools.mongo_db, "processing"),
+    )
     return processing_analytics
 
 
@@ -305,9 +315,11 @@ async def get_trends_analytics(current_user: dict = Depends(AuthService.verify_t
     Returns:
         dict: Trends analytics data extracted from MongoDB.
     """
-    mongo_client = get_mongo_client()
-    mongo_data = await analytics_dashboard._get_mongo_analytics(mongo_client)
-    trends_analytics = await analytics_dashboard._get_trends(mongo_data)
+    trends_analytics = await _cached(
+        current_user,
+        "analytics:trends",
+        lambda: analytics_dashboard.get_metric(async_pools.mongo_db, "trends"),
+    )
     return trends_analytics
 
 
@@ -319,9 +331,11 @@ async def get_system_alerts(current_user: dict = Depends(AuthService.verify_toke
     Returns:
         A list or dictionary containing system alerts extracted from analytics data.
     """
-    mongo_client = get_mongo_client()
-    mongo_data = await analytics_dashboard._get_mongo_analytics(mongo_client)
-    alerts = await analytics_dashboard._get_alerts(mongo_data)
+    alerts = await _cached(
+        current_user,
+        "analytics:alerts",
+        lambda: analytics_dashboard.get_metric(async_pools.mongo_db, "alerts"),
+    )
     return alerts
 
 
@@ -333,9 +347,11 @@ async def get_top_performers(current_user: dict = Depends(AuthService.verify_tok
     Returns:
         A list or dictionary containing information about the top performers as determined by analytics processing.
     """
-    mongo_client = get_mongo_client()
-    mongo_data = await analytics_dashboard._get_mongo_analytics(mongo_client)
-    top_performers = analytics_dashboard._get_top_performers(mongo_data)
+    top_performers = await _cached(
+        current_user,
+        "analytics:top_performers",
+        lambda: analytics_dashboard.get_metric(async_pools.mongo_db, "top_performers"),
+    )
     return top_performers
 
 
@@ -347,7 +363,9 @@ async def get_risk_analysis(current_user: dict = Depends(AuthService.verify_toke
     Returns:
         dict: Risk analysis metrics extracted from MongoDB analytics data.
     """
-    mongo_client = get_mongo_client()
-    mongo_data = await analytics_dashboard._get_mongo_analytics(mongo_client)
-    risk_analysis = analytics_dashboard._get_risk_analysis(mongo_data)
+    risk_analysis = await _cached(
+        current_user,
+        "analytics:risk",
+        lambda: analytics_dashboard.get_metric(async_pools.mongo_db, "risk"),
+    )
     return risk_analysis
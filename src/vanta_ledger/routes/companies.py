@@ -1,57 +1,16 @@
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException, status
 
+from ..async_database import postgres_repo
 from ..auth import AuthService
 from ..config import settings
-from ..database import get_postgres_connection
 from ..utils.validation import input_validator
 
-# Thread pool for database operations
-executor = ThreadPoolExecutor(max_workers=10)
-
 router = APIRouter(prefix="/companies", tags=["Companies"])
 
 
-def _get_companies_sync(page: int, limit: int):
-    """Synchronous database operation for getting companies"""
-    conn = get_postgres_connection()
-    cursor = conn.cursor()
-
-    try:
-        cursor.execute("SELECT COUNT(*) FROM companies")
-        total_count = cursor.fetchone()[0]
-
-        offset = (page - 1) * limit
-
-        cursor.execute(
-            "SELECT postgres_id, name, industry, revenue FROM companies ORDER BY name LIMIT %s OFFSET %s",
-            (limit, offset),
-        )
-        companies = cursor.fetchall()
-
-        return {
-            "companies": [
-                {
-                    "id": company[0],
-                    "name": company[1],
-                    "industry": company[2],
-                    "revenue": company[3],
-                }
-                for company in companies
-            ],
-            "total_count": total_count,
-            "page": page,
-            "limit": limit,
-            "total_pages": (total_count + limit - 1) // limit,
-        }
-    finally:
-        cursor.close()
-        conn.close()
-
-
 @router.get("/")
 async def get_companies(
     page: int = 1,
@@ -70,35 +29,19 @@ async def get_companies(
     """
     page, limit = input_validator.validate_pagination_params(page, limit, max_limit=100)
 
-    # Run database operation in thread pool to avoid blocking
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(executor, _get_companies_sync, page, limit)
-
-
-def _get_company_sync(company_id: int):
-    """Synchronous database operation for getting a single company"""
-    conn = get_postgres_connection()
-    cursor = conn.cursor()
-
-    try:
-        cursor.execute(
-            "SELECT postgres_id, name, industry, revenue FROM companies WHERE postgres_id = %s",
-            (company_id,),
-        )
-        company = cursor.fetchone()
-
-        if not company:
-            raise HTTPException(status_code=404, detail="Company not found")
+    offset = (page - 1) * limit
+    total_count, companies = await asyncio.gather(
+        postgres_repo.count_companies(),
+        postgres_repo.get_companies_page(limit, offset),
+    )
 
-        return {
-            "id": company[0],
-            "name": company[1],
-            "industry": company[2],
-            "revenue": company[3],
-        }
-    finally:
-        cursor.close()
-        conn.close()
+    return {
+        "companies": companies,
+        "total_count": total_count,
+        "page": page,
+        "limit": limit,
+        "total_pages": (total_count + limit - 1) // limit,
+    }
 
 
 @router.get("/{company_id}")
@@ -120,6 +63,7 @@ async def get_company(
         company_id, min_value=1, field_name="company_id"
     )
 
-    # Run database operation in thread pool to avoid blocking
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(executor, _get_company_sync, company_id)
+    company = await postgres_repo.get_company(company_id)
+    if not company:
+        raise HTTPException(status_code=404, detail="Company not found")
+    return company
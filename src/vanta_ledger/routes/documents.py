@@ -4,7 +4,6 @@ from typing import List
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
 
 from ..auth import AuthService
-from ..config import settings
 from ..services.document_processor import DocumentProcessor
 from ..utils.file_utils import secure_file_handler
 
@@ -21,21 +20,26 @@ async def upload_document(
 
     Accepts a file upload, saves it securely, processes the document, and returns metadata including analysis results and security information. Raises an HTTP 500 error if processing fails.
     """
-    temp_file_path = None
     try:
         user_id = current_user.get("user_id", "unknown")
 
-        temp_file_path, secure_filename = secure_file_handler.save_file_securely(
-            file, user_id, settings.UPLOAD_DIR
+        # Validated, hashed and written to its final location in one pass
+        stored = secure_file_handler.store_upload(
+            file, str(document_processor.upload_dir)
         )
 
-        result = document_processor.process_document(str(temp_file_path), file.filename)
+        result = document_processor.process_document(
+            str(stored.path),
+            file.filename,
+            content_hash=stored.sha256,
+        )
 
         result["security"] = {
             "uploaded_by": user_id,
-            "secure_filename": secure_filename,
+            "secure_filename": stored.path.name,
             "original_filename": file.filename,
-            "file_size": file.size,
+            "file_size": stored.size,
+            "sha256": stored.sha256,
             "upload_timestamp": datetime.now().isoformat(),
         }
 
@@ -51,10 +55,10 @@ async def upload_document(
     except HTTPException as e:
         raise e
     except Exception as e:
+        # The stored file is kept: it is named by its content, so a concurrent
+        # upload of the same bytes may already reference it, and a retry
+        # reuses it
         raise HTTPException(status_code=500, detail="Document processing failed") from e
-    finally:
-        if temp_file_path:
-            secure_file_handler.cleanup_temp_file(temp_file_path)
 
 
 @router.get("")
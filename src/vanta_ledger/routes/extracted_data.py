@@ -4,20 +4,49 @@ Extracted Data API Routes
 Legacy compatibility for frontend extracted data features
 """
 
-import csv
-import io
-import json
+import asyncio
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
+from bson import ObjectId
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import JSONResponse, StreamingResponse
 
+from ..async_database import extracted_data_repo
 from ..auth import AuthService
-from ..database import get_mongo_client
+from ..config import settings
+from ..utils.export_utils import MEDIA_TYPES, stream_export
 
 router = APIRouter(prefix="/extracted-data", tags=["Extracted Data"])
 
+# Stable CSV header covering flat rows and the extraction engines' nested rows
+EXPORT_COLUMNS = [
+    "_id",
+    "postgres_id",
+    "doc_id",
+    "filename",
+    "created_date",
+    "extracted_at",
+    "confidence",
+    "amount",
+    "transaction_type",
+    "category",
+    "extracted_data.company_name",
+    "extracted_data.transaction_date",
+    "extracted_data.amount",
+    "extracted_data.currency",
+    "extracted_data.transaction_type",
+    "extracted_data.category",
+    "extracted_data.description",
+    "extracted_data.reference_number",
+    "extracted_data.vendor_name",
+    "extracted_data.invoice_number",
+    "extracted_data.tax_amount",
+    "extracted_data.payment_method",
+    "extracted_data.confidence_score",
+    "extracted_data.extraction_method",
+]
+
 
 @router.get("/")
 async def get_extracted_data(
@@ -31,10 +60,6 @@ async def get_extracted_data(
 ):
     """Get extracted data with filtering and pagination"""
     try:
-        mongo_client = get_mongo_client()
-        db = mongo_client.vanta_ledger
-        collection = db.extracted_data
-
         # Build query filter
         query_filter = {}
 
@@ -57,21 +82,18 @@ async def get_extracted_data(
         skip = (page - 1) * limit
 
         # Get data with pagination
-        cursor = (
-            collection.find(query_filter)
-            .skip(skip)
-            .limit(limit)
-            .sort("created_date", -1)
+        extracted_data, total_count = await asyncio.gather(
+            extracted_data_repo.find(
+                query_filter, sort=[("created_date", -1)], skip=skip, limit=limit
+            ),
+            extracted_data_repo.count(query_filter),
         )
-        extracted_data = list(cursor)
 
         # Convert ObjectId to string for JSON serialization
         for item in extracted_data:
             if "_id" in item:
                 item["_id"] = str(item["_id"])
 
-        # Get total count for pagination
-        total_count = collection.count_documents(query_filter)
         total_pages = (total_count + limit - 1) // limit
 
         return {
@@ -98,10 +120,6 @@ async def get_extracted_data_analytics(
 ):
     """Get analytics for extracted data"""
     try:
-        mongo_client = get_mongo_client()
-        db = mongo_client.vanta_ledger
-        collection = db.extracted_data
-
         # Aggregate analytics
         pipeline = [
             {
@@ -117,7 +135,7 @@ async def get_extracted_data_analytics(
             }
         ]
 
-        result = list(collection.aggregate(pipeline))
+        result = await extracted_data_repo.aggregate(pipeline)
 
         if result:
             analytics = result[0]
@@ -148,25 +166,25 @@ async def get_extracted_data_stats(
 ):
     """Get detailed statistics for extracted data"""
     try:
-        mongo_client = get_mongo_client()
-        db = mongo_client.vanta_ledger
-        collection = db.extracted_data
-
         # Get category distribution
         category_pipeline = [
             {"$group": {"_id": "$category", "count": {"$sum": 1}}},
             {"$sort": {"count": -1}},
         ]
 
-        categories = list(collection.aggregate(category_pipeline))
-
         # Get transaction type distribution
         type_pipeline = [
             {"$group": {"_id": "$transaction_type", "count": {"$sum": 1}}},
             {"$sort": {"count": -1}},
         ]
 
-        transaction_types = list(collection.aggregate(type_pipeline))
+        categories, transaction_types, high, medium, low = await asyncio.gather(
+            extracted_data_repo.aggregate(category_pipeline),
+            extracted_data_repo.aggregate(type_pipeline),
+            extracted_data_repo.count({"confidence": {"$gte": 0.8}}),
+            extracted_data_repo.count({"confidence": {"$gte": 0.5, "$lt": 0.8}}),
+            extracted_data_repo.count({"confidence": {"$lt": 0.5}}),
+        )
 
         return {
             "categories": [
@@ -177,13 +195,7 @@ async def get_extracted_data_stats(
                 {"type": item["_id"] or "Unknown", "count": item["count"]}
                 for item in transaction_types
             ],
-            "confidence_distribution": {
-                "high": collection.count_documents({"confidence": {"$gte": 0.8}}),
-                "medium": collection.count_documents(
-                    {"confidence": {"$gte": 0.5, "$lt": 0.8}}
-                ),
-                "low": collection.count_documents({"confidence": {"$lt": 0.5}}),
-            },
+            "confidence_distribution": {"high": high, "medium": medium, "low": low},
         }
 
     except Exception as e:
@@ -196,61 +208,60 @@ async def get_extracted_data_stats(
 
 @router.get("/export")
 async def export_extracted_data(
-    format: str = Query("json", regex="^(json|csv)$"),
+    format: str = Query("json", regex="^(json|jsonl|csv)$"),
     min_confidence: Optional[float] = Query(None, ge=0.0, le=1.0),
+    columns: Optional[str] = Query(
+        None, description="Comma-separated (dotted) columns; defaults to a fixed set"
+    ),
+    after: Optional[str] = Query(
+        None, description="Resume after this _id (the last one received)"
+    ),
+    limit: int = Query(0, ge=0, description="Maximum rows (0 for no limit)"),
+    gzip: bool = Query(False, description="Gzip-compress the export"),
     current_user: dict = Depends(AuthService.verify_token),
 ):
-    """Export extracted data in JSON or CSV format"""
-    try:
-        mongo_client = get_mongo_client()
-        db = mongo_client.vanta_ledger
-        collection = db.extracted_data
-
-        # Build query filter
-        query_filter = {}
-        if min_confidence is not None:
-            query_filter["confidence"] = {"$gte": min_confidence}
-
-        # Get data
-        cursor = collection.find(query_filter).sort("created_date", -1)
-        extracted_data = list(cursor)
-
-        # Convert ObjectId to string
-        for item in extracted_data:
-            if "_id" in item:
-                item["_id"] = str(item["_id"])
-
-        if format == "json":
-            # Return JSON export
-            json_str = json.dumps(extracted_data, indent=2, default=str)
-
-            return StreamingResponse(
-                io.StringIO(json_str),
-                media_type="application/json",
-                headers={
-                    "Content-Disposition": "attachment; filename=extracted_data.json"
-                },
-            )
-
-        elif format == "csv":
-            # Return CSV export
-            if not extracted_data:
-                csv_content = "No data available"
-            else:
-                output = io.StringIO()
-                fieldnames = extracted_data[0].keys()
-                writer = csv.DictWriter(output, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(extracted_data)
-                csv_content = output.getvalue()
-
-            return StreamingResponse(
-                io.StringIO(csv_content),
-                media_type="text/csv",
-                headers={
-                    "Content-Disposition": "attachment; filename=extracted_data.csv"
-                },
-            )
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
+    """
+    Stream extracted data as a JSON array, JSON Lines or CSV.
+
+    Rows are read from a batched cursor in ``_id`` order and encoded as they
+    arrive, so memory use does not grow with the export size. An interrupted
+    export resumes with ``after`` set to the last ``_id`` received; ``limit``
+    bounds the rows in one request. CSV always uses the same columns (dotted
+    names reach into nested documents).
+
+    Raises:
+        HTTPException: 400 if ``after`` is not a valid document id.
+    """
+    # Build query filter
+    query_filter: Dict[str, Any] = {}
+    if min_confidence is not None:
+        query_filter["confidence"] = {"$gte": min_confidence}
+    if after:
+        if not ObjectId.is_valid(after):
+            raise HTTPException(status_code=400, detail="Invalid 'after' id")
+        query_filter["_id"] = {"$gt": ObjectId(after)}
+
+    export_columns = (
+        [column.strip() for column in columns.split(",") if column.strip()]
+        if columns
+        else EXPORT_COLUMNS
+    )
+
+    # Ascending _id keeps the order stable for resumption as new rows arrive
+    cursor = extracted_data_repo.iterate(
+        query_filter, sort=[("_id", 1)], batch_size=settings.EXPORT_BATCH_SIZE
+    )
+    if limit:
+        cursor = cursor.limit(limit)
+
+    filename = f"extracted_data.{format}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        stream_export(
+            cursor,
+            format,
+            export_columns if columns or format == "csv" else None,
+            compress=gzip,
+        ),
+        media_type="application/gzip" if gzip else MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
@@ -2,8 +2,8 @@ from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
 
+from ..async_database import ledger_entries_repo
 from ..auth import AuthService
-from ..database import get_mongo_client
 
 router = APIRouter(prefix="/ledger", tags=["Ledger"])
 
@@ -16,10 +16,7 @@ async def get_ledger_entries(current_user: dict = Depends(AuthService.verify_tok
     Returns:
         A list of ledger entry documents, excluding the MongoDB internal `_id` field.
     """
-    client = get_mongo_client()
-    db = client.vanta_ledger
-    collection = db.ledger_entries
-    entries = list(collection.find({}, {"_id": 0}).limit(50))
+    entries = await ledger_entries_repo.find({}, {"_id": 0}, limit=50)
     return entries
 
 
@@ -36,8 +33,5 @@ async def get_company_ledger(
     Returns:
         list: A list of ledger entries associated with the given company, excluding MongoDB internal fields.
     """
-    client = get_mongo_client()
-    db = client.vanta_ledger
-    collection = db.ledger_entries
-    entries = list(collection.find({"company_id": company_id}, {"_id": 0}))
+    entries = await ledger_entries_repo.find({"company_id": company_id}, {"_id": 0})
     return entries
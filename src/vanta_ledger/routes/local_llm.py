@@ -24,6 +24,11 @@ from fastapi.responses import JSONResponse
 
 from ..auth import User, get_current_user
 from ..services.enhanced_document_service import enhanced_document_service
+from ..services.llm.context_snapshots import context_snapshots
+from ..services.llm.entity_index import entity_indexes
+from ..services.llm.inference_executor import InferenceOverloaded, inference_priority
+from ..services.llm.prefix_cache import prefix_cache
+from ..services.llm.result_cache import result_cache
 from ..services.local_llm_service import local_llm_service
 from ..utils.validation import input_validator
 
@@ -38,9 +43,19 @@ router = APIRouter(prefix="/api/v2/llm", tags=["Local LLM"])
 async def process_document_with_llm(
     file: UploadFile = File(...),
     company_id: str = Query(..., description="Company ID for context"),
+    priority: str = Query(
+        "interactive",
+        regex="^(interactive|background)$",
+        description="Scheduling class: interactive or background",
+    ),
     current_user: User = Depends(get_current_user),
 ):
-    """Process document with local LLM for specific company"""
+    """
+    Process document with local LLM for specific company
+
+    Bulk and batch uploads should pass ``priority=background`` so that they
+    queue behind interactive requests instead of delaying them.
+    """
     try:
         # Validate company ID
         company_uuid = input_validator.validate_uuid(company_id, "company_id")
@@ -66,9 +81,10 @@ async def process_document_with_llm(
         }
 
         # Create document with LLM enhancement
-        document = await enhanced_document_service.create_document_with_llm(
-            document_data, current_user.id, company_uuid
-        )
+        with inference_priority(priority):
+            document = await enhanced_document_service.create_document_with_llm(
+                document_data, current_user.id, company_uuid
+            )
 
         return {
             "success": True,
@@ -90,6 +106,11 @@ async def analyze_text_with_llm(
     analysis_type: str = Query(
         "general", description="Type of analysis: general, financial, entities"
     ),
+    priority: str = Query(
+        "interactive",
+        regex="^(interactive|background)$",
+        description="Scheduling class: interactive or background",
+    ),
     current_user: User = Depends(get_current_user),
 ):
     """Analyze text with local LLM for specific company"""
@@ -105,23 +126,24 @@ async def analyze_text_with_llm(
         )
 
         # Perform analysis based on type
-        if analysis_type == "financial":
-            result = await local_llm_service._extract_financial_data_with_context(
-                text, company_context
-            )
-        elif analysis_type == "entities":
-            result = await local_llm_service._extract_entities_with_context(
-                text, company_context
-            )
-        else:
-            result = {
-                "classification": await local_llm_service._classify_document_with_context(
+        with inference_priority(priority):
+            if analysis_type == "financial":
+                result = await local_llm_service._extract_financial_data_with_context(
                     text, company_context
-                ),
-                "summary": await local_llm_service._generate_summary_with_context(
+                )
+            elif analysis_type == "entities":
+                result = await local_llm_service._extract_entities_with_context(
                     text, company_context
-                ),
-            }
+                )
+            else:
+                result = {
+                    "classification": await local_llm_service._classify_document_with_context(
+                        text, company_context
+                    ),
+                    "summary": await local_llm_service._generate_summary_with_context(
+                        text, company_context
+                    ),
+                }
 
         return {
             "success": True,
@@ -130,6 +152,12 @@ async def analyze_text_with_llm(
             "company_context": company_context["company_name"],
         }
 
+    except InferenceOverloaded as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Local LLM is busy, retry shortly: {str(e)}",
+            headers={"Retry-After": "5"},
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -223,12 +251,14 @@ async def get_performance_metrics(current_user: User = Depends(get_current_user)
 async def get_hardware_summary(current_user: User = Depends(get_current_user)):
     """Get human-readable hardware summary"""
     try:
+        # Detects hardware on first use, which the summary reads from
+        detected_hardware = local_llm_service.hardware_config
         summary = local_llm_service.hardware_detector.get_hardware_summary()
 
         return {
             "success": True,
             "hardware_summary": summary,
-            "detected_hardware": local_llm_service.hardware_config,
+            "detected_hardware": detected_hardware,
         }
 
     except Exception as e:
@@ -255,6 +285,8 @@ async def get_model_status(current_user: User = Depends(get_current_user)):
         return {
             "success": True,
             "models_loaded": models_loaded,
+            # unloaded / loading / ready / failed, as models load on first use
+            "model_states": local_llm_service.model_pool.get_status()["models"],
             "recommended_models": recommended_models,
             "hardware_profile": local_llm_service.hardware_config[
                 "performance_profile"
@@ -296,18 +328,17 @@ async def reload_models(current_user: User = Depends(get_current_user)):
 async def clear_llm_cache(current_user: User = Depends(get_current_user)):
     """Clear LLM cache"""
     try:
-        # Clear Redis cache for LLM
-        cache_keys = local_llm_service.redis_client.keys("llm_company_cache:*")
-        if cache_keys:
-            local_llm_service.redis_client.delete(*cache_keys)
+        # Clear cached document results in process and in Redis
+        cleared = result_cache.invalidate()
 
-        # Clear company context cache
+        # Clear company context cache and the saved prompt prefixes built from it
         local_llm_service.company_context_manager.clear_cache()
+        prefix_cache.invalidate()
 
         return {
             "success": True,
             "message": "LLM cache cleared successfully",
-            "cleared_keys": len(cache_keys),
+            "cleared_keys": cleared,
         }
 
     except Exception as e:
@@ -322,8 +353,7 @@ async def get_cache_status(current_user: User = Depends(get_current_user)):
     """Get cache status and statistics"""
     try:
         # Get cache statistics
-        cache_keys = local_llm_service.redis_client.keys("llm_company_cache:*")
-        cache_size = len(cache_keys)
+        cache_stats = result_cache.get_stats()
 
         # Get Redis info
         redis_info = local_llm_service.redis_client.info()
@@ -331,7 +361,8 @@ async def get_cache_status(current_user: User = Depends(get_current_user)):
         return {
             "success": True,
             "cache_status": {
-                "llm_cache_keys": cache_size,
+                "llm_cache_keys": cache_stats.get("l2_entries", 0),
+                "result_cache": cache_stats,
                 "redis_memory_used": redis_info.get("used_memory_human", "Unknown"),
                 "redis_keyspace_hits": redis_info.get("keyspace_hits", 0),
                 "redis_keyspace_misses": redis_info.get("keyspace_misses", 0),
@@ -354,8 +385,9 @@ async def get_cache_status(current_user: User = Depends(get_current_user)):
 async def llm_health_check():
     """Check LLM service health"""
     try:
-        # Check if models are loaded
+        # Models load on first use, so none being loaded yet is not a fault
         models_loaded = len(local_llm_service.models) > 0
+        model_states = local_llm_service.model_pool.get_status()["models"]
 
         # Check hardware status
         hardware_status = await local_llm_service.get_hardware_status()
@@ -365,8 +397,9 @@ async def llm_health_check():
 
         health_status = {
             "service": "local_llm",
-            "status": "healthy" if models_loaded and redis_connected else "degraded",
+            "status": "healthy" if redis_connected else "degraded",
             "models_loaded": models_loaded,
+            "model_states": model_states,
             "redis_connected": redis_connected,
             "hardware_status": hardware_status,
             "timestamp": datetime.utcnow().isoformat(),
@@ -406,11 +439,12 @@ async def get_llm_diagnostics(current_user: User = Depends(get_current_user)):
                 "metrics": await local_llm_service.get_performance_metrics()
             },
             "cache": {
-                "keys": len(local_llm_service.redis_client.keys("llm_company_cache:*")),
+                "results": result_cache.get_stats(),
                 "redis_info": local_llm_service.redis_client.info(),
             },
             "company_contexts": {
-                "cached": len(local_llm_service.company_context_manager.company_configs)
+                **context_snapshots.get_stats(),
+                "entity_indexes": entity_indexes.get_stats(),
             },
         }
 
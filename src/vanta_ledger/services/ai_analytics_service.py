@@ -14,12 +14,8 @@ from uuid import UUID
 
 import numpy as np
 import pandas as pd
-import redis
-from pymongo import MongoClient
-from pymongo.collection import Collection
-from pymongo.database import Database
 
-from ..config import settings
+from ..database import MongoCollection, MongoDatabase, get_redis_client
 
 logger = logging.getLogger(__name__)
 
@@ -27,20 +23,17 @@ logger = logging.getLogger(__name__)
 class EnhancedAIAnalyticsService:
     """Enhanced AI analytics service with predictive capabilities"""
 
+    # Resolved on every use, so a closed and reopened pool is picked up
+    db = MongoDatabase()
+    invoices = MongoCollection("invoices")
+    bills = MongoCollection("bills")
+    payments = MongoCollection("payments")
+    documents = MongoCollection("documents")
+    journal_entries = MongoCollection("journal_entries")
+
     def __init__(self):
         # Database connections
-        self.mongo_client = MongoClient(settings.MONGO_URI)
-        self.db: Database = self.mongo_client[settings.DATABASE_NAME]
-        self.redis_client = redis.Redis.from_url(
-            settings.REDIS_URI, decode_responses=True
-        )
-
-        # Collections
-        self.invoices: Collection = self.db.invoices
-        self.bills: Collection = self.db.bills
-        self.payments: Collection = self.db.payments
-        self.documents: Collection = self.db.documents
-        self.journal_entries: Collection = self.db.journal_entries
+        self.redis_client = get_redis_client()
 
     async def analyze_financial_trends(
         self, user_id: UUID, period_days: int = 90
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Analytics Engine
+Single-pass, multi-metric accumulation over per-company, per-day analytics rows
+
+The dashboard overview, the company dashboard and every ``/analytics/*``
+endpoint stream the same rows (``analytics_daily_rollups`` or the equivalent
+``rollup_rows_pipeline`` aggregation) through this engine. Each registered
+accumulator sees every row once and keeps only bounded state (per company,
+per status or per day), so a request costs one cursor pass however many
+metrics it asks for.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, AsyncIterable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _add_counts(target: Dict[str, int], counts: Optional[Dict[str, int]]):
+    for key, value in (counts or {}).items():
+        target[key] = target.get(key, 0) + value
+
+
+def _percentage(part: float, total: float) -> float:
+    return (part / total * 100) if total else 0
+
+
+class MetricAccumulator:
+    """Base class for metrics computed from analytics rows"""
+
+    def add(self, row: Dict[str, Any]):
+        raise NotImplementedError
+
+    def result(self) -> Any:
+        raise NotImplementedError
+
+
+class FinancialAccumulator(MetricAccumulator):
+    """Extracted amount totals"""
+
+    def __init__(self):
+        self.total = 0.0
+        self.count = 0
+        self.largest = None
+        self.smallest = None
+
+    def add(self, row):
+        self.total += row.get("amount_total", 0)
+        self.count += row.get("amount_count", 0)
+        if row.get("amount_max") is not None:
+            if self.largest is None or row["amount_max"] > self.largest:
+                self.largest = row["amount_max"]
+        if row.get("amount_min") is not None:
+            if self.smallest is None or row["amount_min"] < self.smallest:
+                self.smallest = row["amount_min"]
+
+    def result(self):
+        return {
+            "total": self.total,
+            "count": self.count,
+            "average": self.total / self.count if self.count else 0,
+            "largest": self.largest or 0,
+            "smallest": self.smallest or 0,
+        }
+
+
+class ComplianceAccumulator(MetricAccumulator):
+    """
+    Tax information and compliance issue coverage
+
+    Distinct tax numbers, issues and certificates are not counted here: that
+    needs every value seen so far, so ``AnalyticsDashboard`` counts them on the
+    server with ``distinct_entities_pipeline`` and adds the totals.
+    """
+
+    def __init__(self):
+        self.documents = 0
+        self.with_tax = 0
+        self.with_issues = 0
+
+    def add(self, row):
+        self.documents += row.get("documents", 0)
+        self.with_tax += row.get("with_tax", 0)
+        self.with_issues += row.get("with_issues", 0)
+
+    def result(self):
+        compliance_score = _percentage(self.with_tax, self.documents)
+        risk_score = _percentage(self.with_issues, self.documents)
+
+        return {
+            "compliance_score": round(compliance_score, 2),
+            "risk_score": round(risk_score, 2),
+            "documents_with_tax_info": self.with_tax,
+            "documents_with_issues": self.with_issues,
+            "compliance_status": (
+                "COMPLIANT"
+                if compliance_score > 80 and risk_score < 20
+                else "NON_COMPLIANT"
+            ),
+        }
+
+
+class ProcessingAccumulator(MetricAccumulator):
+    """Processing status, document type and processing time distribution"""
+
+    def __init__(self):
+        self.documents = 0
+        self.status: Dict[str, int] = {}
+        self.document_types: Dict[str, int] = {}
+        self.companies: Dict[str, int] = {}
+        self.histogram: Dict[str, int] = {}
+        self.time_total = 0.0
+        self.time_count = 0
+
+    def add(self, row):
+        self.documents += row.get("documents", 0)
+        _add_counts(self.status, row.get("status"))
+        _add_counts(self.document_types, row.get("document_types"))
+        _add_counts(self.histogram, row.get("processing_time_histogram"))
+        company = row.get("company") or "unknown"
+        self.companies[company] = self.companies.get(company, 0) + row.get(
+            "documents", 0
+        )
+        self.time_total += row.get("processing_time_total", 0)
+        self.time_count += row.get("processing_time_count", 0)
+
+    def result(self):
+        average = self.time_total / self.time_count if self.time_count else 0
+
+        return {
+            "total_documents": self.documents,
+            "processing_status": self.status,
+            "document_types": self.document_types,
+            "companies": self.companies,
+            "average_processing_time": round(average, 2),
+            "processing_time_histogram": self.histogram,
+            "success_rate": _percentage(self.status.get("success", 0), self.documents),
+        }
+
+
+def _growth_rate(values: List[float]) -> float:
+    """Calculate growth rate from a list of values"""
+    if len(values) < 2:
+        return 0.0
+
+    first_value = values[0] if values[0] != 0 else 1
+    last_value = values[-1]
+
+    return ((last_value - first_value) / first_value) * 100
+
+
+class TrendsAccumulator(MetricAccumulator):
+    """Daily document and amount trends over the most recent days"""
+
+    def __init__(self, days: int = 7):
+        self.days = days
+        self.daily: Dict[str, List[float]] = {}
+
+    def add(self, row):
+        day = row.get("day")
+        if not day:
+            return
+        counts = self.daily.setdefault(day, [0, 0.0])
+        counts[0] += row.get("documents", 0)
+        counts[1] += row.get("amount_total", 0)
+
+        # Rows arrive in any order; keep memory bounded to a window of days
+        if len(self.daily) > self.days * 2:
+            for stale in sorted(self.daily)[: -self.days]:
+                del self.daily[stale]
+
+    def result(self):
+        dates = sorted(self.daily)[-self.days :]
+        document_trend = [self.daily[day][0] for day in dates]
+        amount_trend = [self.daily[day][1] for day in dates]
+
+        return {
+            "document_trend": document_trend,
+            "amount_trend": amount_trend,
+            "trend_dates": dates,
+            "growth_rate": _growth_rate(document_trend),
+            "amount_growth_rate": _growth_rate(amount_trend),
+        }
+
+
+class AlertsAccumulator(MetricAccumulator):
+    """Compliance, large transaction and processing failure alerts"""
+
+    def __init__(self):
+        self.with_issues = 0
+        self.large_amounts = 0
+        self.failed = 0
+
+    def add(self, row):
+        self.with_issues += row.get("with_issues", 0)
+        self.large_amounts += row.get("large_amounts", 0)
+        self.failed += (row.get("status") or {}).get("failed", 0)
+
+    def result(self):
+        alerts = []
+        timestamp = datetime.now().isoformat()
+
+        if self.with_issues:
+            alerts.append(
+                {
+                    "type": "compliance_risk",
+                    "severity": "high",
+                    "message": f"{self.with_issues} documents have compliance issues",
+                    "timestamp": timestamp,
+                }
+            )
+        if self.large_amounts:
+            alerts.append(
+                {
+                    "type": "large_transaction",
+                    "severity": "medium",
+                    "message": f"{self.large_amounts} transactions exceed 10M KSH",
+                    "timestamp": timestamp,
+                }
+            )
+        if self.failed:
+            alerts.append(
+                {
+                    "type": "processing_failure",
+                    "severity": "medium",
+                    "message": f"{self.failed} documents failed to process",
+                    "timestamp": timestamp,
+                }
+            )
+
+        return alerts
+
+
+class TopPerformersAccumulator(MetricAccumulator):
+    """Companies ranked by documents, amounts and compliance"""
+
+    def __init__(self, limit: int = 5):
+        self.limit = limit
+        self.companies: Dict[str, Dict[str, float]] = {}
+
+    def add(self, row):
+        company = row.get("company") or "Unknown"
+        metrics = self.companies.setdefault(
+            company, {"documents": 0, "total_amount": 0, "with_tax": 0}
+        )
+        metrics["documents"] += row.get("documents", 0)
+        metrics["total_amount"] += row.get("amount_total", 0)
+        metrics["with_tax"] += row.get("with_tax", 0)
+
+    def result(self):
+        company_metrics = {
+            company: {
+                "documents": metrics["documents"],
+                "total_amount": metrics["total_amount"],
+                "avg_amount": (
+                    metrics["total_amount"] / metrics["documents"]
+                    if metrics["documents"]
+                    else 0
+                ),
+                "compliance_score": _percentage(
+                    metrics["with_tax"], metrics["documents"]
+                ),
+            }
+            for company, metrics in self.companies.items()
+        }
+
+        def top(key):
+            ranked = sorted(
+                company_metrics.items(), key=lambda x: x[1][key], reverse=True
+            )
+            return [{"company": k, "metrics": v} for k, v in ranked[: self.limit]]
+
+        return {
+            "top_by_documents": top("documents"),
+            "top_by_amount": top("total_amount"),
+            "top_by_compliance": top("compliance_score"),
+        }
+
+
+class RiskAccumulator(MetricAccumulator):
+    """Document risk distribution (overview scoring)"""
+
+    def __init__(self):
+        self.documents = 0
+        self.risk: Dict[str, int] = {}
+
+    def add(self, row):
+        self.documents += row.get("documents", 0)
+        _add_counts(self.risk, row.get("risk"))
+
+    def result(self):
+        high = self.risk.get("high", 0)
+        medium = self.risk.get("medium", 0)
+        low = self.documents - high - medium
+
+        return {
+            "high_risk_documents": high,
+            "medium_risk_documents": medium,
+            "low_risk_documents": low,
+            "overall_risk_level": (
+                "HIGH"
+                if high > self.documents * 0.1
+                else "MEDIUM" if medium > self.documents * 0.2 else "LOW"
+            ),
+            "risk_distribution": {"high": high, "medium": medium, "low": low},
+            "risk_percentage": {
+                "high": _percentage(high, self.documents),
+                "medium": _percentage(medium, self.documents),
+                "low": _percentage(low, self.documents),
+            },
+        }
+
+
+class CompanyRiskAccumulator(RiskAccumulator):
+    """Document risk distribution (company dashboard scoring)"""
+
+    def add(self, row):
+        self.documents += row.get("documents", 0)
+        _add_counts(self.risk, row.get("company_risk"))
+
+    def result(self):
+        high = self.risk.get("high", 0)
+        medium = self.risk.get("medium", 0)
+
+        return {
+            "high_risk_documents": high,
+            "medium_risk_documents": medium,
+            "low_risk_documents": self.documents - high - medium,
+            "overall_risk_level": (
+                "HIGH" if high > 0 else "MEDIUM" if medium > 0 else "LOW"
+            ),
+        }
+
+
+class AnalyticsEngine:
+    """Feeds one stream of analytics rows to every requested accumulator"""
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], MetricAccumulator]] = {}
+
+    def register(self, name: str, factory: Callable[[], MetricAccumulator]):
+        """Register an accumulator factory under a metric name"""
+        self._factories[name] = factory
+
+    @property
+    def metrics(self) -> List[str]:
+        return list(self._factories)
+
+    async def run(
+        self, rows: AsyncIterable[Dict[str, Any]], metrics: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Stream ``rows`` once and return ``{metric: result}``.
+
+        Raises:
+            KeyError: If an unknown metric is requested.
+        """
+        accumulators = {
+            name: self._factories[name]() for name in (metrics or self._factories)
+        }
+
+        async for row in rows:
+            for accumulator in accumulators.values():
+                accumulator.add(row)
+
+        results = {}
+        for name, accumulator in accumulators.items():
+            try:
+                results[name] = accumulator.result()
+            except Exception as e:
+                logger.error(f"❌ {name} metrics failed: {e}")
+                results[name] = {
+                    "error": f"An internal error occurred while computing {name} metrics."
+                }
+        return results
+
+
+# Global engine with the dashboard metrics
+analytics_engine = AnalyticsEngine()
+analytics_engine.register("financial", FinancialAccumulator)
+analytics_engine.register("compliance", ComplianceAccumulator)
+analytics_engine.register("processing", ProcessingAccumulator)
+analytics_engine.register("trends", TrendsAccumulator)
+analytics_engine.register("alerts", AlertsAccumulator)
+analytics_engine.register("top_performers", TopPerformersAccumulator)
+analytics_engine.register("risk", RiskAccumulator)
+analytics_engine.register("company_risk", CompanyRiskAccumulator)
@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Analytics Aggregation Pipelines
+Server-side MongoDB pipelines backing the analytics dashboard
+
+Extracted amounts arrive as strings ("KSh 1,234.56", "$500"). They are
+normalized once at ingest into ``entities.amount_values`` (a list of floats);
+documents written before that field existed are normalized on the fly inside
+the pipeline, and ``backfill_amount_values`` persists the same expression.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Optional
+
+AMOUNT_VALUES_FIELD = "entities.amount_values"
+LARGE_AMOUNT_THRESHOLD = 10_000_000  # 10M KSH
+MEDIUM_AMOUNT_THRESHOLD = 1_000_000  # 1M KSH
+
+# Upper bounds (seconds) of the processing-time histogram buckets
+PROCESSING_TIME_BUCKETS = [(1, "lt_1s"), (5, "lt_5s"), (30, "lt_30s"), (120, "lt_2m")]
+PROCESSING_TIME_OVERFLOW = "gte_2m"
+
+# Entity lists whose distinct values are reported by the dashboards
+DISTINCT_ENTITIES = ["tax_numbers", "compliance_issues", "certificates"]
+
+_NUMBER_RE = re.compile(r"-?\d+(?:\.\d+)?")
+
+
+def parse_amount(value: Any) -> Optional[float]:
+    """Parse an extracted amount (number or currency string) into a float"""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if value is None:
+        return None
+    match = _NUMBER_RE.search(str(value).replace(",", ""))
+    return float(match.group()) if match else None
+
+
+def normalize_amounts(amounts: Optional[Iterable[Any]]) -> List[float]:
+    """Return the numeric values of a list of extracted amounts, skipping junk"""
+    values = []
+    for amount in amounts or []:
+        parsed = parse_amount(amount)
+        if parsed is not None:
+            values.append(parsed)
+    return values
+
+
+def with_amount_values(entities: Dict[str, Any]) -> Dict[str, Any]:
+    """Return ``entities`` with ``amount_values`` populated for storage"""
+    return {**entities, "amount_values": normalize_amounts(entities.get("amounts"))}
+
+
+# ----------------------------------------------------------------------
+# Expression helpers
+# ----------------------------------------------------------------------
+
+
+def _truthy(field: str) -> Dict[str, Any]:
+    """Python-style truthiness: non-empty arrays, or any non-null scalar"""
+    return {
+        "$cond": [
+            {"$isArray": field},
+            {"$gt": [{"$size": field}, 0]},
+            {"$and": [field]},
+        ]
+    }
+
+
+def _as_int(expr: Dict[str, Any]) -> Dict[str, Any]:
+    return {"$cond": [expr, 1, 0]}
+
+
+def _count_amounts(condition: Dict[str, Any]) -> Dict[str, Any]:
+    return {"$size": {"$filter": {"input": "$_amounts", "as": "v", "cond": condition}}}
+
+
+# Parse a raw amount string with the same rules as ``parse_amount``
+_PARSE_RAW_AMOUNT = {
+    "$convert": {
+        "input": {
+            "$let": {
+                "vars": {
+                    "found": {
+                        "$regexFind": {
+                            "input": {
+                                "$replaceAll": {
+                                    "input": {
+                                        "$convert": {
+                                            "input": "$$a",
+                                            "to": "string",
+                                            "onError": "",
+                                            "onNull": "",
+                                        }
+                                    },
+                                    "find": ",",
+                                    "replacement": "",
+                                }
+                            },
+                            "regex": _NUMBER_RE.pattern,
+                        }
+                    }
+                },
+                "in": "$$found.match",
+            }
+        },
+        "to": "double",
+        "onError": None,
+        "onNull": None,
+    }
+}
+
+AMOUNT_VALUES_EXPR = {
+    "$ifNull": [
+        "$" + AMOUNT_VALUES_FIELD,
+        {
+            "$filter": {
+                "input": {
+                    "$map": {
+                        "input": {"$ifNull": ["$entities.amounts", []]},
+                        "as": "a",
+                        "in": _PARSE_RAW_AMOUNT,
+                    }
+                },
+                "as": "v",
+                "cond": {"$ne": ["$$v", None]},
+            }
+        },
+    ]
+}
+
+# Fields the dashboard needs; everything else (text, key phrases...) is dropped early
+_PROJECTION = {
+    "company": 1,
+    "filename": 1,
+    "document_type": 1,
+    "processing_status": 1,
+    "processing_time": 1,
+    "processing_date": 1,
+    "entities.amounts": 1,
+    "entities.amount_values": 1,
+    "entities.tax_numbers": 1,
+    "entities.compliance_issues": 1,
+}
+
+_DERIVED_FIELDS = {
+    "_amounts": AMOUNT_VALUES_EXPR,
+    "_has_tax": _truthy("$entities.tax_numbers"),
+    "_has_issues": _truthy("$entities.compliance_issues"),
+}
+
+
+def _prepare_stages(match: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    stages = [{"$match": match}] if match else []
+    stages.append({"$project": _PROJECTION})
+    stages.append({"$addFields": _DERIVED_FIELDS})
+    stages.append(
+        {
+            "$addFields": {
+                "_amount_total": {"$sum": "$_amounts"},
+                "_large_amounts": _count_amounts(
+                    {"$gt": ["$$v", LARGE_AMOUNT_THRESHOLD]}
+                ),
+                "_medium_amounts": _count_amounts(
+                    {
+                        "$and": [
+                            {"$gt": ["$$v", MEDIUM_AMOUNT_THRESHOLD]},
+                            {"$lte": ["$$v", LARGE_AMOUNT_THRESHOLD]},
+                        ]
+                    }
+                ),
+            }
+        }
+    )
+    return stages
+
+
+# Overview risk: +3 for compliance issues, -1 for clean tax info, +2 per amount
+# above 10M and +1 per amount above 1M
+_OVERVIEW_RISK_SCORE = {
+    "$add": [
+        {"$multiply": [_as_int("$_has_issues"), 3]},
+        {
+            "$multiply": [
+                _as_int({"$and": ["$_has_tax", {"$not": ["$_has_issues"]}]}),
+                -1,
+            ]
+        },
+        {"$multiply": ["$_large_amounts", 2]},
+        "$_medium_amounts",
+    ]
+}
+
+_OVERVIEW_RISK_LEVEL = {
+    "$switch": {
+        "branches": [
+            {"case": {"$gte": ["$_risk_score", 3]}, "then": "high"},
+            {"case": {"$gte": ["$_risk_score", 1]}, "then": "medium"},
+        ],
+        "default": "low",
+    }
+}
+
+# Company risk: high on compliance issues, medium on any amount above 1M
+_COMPANY_RISK_LEVEL = {
+    "$switch": {
+        "branches": [
+            {"case": "$_has_issues", "then": "high"},
+            {
+                "case": {"$gt": [{"$add": ["$_large_amounts", "$_medium_amounts"]}, 0]},
+                "then": "medium",
+            },
+        ],
+        "default": "low",
+    }
+}
+
+_PROCESSING_TIME_BUCKET = {
+    "$switch": {
+        "branches": [
+            {"case": {"$lt": ["$processing_time", upper_bound]}, "then": bucket}
+            for upper_bound, bucket in PROCESSING_TIME_BUCKETS
+        ],
+        "default": PROCESSING_TIME_OVERFLOW,
+    }
+}
+
+# YYYY-MM-DD for string or date ``processing_date`` values, else null
+_ROLLUP_DAY = {
+    "$switch": {
+        "branches": [
+            {
+                "case": {"$eq": [{"$type": "$processing_date"}, "date"]},
+                "then": {
+                    "$dateToString": {"format": "%Y-%m-%d", "date": "$processing_date"}
+                },
+            },
+            {
+                "case": {
+                    "$and": [
+                        {"$eq": [{"$type": "$processing_date"}, "string"]},
+                        {"$ne": ["$processing_date", ""]},
+                    ]
+                },
+                "then": {"$substrCP": ["$processing_date", 0, 10]},
+            },
+        ],
+        "default": None,
+    }
+}
+
+
+def _key_or_unknown(field: str) -> Dict[str, Any]:
+    return {"$cond": [{"$and": [field]}, {"$toString": field}, "unknown"]}
+
+
+def _count_map(field: Any) -> Dict[str, Any]:
+    """``{value: occurrences}`` object for an array of pushed keys"""
+    return {
+        "$arrayToObject": {
+            "$map": {
+                "input": {"$setUnion": [field]},
+                "as": "k",
+                "in": {
+                    "k": "$$k",
+                    "v": {
+                        "$size": {
+                            "$filter": {
+                                "input": field,
+                                "cond": {"$eq": ["$$this", "$$k"]},
+                            }
+                        }
+                    },
+                },
+            }
+        }
+    }
+
+
+def rollup_rows_pipeline(
+    match: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Aggregate ``processed_documents`` into per-company, per-day rows with the
+    same shape as the ``analytics_daily_rollups`` collection.
+
+    Used when rollups are disabled so the analytics engine always consumes the
+    same row format.
+    """
+    return _prepare_stages(match) + [
+        {
+            "$addFields": {
+                "_risk_score": _OVERVIEW_RISK_SCORE,
+                "_company_risk": _COMPANY_RISK_LEVEL,
+                "_timed": _truthy("$processing_time"),
+                "_day": _ROLLUP_DAY,
+            }
+        },
+        {
+            "$group": {
+                "_id": {"company": "$company", "day": "$_day"},
+                "documents": {"$sum": 1},
+                "_statuses": {"$push": _key_or_unknown("$processing_status")},
+                "_types": {"$push": _key_or_unknown("$document_type")},
+                "_risks": {"$push": _OVERVIEW_RISK_LEVEL},
+                "_company_risks": {"$push": "$_company_risk"},
+                "_buckets": {
+                    "$push": {"$cond": ["$_timed", _PROCESSING_TIME_BUCKET, None]}
+                },
+                "with_tax": {"$sum": _as_int("$_has_tax")},
+                "with_issues": {"$sum": _as_int("$_has_issues")},
+                "amount_total": {"$sum": "$_amount_total"},
+                "amount_count": {"$sum": {"$size": "$_amounts"}},
+                "amount_max": {"$max": {"$max": "$_amounts"}},
+                "amount_min": {"$min": {"$min": "$_amounts"}},
+                "large_amounts": {"$sum": "$_large_amounts"},
+                "processing_time_total": {
+                    "$sum": {"$cond": ["$_timed", "$processing_time", 0]}
+                },
+                "processing_time_count": {"$sum": _as_int("$_timed")},
+            }
+        },
+        {
+            "$project": {
+                "_id": 0,
+                "company": "$_id.company",
+                "day": "$_id.day",
+                "documents": 1,
+                "status": _count_map("$_statuses"),
+                "document_types": _count_map("$_types"),
+                "risk": _count_map("$_risks"),
+                "company_risk": _count_map("$_company_risks"),
+                "processing_time_histogram": _count_map(
+                    {
+                        "$filter": {
+                            "input": "$_buckets",
+                            "cond": {"$ne": ["$$this", None]},
+                        }
+                    }
+                ),
+                "with_tax": 1,
+                "with_issues": 1,
+                "amount_total": 1,
+                "amount_count": 1,
+                "amount_max": 1,
+                "amount_min": 1,
+                "large_amounts": 1,
+                "processing_time_total": 1,
+                "processing_time_count": 1,
+            }
+        },
+    ]
+
+
+def distinct_entities_pipeline(
+    match: Optional[Dict[str, Any]] = None, prefix: str = "entities."
+) -> List[Dict[str, Any]]:
+    """
+    Count the distinct values of each ``DISTINCT_ENTITIES`` list on the server.
+
+    Values are grouped by MongoDB, which spills to disk with ``allowDiskUse``,
+    so the caller receives one small document
+    (``{"total_tax_numbers": n, ...}``) however many values exist.
+    ``prefix`` is ``"entities."`` for ``processed_documents`` and ``""`` for
+    rollup rows.
+    """
+    stages = [{"$match": match}] if match else []
+    stages.append({"$project": {f"{prefix}{field}": 1 for field in DISTINCT_ENTITIES}})
+    stages.append(
+        {
+            "$facet": {
+                field: [
+                    {"$unwind": f"${prefix}{field}"},
+                    {"$group": {"_id": f"${prefix}{field}"}},
+                    {"$count": "n"},
+                ]
+                for field in DISTINCT_ENTITIES
+            }
+        }
+    )
+    stages.append(
+        {
+            "$project": {
+                f"total_{field}": {
+                    "$ifNull": [{"$arrayElemAt": [f"${field}.n", 0]}, 0]
+                }
+                for field in DISTINCT_ENTITIES
+            }
+        }
+    )
+    return stages
+
+
+def backfill_amount_values(collection, batch_filter: Optional[Dict] = None) -> int:
+    """
+    Persist ``entities.amount_values`` for documents stored before ingest-time
+    normalization, using a server-side update pipeline.
+
+    Returns:
+        int: Number of documents updated.
+    """
+    query = {AMOUNT_VALUES_FIELD: {"$exists": False}}
+    if batch_filter:
+        query.update(batch_filter)
+    result = collection.update_many(
+        query, [{"$set": {AMOUNT_VALUES_FIELD: AMOUNT_VALUES_EXPR}}]
+    )
+    return result.modified_count
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Analytics Rollups
+Per-company, per-day dashboard counters maintained incrementally at ingest
+
+Each row in ``analytics_daily_rollups`` summarises the ``processed_documents``
+of one company on one day. Writers call ``record_document`` right after storing
+a document there (``record_documents`` for a batch); ``rebuild_rollups``
+recomputes the rows from the same collection for backfills. Dashboards fold a
+few hundred rows through the analytics engine instead of scanning every
+document.
+
+Before a document is counted its ``_id`` is inserted into
+``analytics_rollup_markers``; a document whose marker already exists is
+skipped, so recording it twice (a retried batch, a rebuild racing ingest)
+counts it once. A writer that dies between the marker and the counters leaves
+the document uncounted until the next ``rebuild_rollups``.
+
+Only pymongo handles are used here so the standalone ingestion scripts in
+``database/`` can maintain the rollups with their own connections.
+"""
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from .analytics_pipelines import (
+    DISTINCT_ENTITIES,
+    LARGE_AMOUNT_THRESHOLD,
+    MEDIUM_AMOUNT_THRESHOLD,
+    PROCESSING_TIME_BUCKETS,
+    PROCESSING_TIME_OVERFLOW,
+    normalize_amounts,
+)
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_COLLECTION = "analytics_daily_rollups"
+
+# One marker per document already folded into the rollups (``_id`` is the
+# document ``_id``)
+MARKER_COLLECTION = "analytics_rollup_markers"
+
+# Duplicate key error code
+_DUPLICATE_KEY = 11000
+
+
+def _field_key(value: Any) -> str:
+    """Make a status/type value safe to use as a MongoDB field name"""
+    if not value:
+        return "unknown"
+    return str(value).replace(".", "_").replace("$", "_")
+
+
+def _rollup_day(processing_date: Any) -> Optional[str]:
+    if isinstance(processing_date, datetime):
+        return processing_date.date().isoformat()
+    if isinstance(processing_date, str) and processing_date:
+        return processing_date[:10]
+    return None
+
+
+def _processing_time_bucket(seconds: float) -> str:
+    for upper_bound, bucket in PROCESSING_TIME_BUCKETS:
+        if seconds < upper_bound:
+            return bucket
+    return PROCESSING_TIME_OVERFLOW
+
+
+def rollup_update(document: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Build the ``(filter, update)`` pair that folds one processed document into
+    its company/day rollup row.
+
+    ``document`` is a stored ``processed_documents`` document (``_id``,
+    company, processing_date, processing_status, document_type,
+    processing_time, entities). The update counts the document
+    unconditionally; ``record_documents`` claims its marker first.
+    """
+    entities = document.get("entities") or {}
+    amounts = entities.get("amount_values")
+    if amounts is None:
+        amounts = normalize_amounts(entities.get("amounts"))
+
+    has_tax = bool(entities.get("tax_numbers"))
+    has_issues = bool(entities.get("compliance_issues"))
+    large = sum(1 for v in amounts if v > LARGE_AMOUNT_THRESHOLD)
+    medium = sum(
+        1 for v in amounts if MEDIUM_AMOUNT_THRESHOLD < v <= LARGE_AMOUNT_THRESHOLD
+    )
+
+    # Overview risk score (mirrors analytics_pipelines._OVERVIEW_RISK_SCORE)
+    risk_score = (3 if has_issues else 0) - (1 if has_tax and not has_issues else 0)
+    risk_score += 2 * large + medium
+    risk = "high" if risk_score >= 3 else "medium" if risk_score >= 1 else "low"
+
+    # Company dashboard risk level
+    company_risk = "high" if has_issues else "medium" if large + medium else "low"
+
+    inc = {
+        "documents": 1,
+        f"status.{_field_key(document.get('processing_status'))}": 1,
+        f"document_types.{_field_key(document.get('document_type'))}": 1,
+        "with_tax": int(has_tax),
+        "with_issues": int(has_issues),
+        "amount_total": sum(amounts),
+        "amount_count": len(amounts),
+        "large_amounts": large,
+        f"risk.{risk}": 1,
+        f"company_risk.{company_risk}": 1,
+    }
+
+    processing_time = document.get("processing_time")
+    if processing_time:
+        inc["processing_time_total"] = processing_time
+        inc["processing_time_count"] = 1
+        inc[f"processing_time_histogram.{_processing_time_bucket(processing_time)}"] = 1
+
+    update: Dict[str, Any] = {
+        "$inc": inc,
+        "$set": {"updated_at": datetime.now()},
+    }
+    if amounts:
+        update["$max"] = {"amount_max": max(amounts)}
+        update["$min"] = {"amount_min": min(amounts)}
+
+    add_to_set = {
+        field: {"$each": list(entities[field])}
+        for field in DISTINCT_ENTITIES
+        if entities.get(field)
+    }
+    if add_to_set:
+        update["$addToSet"] = add_to_set
+
+    key = {
+        "company": document.get("company"),
+        "day": _rollup_day(document.get("processing_date")),
+    }
+    return key, update
+
+
+def _duplicate_indexes(error: BulkWriteError) -> List[int]:
+    """Indexes of the writes that failed only on a duplicate key"""
+    details = error.details or {}
+    write_errors = details.get("writeErrors", [])
+    if details.get("writeConcernErrors") or any(
+        write_error.get("code") != _DUPLICATE_KEY for write_error in write_errors
+    ):
+        raise error
+    return [write_error["index"] for write_error in write_errors]
+
+
+def _claim(db, documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Insert a marker for each document and return those not yet folded in
+
+    The marker ``_id`` is the document ``_id``, so a document recorded before
+    (or twice in one batch) fails on the duplicate key and is left out.
+    """
+    markers = [
+        {"_id": document["_id"], "company": document.get("company")}
+        for document in documents
+    ]
+    try:
+        db[MARKER_COLLECTION].insert_many(markers, ordered=False)
+    except BulkWriteError as e:
+        skipped = set(_duplicate_indexes(e))
+        return [
+            document for index, document in enumerate(documents) if index not in skipped
+        ]
+    return documents
+
+
+def _bulk_upsert(db, updates: List[UpdateOne], retry: bool = True):
+    """
+    Unordered bulk upsert into the company/day rows
+
+    A duplicate key means another writer created the same row at the same
+    time; those updates are retried once and then match the existing row.
+    """
+    try:
+        db[ROLLUP_COLLECTION].bulk_write(updates, ordered=False)
+    except BulkWriteError as e:
+        duplicates = _duplicate_indexes(e)
+        if not retry:
+            raise
+        _bulk_upsert(db, [updates[index] for index in duplicates], retry=False)
+
+
+def _fold(db, documents: List[Dict[str, Any]]) -> int:
+    """Claim a batch of documents and count the ones not already folded in"""
+    documents = _claim(db, documents)
+    if documents:
+        updates = [
+            UpdateOne(*rollup_update(document), upsert=True) for document in documents
+        ]
+        _bulk_upsert(db, updates)
+    return len(documents)
+
+
+def record_document(db, document: Dict[str, Any]) -> bool:
+    """
+    Fold a document just stored in ``processed_documents`` into the rollups.
+
+    Failures are logged rather than raised so analytics never block ingestion;
+    the call can be repeated, and ``rebuild_rollups`` repairs any drift.
+    """
+    return record_documents(db, [document])
+
+
+def record_documents(db, documents: List[Dict[str, Any]]) -> bool:
+    """
+    Fold a batch of freshly stored documents into the rollups in one bulk write.
+
+    Like ``record_document``, failures are logged rather than raised.
+    """
+    if not documents:
+        return True
+    try:
+        _fold(db, documents)
+        return True
+    except Exception as e:
+        logger.warning(f"Analytics rollup update failed: {e}")
+        return False
+
+
+def ensure_rollup_indexes(db):
+    """
+    Create the unique company/day index the rollup upserts rely on, and the
+    company index ``rebuild_rollups`` uses to clear a company's markers
+    """
+    db[ROLLUP_COLLECTION].create_index(
+        [("company", ASCENDING), ("day", ASCENDING)], unique=True
+    )
+    db[MARKER_COLLECTION].create_index([("company", ASCENDING)])
+
+
+def rebuild_rollups(db, company: Optional[str] = None, batch_size: int = 1000) -> int:
+    """
+    Recompute rollup rows from ``processed_documents``.
+
+    The rows and their markers are cleared first, then documents are streamed
+    and folded in with unordered bulk writes, so memory stays bounded by
+    ``batch_size``. Documents recorded by ingest while a rebuild is running
+    are still counted once.
+
+    Returns:
+        int: Number of documents folded into the rollups by the rebuild.
+    """
+    query = {"company": company} if company is not None else {}
+    ensure_rollup_indexes(db)
+    db[ROLLUP_COLLECTION].delete_many(query)
+    db[MARKER_COLLECTION].delete_many(query)
+
+    projection = {
+        "_id": 1,
+        "company": 1,
+        "processing_date": 1,
+        "processing_status": 1,
+        "document_type": 1,
+        "processing_time": 1,
+        "entities.amounts": 1,
+        "entities.amount_values": 1,
+        **{f"entities.{field}": 1 for field in DISTINCT_ENTITIES},
+    }
+
+    processed = 0
+    batch: List[Dict[str, Any]] = []
+    for document in db.processed_documents.find(
+        query, projection, batch_size=batch_size
+    ):
+        batch.append(document)
+        if len(batch) >= batch_size:
+            processed += _fold(db, batch)
+            batch = []
+
+    if batch:
+        processed += _fold(db, batch)
+
+    logger.info(f"✅ Rebuilt analytics rollups from {processed} documents")
+    return processed
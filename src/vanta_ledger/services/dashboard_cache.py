@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Dashboard Cache
+Two-tier (in-process L1 + Redis L2) cache for dashboard and ``/analytics/*`` payloads
+
+Entries are fresh for ``DASHBOARD_CACHE_TTL`` seconds and may then be served
+stale for a further ``DASHBOARD_CACHE_STALE_TTL`` seconds while a single
+background refresh recomputes them. Document ingestion and ledger writes call
+``invalidate_dashboards`` (sync writers) or ``dashboard_cache.invalidate``
+(async routes); invalidation deletes the Redis entries by tag and is broadcast
+on a pub/sub channel so every worker drops its L1 copy.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..config import settings
+from ..database import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "dashboard_cache"
+INVALIDATION_CHANNEL = f"{KEY_PREFIX}:invalidate"
+
+# Every entry carries this tag so a global invalidation can find it
+ALL_TAG = "all"
+# Cross-company payloads (overview, /analytics/*) change with any company's data
+GLOBAL_TAG = "global"
+
+
+def company_tag(company_id: Any) -> str:
+    return f"company:{company_id}"
+
+
+def cache_key(kind: str, *parts: Any) -> str:
+    """Build a cache key such as ``overview:admin:ACME``"""
+    return ":".join([kind, *(str(part) if part else "-" for part in parts)])
+
+
+def invalidation_tags(company_id: Optional[Any] = None) -> List[str]:
+    """Tags to drop after a write for ``company_id`` (everything if unknown)"""
+    if company_id is None:
+        return [ALL_TAG]
+    return [GLOBAL_TAG, company_tag(company_id)]
+
+
+def _is_error(value: Any) -> bool:
+    return isinstance(value, dict) and "error" in value
+
+
+def _cacheable(payload: Any) -> bool:
+    # Service methods report failures as ``{"error": ...}``, either for the
+    # whole payload or for one section of it (``{"system_health": {"error":
+    # ...}}``); never pin those
+    if not isinstance(payload, dict):
+        return True
+    return not (_is_error(payload) or any(map(_is_error, payload.values())))
+
+
+class _Entry:
+    __slots__ = ("payload", "fresh_until", "stale_until", "tags")
+
+    def __init__(self, payload, fresh_until, stale_until, tags):
+        self.payload = payload
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+        self.tags = tags
+
+
+class DashboardCache:
+    """Stale-while-revalidate cache with an in-process L1 over Redis"""
+
+    def __init__(
+        self,
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None,
+        max_entries: Optional[int] = None,
+    ):
+        self.ttl = ttl if ttl is not None else settings.DASHBOARD_CACHE_TTL
+        self.stale_ttl = (
+            stale_ttl if stale_ttl is not None else settings.DASHBOARD_CACHE_STALE_TTL
+        )
+        self.max_entries = max_entries or settings.DASHBOARD_CACHE_L1_SIZE
+        self.redis = None
+        self.instance_id = uuid.uuid4().hex
+
+        self._l1: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._listener: Optional[asyncio.Task] = None
+        # Bumped by every invalidation so in-flight computations are not stored
+        self._generation = 0
+        self.stats = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "invalidations": 0,
+            "errors": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self, redis):
+        """Use ``redis`` (``redis.asyncio``) as L2 and listen for invalidations"""
+        self.redis = redis
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        """Stop the invalidation listener and any background refreshes"""
+        tasks = list(self._refreshing.values())
+        if self._listener is not None:
+            tasks.append(self._listener)
+            self._listener = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._refreshing.clear()
+        self.redis = None
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    async def get_or_compute(
+        self,
+        key: str,
+        tags: List[str],
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """
+        Return the cached payload for ``key``, computing it on a miss
+
+        Stale entries are returned immediately and refreshed in the background;
+        concurrent misses for the same key share one computation.
+        """
+        now = time.time()
+        entry = self._l1.get(key)
+        if entry is not None and entry.stale_until <= now:
+            self._l1.pop(key, None)
+            entry = None
+        if entry is not None:
+            self._l1.move_to_end(key)
+            self.stats["l1_hits"] += 1
+        else:
+            entry = await self._l2_get(key, tags)
+            if entry is not None:
+                self._l1_put(key, entry)
+                self.stats["l2_hits"] += 1
+
+        if entry is not None:
+            if entry.fresh_until <= now:
+                self.stats["stale_hits"] += 1
+                self._schedule_refresh(key, tags, compute)
+            return entry.payload
+
+        self.stats["misses"] += 1
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            payload = await self._compute_and_store(key, tags, compute)
+            future.set_result(payload)
+            return payload
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Consume the exception when nobody else was waiting on it
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def _schedule_refresh(self, key, tags, compute):
+        if key in self._refreshing or key in self._inflight:
+            return
+        task = asyncio.create_task(self._refresh(key, tags, compute))
+        self._refreshing[key] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+
+    async def _refresh(self, key, tags, compute):
+        try:
+            await self._compute_and_store(key, tags, compute)
+            self.stats["refreshes"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Dashboard cache refresh failed for {key}: {e}")
+
+    async def _compute_and_store(self, key, tags, compute):
+        generation = self._generation
+        payload = await compute()
+        if _cacheable(payload) and generation == self._generation:
+            now = time.time()
+            entry = _Entry(
+                payload, now + self.ttl, now + self.ttl + self.stale_ttl, tags
+            )
+            self._l1_put(key, entry)
+            await self._l2_put(key, entry)
+        return payload
+
+    # ------------------------------------------------------------------
+    # Tiers
+    # ------------------------------------------------------------------
+
+    def _l1_put(self, key: str, entry: _Entry):
+        self._l1[key] = entry
+        self._l1.move_to_end(key)
+        while len(self._l1) > self.max_entries:
+            self._l1.popitem(last=False)
+
+    async def _l2_get(self, key: str, tags: List[str]) -> Optional[_Entry]:
+        if self.redis is None:
+            return None
+        try:
+            raw = await self.redis.get(f"{KEY_PREFIX}:{key}")
+            if raw is None:
+                return None
+            data = json.loads(raw)
+            return _Entry(
+                data["payload"],
+                data["fresh_until"],
+                data["fresh_until"] + self.stale_ttl,
+                tags,
+            )
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Dashboard cache read failed for {key}: {e}")
+            return None
+
+    async def _l2_put(self, key: str, entry: _Entry):
+        if self.redis is None:
+            return
+        redis_key = f"{KEY_PREFIX}:{key}"
+        expires = self.ttl + self.stale_ttl
+        try:
+            value = json.dumps(
+                {"payload": entry.payload, "fresh_until": entry.fresh_until},
+                default=str,
+            )
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.set(redis_key, value, ex=expires)
+            for tag in [ALL_TAG, *entry.tags]:
+                pipe.sadd(f"{KEY_PREFIX}:index:{tag}", redis_key)
+                pipe.expire(f"{KEY_PREFIX}:index:{tag}", expires)
+            await pipe.execute()
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Dashboard cache write failed for {key}: {e}")
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+
+    def drop_local(self, tags: List[str]) -> int:
+        """Drop L1 entries carrying any of ``tags``"""
+        self._generation += 1
+        if ALL_TAG in tags:
+            dropped = len(self._l1)
+            self._l1.clear()
+            return dropped
+        wanted = set(tags)
+        stale = [key for key, entry in self._l1.items() if wanted & set(entry.tags)]
+        for key in stale:
+            self._l1.pop(key, None)
+        return len(stale)
+
+    async def invalidate(self, company_id: Optional[Any] = None):
+        """Invalidate payloads affected by a write for ``company_id``"""
+        tags = invalidation_tags(company_id)
+        self.drop_local(tags)
+        self.stats["invalidations"] += 1
+        if self.redis is None:
+            return
+        try:
+            index_keys = [f"{KEY_PREFIX}:index:{tag}" for tag in tags]
+            keys = set()
+            for index_key in index_keys:
+                keys.update(await self.redis.smembers(index_key))
+            if keys:
+                await self.redis.delete(*keys)
+            await self.redis.delete(*index_keys)
+            await self.redis.publish(
+                INVALIDATION_CHANNEL,
+                json.dumps({"origin": self.instance_id, "tags": tags}),
+            )
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Dashboard cache invalidation failed: {e}")
+
+    async def _listen(self):
+        """Drop L1 entries invalidated by other workers"""
+        while True:
+            try:
+                pubsub = self.redis.pubsub()
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    data = json.loads(message["data"])
+                    if data.get("origin") != self.instance_id:
+                        self.drop_local(data.get("tags", [ALL_TAG]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Entries may have changed while disconnected
+                self.drop_local([ALL_TAG])
+                logger.warning(f"Dashboard cache listener reconnecting: {e}")
+                await asyncio.sleep(5)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "l1_entries": len(self._l1)}
+
+
+# Global dashboard cache
+dashboard_cache = DashboardCache()
+
+
+def invalidate_dashboards(company_id: Optional[Any] = None):
+    """
+    Invalidate dashboard payloads from synchronous writers
+
+    Uses the shared sync Redis pool; never raises so a cache outage cannot
+    fail the write that triggered it.
+    """
+    tags = invalidation_tags(company_id)
+    dashboard_cache.drop_local(tags)
+    dashboard_cache.stats["invalidations"] += 1
+    try:
+        redis_client = get_redis_client()
+        index_keys = [f"{KEY_PREFIX}:index:{tag}" for tag in tags]
+        keys = set()
+        for index_key in index_keys:
+            keys.update(redis_client.smembers(index_key))
+        if keys:
+            redis_client.delete(*keys)
+        redis_client.delete(*index_keys)
+        redis_client.publish(
+            INVALIDATION_CHANNEL,
+            json.dumps({"origin": dashboard_cache.instance_id, "tags": tags}),
+        )
+    except Exception as e:
+        dashboard_cache.stats["errors"] += 1
+        logger.warning(f"Dashboard cache invalidation failed: {e}")
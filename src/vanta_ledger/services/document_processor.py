@@ -12,13 +12,14 @@ import os
 import shutil
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..config import settings
+from .ocr_pipeline import ocr_pipeline
 
 # OCR and document processing
 try:
     import docx2txt
-    import fitz  # PyMuPDF
-    import pdf2image
     import pytesseract
     from PIL import Image
 
@@ -26,24 +27,57 @@ try:
 except ImportError:
     OCR_AVAILABLE = False
     logging.warning(
-        "OCR libraries not available. Install: pip install pytesseract pdf2image python-docx2txt PyMuPDF Pillow"
+        "OCR libraries not available. Install: pip install pytesseract python-docx2txt Pillow"
     )
 
 # AI and text processing
 import re
 from collections import defaultdict
 
-import spacy
-
 try:
-    nlp = spacy.load("en_core_web_sm")
+    import spacy
+
+    # Noun chunks need the tagger and parser, entities the NER; nothing
+    # reads lemmas
+    nlp = spacy.load("en_core_web_sm", exclude=["lemmatizer"])
     NLP_AVAILABLE = True
-except OSError:
+except (ImportError, OSError):
     NLP_AVAILABLE = False
     logging.warning(
         "spaCy model not available. Install: python -m spacy download en_core_web_sm"
     )
 
+# Patterns used by the extractors, compiled once
+WORD_PATTERN = re.compile(r"\b\w+\b")
+DIGIT_PATTERN = re.compile(r"\d")
+SENTENCE_SPLIT_PATTERN = re.compile(r"[.!?]+")
+DATE_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE)
+    for pattern in (
+        r"\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b",
+        r"\b\d{4}[/-]\d{1,2}[/-]\d{1,2}\b",
+        r"\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},?\s+\d{4}\b",
+        r"\b\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{4}\b",
+    )
+]
+COMPANY_PATTERNS = [
+    re.compile(pattern)
+    for pattern in (
+        r"\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+(?:Inc|Corp|LLC|Ltd|Company|Co|Corporation)\b",
+        r"\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+(?:&|and)\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b",
+    )
+]
+PROJECT_PATTERNS = [
+    re.compile(pattern)
+    for pattern in (
+        r"Project:\s*([A-Z][a-zA-Z0-9\s]+)",
+        r"Project\s+([A-Z][a-zA-Z0-9\s]+)",
+        r"([A-Z][a-zA-Z0-9\s]+)\s+Project",
+    )
+]
+KEYWORD_STOPWORDS = frozenset({"the", "and", "for", "with", "this", "that"})
+KEYWORD_ENTITY_LABELS = frozenset({"ORG", "PRODUCT", "GPE", "PERSON"})
+
 
 class DocumentProcessor:
     """Advanced document processing with OCR, AI analysis, and information extraction"""
@@ -137,13 +171,31 @@ class DocumentProcessor:
             "url": r"https?://(?:[-\w.])+(?:[:\d]+)?(?:/(?:[\w/_.])*(?:\?(?:[\w&=%.])*)?(?:#(?:[\w.])*)?)?",
         }
 
+        # Compile once rather than on every search
+        self.document_patterns = {
+            doc_type: [re.compile(pattern) for pattern in patterns]
+            for doc_type, patterns in self.document_patterns.items()
+        }
+        self.financial_patterns = {
+            name: re.compile(pattern)
+            for name, pattern in self.financial_patterns.items()
+        }
+
     def process_document(
-        self, file_path: str, original_filename: str
+        self,
+        file_path: str,
+        original_filename: str,
+        content_hash: Optional[str] = None,
     ) -> Dict[str, Any]:
-        """Process a document and extract comprehensive information"""
+        """
+        Process a document and extract comprehensive information
+
+        ``content_hash`` is the SHA-256 of the file when the caller already
+        computed it while storing the upload, so the file is not read again.
+        """
         try:
             # Generate unique document ID
-            doc_id = self._generate_doc_id(file_path, original_filename)
+            doc_id = self._generate_doc_id(file_path, original_filename, content_hash)
 
             # Extract text content
             text_content = self._extract_text(file_path)
@@ -177,11 +229,17 @@ class DocumentProcessor:
             logging.error(f"Error processing document {original_filename}: {str(e)}")
             raise
 
-    def _generate_doc_id(self, file_path: str, original_filename: str) -> str:
+    def _generate_doc_id(
+        self, file_path: str, original_filename: str, content_hash: Optional[str] = None
+    ) -> str:
         """Generate unique document ID based on content hash"""
-        with open(file_path, "rb") as f:
-            content_hash = hashlib.sha256(f.read()).hexdigest()[:8]
-        return f"{content_hash}_{int(datetime.now().timestamp())}"
+        if content_hash is None:
+            digest = hashlib.sha256()
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(settings.UPLOAD_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+            content_hash = digest.hexdigest()
+        return f"{content_hash[:8]}_{int(datetime.now().timestamp())}"
 
     def _extract_text(self, file_path: str) -> str:
         """Extract text from various file formats"""
@@ -193,30 +251,19 @@ class DocumentProcessor:
         return self.supported_types[file_ext](file_path)
 
     def _extract_pdf_text(self, file_path: str) -> str:
-        """Extract text from PDF files"""
-        text = ""
-
-        # Try PyMuPDF first (faster and more secure)
+        """Extract text from PDF files, OCRing only pages without a text layer"""
         try:
-            doc = fitz.open(file_path)
-            for page in doc:
-                text += page.get_text() + "\n"
-            doc.close()
-            if text.strip():
-                return text
+            text, pages = ocr_pipeline.extract_pdf(file_path)
         except Exception as e:
-            logging.warning(f"PyMuPDF failed for {file_path}: {e}")
-
-        # Fallback to OCR if PyMuPDF fails or no text found
-        if OCR_AVAILABLE:
-            try:
-                images = pdf2image.convert_from_path(file_path)
-                for image in images:
-                    text += pytesseract.image_to_string(image) + "\n"
-                return text
-            except Exception as e:
-                logging.error(f"OCR failed for {file_path}: {e}")
+            logging.error(f"Failed to extract text from PDF {file_path}: {e}")
+            return ""
 
+        ocr_pages = [page for page in pages if page["method"] == "ocr"]
+        if ocr_pages:
+            logging.info(
+                f"OCRed {len(ocr_pages)} of {len(pages)} pages of {file_path} in "
+                f"{sum(page['seconds'] for page in ocr_pages):.2f}s"
+            )
         return text
 
     def _extract_docx_text(self, file_path: str) -> str:
@@ -256,6 +303,10 @@ class DocumentProcessor:
         self, file_path: str, doc_id: str, original_filename: str
     ) -> Path:
         """Store original file with proper naming"""
+        if Path(file_path).parent.resolve() == self.upload_dir.resolve():
+            # Streamed straight into content-addressed storage by the upload
+            return Path(file_path)
+
         file_ext = Path(original_filename).suffix
         new_filename = f"{doc_id}{file_ext}"
         new_path = self.upload_dir / new_filename
@@ -270,17 +321,27 @@ class DocumentProcessor:
             f.write(text_content)
         return text_file
 
-    def _analyze_document(self, text_content: str, doc_id: str) -> Dict[str, Any]:
-        """Perform comprehensive document analysis"""
+    def _analyze_document(
+        self, text_content: str, doc_id: str, doc: Optional[Any] = None
+    ) -> Dict[str, Any]:
+        """
+        Perform comprehensive document analysis
+
+        ``doc`` is the spaCy parse of ``text_content``. It is parsed here when
+        not given, once, and shared by every extractor that reads it.
+        """
+        if doc is None:
+            doc = self._parse(text_content)
+
         analysis = {
             "doc_id": doc_id,
             "type": self._classify_document(text_content),
-            "keywords": self._extract_keywords(text_content),
+            "keywords": self._extract_keywords(text_content, doc),
             "dates": self._extract_dates(text_content),
-            "companies": self._extract_companies(text_content),
+            "companies": self._extract_companies(text_content, doc),
             "financial_data": self._extract_financial_data(text_content),
             "projects": self._extract_projects(text_content),
-            "entities": self._extract_entities(text_content),
+            "entities": self._extract_entities(text_content, doc),
             "summary": self._generate_summary(text_content),
             "metadata": self._extract_metadata(text_content),
             "processed_at": datetime.now().isoformat(),
@@ -288,6 +349,36 @@ class DocumentProcessor:
 
         return analysis
 
+    def analyze_texts(
+        self,
+        documents: Iterable[Tuple[str, str]],
+        n_process: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Analyze ``(text_content, doc_id)`` pairs in batch
+
+        Texts are parsed through ``nlp.pipe``, ``NLP_PROCESSES`` worker
+        processes at a time, and analyses are yielded in input order.
+        """
+        if not NLP_AVAILABLE:
+            for text_content, doc_id in documents:
+                yield self._analyze_document(text_content, doc_id)
+            return
+
+        docs = nlp.pipe(
+            documents,
+            as_tuples=True,
+            n_process=n_process or settings.NLP_PROCESSES,
+            batch_size=batch_size or settings.NLP_BATCH_SIZE,
+        )
+        for doc, doc_id in docs:
+            yield self._analyze_document(doc.text, doc_id, doc)
+
+    def _parse(self, text: str) -> Optional[Any]:
+        """spaCy parse of ``text``, or None without spaCy"""
+        return nlp(text) if NLP_AVAILABLE else None
+
     def _classify_document(self, text: str) -> str:
         """Classify document type based on content patterns"""
         text_lower = text.lower()
@@ -295,33 +386,26 @@ class DocumentProcessor:
 
         for doc_type, patterns in self.document_patterns.items():
             for pattern in patterns:
-                if re.search(pattern, text_lower):
+                if pattern.search(text_lower):
                     scores[doc_type] += 1
 
         if scores:
             return max(scores, key=scores.get)
         return "unknown"
 
-    def _extract_keywords(self, text: str) -> List[str]:
+    def _extract_keywords(self, text: str, doc: Optional[Any] = None) -> List[str]:
         """Extract important keywords from text"""
         if not NLP_AVAILABLE:
             # Fallback to simple keyword extraction
-            words = re.findall(r"\b\w+\b", text.lower())
             word_freq = defaultdict(int)
-            for word in words:
-                if len(word) > 3 and word not in [
-                    "the",
-                    "and",
-                    "for",
-                    "with",
-                    "this",
-                    "that",
-                ]:
+            for word in WORD_PATTERN.findall(text.lower()):
+                if len(word) > 3 and word not in KEYWORD_STOPWORDS:
                     word_freq[word] += 1
             return sorted(word_freq, key=word_freq.get, reverse=True)[:10]
 
         # Use spaCy for better keyword extraction
-        doc = nlp(text)
+        if doc is None:
+            doc = nlp(text)
         keywords = []
 
         # Extract noun phrases and named entities
@@ -330,110 +414,81 @@ class DocumentProcessor:
                 keywords.append(chunk.text.lower())
 
         for ent in doc.ents:
-            if ent.label_ in ["ORG", "PRODUCT", "GPE", "PERSON"]:
+            if ent.label_ in KEYWORD_ENTITY_LABELS:
                 keywords.append(ent.text.lower())
 
         return list(set(keywords))[:15]
 
     def _extract_dates(self, text: str) -> List[str]:
         """Extract dates from text"""
-        date_patterns = [
-            r"\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b",
-            r"\b\d{4}[/-]\d{1,2}[/-]\d{1,2}\b",
-            r"\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},?\s+\d{4}\b",
-            r"\b\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{4}\b",
-        ]
-
         dates = []
-        for pattern in date_patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            dates.extend(matches)
+        for pattern in DATE_PATTERNS:
+            dates.extend(pattern.findall(text))
 
         return list(set(dates))
 
-    def _extract_companies(self, text: str) -> List[str]:
+    def _extract_companies(self, text: str, doc: Optional[Any] = None) -> List[str]:
         """Extract company names from text"""
         if not NLP_AVAILABLE:
             # Simple pattern matching
-            company_patterns = [
-                r"\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+(?:Inc|Corp|LLC|Ltd|Company|Co|Corporation)\b",
-                r"\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+(?:&|and)\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b",
-            ]
             companies = []
-            for pattern in company_patterns:
-                matches = re.findall(pattern, text)
-                companies.extend(matches)
+            for pattern in COMPANY_PATTERNS:
+                companies.extend(pattern.findall(text))
             return list(set(companies))
 
         # Use spaCy for better entity recognition
-        doc = nlp(text)
-        companies = []
-
-        for ent in doc.ents:
-            if ent.label_ == "ORG":
-                companies.append(ent.text)
-
-        return list(set(companies))
+        if doc is None:
+            doc = nlp(text)
+        return list({ent.text for ent in doc.ents if ent.label_ == "ORG"})
 
     def _extract_financial_data(self, text: str) -> List[Dict[str, str]]:
         """Extract financial information"""
         financial_data = []
 
-        # Extract amounts
-        amounts = re.findall(self.financial_patterns["amounts"], text)
-        for amount in amounts:
-            financial_data.append(
-                {
-                    "type": "amount",
-                    "value": amount,
-                    "context": self._get_context(text, amount, 50),
-                }
-            )
-
-        # Extract percentages
-        percentages = re.findall(self.financial_patterns["percentages"], text)
-        for percentage in percentages:
-            financial_data.append(
-                {
-                    "type": "percentage",
-                    "value": percentage,
-                    "context": self._get_context(text, percentage, 50),
-                }
-            )
+        for data_type, pattern in (
+            ("amount", self.financial_patterns["amounts"]),
+            ("percentage", self.financial_patterns["percentages"]),
+        ):
+            for match in pattern.finditer(text):
+                financial_data.append(
+                    {
+                        "type": data_type,
+                        "value": match.group(),
+                        "context": self._get_context(
+                            text, match.start(), match.end(), 50
+                        ),
+                    }
+                )
 
         return financial_data
 
     def _extract_projects(self, text: str) -> List[str]:
         """Extract project names/references"""
-        project_patterns = [
-            r"Project:\s*([A-Z][a-zA-Z0-9\s]+)",
-            r"Project\s+([A-Z][a-zA-Z0-9\s]+)",
-            r"([A-Z][a-zA-Z0-9\s]+)\s+Project",
-        ]
-
         projects = []
-        for pattern in project_patterns:
-            matches = re.findall(pattern, text)
-            projects.extend(matches)
+        for pattern in PROJECT_PATTERNS:
+            projects.extend(pattern.findall(text))
 
         return list(set(projects))
 
-    def _extract_entities(self, text: str) -> Dict[str, List[str]]:
+    def _extract_entities(
+        self, text: str, doc: Optional[Any] = None
+    ) -> Dict[str, List[str]]:
         """Extract named entities using spaCy"""
         if not NLP_AVAILABLE:
             return {}
 
-        doc = nlp(text)
-        entities = defaultdict(list)
+        if doc is None:
+            doc = nlp(text)
+        entities = defaultdict(set)
 
         for ent in doc.ents:
-            entities[ent.label_].append(ent.text)
+            entities[ent.label_].add(ent.text)
 
-        return {k: list(set(v)) for k, v in entities.items()}
+        return {k: list(v) for k, v in entities.items()}
 
     def _generate_summary(self, text: str) -> str:
         """Generate a brief summary of the document"""
-        sentences = re.split(r"[.!?]+", text)
+        sentences = SENTENCE_SPLIT_PATTERN.split(text)
         sentences = [s.strip() for s in sentences if len(s.strip()) > 20]
 
         if len(sentences) <= 3:
@@ -448,17 +503,19 @@ class DocumentProcessor:
         return {
             "word_count": len(text.split()),
             "character_count": len(text),
-            "line_count": len(text.split("\n")),
-            "has_numbers": bool(re.search(r"\d", text)),
-            "has_emails": bool(re.search(self.financial_patterns["email"], text)),
-            "has_phones": bool(re.search(self.financial_patterns["phone"], text)),
-            "has_urls": bool(re.search(self.financial_patterns["url"], text)),
+            "line_count": text.count("\n") + 1,
+            "has_numbers": bool(DIGIT_PATTERN.search(text)),
+            "has_emails": bool(self.financial_patterns["email"].search(text)),
+            "has_phones": bool(self.financial_patterns["phone"].search(text)),
+            "has_urls": bool(self.financial_patterns["url"].search(text)),
         }
 
-    def _get_context(self, text: str, match: str, context_length: int = 50) -> str:
-        """Get context around a match"""
-        start = max(0, text.find(match) - context_length)
-        end = min(len(text), text.find(match) + len(match) + context_length)
+    def _get_context(
+        self, text: str, start: int, end: int, context_length: int = 50
+    ) -> str:
+        """Get context around the match at ``text[start:end]``"""
+        start = max(0, start - context_length)
+        end = min(len(text), end + context_length)
         return text[start:end].strip()
 
     def _store_analysis(self, doc_id: str, analysis: Dict[str, Any]) -> Path:
@@ -13,12 +13,8 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID, uuid4
 
-import redis
-from pymongo import MongoClient
-from pymongo.collection import Collection
-from pymongo.database import Database
 
-from ..config import settings
+from ..database import MongoCollection, MongoDatabase, get_redis_client
 from ..models.document_models import (
     DocumentCategory,
     DocumentMetadata,
@@ -38,19 +34,16 @@ logger = logging.getLogger(__name__)
 class EnhancedDocumentService:
     """Enhanced document management service with advanced features"""
 
+    # Resolved on every use, so a closed and reopened pool is picked up
+    db = MongoDatabase()
+    documents = MongoCollection("documents")
+    tags = MongoCollection("document_tags")
+    categories = MongoCollection("document_categories")
+    search_index = MongoCollection("document_search_index")
+
     def __init__(self):
         # Database connections
-        self.mongo_client = MongoClient(settings.MONGO_URI)
-        self.db: Database = self.mongo_client[settings.DATABASE_NAME]
-        self.redis_client = redis.Redis.from_url(
-            settings.REDIS_URI, decode_responses=True
-        )
-
-        # Collections
-        self.documents: Collection = self.db.documents
-        self.tags: Collection = self.db.document_tags
-        self.categories: Collection = self.db.document_categories
-        self.search_index: Collection = self.db.document_search_index
+        self.redis_client = get_redis_client()
 
         # Create indexes for performance
         self._create_indexes()
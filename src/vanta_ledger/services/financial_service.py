@@ -11,12 +11,8 @@ from decimal import Decimal
 from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID, uuid4
 
-import redis
-from pymongo import MongoClient
-from pymongo.collection import Collection
-from pymongo.database import Database
 
-from ..config import settings
+from ..database import MongoCollection, MongoDatabase, get_redis_client
 from ..models.financial_models import (
     AccountBalance,
     AccountType,
@@ -35,6 +31,8 @@ from ..models.financial_models import (
     Vendor,
 )
 from ..utils.validation import input_validator
+from .dashboard_cache import invalidate_dashboards
+from .llm.context_snapshots import context_snapshots
 
 logger = logging.getLogger(__name__)
 
@@ -42,26 +40,23 @@ logger = logging.getLogger(__name__)
 class FinancialService:
     """Core financial management service"""
 
+    # Resolved on every use, so a closed and reopened pool is picked up
+    db = MongoDatabase()
+    chart_of_accounts = MongoCollection("chart_of_accounts")
+    journal_entries = MongoCollection("journal_entries")
+    journal_entry_lines = MongoCollection("journal_entry_lines")
+    account_balances = MongoCollection("account_balances")
+    invoices = MongoCollection("invoices")
+    invoice_lines = MongoCollection("invoice_lines")
+    bills = MongoCollection("bills")
+    payments = MongoCollection("payments")
+    payment_allocations = MongoCollection("payment_allocations")
+    customers = MongoCollection("customers")
+    vendors = MongoCollection("vendors")
+
     def __init__(self):
         # Database connections
-        self.mongo_client = MongoClient(settings.MONGO_URI)
-        self.db: Database = self.mongo_client[settings.DATABASE_NAME]
-        self.redis_client = redis.Redis.from_url(
-            settings.REDIS_URI, decode_responses=True
-        )
-
-        # Collections
-        self.chart_of_accounts: Collection = self.db.chart_of_accounts
-        self.journal_entries: Collection = self.db.journal_entries
-        self.journal_entry_lines: Collection = self.db.journal_entry_lines
-        self.account_balances: Collection = self.db.account_balances
-        self.invoices: Collection = self.db.invoices
-        self.invoice_lines: Collection = self.db.invoice_lines
-        self.bills: Collection = self.db.bills
-        self.payments: Collection = self.db.payments
-        self.payment_allocations: Collection = self.db.payment_allocations
-        self.customers: Collection = self.db.customers
-        self.vendors: Collection = self.db.vendors
+        self.redis_client = get_redis_client()
 
         # Create indexes
         self._create_indexes()
@@ -212,6 +207,8 @@ class FinancialService:
 
             self.chart_of_accounts.insert_one(account.dict())
             logger.info(f"Account created: {account.account_code}")
+            # LLM company contexts list the chart of accounts
+            context_snapshots.invalidate(account_data.get("company_id"))
             return account
 
         except Exception as e:
@@ -289,6 +286,8 @@ class FinancialService:
             self.journal_entries.insert_one(entry.dict())
 
             logger.info(f"Journal entry created: {entry.entry_number}")
+            # Ledger entries are not company-scoped, so drop every dashboard
+            invalidate_dashboards()
             return entry
 
         except Exception as e:
@@ -384,6 +383,7 @@ class FinancialService:
                 self.invoice_lines.insert_one(line.dict())
 
             logger.info(f"Invoice created: {invoice.invoice_number}")
+            invalidate_dashboards()
             return invoice
 
         except Exception as e:
@@ -454,6 +454,7 @@ class FinancialService:
 
             self.customers.insert_one(customer.dict())
             logger.info(f"Customer created: {customer.customer_code}")
+            context_snapshots.invalidate(customer_data.get("company_id"))
             return customer
 
         except Exception as e:
@@ -11,20 +11,35 @@ from uuid import UUID
 
 from pymongo.database import Database
 
+from ...config import settings
+from ...database import MongoDatabase
+from .context_snapshots import context_snapshots
+from .entity_index import entity_indexes
+
 logger = logging.getLogger(__name__)
 
 
 class CompanyContextManager:
     """Manage company-specific context and configurations"""
 
-    def __init__(self, db: Database):
-        self.db = db
-        self.company_configs = {}
+    # The application database unless one is passed in
+    db = MongoDatabase()
+
+    def __init__(self, db: Optional[Database] = None):
+        if db is not None:
+            self.db = db
+        # Versioned snapshots shared with other workers through Redis
+        self.snapshots = context_snapshots
         self.company_embeddings = {}
 
     async def get_company_context(self, company_id: UUID) -> Dict[str, Any]:
         """Get company-specific context for LLM processing"""
         try:
+            # Serve the current snapshot when there is one
+            context, version = self.snapshots.get(company_id)
+            if context is not None:
+                return context
+
             # Get company configuration
             company_config = self.db.companies.find_one({"_id": str(company_id)})
             if not company_config:
@@ -47,10 +62,18 @@ class CompanyContextManager:
                 "business_type": company_config.get("business_type", "general"),
                 "country": company_config.get("country", "Kenya"),
                 "timezone": company_config.get("timezone", "Africa/Nairobi"),
+                "extraction_mode": company_config.get(
+                    "llm_extraction_mode", settings.LLM_EXTRACTION_MODE
+                ),
+                # Keys derived data such as the entity indexes
+                "snapshot_version": version,
             }
 
-            # Cache company context
-            self.company_configs[str(company_id)] = context
+            # Precomputed, size-bounded projection used in every prompt
+            context["prompt_context"] = self._project_prompt_context(context)
+
+            # Cache under the version read before building
+            self.snapshots.put(company_id, context, version)
 
             logger.debug(f"Loaded context for company: {context['company_name']}")
             return context
@@ -62,7 +85,16 @@ class CompanyContextManager:
     async def _get_company_accounts(self, company_id: UUID) -> List[Dict]:
         """Get company's chart of accounts"""
         try:
-            accounts = self.db.chart_of_accounts.find({"company_id": str(company_id)})
+            accounts = self.db.chart_of_accounts.find(
+                {"company_id": str(company_id)},
+                {
+                    "_id": 0,
+                    "account_code": 1,
+                    "account_name": 1,
+                    "account_type": 1,
+                    "parent_account_id": 1,
+                },
+            )
             account_list = []
             for acc in accounts:
                 account_list.append(
@@ -81,20 +113,15 @@ class CompanyContextManager:
     async def _get_company_customers(self, company_id: UUID) -> List[Dict]:
         """Get company's customers"""
         try:
-            customers = self.db.customers.find({"company_id": str(company_id)})
-            customer_list = []
-            for cust in customers:
-                customer_list.append(
-                    {
-                        "code": cust["customer_code"],
-                        "name": cust["customer_name"],
-                        "email": cust.get("email"),
-                        "phone": cust.get("phone"),
-                        "tax_id": cust.get("tax_id"),
-                        "credit_limit": cust.get("credit_limit", 0),
-                    }
-                )
-            return customer_list
+            # Codes and names are all the prompts and validation use
+            customers = self.db.customers.find(
+                {"company_id": str(company_id)},
+                {"_id": 0, "customer_code": 1, "customer_name": 1},
+            )
+            return [
+                {"code": cust["customer_code"], "name": cust["customer_name"]}
+                for cust in customers
+            ]
         except Exception as e:
             logger.error(f"Error getting company customers: {str(e)}")
             return []
@@ -102,20 +129,14 @@ class CompanyContextManager:
     async def _get_company_vendors(self, company_id: UUID) -> List[Dict]:
         """Get company's vendors"""
         try:
-            vendors = self.db.vendors.find({"company_id": str(company_id)})
-            vendor_list = []
-            for vend in vendors:
-                vendor_list.append(
-                    {
-                        "code": vend["vendor_code"],
-                        "name": vend["vendor_name"],
-                        "email": vend.get("email"),
-                        "phone": vend.get("phone"),
-                        "tax_id": vend.get("tax_id"),
-                        "payment_terms": vend.get("payment_terms"),
-                    }
-                )
-            return vendor_list
+            vendors = self.db.vendors.find(
+                {"company_id": str(company_id)},
+                {"_id": 0, "vendor_code": 1, "vendor_name": 1},
+            )
+            return [
+                {"code": vend["vendor_code"], "name": vend["vendor_name"]}
+                for vend in vendors
+            ]
         except Exception as e:
             logger.error(f"Error getting company vendors: {str(e)}")
             return []
@@ -137,10 +158,17 @@ class CompanyContextManager:
             "business_type": "general",
             "country": "Kenya",
             "timezone": "Africa/Nairobi",
+            "extraction_mode": settings.LLM_EXTRACTION_MODE,
         }
 
     def build_company_prompt_context(self, company_context: Dict) -> str:
         """Build company-specific context for LLM prompts"""
+        if company_context.get("prompt_context"):
+            return company_context["prompt_context"]
+        return self._project_prompt_context(company_context)
+
+    def _project_prompt_context(self, company_context: Dict) -> str:
+        """Prompt projection of a context, at most ``LLM_CONTEXT_PROMPT_CHARS``"""
         context_parts = [
             f"Company: {company_context['company_name']}",
             f"Industry: {company_context['industry']}",
@@ -174,7 +202,12 @@ class CompanyContextManager:
             )
             context_parts.append(f"Key Accounts: {account_list}")
 
-        return " | ".join(context_parts)
+        # Drop whole trailing parts rather than cut a name in half
+        projection = " | ".join(context_parts)
+        while len(projection) > settings.LLM_CONTEXT_PROMPT_CHARS and len(context_parts) > 1:
+            context_parts.pop()
+            projection = " | ".join(context_parts)
+        return projection[: settings.LLM_CONTEXT_PROMPT_CHARS]
 
     def get_company_specific_instructions(
         self, company_context: Dict, task_type: str
@@ -223,53 +256,42 @@ class CompanyContextManager:
         }
 
         try:
-            if entity_type == "customer":
-                # Check against company customers
-                customers = company_context.get("customers", [])
-                for customer in customers:
-                    if (
-                        entity.lower() in customer["name"].lower()
-                        or entity.lower() in customer["code"].lower()
-                    ):
-                        validation_result.update(
-                            {
-                                "is_valid": True,
-                                "confidence": 0.9,
-                                "matched_customer": customer,
-                            }
-                        )
-                        break
-
-            elif entity_type == "vendor":
-                # Check against company vendors
-                vendors = company_context.get("vendors", [])
-                for vendor in vendors:
-                    if (
-                        entity.lower() in vendor["name"].lower()
-                        or entity.lower() in vendor["code"].lower()
-                    ):
-                        validation_result.update(
-                            {
-                                "is_valid": True,
-                                "confidence": 0.9,
-                                "matched_vendor": vendor,
-                            }
-                        )
-                        break
+            if entity_type in ("customer", "vendor"):
+                # Resolve against the company's customers or vendors
+                indexes = entity_indexes.for_context(company_context)
+                index = (
+                    indexes.customers if entity_type == "customer" else indexes.vendors
+                )
+                candidates = index.candidates(entity)
+                if (
+                    candidates
+                    and candidates[0][1] >= settings.LLM_ENTITY_MATCH_THRESHOLD
+                ):
+                    record, score = candidates[0]
+                    validation_result.update(
+                        {
+                            "is_valid": True,
+                            "confidence": score,
+                            f"matched_{entity_type}": record,
+                        }
+                    )
+                else:
+                    validation_result["suggestions"] = [
+                        record["name"] for record, _ in candidates
+                    ]
 
             elif entity_type == "account_code":
                 # Check against company chart of accounts
-                accounts = company_context.get("financial_accounts", [])
-                for account in accounts:
-                    if entity.upper() == account["code"].upper():
-                        validation_result.update(
-                            {
-                                "is_valid": True,
-                                "confidence": 1.0,
-                                "matched_account": account,
-                            }
-                        )
-                        break
+                accounts = entity_indexes.for_context(company_context).accounts
+                account = accounts.lookup_code(entity)
+                if account is not None:
+                    validation_result.update(
+                        {
+                            "is_valid": True,
+                            "confidence": 1.0,
+                            "matched_account": account,
+                        }
+                    )
 
             elif entity_type == "amount":
                 # Validate amount format for company currency
@@ -360,18 +382,15 @@ class CompanyContextManager:
 
     def cache_company_context(self, company_id: UUID, context: Dict):
         """Cache company context for faster access"""
-        self.company_configs[str(company_id)] = context
+        self.snapshots.put(company_id, context, self.snapshots.version(company_id))
 
     def get_cached_context(self, company_id: UUID) -> Optional[Dict]:
         """Get cached company context"""
-        return self.company_configs.get(str(company_id))
+        return self.snapshots.peek(company_id)
 
     def clear_cache(self, company_id: Optional[UUID] = None):
         """Clear company context cache"""
-        if company_id:
-            self.company_configs.pop(str(company_id), None)
-        else:
-            self.company_configs.clear()
+        self.snapshots.invalidate(company_id)
 
     def get_company_statistics(self, company_id: UUID) -> Dict[str, Any]:
         """Get company processing statistics"""
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Company Context Snapshots
+Versioned per-company LLM context, cached in process and in Redis
+
+Building a company context reads the company, its chart of accounts, its
+customers and its vendors from Mongo. The result is stored as a compact
+snapshot (codes and names only, plus a size-bounded prompt projection)
+tagged with the company's version.
+
+Versions are Redis counters: one per company and one global. Writes that
+change a context bump them through ``invalidate`` (called from the
+``FinancialService`` write paths and, when enabled, from a Mongo change
+stream watcher), which makes every worker's snapshot stale at once. An
+in-process snapshot is trusted for ``LLM_CONTEXT_RECHECK_SECONDS`` before its
+version is compared again, so a hot company costs at most one small Redis
+read every few seconds instead of four Mongo queries per document.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from ...config import settings
+from ...database import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "company_context"
+GLOBAL_VERSION_KEY = f"{KEY_PREFIX}:version:*"
+
+# Collections whose documents feed a company context
+WATCHED_COLLECTIONS = ("companies", "chart_of_accounts", "customers", "vendors")
+
+
+class _Snapshot:
+    __slots__ = ("context", "version", "checked_until")
+
+    def __init__(self, context, version, checked_until):
+        self.context = context
+        self.version = version
+        self.checked_until = checked_until
+
+
+class ContextSnapshotCache:
+    """Two-tier cache of company contexts validated by Redis version counters"""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        recheck: Optional[float] = None,
+        ttl: Optional[int] = None,
+        redis_client=None,
+    ):
+        self.max_entries = max_entries or settings.LLM_CONTEXT_CACHE_SIZE
+        self.recheck = (
+            recheck if recheck is not None else settings.LLM_CONTEXT_RECHECK_SECONDS
+        )
+        self.ttl = ttl if ttl is not None else settings.LLM_CONTEXT_SNAPSHOT_TTL
+        self.redis = redis_client
+
+        self._entries: "OrderedDict[str, _Snapshot]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Used for versions while Redis is unreachable
+        self._local_versions: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.stats = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "invalidations": 0,
+            "errors": 0,
+        }
+
+    def _redis(self):
+        if self.redis is None:
+            try:
+                self.redis = get_redis_client()
+            except Exception as e:
+                logger.warning(f"Company context cache running without Redis: {e}")
+                return None
+        return self.redis
+
+    @staticmethod
+    def _version_key(company_id: str) -> str:
+        return f"{KEY_PREFIX}:version:{company_id}"
+
+    @staticmethod
+    def _snapshot_key(company_id: str) -> str:
+        return f"{KEY_PREFIX}:snapshot:{company_id}"
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def version(self, company_id: Any) -> str:
+        """Current ``global:company`` version of a company's context"""
+        company_id = str(company_id)
+        redis = self._redis()
+        if redis is not None:
+            try:
+                global_version, company_version = redis.mget(
+                    GLOBAL_VERSION_KEY, self._version_key(company_id)
+                )
+                return f"{global_version or 0}:{company_version or 0}"
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Company context version read failed: {e}")
+        with self._lock:
+            return (
+                f"local{self._local_versions.get('*', 0)}:"
+                f"{self._local_versions.get(company_id, 0)}"
+            )
+
+    def get(self, company_id: Any) -> Tuple[Optional[Dict[str, Any]], str]:
+        """
+        Return ``(context, version)`` for a company
+
+        ``context`` is None on a miss; build it and ``put`` it under the
+        returned version, which was read before the build.
+        """
+        company_id = str(company_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(company_id)
+            if entry is not None and entry.checked_until > now:
+                self._entries.move_to_end(company_id)
+                self.stats["l1_hits"] += 1
+                return entry.context, entry.version
+
+        version = self.version(company_id)
+        if entry is not None and entry.version == version:
+            with self._lock:
+                entry.checked_until = now + self.recheck
+                self.stats["l1_hits"] += 1
+            return entry.context, version
+
+        redis = self._redis()
+        if redis is not None:
+            try:
+                raw = redis.get(self._snapshot_key(company_id))
+                if raw is not None:
+                    data = json.loads(raw)
+                    if data["version"] == version:
+                        self._l1_put(company_id, data["context"], version)
+                        self.stats["l2_hits"] += 1
+                        return data["context"], version
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"Company context snapshot read failed: {e}")
+
+        self.stats["misses"] += 1
+        return None, version
+
+    def peek(self, company_id: Any) -> Optional[Dict[str, Any]]:
+        """In-process snapshot for a company, however old"""
+        with self._lock:
+            entry = self._entries.get(str(company_id))
+            return entry.context if entry is not None else None
+
+    def put(self, company_id: Any, context: Dict[str, Any], version: str):
+        """Store a freshly built context under the version read before building it"""
+        company_id = str(company_id)
+        self._l1_put(company_id, context, version)
+        redis = self._redis()
+        if redis is None:
+            return
+        try:
+            redis.set(
+                self._snapshot_key(company_id),
+                json.dumps({"version": version, "context": context}, default=str),
+                ex=self.ttl,
+            )
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Company context snapshot write failed: {e}")
+
+    def _l1_put(self, company_id: str, context: Dict[str, Any], version: str):
+        with self._lock:
+            self._entries[company_id] = _Snapshot(
+                context, version, time.monotonic() + self.recheck
+            )
+            self._entries.move_to_end(company_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+
+    def invalidate(self, company_id: Optional[Any] = None):
+        """
+        Make a company's snapshots stale in every worker (all when None)
+
+        Never raises, so a cache outage cannot fail the write that triggered it.
+        """
+        slot = "*" if company_id is None else str(company_id)
+        with self._lock:
+            if company_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(slot, None)
+            self._local_versions[slot] = self._local_versions.get(slot, 0) + 1
+            self.stats["invalidations"] += 1
+
+        redis = self._redis()
+        if redis is None:
+            return
+        key = GLOBAL_VERSION_KEY if company_id is None else self._version_key(slot)
+        try:
+            redis.incr(key)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Company context invalidation failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Change stream
+    # ------------------------------------------------------------------
+
+    def watch(self, db):
+        """Invalidate from a Mongo change stream on a background thread"""
+        if self._watcher is None:
+            self._stop.clear()
+            self._watcher = threading.Thread(
+                target=self._watch,
+                args=(db,),
+                name="company-context-watcher",
+                daemon=True,
+            )
+            self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+        self._watcher = None
+
+    @staticmethod
+    def _company_of(change: Dict[str, Any]) -> Optional[str]:
+        if change.get("ns", {}).get("coll") == "companies":
+            return str(change.get("documentKey", {}).get("_id"))
+        document = change.get("fullDocument") or {}
+        company_id = document.get("company_id")
+        return str(company_id) if company_id is not None else None
+
+    def _watch(self, db):
+        from pymongo.errors import OperationFailure
+
+        pipeline = [{"$match": {"ns.coll": {"$in": list(WATCHED_COLLECTIONS)}}}]
+        while not self._stop.is_set():
+            try:
+                with db.watch(pipeline, full_document="updateLookup") as stream:
+                    # Changes may have been missed while not watching
+                    self.invalidate()
+                    while not self._stop.is_set():
+                        change = stream.try_next()
+                        if change is None:
+                            self._stop.wait(1)
+                            continue
+                        # Deletes carry no document; drop every company then
+                        self.invalidate(self._company_of(change))
+            except OperationFailure as e:
+                # Standalone servers have no change streams; write hooks remain
+                logger.warning(f"Company context change stream unavailable: {e}")
+                self._watcher = None
+                return
+            except Exception as e:
+                logger.warning(f"Company context watcher reconnecting: {e}")
+                self._stop.wait(5)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "watching": self._watcher is not None,
+        }
+
+
+# Global company context snapshot cache
+context_snapshots = ContextSnapshotCache()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Entity Index
+Resolves extracted names and codes to a company's master data
+
+Each company context gets one index per kind of record (customers, vendors,
+chart of accounts), built once per context snapshot version and reused by
+every document until the snapshot changes. An index holds:
+
+- a hash map of normalized codes, for exact code lookups
+- a hash map of normalized names (case, accents, punctuation and legal
+  suffixes such as "Ltd" removed), for exact name lookups
+- an inverted index of character trigrams, for fuzzy lookups
+
+Scores are the Dice coefficient of the trigram sets; a query whose trigrams
+all appear in a record (an abbreviated or partial name) scores at least 0.9.
+A fuzzy lookup only scores records sharing enough of the query's rarer
+trigrams to be able to reach the match threshold, so its cost follows the
+number of similar names rather than the number of records. Near misses
+below the threshold are returned as suggestions when they share enough
+trigrams to be shortlisted.
+"""
+
+import logging
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ...config import settings
+
+logger = logging.getLogger(__name__)
+
+# Words that do not tell two counterparties apart
+LEGAL_SUFFIXES = frozenset(
+    {
+        "co",
+        "company",
+        "corp",
+        "corporation",
+        "inc",
+        "incorporated",
+        "limited",
+        "llc",
+        "llp",
+        "ltd",
+        "plc",
+    }
+)
+
+# Trigrams in more than this share of records are too common to scan
+COMMON_GRAM_SHARE = 0.02
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_name(name: Any) -> str:
+    """Lowercase ASCII words of ``name`` without punctuation or legal suffixes"""
+    text = unicodedata.normalize("NFKD", str(name or "")).casefold()
+    text = text.encode("ascii", "ignore").decode("ascii")
+    words = _NON_ALNUM.sub(" ", text).split()
+    stripped = [word for word in words if word not in LEGAL_SUFFIXES]
+    return " ".join(stripped or words)
+
+
+def normalize_code(code: Any) -> str:
+    return "".join(str(code or "").split()).upper()
+
+
+def trigrams(normalized: str) -> set:
+    padded = f"  {normalized} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class EntityIndex:
+    """Exact and fuzzy lookups over one list of master data records"""
+
+    def __init__(self, records: List[Dict[str, Any]]):
+        self.records = records
+        self.by_code: Dict[str, int] = {}
+        self.by_name: Dict[str, int] = {}
+        self.grams: Dict[str, List[int]] = {}
+        self.gram_sets: List[frozenset] = []
+
+        for position, record in enumerate(records):
+            code = normalize_code(record.get("code"))
+            if code:
+                self.by_code.setdefault(code, position)
+            name = normalize_name(record.get("name"))
+            if name:
+                self.by_name.setdefault(name, position)
+            record_grams = frozenset(trigrams(name)) if name else frozenset()
+            for gram in record_grams:
+                self.grams.setdefault(gram, []).append(position)
+            self.gram_sets.append(record_grams)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def lookup_code(self, code: Any) -> Optional[Dict[str, Any]]:
+        position = self.by_code.get(normalize_code(code))
+        return self.records[position] if position is not None else None
+
+    def candidates(
+        self, text: Any, limit: int = 5
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """Best ``limit`` records for ``text`` with scores in [0, 1], best first"""
+        code = normalize_code(text)
+        if code in self.by_code:
+            return [(self.records[self.by_code[code]], 1.0)]
+        name = normalize_name(text)
+        if not name:
+            return []
+        if name in self.by_name:
+            return [(self.records[self.by_name[name]], 1.0)]
+
+        query = trigrams(name)
+        scored = []
+        for position, overlap in self._overlaps(query).items():
+            record_grams = self.gram_sets[position]
+            score = 2.0 * overlap / (len(query) + len(record_grams))
+            if overlap == len(query):
+                score = max(score, 0.9)
+            scored.append((score, -len(record_grams), position))
+        scored.sort(reverse=True)
+        return [
+            (self.records[position], round(score, 4))
+            for score, _, position in scored[:limit]
+        ]
+
+    def _overlaps(self, query: set) -> Dict[int, int]:
+        """
+        Shared trigram counts for records that can reach the match threshold
+
+        A Dice score of ``t`` needs ``t * q / (2 - t)`` of the ``q`` query
+        trigrams, so any such record holds one of the rarest
+        ``q - needed + 1``. Postings are counted rarest first; trigrams found
+        in more than ``COMMON_GRAM_SHARE`` of records are skipped beyond that
+        minimum and only checked on the records that are left.
+        """
+        threshold = settings.LLM_ENTITY_MATCH_THRESHOLD
+        needed = max(1, math.ceil(threshold * len(query) / (2 - threshold)))
+        common = max(1, int(len(self.records) * COMMON_GRAM_SHARE))
+        grams = sorted(
+            (gram for gram in query if gram in self.grams),
+            key=lambda gram: len(self.grams[gram]),
+        )
+        minimum = len(query) - needed + 1
+        scanned = [
+            gram
+            for rank, gram in enumerate(grams)
+            if rank < minimum or len(self.grams[gram]) <= common
+        ]
+        unscanned = grams[len(scanned) :]
+
+        counts: Counter = Counter()
+        for gram in scanned:
+            counts.update(self.grams[gram])
+        overlaps = {}
+        for position, count in counts.items():
+            if count + len(unscanned) < needed:
+                continue
+            record_grams = self.gram_sets[position]
+            overlaps[position] = count + sum(
+                gram in record_grams for gram in unscanned
+            )
+        return overlaps
+
+    def match(
+        self, text: Any, threshold: Optional[float] = None
+    ) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Best record for ``text`` and its score, or ``(None, best score)``"""
+        if threshold is None:
+            threshold = settings.LLM_ENTITY_MATCH_THRESHOLD
+        best = self.candidates(text, limit=1)
+        if not best:
+            return None, 0.0
+        record, score = best[0]
+        return (record if score >= threshold else None), score
+
+
+class CompanyEntityIndex:
+    """Entity indexes for one company context"""
+
+    def __init__(self, company_context: Dict[str, Any]):
+        customers = company_context.get("customers", [])
+        vendors = company_context.get("vendors", [])
+        self.customers = EntityIndex(customers)
+        self.vendors = EntityIndex(vendors)
+        self.counterparties = EntityIndex(customers + vendors)
+        self.accounts = EntityIndex(company_context.get("financial_accounts", []))
+
+
+class EntityIndexCache:
+    """Company entity indexes, kept per context snapshot version"""
+
+    def __init__(self, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or settings.LLM_CONTEXT_CACHE_SIZE
+        self._entries: "OrderedDict[Tuple[str, str], CompanyEntityIndex]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "builds": 0}
+
+    def for_context(self, company_context: Dict[str, Any]) -> CompanyEntityIndex:
+        """Index for ``company_context``, built on first use of its version"""
+        version = company_context.get("snapshot_version")
+        if version is None:
+            # Default and hand-built contexts are small and unversioned
+            return CompanyEntityIndex(company_context)
+
+        key = (str(company_context.get("company_id")), version)
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return index
+
+        index = CompanyEntityIndex(company_context)
+        with self._lock:
+            self._entries[key] = index
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self.stats["builds"] += 1
+        return index
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries)}
+
+
+# Global entity index cache
+entity_indexes = EntityIndexCache()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Fused Document Extraction
+Single-prompt classification, summary, entity and financial extraction
+
+The separate path sends the company context and an overlapping slice of the
+document four times. The fused path sends them once and asks for one JSON
+object, decoded under a grammar generated from ``FUSED_SCHEMA`` so the
+output always parses. Company-specific text comes before the document so
+consecutive prompts for one company share the longest possible prefix.
+"""
+
+import json
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Tuple
+
+try:
+    from llama_cpp import LlamaGrammar
+
+    GRAMMAR_AVAILABLE = True
+except ImportError:
+    GRAMMAR_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_MODES = ("separate", "fused")
+
+DOCUMENT_TYPES = [
+    "invoice",
+    "receipt",
+    "contract",
+    "financial_statement",
+    "tax_document",
+    "legal_document",
+    "other",
+]
+
+ENTITY_FIELDS = [
+    "companies",
+    "dates",
+    "amounts",
+    "invoice_numbers",
+    "emails",
+    "phones",
+    "account_codes",
+]
+
+FINANCIAL_FIELDS = [
+    "total_amount",
+    "tax_amount",
+    "due_date",
+    "invoice_number",
+    "customer_name",
+]
+
+# Bounds keep a complete object within LLM_FUSED_MAX_TOKENS
+_STRING_LIST = {"type": "array", "items": {"type": "string"}, "maxItems": 10}
+
+FUSED_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "document_type": {"type": "string", "enum": DOCUMENT_TYPES},
+        "summary": {"type": "string", "maxLength": 600},
+        "entities": {
+            "type": "object",
+            "properties": {field: _STRING_LIST for field in ENTITY_FIELDS},
+            "required": ENTITY_FIELDS,
+        },
+        "financial_data": {
+            "type": "object",
+            "properties": {
+                **{field: {"type": "string"} for field in FINANCIAL_FIELDS},
+                "account_codes": _STRING_LIST,
+            },
+            "required": FINANCIAL_FIELDS + ["account_codes"],
+        },
+    },
+    "required": ["document_type", "summary", "entities", "financial_data"],
+}
+
+
+@lru_cache(maxsize=1)
+def fused_grammar():
+    """Grammar constraining generation to ``FUSED_SCHEMA``, or None"""
+    if not GRAMMAR_AVAILABLE:
+        return None
+    return LlamaGrammar.from_json_schema(json.dumps(FUSED_SCHEMA), verbose=False)
+
+
+def build_fused_prompt(
+    context_manager, company_context: Dict, text: str
+) -> Tuple[str, str]:
+    """Build the company prefix and document suffix of the fused prompt"""
+    company = company_context["company_name"]
+    currency = company_context["currency"]
+    instructions = context_manager.get_company_specific_instructions(
+        company_context, "document_classification"
+    )
+    context = context_manager.build_company_prompt_context(company_context)
+
+    prefix = f"""
+            {instructions}
+
+            Context: {context}
+
+            Analyse the document below for {company} and answer with one JSON object:
+            - "document_type": one of {", ".join(DOCUMENT_TYPES)}
+            - "summary": a concise summary (2-3 sentences) focusing on information relevant to {company}
+            - "entities": companies (especially {company} and related companies), dates,
+              amounts (money in {currency}), invoice numbers, emails, phones and
+              account codes from the company's chart of accounts
+            - "financial_data": total amount and tax amount (in {currency}), due date,
+              invoice number, customer/vendor name (check against the company's
+              customer/vendor list) and account codes; use "" when a value is absent
+
+            Document:
+"""
+    suffix = f"""{text[:2000]}
+
+            JSON:
+            """
+    return prefix, suffix
+
+
+def parse_fused_response(result_text: str) -> Dict[str, Any]:
+    """
+    Parse a fused response into the four separate-path results
+
+    Raises ``ValueError`` when the output is not a complete object, which only
+    happens when generation was cut off or ran without the grammar.
+    """
+    data = json.loads(result_text)
+    if not isinstance(data, dict) or set(FUSED_SCHEMA["required"]) - set(data):
+        raise ValueError("Fused response is missing required fields")
+
+    financial_data = {
+        field: value for field, value in data["financial_data"].items() if value
+    }
+    return {
+        "document_type": data["document_type"],
+        "summary": data["summary"].strip(),
+        "entities": data["entities"],
+        "financial_data": financial_data,
+    }
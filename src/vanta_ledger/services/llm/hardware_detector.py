@@ -32,14 +32,6 @@ except ImportError:
     GPUTIL_AVAILABLE = False
     logger.warning("GPUtil not available - GPU detection disabled")
 
-try:
-    import torch
-
-    TORCH_AVAILABLE = True
-except ImportError:
-    TORCH_AVAILABLE = False
-    logger.warning("PyTorch not available")
-
 
 class HardwareDetector:
     """Detect and configure hardware for optimal LLM performance"""
@@ -174,6 +166,14 @@ class HardwareDetector:
             logger.warning(f"Memory detection failed: {str(e)}")
             self.memory_info = {"total": 8 * 1024**3, "available": 4 * 1024**3}
 
+    def available_memory(self) -> int:
+        """Bytes of RAM available right now"""
+        try:
+            return psutil.virtual_memory().available
+        except Exception as e:
+            logger.warning(f"Memory detection failed: {str(e)}")
+            return (self.memory_info or {}).get("available", 4 * 1024**3)
+
     def _configure_optimal_settings(self):
         """Configure optimal settings based on detected hardware"""
         self.detected_hardware = {
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Inference Executor
+Runs local model inference off the event loop with per-model scheduling
+
+Each loaded model is owned by one worker thread, so a ``Llama`` instance
+(which is not safe to share between threads) only ever runs on its own
+thread, while llama.cpp and torch release the GIL and the event loop keeps
+serving requests. Callers ``await`` results through ``submit``.
+
+Waiting jobs are scheduled rather than served first-come first-served:
+
+- Interactive jobs always run before background jobs
+  (see ``inference_priority``), and each class has a bounded queue; once it
+  is full new work is rejected with ``InferenceQueueFull``.
+- Every job has a deadline. Jobs that cannot start in time are rejected on
+  admission or dropped before running with ``InferenceDeadlineExceeded``,
+  and the earliest deadline runs first within a class.
+- Jobs sharing a prompt prefix (``affinity``) are grouped back to back, up
+  to ``max_group`` at a time, so the prefix stays resident in the model's
+  context and only each document's own tokens are evaluated.
+"""
+
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+
+from ...config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# Prometheus metrics, one series per registered model
+LLM_QUEUE_DEPTH = Gauge(
+    "llm_inference_queue_depth", "Inference jobs waiting for a model", ["model"]
+)
+LLM_IN_FLIGHT = Gauge(
+    "llm_inference_in_flight", "Inference jobs currently running", ["model"]
+)
+LLM_JOBS = Counter(
+    "llm_inference_jobs_total", "Inference jobs by outcome", ["model", "outcome"]
+)
+LLM_QUEUE_WAIT = Histogram(
+    "llm_inference_queue_wait_seconds", "Time jobs spent queued", ["model"]
+)
+LLM_RUN_TIME = Histogram(
+    "llm_inference_run_seconds", "Time jobs spent running", ["model"]
+)
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+PRIORITIES = (INTERACTIVE, BACKGROUND)
+
+# (priority, timeout) for jobs submitted from the current context
+_request_priority: contextvars.ContextVar[Tuple[str, Optional[float]]] = (
+    contextvars.ContextVar("inference_priority", default=(INTERACTIVE, None))
+)
+
+
+@contextmanager
+def inference_priority(priority: str = BACKGROUND, timeout: Optional[float] = None):
+    """Submit jobs from this context with ``priority`` and a ``timeout`` in seconds"""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown inference priority: {priority}")
+    token = _request_priority.set((priority, timeout))
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+def _default_timeout(priority: str) -> float:
+    if priority == INTERACTIVE:
+        return settings.LLM_INTERACTIVE_TIMEOUT
+    return settings.LLM_BACKGROUND_TIMEOUT
+
+
+class InferenceOverloaded(Exception):
+    """Base class for work the executor refused or gave up on"""
+
+
+class InferenceQueueFull(InferenceOverloaded):
+    """Raised when a model already has ``queue_size`` jobs of a class waiting"""
+
+    def __init__(self, model_name: str, depth: int):
+        super().__init__(f"Inference queue for {model_name} is full ({depth} waiting)")
+        self.model_name = model_name
+        self.depth = depth
+
+
+class InferenceDeadlineExceeded(InferenceOverloaded):
+    """Raised when a job cannot start or finish before its deadline"""
+
+    def __init__(self, model_name: str):
+        super().__init__(f"Inference on {model_name} missed its deadline")
+        self.model_name = model_name
+
+
+class _Job:
+    __slots__ = (
+        "fn",
+        "args",
+        "kwargs",
+        "future",
+        "priority",
+        "deadline",
+        "affinity",
+        "enqueued_at",
+    )
+
+    def __init__(self, fn, args, kwargs, priority, deadline, affinity):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future: Future = Future()
+        self.priority = priority
+        self.deadline = deadline
+        self.affinity = affinity
+        self.enqueued_at = time.monotonic()
+
+
+def _complete(model, prompt: str, **kwargs):
+    return model(prompt, **kwargs)
+
+
+class _JobScheduler:
+    """Per-model waiting jobs, ordered by priority, deadline and affinity"""
+
+    def __init__(self, queue_size: int, max_group: int):
+        self.queue_size = queue_size
+        self.max_group = max(1, max_group)
+        self._waiting: Dict[str, List[_Job]] = {p: [] for p in PRIORITIES}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._affinity: Optional[Hashable] = None
+        self._group_run = 0
+        # Moving average of run time, for deadline admission
+        self.avg_run_time = 0.0
+
+    def depth(self, priority: Optional[str] = None) -> int:
+        if priority is not None:
+            return len(self._waiting[priority])
+        return sum(len(jobs) for jobs in self._waiting.values())
+
+    def put(self, job: _Job, model_name: str, in_flight: int):
+        with self._cond:
+            waiting = self._waiting[job.priority]
+            if len(waiting) >= self.queue_size:
+                raise InferenceQueueFull(model_name, len(waiting))
+            # Jobs of this class or above that would run first
+            ahead = in_flight + sum(
+                len(self._waiting[p])
+                for p in PRIORITIES[: PRIORITIES.index(job.priority) + 1]
+            )
+            if job.enqueued_at + ahead * self.avg_run_time > job.deadline:
+                raise InferenceDeadlineExceeded(model_name)
+            waiting.append(job)
+            self._cond.notify()
+
+    def get(self, on_expired: Callable[[_Job], None]) -> Optional[_Job]:
+        """Block for the next job to run; None once closed"""
+        with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                now = time.monotonic()
+                for waiting in self._waiting.values():
+                    for job in [j for j in waiting if j.deadline <= now]:
+                        waiting.remove(job)
+                        on_expired(job)
+                job = self._pick()
+                if job is not None:
+                    return job
+                self._cond.wait()
+
+    def _pick(self) -> Optional[_Job]:
+        for priority in PRIORITIES:
+            waiting = self._waiting[priority]
+            if not waiting:
+                continue
+            job = None
+            if self._affinity is not None and self._group_run < self.max_group:
+                job = next((j for j in waiting if j.affinity == self._affinity), None)
+            if job is None:
+                job = min(waiting, key=lambda j: j.deadline)
+            waiting.remove(job)
+            if job.affinity is not None and job.affinity == self._affinity:
+                self._group_run += 1
+            else:
+                self._affinity = job.affinity
+                self._group_run = 1
+            return job
+        return None
+
+    def record_run_time(self, seconds: float):
+        with self._cond:
+            if self.avg_run_time == 0.0:
+                self.avg_run_time = seconds
+            else:
+                self.avg_run_time = 0.8 * self.avg_run_time + 0.2 * seconds
+
+    def close(self) -> List[_Job]:
+        """Stop the worker and return the jobs that never started"""
+        with self._cond:
+            self._closed = True
+            pending = [job for jobs in self._waiting.values() for job in jobs]
+            for jobs in self._waiting.values():
+                jobs.clear()
+            self._cond.notify_all()
+        return pending
+
+
+class _ModelWorker:
+    """Worker thread that owns one model and runs its scheduled jobs"""
+
+    def __init__(self, name: str, model: Any, queue_size: int, max_group: int):
+        self.name = name
+        self.model = model
+        self.scheduler = _JobScheduler(queue_size, max_group)
+        self.in_flight = 0
+        self.stats = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "rejected": 0,
+            "expired": 0,
+            "cancelled": 0,
+        }
+        self.thread = threading.Thread(
+            target=self._run, name=f"llm-inference-{name}", daemon=True
+        )
+        self.thread.start()
+
+    def put(self, job: _Job):
+        try:
+            self.scheduler.put(job, self.name, self.in_flight)
+        except InferenceOverloaded:
+            self.stats["rejected"] += 1
+            LLM_JOBS.labels(self.name, "rejected").inc()
+            raise
+        self.stats["submitted"] += 1
+
+    def stop(self):
+        """Cancel queued jobs and end the thread after the running one"""
+        for job in self.scheduler.close():
+            if job.future.cancel():
+                self.stats["cancelled"] += 1
+
+    def _expire(self, job: _Job):
+        if job.future.set_running_or_notify_cancel():
+            job.future.set_exception(InferenceDeadlineExceeded(self.name))
+        self.stats["expired"] += 1
+        LLM_JOBS.labels(self.name, "expired").inc()
+
+    def _run(self):
+        while True:
+            job = self.scheduler.get(self._expire)
+            if job is None:
+                return
+            # False when the awaiting caller was cancelled while queued
+            if not job.future.set_running_or_notify_cancel():
+                self.stats["cancelled"] += 1
+                LLM_JOBS.labels(self.name, "cancelled").inc()
+                continue
+
+            started = time.monotonic()
+            LLM_QUEUE_WAIT.labels(self.name).observe(started - job.enqueued_at)
+            self.in_flight = 1
+            try:
+                result = job.fn(self.model, *job.args, **job.kwargs)
+            except Exception as e:
+                self.stats["failed"] += 1
+                LLM_JOBS.labels(self.name, "failed").inc()
+                job.future.set_exception(e)
+            else:
+                self.stats["completed"] += 1
+                LLM_JOBS.labels(self.name, "completed").inc()
+                job.future.set_result(result)
+            finally:
+                self.in_flight = 0
+                run_time = time.monotonic() - started
+                self.scheduler.record_run_time(run_time)
+                LLM_RUN_TIME.labels(self.name).observe(run_time)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "queue_depth": {p: self.scheduler.depth(p) for p in PRIORITIES},
+            "queue_size": self.scheduler.queue_size,
+            "in_flight": self.in_flight,
+            "avg_run_time": round(self.scheduler.avg_run_time, 3),
+        }
+
+
+class InferenceExecutor:
+    """Per-model worker threads behind an asyncio submit/await API"""
+
+    def __init__(self, queue_size: Optional[int] = None):
+        self.queue_size = queue_size or settings.LLM_EXECUTOR_QUEUE_SIZE
+        self._workers: Dict[str, _ModelWorker] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, model: Any, max_group: int = 1):
+        """
+        Hand ``model`` to a dedicated worker, replacing any previous one
+
+        ``max_group`` caps how many jobs sharing an affinity run back to back
+        while other jobs of the same priority are waiting.
+        """
+        worker = _ModelWorker(name, model, self.queue_size, max_group)
+        with self._lock:
+            previous = self._workers.get(name)
+            self._workers[name] = worker
+        if previous is not None:
+            previous.stop()
+        LLM_QUEUE_DEPTH.labels(name).set_function(lambda: worker.scheduler.depth())
+        LLM_IN_FLIGHT.labels(name).set_function(lambda: worker.in_flight)
+        logger.info(f"✅ Inference worker started for {name}")
+
+    def unregister(self, name: str):
+        with self._lock:
+            worker = self._workers.pop(name, None)
+        if worker is not None:
+            worker.stop()
+
+    def has_model(self, name: str) -> bool:
+        return name in self._workers
+
+    def is_idle(self, name: str) -> bool:
+        """True when nothing is queued or running on ``name``"""
+        worker = self._workers.get(name)
+        return worker is None or (
+            worker.in_flight == 0 and worker.scheduler.depth() == 0
+        )
+
+    async def submit(
+        self,
+        name: str,
+        fn: Callable,
+        *args,
+        affinity: Optional[Hashable] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Run ``fn(model, *args, **kwargs)`` on the thread owning ``name``
+
+        Priority and timeout come from the enclosing ``inference_priority``
+        (interactive by default). Raises ``KeyError`` for an unregistered
+        model, ``InferenceQueueFull`` when the priority's queue is at
+        capacity and ``InferenceDeadlineExceeded`` when the job cannot
+        finish in time. Cancelling the awaiting task drops the job if it has
+        not started.
+        """
+        worker = self._workers[name]
+        priority, timeout = _request_priority.get()
+        if timeout is None:
+            timeout = _default_timeout(priority)
+        job = _Job(fn, args, kwargs, priority, time.monotonic() + timeout, affinity)
+        worker.put(job)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(job.future), timeout)
+        except asyncio.TimeoutError:
+            raise InferenceDeadlineExceeded(name)
+
+    async def generate(
+        self,
+        name: str,
+        prompt: str,
+        affinity: Optional[Hashable] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """Run a llama.cpp completion on ``name``"""
+        return await self.submit(name, _complete, prompt, affinity=affinity, **kwargs)
+
+    def shutdown(self):
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: worker.get_stats() for name, worker in self._workers.items()}
+
+
+# Global inference executor
+inference_executor = InferenceExecutor()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Layout Pipeline
+Batched LayoutLMv3 document understanding for multi-page PDFs and images
+
+Each page is rasterized once (PDFs through PyMuPDF, images and multi-frame
+TIFFs through PIL) and streamed, so only one batch of page images is held in
+memory at a time. Pages go through the processor and model
+``LLM_LAYOUT_BATCH_SIZE`` at a time under ``torch.inference_mode``. Results
+are cached per page by a hash of the rendered pixels and the model version,
+so a re-uploaded contract, or a page repeated across documents (standard
+terms, letterheads), is not run through the model again.
+
+``analyze`` runs on the LayoutLMv3 inference worker thread.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ...config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def iter_pages(file_path: str, dpi: int, max_pages: int) -> Iterator[Any]:
+    """Yield each page of a PDF or image file as an RGB ``PIL.Image``"""
+    from PIL import Image, ImageSequence
+
+    if Path(file_path).suffix.lower() == ".pdf":
+        import fitz  # PyMuPDF
+
+        with fitz.open(file_path) as doc:
+            for index, page in enumerate(doc):
+                if index >= max_pages:
+                    break
+                pixmap = page.get_pixmap(dpi=dpi, alpha=False)
+                yield Image.frombytes(
+                    "RGB", (pixmap.width, pixmap.height), pixmap.samples
+                )
+        return
+
+    with Image.open(file_path) as image:
+        for index, frame in enumerate(ImageSequence.Iterator(image)):
+            if index >= max_pages:
+                break
+            yield frame.convert("RGB")
+
+
+def page_digest(image) -> str:
+    """Hash of a rendered page's pixels"""
+    digest = hashlib.sha256(f"{image.mode}:{image.size}".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def _infer(layoutlm: Dict[str, Any], images: List[Any]) -> List[Dict[str, Any]]:
+    """Run one batch of page images through LayoutLMv3"""
+    import torch
+
+    processor = layoutlm["processor"]
+    model = layoutlm["model"]
+    device = layoutlm["device"]
+
+    encoding = processor(images, return_tensors="pt", padding=True, truncation=True)
+    encoding = {k: v.to(device) for k, v in encoding.items()}
+
+    with torch.inference_mode():
+        logits = model(**encoding).logits
+    confidences, labels = logits.softmax(-1).max(-1)
+    regions = encoding["attention_mask"].sum(-1)
+
+    id2label = getattr(model.config, "id2label", None) or {}
+    return [
+        {
+            "label": id2label.get(int(label), str(int(label))),
+            "confidence": round(float(confidence), 4),
+            "text_regions": int(region),
+        }
+        for label, confidence, region in zip(labels, confidences, regions)
+    ]
+
+
+class LayoutPipeline:
+    """Streams document pages through LayoutLMv3 in batches"""
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        dpi: Optional[int] = None,
+        max_pages: Optional[int] = None,
+        cache_size: Optional[int] = None,
+    ):
+        self.batch_size = max(1, batch_size or settings.LLM_LAYOUT_BATCH_SIZE)
+        self.dpi = dpi or settings.LLM_LAYOUT_DPI
+        self.max_pages = max_pages or settings.LLM_LAYOUT_MAX_PAGES
+        self.cache_size = (
+            cache_size
+            if cache_size is not None
+            else settings.LLM_LAYOUT_PAGE_CACHE_SIZE
+        )
+        self._cache: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"documents": 0, "pages": 0, "cached_pages": 0, "batches": 0}
+
+    def analyze(self, layoutlm: Dict[str, Any], file_path: str) -> Dict[str, Any]:
+        """Analyze every page of ``file_path``; called on the model's worker thread"""
+        version = layoutlm.get("version", "")
+        pages: List[Dict[str, Any]] = []
+        batch: List[Tuple[int, str, Any]] = []
+
+        for index, image in enumerate(iter_pages(file_path, self.dpi, self.max_pages)):
+            digest = page_digest(image)
+            cached = self._cache_get((version, digest))
+            if cached is not None:
+                pages.append({**cached, "page": index + 1})
+                continue
+            batch.append((index, digest, image))
+            if len(batch) >= self.batch_size:
+                pages.extend(self._run_batch(layoutlm, version, batch))
+                batch = []
+        if batch:
+            pages.extend(self._run_batch(layoutlm, version, batch))
+
+        pages.sort(key=lambda page: page["page"])
+        with self._lock:
+            self.stats["documents"] += 1
+            self.stats["pages"] += len(pages)
+        return self._summarize(pages, layoutlm["device"])
+
+    def _run_batch(self, layoutlm, version, batch) -> List[Dict[str, Any]]:
+        results = _infer(layoutlm, [image for _, _, image in batch])
+        with self._lock:
+            self.stats["batches"] += 1
+        pages = []
+        for (index, digest, _), result in zip(batch, results):
+            self._cache_put((version, digest), result)
+            pages.append({**result, "page": index + 1})
+        return pages
+
+    def _cache_get(self, key) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+                self.stats["cached_pages"] += 1
+            return result
+
+    def _cache_put(self, key, result: Dict[str, Any]):
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._cache[key] = result
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _summarize(pages: List[Dict[str, Any]], device) -> Dict[str, Any]:
+        labels = [page["label"].lower() for page in pages]
+        has_table = any("table" in label for label in labels)
+        return {
+            "has_table": has_table,
+            "has_form": any("form" in label for label in labels),
+            "text_regions": sum(page["text_regions"] for page in pages),
+            "layout_type": "structured" if has_table else "unstructured",
+            "processing_device": "gpu" if device.type == "cuda" else "cpu",
+            "page_count": len(pages),
+            "pages": pages,
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "cached_entries": len(self._cache)}
+
+
+# Global layout pipeline
+layout_pipeline = LayoutPipeline()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Model Pool
+Loads local models on first use and evicts idle ones when memory runs short
+
+Nothing is loaded at import or startup time. The first request for a model
+starts its load as a background task; concurrent requests await the same
+task, and a cancelled request does not cancel the load. Loads run one at a
+time so that two of them never claim the same free memory.
+
+Before a load the pool compares the model's size with the RAM available
+(less ``LLM_MEMORY_RESERVE_MB``) and evicts least recently used models until
+it fits. Only idle models are evicted: nothing queued or running on their
+worker, and not used within ``evict_grace`` seconds, which covers the gap
+between a caller seeing a model ready and submitting its job. When not
+enough can be freed the load still goes ahead, since GGUF weights are
+memory-mapped and the kernel can page them out under pressure.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+from ...config import settings
+
+logger = logging.getLogger(__name__)
+
+UNLOADED = "unloaded"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class ModelPool:
+    """Readiness state and memory-aware LRU eviction for loaded models"""
+
+    def __init__(
+        self,
+        load: Callable[[str], Awaitable[bool]],
+        unload: Callable[[str], None],
+        size_of: Callable[[str], int],
+        available_memory: Callable[[], int],
+        is_idle: Callable[[str], bool],
+        reserve_bytes: Optional[int] = None,
+        max_loaded: Optional[int] = None,
+        evict_grace: float = 5.0,
+    ):
+        self._load_fn = load
+        self._unload_fn = unload
+        self._size_of = size_of
+        self._available_memory = available_memory
+        self._is_idle = is_idle
+        self.reserve_bytes = (
+            reserve_bytes
+            if reserve_bytes is not None
+            else settings.LLM_MEMORY_RESERVE_MB * 1024 * 1024
+        )
+        self.max_loaded = (
+            max_loaded if max_loaded is not None else settings.LLM_MAX_LOADED_MODELS
+        )
+        self.evict_grace = evict_grace
+
+        self._states: Dict[str, str] = {}
+        self._errors: Dict[str, str] = {}
+        # Ready models, least recently used first: name -> (size, last used)
+        self._lru: "OrderedDict[str, list]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._load_lock: Optional[asyncio.Lock] = None
+        self.stats = {"loads": 0, "load_failures": 0, "evictions": 0}
+
+    def state(self, name: str) -> str:
+        return self._states.get(name, UNLOADED)
+
+    def touch(self, name: str):
+        """Mark ``name`` as just used"""
+        entry = self._lru.get(name)
+        if entry is not None:
+            entry[1] = time.monotonic()
+            self._lru.move_to_end(name)
+
+    def start(self, name: str) -> asyncio.Task:
+        """Start loading ``name`` in the background, if it is not already"""
+        task = self._loading.get(name)
+        if task is None:
+            task = asyncio.create_task(self._load(name))
+            self._loading[name] = task
+            task.add_done_callback(lambda _: self._loading.pop(name, None))
+        return task
+
+    async def ensure(self, name: str) -> bool:
+        """Wait until ``name`` is loaded; False when it cannot be"""
+        if self.state(name) == READY:
+            self.touch(name)
+            return True
+        return await asyncio.shield(self.start(name))
+
+    def preload(self, names: Iterable[str]):
+        """Load ``names`` in the background without waiting for them"""
+        for name in names:
+            if self.state(name) != READY:
+                self.start(name)
+
+    async def _load(self, name: str) -> bool:
+        if self._load_lock is None:
+            self._load_lock = asyncio.Lock()
+        async with self._load_lock:
+            if self.state(name) == READY:
+                return True
+            self._states[name] = LOADING
+            size = self._size_of(name)
+            self._make_room(name, size)
+
+            started = time.monotonic()
+            try:
+                loaded = await self._load_fn(name)
+                self._errors.pop(name, None)
+            except Exception as e:
+                loaded = False
+                self._errors[name] = str(e)
+
+            if not loaded:
+                self._states[name] = FAILED
+                self.stats["load_failures"] += 1
+                return False
+            self._states[name] = READY
+            self._lru[name] = [size, time.monotonic()]
+            self.stats["loads"] += 1
+            logger.info(
+                f"Model {name} ready in {time.monotonic() - started:.1f}s "
+                f"({size / 1024**2:.0f} MB)"
+            )
+            return True
+
+    def _make_room(self, name: str, size: int):
+        """Evict idle models until ``size`` bytes fit beside the reserve"""
+        try:
+            available = self._available_memory()
+        except Exception as e:
+            logger.warning(f"Available memory unknown, not evicting: {e}")
+            available = None
+
+        freed = 0
+        now = time.monotonic()
+        for victim in list(self._lru):
+            over_count = self.max_loaded > 0 and len(self._lru) >= self.max_loaded
+            short = (
+                available is not None
+                and available + freed - self.reserve_bytes < size
+            )
+            if not (over_count or short):
+                return
+            victim_size, last_used = self._lru[victim]
+            if victim == name or now - last_used < self.evict_grace:
+                continue
+            if not self._is_idle(victim):
+                continue
+            self.evict(victim)
+            freed += victim_size
+
+        if available is not None and available + freed - self.reserve_bytes < size:
+            logger.warning(
+                f"Loading {name} without enough free memory; "
+                f"no idle model left to evict"
+            )
+
+    def evict(self, name: str):
+        """Unload ``name`` now"""
+        self._lru.pop(name, None)
+        self._states[name] = UNLOADED
+        try:
+            self._unload_fn(name)
+        except Exception as e:
+            logger.warning(f"Error unloading model {name}: {e}")
+        self.stats["evictions"] += 1
+        logger.info(f"Model {name} evicted")
+
+    def get_status(self) -> Dict[str, Any]:
+        models = {}
+        for name, state in self._states.items():
+            models[name] = {"state": state}
+            if name in self._lru:
+                models[name]["size_mb"] = round(self._lru[name][0] / 1024**2)
+            if state == FAILED and name in self._errors:
+                models[name]["error"] = self._errors[name]
+        return {**self.stats, "models": models}
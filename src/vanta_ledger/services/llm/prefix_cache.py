@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Prompt Prefix Cache
+Saved llama.cpp states for company-specific prompt prefixes
+
+Prompts are split into a prefix (task instructions and the company context,
+identical for every document of a company) and a document suffix. The first
+completion for a prefix evaluates it once and keeps ``Llama.save_state()``;
+later completions restore that state, and llama.cpp then evaluates only the
+tokens after the longest common prefix, i.e. the document. Keys include a
+digest of the prefix text, so any change to the company context or the
+prompt template selects a new state instead of reusing a stale one.
+
+States hold the KV cache of the prefix tokens, so the cache is bounded by
+bytes (``LLM_PREFIX_CACHE_MB``) rather than entries. Methods taking a model
+run on that model's inference worker thread.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from ...config import settings
+
+logger = logging.getLogger(__name__)
+
+PrefixKey = Tuple[str, str, str, str]
+
+
+class _SavedPrefix:
+    __slots__ = ("tokens", "state", "size")
+
+    def __init__(self, tokens, state):
+        self.tokens = tokens
+        self.state = state
+        self.size = state.llama_state_size
+
+
+class PromptPrefixCache:
+    """Byte-bounded LRU of llama.cpp states keyed by model, company and prefix"""
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = (
+            max_bytes
+            if max_bytes is not None
+            else settings.LLM_PREFIX_CACHE_MB * 1024 * 1024
+        )
+        self._entries: "OrderedDict[PrefixKey, _SavedPrefix]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "resident": 0,
+            "evictions": 0,
+            "prefix_tokens_saved": 0,
+        }
+
+    @staticmethod
+    def key(model_name: str, company_id: Any, task: str, prefix: str) -> PrefixKey:
+        digest = hashlib.sha256(prefix.encode("utf-8")).hexdigest()[:16]
+        return (model_name, str(company_id), task, digest)
+
+    def complete(self, model, key: PrefixKey, prefix: str, suffix: str, **kwargs):
+        """Run a completion of ``prefix + suffix`` with the prefix state restored"""
+        if self.max_bytes <= 0 or not hasattr(model, "save_state"):
+            return model(prefix + suffix, **kwargs)
+
+        try:
+            self._restore(model, key, prefix)
+        except Exception as e:
+            # The completion below still evaluates the full prompt
+            logger.warning(f"Prompt prefix cache bypassed: {e}")
+        return model(prefix + suffix, **kwargs)
+
+    def _restore(self, model, key: PrefixKey, prefix: str):
+        with self._lock:
+            saved = self._entries.get(key)
+            if saved is None:
+                self.stats["misses"] += 1
+            else:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                self.stats["prefix_tokens_saved"] += len(saved.tokens)
+
+        if saved is None:
+            # Tokenised as create_completion tokenises the full prompt
+            tokens = model.tokenize(prefix.encode("utf-8"), special=True)
+            model.reset()
+            model.eval(tokens)
+            self._put(key, _SavedPrefix(tokens, model.save_state()))
+            return
+
+        # Skip the copy when the last completion on this model used the prefix
+        n = len(saved.tokens)
+        if model.n_tokens >= n and list(model.input_ids[:n]) == saved.tokens:
+            self.stats["resident"] += 1
+            return
+        model.load_state(saved.state)
+
+    def _put(self, key: PrefixKey, saved: _SavedPrefix):
+        if saved.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            self._entries[key] = saved
+            self._bytes += saved.size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.stats["evictions"] += 1
+
+    def invalidate(
+        self, company_id: Optional[Any] = None, model_name: Optional[str] = None
+    ):
+        """Drop saved prefixes for a company and/or model, or all of them"""
+        with self._lock:
+            stale = [
+                key
+                for key in self._entries
+                if (company_id is None or key[1] == str(company_id))
+                and (model_name is None or key[0] == model_name)
+            ]
+            for key in stale:
+                self._bytes -= self._entries.pop(key).size
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+# Global prompt prefix cache
+prefix_cache = PromptPrefixCache()
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+LLM Result Cache
+Content-addressed cache of per-document LLM results, in process and in Redis
+
+Keys are the SHA-256 of what actually determines a result: the document
+content (extracted text, plus the file bytes when the layout model reads
+them), the ids of the models that ran, ``PROMPT_TEMPLATE_VERSION`` and a
+digest of the company context. Identical content uploaded under another
+name hits; distinct uploads never collide, and a changed model file, prompt
+template or company context selects a new key.
+
+Results live in a small in-process LRU (L1) over a long-lived Redis tier
+(L2) that is bounded by bytes: a Lua script stores each entry and evicts the
+least recently used ones once ``LLM_RESULT_CACHE_MB`` is exceeded. Entries
+are indexed by company and model, so ``invalidate`` and ``note_version``
+can drop everything a changed company context or model produced.
+
+Redis keys are only ever removed by these scripts, never by ``EXPIRE``, so the
+LRU index and byte counter always describe the keys that exist. An entry older
+than ``LLM_CACHE_TTL`` is treated as a miss and removed when it is read.
+
+The methods make blocking Redis round trips; async callers run them with
+``asyncio.to_thread``.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from ...config import settings
+from ...database import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "llm_result"
+LRU_KEY = f"{KEY_PREFIX}:lru"
+SIZES_KEY = f"{KEY_PREFIX}:sizes"
+BYTES_KEY = f"{KEY_PREFIX}:bytes"
+
+# Bump whenever prompts or result parsing change so old results are not reused
+PROMPT_TEMPLATE_VERSION = "1"
+
+# Every entry carries this tag so a global invalidation can find it
+ALL_TAG = "all"
+
+# KEYS: entry, lru zset, sizes hash, bytes counter, index sets...
+# ARGV: value, now, max bytes
+# Returns the number of entries evicted. Evicted keys are not declared in
+# KEYS, which is fine on a single Redis node.
+STORE_LUA = """
+local size = string.len(ARGV[1])
+local old = tonumber(redis.call('HGET', KEYS[3], KEYS[1]) or '0')
+redis.call('SET', KEYS[1], ARGV[1])
+redis.call('ZADD', KEYS[2], ARGV[2], KEYS[1])
+redis.call('HSET', KEYS[3], KEYS[1], size)
+local total = redis.call('INCRBY', KEYS[4], size - old)
+for i = 5, #KEYS do
+    redis.call('SADD', KEYS[i], KEYS[1])
+end
+local evicted = 0
+while total > tonumber(ARGV[3]) do
+    local oldest = redis.call('ZRANGE', KEYS[2], 0, 0)
+    if #oldest == 0 then
+        break
+    end
+    local victim = oldest[1]
+    local victim_size = tonumber(redis.call('HGET', KEYS[3], victim) or '0')
+    total = redis.call('INCRBY', KEYS[4], -victim_size)
+    redis.call('DEL', victim)
+    redis.call('ZREM', KEYS[2], victim)
+    redis.call('HDEL', KEYS[3], victim)
+    evicted = evicted + 1
+end
+return evicted
+"""
+
+# KEYS: entry, lru zset, sizes hash, bytes counter
+# Returns 1 if the entry existed
+REMOVE_LUA = """
+local size = redis.call('HGET', KEYS[3], KEYS[1])
+if size then
+    redis.call('INCRBY', KEYS[4], -tonumber(size))
+    redis.call('HDEL', KEYS[3], KEYS[1])
+end
+redis.call('ZREM', KEYS[2], KEYS[1])
+return redis.call('DEL', KEYS[1])
+"""
+
+# KEYS: lru zset, sizes hash, bytes counter, index sets...
+# Returns the number of entries dropped
+DROP_LUA = """
+local dropped = 0
+for i = 4, #KEYS do
+    for _, key in ipairs(redis.call('SMEMBERS', KEYS[i])) do
+        local size = redis.call('HGET', KEYS[2], key)
+        if size then
+            redis.call('INCRBY', KEYS[3], -tonumber(size))
+            redis.call('HDEL', KEYS[2], key)
+            dropped = dropped + 1
+        end
+        redis.call('DEL', key)
+        redis.call('ZREM', KEYS[1], key)
+    end
+    redis.call('DEL', KEYS[i])
+end
+return dropped
+"""
+
+
+def company_tag(company_id: Any) -> str:
+    return f"company:{company_id}"
+
+
+def model_tag(model_name: str) -> str:
+    return f"model:{model_name}"
+
+
+def content_digest(text: str, file_path: Optional[str] = None) -> str:
+    """SHA-256 of ``text``, and of the file's bytes when ``file_path`` is given"""
+    digest = hashlib.sha256(text.encode("utf-8"))
+    if file_path:
+        try:
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+        except OSError:
+            pass
+    return digest.hexdigest()
+
+
+def context_version(company_context: Dict[str, Any]) -> str:
+    """Digest of everything in a company context that can shape a result"""
+    payload = json.dumps(company_context, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def model_version(model_name: str, model_path: str) -> str:
+    """Identify a model by its file, so swapped weights get new keys"""
+    path = Path(model_path)
+    try:
+        stat = path.stat()
+        return f"{model_name}:{path.name}:{stat.st_size}:{int(stat.st_mtime)}"
+    except OSError:
+        return f"{model_name}:{path.name}"
+
+
+class _Entry:
+    __slots__ = ("result", "tags")
+
+    def __init__(self, result, tags):
+        self.result = result
+        self.tags = tags
+
+
+class LLMResultCache:
+    """Content-addressed LRU over a byte-bounded Redis tier"""
+
+    def __init__(
+        self,
+        l1_size: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[int] = None,
+        redis_client=None,
+    ):
+        self.l1_size = l1_size or settings.LLM_RESULT_CACHE_L1_SIZE
+        self.max_bytes = (
+            max_bytes
+            if max_bytes is not None
+            else settings.LLM_RESULT_CACHE_MB * 1024 * 1024
+        )
+        self.ttl = ttl if ttl is not None else settings.LLM_CACHE_TTL
+        self.redis = redis_client
+        self._scripts: Dict[str, Any] = {}
+        # Guards L1 and the recorded versions; callers run on worker threads
+        self._lock = threading.Lock()
+        self._l1: "OrderedDict[str, _Entry]" = OrderedDict()
+        # Last company context / model version seen, per "kind:name"
+        self._versions: Dict[str, str] = {}
+        self.stats = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "errors": 0,
+        }
+
+    @staticmethod
+    def key(content: str, model_id: str, context: str) -> str:
+        """Cache key for a content digest, model id and context version"""
+        material = "\n".join([content, model_id, PROMPT_TEMPLATE_VERSION, context])
+        return f"{KEY_PREFIX}:{hashlib.sha256(material.encode('utf-8')).hexdigest()}"
+
+    def _redis(self):
+        if self.redis is None:
+            try:
+                self.redis = get_redis_client()
+            except Exception as e:
+                logger.warning(f"LLM result cache running without Redis: {e}")
+                return None
+        return self.redis
+
+    def _script(self, redis, name: str, source: str):
+        if name not in self._scripts:
+            self._scripts[name] = redis.register_script(source)
+        return self._scripts[name]
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached result for ``key``, or None"""
+        with self._lock:
+            entry = self._l1.get(key)
+            if entry is not None:
+                self._l1.move_to_end(key)
+                self.stats["l1_hits"] += 1
+                return entry.result
+
+        redis = self._redis()
+        if redis is not None:
+            try:
+                raw = redis.get(key)
+                if raw is not None:
+                    data = json.loads(raw)
+                    now = time.time()
+                    if self.ttl and now - data.get("stored_at", 0) > self.ttl:
+                        remove = self._script(redis, "remove", REMOVE_LUA)
+                        remove(keys=[key, LRU_KEY, SIZES_KEY, BYTES_KEY], args=[])
+                        self.stats["misses"] += 1
+                        return None
+                    redis.zadd(LRU_KEY, {key: now})
+                    self._l1_put(key, _Entry(data["result"], data["tags"]))
+                    self.stats["l2_hits"] += 1
+                    return data["result"]
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"LLM result cache read failed: {e}")
+
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, key: str, result: Dict[str, Any], tags: List[str]):
+        """Store ``result`` in both tiers, indexed under ``tags``"""
+        self._l1_put(key, _Entry(result, tags))
+
+        redis = self._redis()
+        if redis is None:
+            return
+        try:
+            now = time.time()
+            value = json.dumps(
+                {"result": result, "tags": tags, "stored_at": now}, default=str
+            )
+            if len(value) > self.max_bytes:
+                return
+            index_keys = [f"{KEY_PREFIX}:index:{tag}" for tag in [ALL_TAG, *tags]]
+            store = self._script(redis, "store", STORE_LUA)
+            evicted = store(
+                keys=[key, LRU_KEY, SIZES_KEY, BYTES_KEY, *index_keys],
+                args=[value, now, self.max_bytes],
+            )
+            self.stats["evictions"] += int(evicted or 0)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"LLM result cache write failed: {e}")
+
+    def _l1_put(self, key: str, entry: _Entry):
+        with self._lock:
+            self._l1[key] = entry
+            self._l1.move_to_end(key)
+            while len(self._l1) > self.l1_size:
+                self._l1.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+
+    def invalidate(
+        self, company_id: Optional[Any] = None, model_name: Optional[str] = None
+    ) -> int:
+        """Drop results for a company and/or model, or all of them"""
+        tags = []
+        if company_id is not None:
+            tags.append(company_tag(company_id))
+        if model_name is not None:
+            tags.append(model_tag(model_name))
+        return self._drop(tags or [ALL_TAG])
+
+    def note_version(self, kind: str, name: Any, version: str):
+        """
+        Record the current version of a company context or model
+
+        When it differs from the version recorded earlier (by any worker),
+        the results indexed under that company or model are dropped.
+        """
+        slot = f"{kind}:{name}"
+        with self._lock:
+            previous = self._versions.get(slot)
+            if previous == version:
+                return
+            self._versions[slot] = version
+
+        redis = self._redis()
+        if redis is not None:
+            try:
+                raw = redis.getset(f"{KEY_PREFIX}:version:{slot}", version)
+                if raw is not None:
+                    previous = raw.decode() if isinstance(raw, bytes) else raw
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"LLM result cache version check failed: {e}")
+        if previous is not None and previous != version:
+            self._drop([slot])
+
+    def _drop(self, tags: List[str]) -> int:
+        self.stats["invalidations"] += 1
+        with self._lock:
+            if ALL_TAG in tags:
+                dropped = len(self._l1)
+                self._l1.clear()
+            else:
+                wanted = set(tags)
+                stale = [
+                    k for k, entry in self._l1.items() if wanted & set(entry.tags)
+                ]
+                for key in stale:
+                    self._l1.pop(key, None)
+                dropped = len(stale)
+
+        redis = self._redis()
+        if redis is None:
+            return dropped
+        try:
+            drop = self._script(redis, "drop", DROP_LUA)
+            index_keys = [f"{KEY_PREFIX}:index:{tag}" for tag in tags]
+            return int(
+                drop(keys=[LRU_KEY, SIZES_KEY, BYTES_KEY, *index_keys], args=[]) or 0
+            )
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"LLM result cache invalidation failed: {e}")
+            return dropped
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {
+            **self.stats,
+            "l1_entries": len(self._l1),
+            "max_bytes": self.max_bytes,
+        }
+        redis = self._redis()
+        if redis is not None:
+            try:
+                stats["l2_entries"] = redis.zcard(LRU_KEY)
+                stats["l2_bytes"] = int(redis.get(BYTES_KEY) or 0)
+            except Exception as e:
+                logger.debug(f"LLM result cache stats unavailable: {e}")
+        return stats
+
+
+# Global LLM result cache
+result_cache = LLMResultCache()
@@ -5,46 +5,31 @@ Main service integrating hardware detection, company context, and model orchestr
 """
 
 import asyncio
-import hashlib
+import gc
+import importlib.util
 import json
 import logging
 import time
 from datetime import datetime
+from functools import cached_property
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID
 
-# LLM and ML imports
-try:
-    from llama_cpp import Llama
-
-    LLAMA_AVAILABLE = True
-except ImportError:
-    LLAMA_AVAILABLE = False
+# LLM and ML libraries are imported when a model is first loaded, so that
+# importing this module (and starting an API worker) stays fast
+LLAMA_AVAILABLE = importlib.util.find_spec("llama_cpp") is not None
+if not LLAMA_AVAILABLE:
     logging.warning("llama-cpp-python not available")
 
-# Try to import optional dependencies
-try:
-    import torch
-    from transformers import (
-        LayoutLMv3ForSequenceClassification,
-        LayoutLMv3Processor,
-    )
-
-    LAYOUTLM_AVAILABLE = True
-except Exception as e:
+LAYOUTLM_AVAILABLE = all(
+    importlib.util.find_spec(module) is not None
+    for module in ("torch", "transformers")
+)
+if not LAYOUTLM_AVAILABLE:
     logging.warning(
-        f"LayoutLMv3 not available - document layout understanding disabled: {e}"
+        "PyTorch/Transformers not available - document layout understanding disabled"
     )
-except ImportError:
-    TORCH_AVAILABLE = False
-    LAYOUTLM_AVAILABLE = False
-    logging.warning("PyTorch/Transformers not available")
-
-# Database and cache
-import redis
-from pymongo import MongoClient
-from pymongo.database import Database
 
 # Optional hardware monitoring
 try:
@@ -56,9 +41,28 @@ except ImportError:
     logging.warning("GPUtil/psutil not available - hardware monitoring disabled")
 
 from ..config import settings
+from ..database import MongoDatabase, get_redis_client
 from ..models.document_models import EnhancedDocument
 from .llm.company_context import CompanyContextManager
+from .llm.entity_index import entity_indexes
+from .llm.fused_extraction import (
+    build_fused_prompt,
+    fused_grammar,
+    parse_fused_response,
+)
 from .llm.hardware_detector import HardwareDetector
+from .llm.inference_executor import InferenceOverloaded, inference_executor
+from .llm.layout_pipeline import layout_pipeline
+from .llm.model_pool import ModelPool
+from .llm.prefix_cache import prefix_cache
+from .llm.result_cache import (
+    company_tag,
+    content_digest,
+    context_version,
+    model_tag,
+    model_version,
+    result_cache,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -66,29 +70,45 @@ logger = logging.getLogger(__name__)
 class LocalLLMService:
     """Local LLM orchestration and management service"""
 
+    # Resolved on every use, so a closed and reopened pool is picked up
+    db = MongoDatabase()
+
     def __init__(self):
-        # Initialize hardware detector
+        # Hardware is detected on first use of ``hardware_config``
         self.hardware_detector = HardwareDetector()
-        self.hardware_config = self.hardware_detector.detect_hardware()
 
         # Initialize database connections
-        self.mongo_client = MongoClient(settings.MONGO_URI)
-        self.db: Database = self.mongo_client[settings.DATABASE_NAME]
-        self.redis_client = redis.Redis.from_url(
-            settings.REDIS_URI, decode_responses=True
-        )
+        self.redis_client = get_redis_client()
 
         # Initialize company context manager
-        self.company_context_manager = CompanyContextManager(self.db)
+        self.company_context_manager = CompanyContextManager()
 
-        # Model management
+        # Model management; inference runs on the executor's worker threads and
+        # models are loaded on first use by the pool
         self.models = {}
-        self.model_configs = self._load_model_configs()
+        # Model file versions, part of every result cache key
+        self.model_versions: Dict[str, str] = {}
+        self.executor = inference_executor
+        self.model_pool = ModelPool(
+            load=self._load_model,
+            unload=self._unload_model,
+            size_of=self._model_size,
+            available_memory=self.hardware_detector.available_memory,
+            is_idle=lambda name: self.executor.is_idle(name),
+        )
         self.performance_metrics = {}
 
+    @cached_property
+    def hardware_config(self) -> Dict[str, Any]:
+        config = self.hardware_detector.detect_hardware()
         logger.info(
-            f"Local LLM Service initialized with hardware: {self.hardware_detector.get_hardware_summary()}"
+            f"Local LLM hardware: {self.hardware_detector.get_hardware_summary()}"
         )
+        return config
+
+    @cached_property
+    def model_configs(self) -> Dict[str, Dict]:
+        return self._load_model_configs()
 
     def _load_model_configs(self) -> Dict[str, Dict]:
         """Load model configurations based on hardware"""
@@ -140,29 +160,18 @@ class LocalLLMService:
         return base_configs
 
     async def initialize_models(self):
-        """Initialize all required models based on hardware"""
+        """Load the recommended models now, waiting until they are ready"""
         try:
             logger.info("Initializing local LLM models...")
 
-            # Load primary model based on hardware
-            primary_model = self.hardware_config["recommended_models"]["primary"][
-                "name"
-            ]
-            await self._load_model(primary_model)
-
-            # Load secondary model if different
-            secondary_model = self.hardware_config["recommended_models"]["secondary"][
-                "name"
-            ]
-            if secondary_model != primary_model:
-                await self._load_model(secondary_model)
-
-            # Load document understanding model if available
-            if "document_understanding" in self.hardware_config["recommended_models"]:
-                doc_model = self.hardware_config["recommended_models"][
-                    "document_understanding"
-                ]["name"]
-                await self._load_model(doc_model)
+            recommended = self.hardware_config["recommended_models"]
+            names = dict.fromkeys(
+                recommended[role]["name"]
+                for role in ("primary", "secondary", "document_understanding")
+                if role in recommended
+            )
+            for model_name in names:
+                await self.model_pool.ensure(model_name)
 
             logger.info(f"Models initialized: {list(self.models.keys())}")
 
@@ -170,35 +179,89 @@ class LocalLLMService:
             logger.error(f"Error initializing models: {str(e)}")
             raise
 
-    async def _load_model(self, model_name: str):
-        """Load a specific model"""
+    async def preload_models(self):
+        """Start loading ``LLM_PRELOAD_MODELS`` in the background"""
+        # Hardware detection shells out to nvidia-smi; keep it off the loop
+        hardware_config = await asyncio.to_thread(lambda: self.hardware_config)
+        recommended = hardware_config.get("recommended_models", {})
+        names = []
+        for entry in settings.LLM_PRELOAD_MODELS.split(","):
+            entry = entry.strip()
+            if entry in recommended:
+                entry = recommended[entry]["name"]
+            if entry:
+                names.append(entry)
+        self.model_pool.preload(names)
+
+    async def _ensure_model(self, model_name: str) -> bool:
+        """Load ``model_name`` on first use; False when it cannot be loaded"""
+        if model_name in self.models:
+            self.model_pool.touch(model_name)
+            return True
+        return await self.model_pool.ensure(model_name)
+
+    def _model_size(self, model_name: str) -> int:
+        """Bytes a model takes in memory, estimated from its files"""
+        config = self.model_configs.get(model_name, {})
+        path = Path(config.get("model_path", ""))
+        try:
+            if path.is_file():
+                return path.stat().st_size
+            if path.is_dir():
+                return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+        except OSError:
+            pass
+        for recommended in self.hardware_config.get("recommended_models", {}).values():
+            if recommended.get("name") == model_name:
+                return int(recommended.get("size_gb", 0) * 1024**3)
+        return 0
+
+    async def _load_model(self, model_name: str) -> bool:
+        """Load a specific model; True once it is registered with the executor"""
         try:
             if model_name not in self.model_configs:
                 logger.warning(f"Model config not found for {model_name}")
-                return
+                return False
 
             config = self.model_configs[model_name]
             model_path = Path(config["model_path"])
 
             if not model_path.exists():
                 logger.warning(f"Model file not found: {model_path}")
-                return
+                return False
 
             if model_name in ["mistral_7b", "phi3_mini", "tinyllama"]:
                 await self._load_llama_model(model_name, config)
             elif model_name == "layoutlmv3":
                 await self._load_layoutlm_model(config)
 
+            if model_name not in self.models:
+                return False
             logger.info(f"Model {model_name} loaded successfully")
+            return True
 
         except Exception as e:
             logger.error(f"Error loading model {model_name}: {str(e)}")
+            return False
+
+    def _unload_model(self, model_name: str):
+        """Drop a model, its worker and its saved prompt prefixes"""
+        self.executor.unregister(model_name)
+        self.models.pop(model_name, None)
+        prefix_cache.invalidate(model_name=model_name)
+        # Llama frees its context and unmaps the weights when collected
+        gc.collect()
 
     async def _load_llama_model(self, model_name: str, config: Dict):
         """Load Llama-based model (Mistral, Phi-3, TinyLlama)"""
         try:
+            if not LLAMA_AVAILABLE:
+                logger.warning(f"llama-cpp-python not available, skipping {model_name}")
+                return
+            from llama_cpp import Llama
+
             # Get hardware-specific settings
-            gpu_config = self.hardware_config.get("gpu", {})
+            gpu_config = self.hardware_config.get("gpu") or {}
             optimizations = gpu_config.get("optimizations", {})
 
             # Configure model parameters
@@ -207,7 +270,12 @@ class LocalLLMService:
                 "n_ctx": config["context_length"],
                 "n_threads": self.hardware_config["cpu"]["optimizations"]["threads"],
                 "n_gpu_layers": optimizations.get("use_gpu_layers", 0),
-                "n_batch": optimizations.get("max_batch_size", 1),
+                # Tokens per prompt-evaluation step, not concurrent sequences
+                "n_batch": min(settings.LLM_N_BATCH, config["context_length"]),
+                # Map the GGUF file rather than copying it; pages are shared
+                # between workers and can be reclaimed by the kernel
+                "use_mmap": True,
+                "use_mlock": False,
                 "verbose": False,
             }
 
@@ -220,7 +288,16 @@ class LocalLLMService:
                     }
                 )
 
-            self.models[model_name] = Llama(**model_params)
+            # Construction reads the weights; keep it off the event loop
+            model = await asyncio.to_thread(Llama, **model_params)
+            self.models[model_name] = model
+            self.executor.register(
+                model_name,
+                model,
+                max_group=settings.LLM_SCHEDULER_MAX_GROUP,
+            )
+            prefix_cache.invalidate(model_name=model_name)
+            await self._note_model_version(model_name, config)
 
         except Exception as e:
             logger.error(f"Error loading Llama model {model_name}: {str(e)}")
@@ -241,36 +318,70 @@ class LocalLLMService:
                 logger.warning("LayoutLMv3 model files not found")
                 return
 
-            # Load model and processor with revision pinning for security
-            processor = LayoutLMv3Processor.from_pretrained(  # nosec B615
-                str(processor_path), 
-                revision="main",  # Pin to main branch for security
-                trust_remote_code=False
+            use_gpu = bool(self.hardware_config.get("gpu"))
+            layoutlm = await asyncio.to_thread(
+                self._build_layout_model, model_path, processor_path, use_gpu
             )
-            model = LayoutLMv3ForSequenceClassification.from_pretrained(  # nosec B615
-                str(model_path), 
-                revision="main",  # Pin to main branch for security
-                trust_remote_code=False
+            # Keys the layout pipeline's per-page cache
+            precision = "int8" if layoutlm["quantized"] else "fp32"
+            layoutlm["version"] = (
+                f"{model_version('layoutlmv3', config['model_path'])}:{precision}"
             )
-
-            # Move to GPU if available
-            if torch.cuda.is_available() and self.hardware_config.get("gpu"):
-                device = torch.device("cuda")
-                model = model.to(device)
-                logger.info("LayoutLMv3 moved to GPU")
-            else:
-                device = torch.device("cpu")
-                logger.info("LayoutLMv3 using CPU")
-
-            self.models["layoutlmv3"] = {
-                "processor": processor,
-                "model": model,
-                "device": device,
-            }
+            self.models["layoutlmv3"] = layoutlm
+            self.executor.register("layoutlmv3", self.models["layoutlmv3"])
+            await self._note_model_version("layoutlmv3", config)
 
         except Exception as e:
             logger.error(f"Error loading LayoutLMv3: {str(e)}")
 
+    @staticmethod
+    def _build_layout_model(
+        model_path: Path, processor_path: Path, use_gpu: bool
+    ) -> Dict[str, Any]:
+        """Load LayoutLMv3 and its processor; runs in a worker thread"""
+        import torch
+        from transformers import (
+            LayoutLMv3ForSequenceClassification,
+            LayoutLMv3Processor,
+        )
+
+        # Load model and processor with revision pinning for security
+        processor = LayoutLMv3Processor.from_pretrained(  # nosec B615
+            str(processor_path), 
+            revision="main",  # Pin to main branch for security
+            trust_remote_code=False
+        )
+        model = LayoutLMv3ForSequenceClassification.from_pretrained(  # nosec B615
+            str(model_path), 
+            revision="main",  # Pin to main branch for security
+            trust_remote_code=False
+        )
+
+        model.eval()
+        quantized = False
+
+        # Move to GPU if available
+        if torch.cuda.is_available() and use_gpu:
+            device = torch.device("cuda")
+            model = model.to(device)
+            logger.info("LayoutLMv3 moved to GPU")
+        else:
+            device = torch.device("cpu")
+            if settings.LLM_LAYOUT_QUANTIZE:
+                # int8 weights for the linear layers, which dominate CPU time
+                model = torch.ao.quantization.quantize_dynamic(
+                    model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+                quantized = True
+            logger.info(f"LayoutLMv3 using CPU{' (int8)' if quantized else ''}")
+
+        return {
+            "processor": processor,
+            "model": model,
+            "device": device,
+            "quantized": quantized,
+        }
+
     async def process_document_for_company(
         self, document: EnhancedDocument, company_id: UUID
     ) -> Dict[str, Any]:
@@ -283,11 +394,13 @@ class LocalLLMService:
                 company_id
             )
 
-            # Generate cache key including company context
-            cache_key = self._generate_company_cache_key(document, company_id)
+            # Content-addressed key over the text, models and company context
+            cache_key, cache_tags = await self._result_cache_key(
+                document, company_context
+            )
 
             # Check cache first
-            cached_result = await self._get_cached_result(cache_key)
+            cached_result = await asyncio.to_thread(result_cache.get, cache_key)
             if cached_result:
                 return cached_result
 
@@ -297,7 +410,7 @@ class LocalLLMService:
             )
 
             # Cache results
-            await self._cache_result(cache_key, results)
+            await asyncio.to_thread(result_cache.put, cache_key, results, cache_tags)
 
             # Record performance metrics
             processing_time = time.time() - start_time
@@ -322,7 +435,17 @@ class LocalLLMService:
             company_context
         )
 
-        if document.extracted_text:
+        fused_results = None
+        fused = company_context.get("extraction_mode") == "fused"
+        if document.extracted_text and fused:
+            # One generation covering all four tasks below
+            fused_results = await self._analyze_document_fused(
+                document.extracted_text, company_context
+            )
+
+        if fused_results is not None:
+            results.update(fused_results)
+        elif document.extracted_text:
             # Document classification with company context
             results["classification"] = await self._classify_document_with_context(
                 document.extracted_text, company_context
@@ -351,6 +474,76 @@ class LocalLLMService:
 
         return results
 
+    async def _complete_with_context(
+        self,
+        model_name: str,
+        company_context: Dict,
+        task: str,
+        prefix: str,
+        suffix: str,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """Complete ``prefix + suffix`` from the saved company prefix state"""
+        key = prefix_cache.key(
+            model_name, company_context.get("company_id"), task, prefix
+        )
+        # Same-prefix jobs are grouped so the prefix stays in context
+        return await self.executor.submit(
+            model_name,
+            prefix_cache.complete,
+            key,
+            prefix,
+            suffix,
+            affinity=key,
+            **kwargs,
+        )
+
+    async def _analyze_document_fused(
+        self, text: str, company_context: Dict
+    ) -> Optional[Dict[str, Any]]:
+        """Classify, summarise and extract in one schema-constrained generation"""
+        try:
+            primary_model = self.hardware_config["recommended_models"]["primary"][
+                "name"
+            ]
+            if not await self._ensure_model(primary_model):
+                return None
+
+            prefix, suffix = build_fused_prompt(
+                self.company_context_manager, company_context, text
+            )
+            response = await self._complete_with_context(
+                primary_model,
+                company_context,
+                "fused_extraction",
+                prefix,
+                suffix,
+                max_tokens=settings.LLM_FUSED_MAX_TOKENS,
+                temperature=0.3,
+                grammar=fused_grammar(),
+            )
+            data = parse_fused_response(response["choices"][0]["text"])
+
+            return {
+                "classification": self._parse_classification_result(
+                    data["document_type"], company_context
+                ),
+                "summary": data["summary"],
+                "entities": self._filter_entities_by_context(
+                    data["entities"], company_context
+                ),
+                "financial_data": self._validate_financial_data(
+                    data["financial_data"], company_context
+                ),
+            }
+
+        except InferenceOverloaded:
+            raise
+        except Exception as e:
+            # Falls back to the separate generations
+            logger.error(f"Error in fused document analysis: {str(e)}")
+            return None
+
     async def _classify_document_with_context(
         self, text: str, company_context: Dict
     ) -> Dict[str, Any]:
@@ -360,7 +553,7 @@ class LocalLLMService:
             primary_model = self.hardware_config["recommended_models"]["primary"][
                 "name"
             ]
-            if primary_model not in self.models:
+            if not await self._ensure_model(primary_model):
                 return {"type": "unknown", "confidence": 0.0}
 
             # Get company-specific instructions
@@ -370,27 +563,37 @@ class LocalLLMService:
                 )
             )
 
-            prompt = f"""
+            prefix = f"""
             {instructions}
-            
+
             Context: {self.company_context_manager.build_company_prompt_context(company_context)}
-            
-            Classify the following document into one of these categories:
+
+            Classify the document below into one of these categories:
             - invoice
-            - receipt  
+            - receipt
             - contract
             - financial_statement
             - tax_document
             - legal_document
             - other
-            
-            Document text: {text[:1000]}
-            
+
             Respond with only the category name and confidence score (0-1).
-            """
 
-            response = self.models[primary_model](
-                prompt, max_tokens=50, temperature=0.3, stop=["\n"]
+            Document text:
+"""
+            suffix = f"""{text[:1000]}
+
+            Category:"""
+
+            response = await self._complete_with_context(
+                primary_model,
+                company_context,
+                "document_classification",
+                prefix,
+                suffix,
+                max_tokens=50,
+                temperature=0.3,
+                stop=["\n"],
             )
 
             result = response["choices"][0]["text"].strip().lower()
@@ -398,6 +601,8 @@ class LocalLLMService:
             # Parse response with company context
             return self._parse_classification_result(result, company_context)
 
+        except InferenceOverloaded:
+            raise
         except Exception as e:
             logger.error(f"Error classifying document with context: {str(e)}")
             return {"type": "unknown", "confidence": 0.0}
@@ -447,7 +652,7 @@ class LocalLLMService:
             primary_model = self.hardware_config["recommended_models"]["primary"][
                 "name"
             ]
-            if primary_model not in self.models:
+            if not await self._ensure_model(primary_model):
                 return "Summary not available"
 
             instructions = (
@@ -456,25 +661,36 @@ class LocalLLMService:
                 )
             )
 
-            prompt = f"""
+            prefix = f"""
             {instructions}
-            
+
             Context: {self.company_context_manager.build_company_prompt_context(company_context)}
-            
-            Generate a concise summary (2-3 sentences) of the following document, 
-            focusing on information relevant to {company_context['company_name']}:
-            
-            {text[:2000]}
-            
+
+            Generate a concise summary (2-3 sentences) of the document below,
+            focusing on information relevant to {company_context['company_name']}.
+
+            Document:
+"""
+            suffix = f"""{text[:2000]}
+
             Summary:
             """
 
-            response = self.models[primary_model](
-                prompt, max_tokens=150, temperature=0.5, stop=["\n\n"]
+            response = await self._complete_with_context(
+                primary_model,
+                company_context,
+                "summary_generation",
+                prefix,
+                suffix,
+                max_tokens=150,
+                temperature=0.5,
+                stop=["\n\n"],
             )
 
             return response["choices"][0]["text"].strip()
 
+        except InferenceOverloaded:
+            raise
         except Exception as e:
             logger.error(f"Error generating summary with context: {str(e)}")
             return "Summary generation failed"
@@ -487,7 +703,7 @@ class LocalLLMService:
             primary_model = self.hardware_config["recommended_models"]["primary"][
                 "name"
             ]
-            if primary_model not in self.models:
+            if not await self._ensure_model(primary_model):
                 return {}
 
             instructions = (
@@ -496,12 +712,12 @@ class LocalLLMService:
                 )
             )
 
-            prompt = f"""
+            prefix = f"""
             {instructions}
-            
+
             Context: {self.company_context_manager.build_company_prompt_context(company_context)}
-            
-            Extract the following entities from the document text, 
+
+            Extract the following entities from the document text below,
             paying special attention to entities related to {company_context['company_name']}:
             - Company names (especially {company_context['company_name']} and related companies)
             - Dates
@@ -510,9 +726,7 @@ class LocalLLMService:
             - Email addresses
             - Phone numbers
             - Account codes (from company's chart of accounts)
-            
-            Document: {text[:1500]}
-            
+
             Return as JSON format:
             {{
                 "companies": ["company1", "company2"],
@@ -523,10 +737,22 @@ class LocalLLMService:
                 "phones": ["phone1", "phone2"],
                 "account_codes": ["code1", "code2"]
             }}
+
+            Document:
+"""
+            suffix = f"""{text[:1500]}
+
+            JSON:
             """
 
-            response = self.models[primary_model](
-                prompt, max_tokens=300, temperature=0.3
+            response = await self._complete_with_context(
+                primary_model,
+                company_context,
+                "entity_extraction",
+                prefix,
+                suffix,
+                max_tokens=300,
+                temperature=0.3,
             )
 
             result_text = response["choices"][0]["text"].strip()
@@ -547,6 +773,8 @@ class LocalLLMService:
             # Fallback to simple extraction
             return self._simple_entity_extraction_with_context(text, company_context)
 
+        except InferenceOverloaded:
+            raise
         except Exception as e:
             logger.error(f"Error extracting entities with context: {str(e)}")
             return {}
@@ -566,14 +794,12 @@ class LocalLLMService:
             ]
 
         # Filter account codes based on company's chart of accounts
-        company_accounts = [
-            acc["code"] for acc in company_context.get("financial_accounts", [])
-        ]
-        if company_accounts:
+        accounts = entity_indexes.for_context(company_context).accounts
+        if len(accounts):
             filtered_entities["account_codes"] = [
                 code
                 for code in entities.get("account_codes", [])
-                if code in company_accounts
+                if accounts.lookup_code(code) is not None
             ]
 
         return filtered_entities
@@ -620,7 +846,7 @@ class LocalLLMService:
             secondary_model = self.hardware_config["recommended_models"]["secondary"][
                 "name"
             ]
-            if secondary_model not in self.models:
+            if not await self._ensure_model(secondary_model):
                 return {}
 
             instructions = (
@@ -629,34 +855,44 @@ class LocalLLMService:
                 )
             )
 
-            prompt = f"""
+            prefix = f"""
             {instructions}
-            
+
             Context: {self.company_context_manager.build_company_prompt_context(company_context)}
-            
-            Extract financial information from this document for {company_context['company_name']}:
+
+            Extract financial information from the document below for {company_context['company_name']}:
             - Total amount (in {company_context['currency']})
             - Tax amount (in {company_context['currency']})
             - Due date
             - Invoice number
             - Customer/vendor name (check against company's customer/vendor list)
             - Account codes (from company's chart of accounts)
-            
-            Document: {text[:1000]}
-            
+
             Return as JSON:
             {{
                 "total_amount": "amount",
-                "tax_amount": "amount", 
+                "tax_amount": "amount",
                 "due_date": "date",
                 "invoice_number": "number",
                 "customer_name": "name",
                 "account_codes": ["code1", "code2"]
             }}
+
+            Document:
+"""
+            suffix = f"""{text[:1000]}
+
+            JSON:
             """
 
-            response = self.models[secondary_model](
-                prompt, max_tokens=200, temperature=0.3
+            response = await self._complete_with_context(
+                secondary_model,
+                company_context,
+                "financial_extraction",
+                prefix,
+                suffix,
+                max_tokens=200,
+                temperature=0.3,
             )
 
             result_text = response["choices"][0]["text"].strip()
@@ -677,6 +913,8 @@ class LocalLLMService:
 
             return {}
 
+        except InferenceOverloaded:
+            raise
         except Exception as e:
             logger.error(f"Error extracting financial data with context: {str(e)}")
             return {}
@@ -687,25 +925,29 @@ class LocalLLMService:
         """Validate financial data against company context"""
         validated_data = financial_data.copy()
 
-        # Validate customer/vendor names
-        if financial_data.get("customer_name"):
-            customers = [c["name"] for c in company_context.get("customers", [])]
-            vendors = [v["name"] for v in company_context.get("vendors", [])]
+        indexes = entity_indexes.for_context(company_context)
 
-            if financial_data["customer_name"] not in customers + vendors:
+        # Link customer/vendor names to the company's master data
+        if financial_data.get("customer_name"):
+            counterparty, _ = indexes.counterparties.match(
+                financial_data["customer_name"]
+            )
+            if counterparty is None:
                 validated_data["customer_name"] = (
                     f"Unknown: {financial_data['customer_name']}"
                 )
+            else:
+                validated_data["customer_name"] = counterparty["name"]
+                validated_data["counterparty_code"] = counterparty["code"]
 
         # Validate account codes
         if financial_data.get("account_codes"):
-            company_accounts = [
-                acc["code"] for acc in company_context.get("financial_accounts", [])
-            ]
             validated_data["account_codes"] = [
-                code
-                for code in financial_data["account_codes"]
-                if code in company_accounts
+                account["code"]
+                for account in map(
+                    indexes.accounts.lookup_code, financial_data["account_codes"]
+                )
+                if account is not None
             ]
 
         return validated_data
@@ -713,75 +955,67 @@ class LocalLLMService:
     async def _understand_document_layout(self, file_path: str) -> Dict[str, Any]:
         """Understand document layout using LayoutLMv3"""
         try:
-            if not LAYOUTLM_AVAILABLE or "layoutlmv3" not in self.models:
+            if not LAYOUTLM_AVAILABLE or not await self._ensure_model("layoutlmv3"):
                 return {"layout": "unknown", "reason": "LayoutLMv3 not available"}
 
-            # Load and process image
-            from PIL import Image
-
-            image = Image.open(file_path).convert("RGB")
-            processor = self.models["layoutlmv3"]["processor"]
-            model = self.models["layoutlmv3"]["model"]
-            device = self.models["layoutlmv3"]["device"]
-
-            # Process image
-            encoding = processor(image, return_tensors="pt")
-            encoding = {k: v.to(device) for k, v in encoding.items()}
-
-            # Get predictions
-            with torch.no_grad():
-                outputs = model(**encoding)
-                predictions = outputs.logits.argmax(-1)
-
-            # Analyze layout
-            layout_analysis = {
-                "has_table": "table" in str(predictions).lower(),
-                "has_form": "form" in str(predictions).lower(),
-                "text_regions": len(encoding["input_ids"][0]),
-                "layout_type": (
-                    "structured"
-                    if "table" in str(predictions).lower()
-                    else "unstructured"
-                ),
-                "processing_device": "gpu" if device.type == "cuda" else "cpu",
-            }
-
-            return layout_analysis
+            # Every page, in batches, on the model's worker thread
+            return await self.executor.submit(
+                "layoutlmv3", layout_pipeline.analyze, file_path
+            )
 
+        except InferenceOverloaded:
+            raise
         except Exception as e:
             logger.error(f"Error understanding document layout: {str(e)}")
             return {"layout": "unknown"}
 
-    def _generate_company_cache_key(
-        self, document: EnhancedDocument, company_id: UUID
-    ) -> str:
-        """Generate cache key including company context"""
-        content_hash = hashlib.sha256(
-            f"{document.original_filename}{document.file_size}{document.checksum}{company_id}".encode()
-        ).hexdigest()[
-            :16
-        ]  # Use first 16 chars for cache key compatibility
-        return f"llm_company_cache:{content_hash}"
-
-    async def _get_cached_result(self, cache_key: str) -> Optional[Dict]:
-        """Get cached result from Redis"""
-        try:
-            cached = self.redis_client.get(cache_key)
-            if cached:
-                return json.loads(cached)
-            return None
-        except Exception as e:
-            logger.error(f"Error getting cached result: {str(e)}")
-            return None
+    async def _note_model_version(self, model_name: str, config: Dict):
+        """Record a loaded model's file version for result cache keys"""
+        version = model_version(model_name, config["model_path"])
+        self.model_versions[model_name] = version
+        await asyncio.to_thread(result_cache.note_version, "model", model_name, version)
+
+    def _model_version(self, model_name: str) -> str:
+        """File version of a model, whether or not it is loaded yet"""
+        if model_name not in self.model_versions:
+            config = self.model_configs.get(model_name, {})
+            self.model_versions[model_name] = model_version(
+                model_name, config.get("model_path", "")
+            )
+        return self.model_versions[model_name]
 
-    async def _cache_result(self, cache_key: str, result: Dict):
-        """Cache result in Redis"""
-        try:
-            self.redis_client.setex(
-                cache_key, 3600, json.dumps(result, default=str)  # 1 hour TTL
+    async def _result_cache_key(
+        self, document: EnhancedDocument, company_context: Dict
+    ) -> Tuple[str, List[str]]:
+        """Result cache key and invalidation tags for ``document``"""
+        recommended = self.hardware_config["recommended_models"]
+        model_names = list(
+            dict.fromkeys(
+                recommended[role]["name"]
+                for role in ("primary", "secondary")
+                if role in recommended
             )
-        except Exception as e:
-            logger.error(f"Error caching result: {str(e)}")
+        )
+        file_path = getattr(document, "file_path", None)
+        layout_path = Path(self.model_configs["layoutlmv3"]["model_path"])
+        if file_path and LAYOUTLM_AVAILABLE and layout_path.exists():
+            # The layout model reads the file itself, not the extracted text
+            model_names.append("layoutlmv3")
+        else:
+            file_path = None
+
+        model_id = "|".join(self._model_version(name) for name in model_names)
+        version = context_version(company_context)
+        company_id = company_context.get("company_id")
+        await asyncio.to_thread(
+            result_cache.note_version, "company", company_id, version
+        )
+
+        content = await asyncio.to_thread(
+            content_digest, document.extracted_text or "", file_path
+        )
+        tags = [company_tag(company_id), *(model_tag(name) for name in model_names)]
+        return result_cache.key(content, model_id, version), tags
 
     def _record_performance_metrics(self, operation: str, duration: float):
         """Record performance metrics"""
@@ -825,6 +1059,13 @@ class LocalLLMService:
             "performance_profile": self.hardware_config["performance_profile"],
         }
 
+        # Inference queue depth and outcomes per loaded model
+        metrics["executor"] = self.executor.get_stats()
+        metrics["models"] = self.model_pool.get_status()
+        metrics["prefix_cache"] = prefix_cache.get_stats()
+        metrics["result_cache"] = result_cache.get_stats()
+        metrics["layout_pipeline"] = layout_pipeline.get_stats()
+
         return metrics
 
     async def get_hardware_status(self) -> Dict[str, Any]:
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+OCR Pipeline
+Page-level PDF text extraction that only OCRs pages without a text layer
+
+Each page's text layer is read through PyMuPDF first; a page whose layer is
+shorter than ``OCR_MIN_TEXT_CHARS`` (a scan, or a scan with only a stamped
+page number) is OCRed, every other page is used as is. Image-only pages are
+rasterized one at a time at ``OCR_DPI``, in grayscale by default, and handed
+to tesseract as a zero-copy view of the pixmap, so a worker holds a single
+page image at a time instead of the whole document. Pages are OCRed in a
+pool of ``OCR_PROCESSES`` worker processes (one tesseract thread each), and
+every page's render and OCR time is recorded.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import settings
+
+try:
+    import fitz  # PyMuPDF
+    import pytesseract
+    from PIL import Image
+
+    OCR_AVAILABLE = True
+except ImportError:
+    OCR_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Set in each process by _open_document: the last document OCRed, kept open
+# while consecutive pages of it arrive
+_open_key: Optional[Tuple[str, int, int]] = None
+_open_doc = None
+
+
+def _init_worker():
+    """Keep tesseract to one thread; the pool provides the parallelism"""
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+
+
+def _open_document(file_path: str):
+    global _open_key, _open_doc
+    stat = os.stat(file_path)
+    # A path can be reused for a different upload
+    key = (file_path, stat.st_mtime_ns, stat.st_size)
+    if _open_key != key:
+        if _open_doc is not None:
+            _open_doc.close()
+        _open_doc = fitz.open(file_path)
+        _open_key = key
+    return _open_doc
+
+
+def ocr_page(
+    file_path: str, page_number: int, dpi: int, grayscale: bool
+) -> Dict[str, Any]:
+    """Rasterize and OCR one PDF page in a worker process"""
+    return _ocr_page(_open_document(file_path), page_number, dpi, grayscale)
+
+
+def _ocr_page(doc, page_number: int, dpi: int, grayscale: bool) -> Dict[str, Any]:
+    started = time.perf_counter()
+    colorspace = fitz.csGRAY if grayscale else fitz.csRGB
+    mode = "L" if grayscale else "RGB"
+    pixmap = doc[page_number].get_pixmap(dpi=dpi, colorspace=colorspace, alpha=False)
+    image = Image.frombuffer(
+        mode,
+        (pixmap.width, pixmap.height),
+        getattr(pixmap, "samples_mv", None) or pixmap.samples,
+        "raw",
+        mode,
+        pixmap.stride,
+        1,
+    )
+    rendered = time.perf_counter()
+    text = pytesseract.image_to_string(image)
+    del image, pixmap
+    return {
+        "page": page_number,
+        "text": text,
+        "render_seconds": rendered - started,
+        "ocr_seconds": time.perf_counter() - rendered,
+    }
+
+
+class OCRPipeline:
+    """Extracts PDF text page by page, OCRing image-only pages in a process pool"""
+
+    def __init__(
+        self,
+        dpi: Optional[int] = None,
+        grayscale: Optional[bool] = None,
+        processes: Optional[int] = None,
+        min_text_chars: Optional[int] = None,
+    ):
+        self.dpi = dpi or settings.OCR_DPI
+        self.grayscale = settings.OCR_GRAYSCALE if grayscale is None else grayscale
+        self.processes = processes or settings.OCR_PROCESSES
+        self.min_text_chars = (
+            settings.OCR_MIN_TEXT_CHARS if min_text_chars is None else min_text_chars
+        )
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.stats = {
+            "documents": 0,
+            "pages_text": 0,
+            "pages_ocr": 0,
+            "ocr_failures": 0,
+            "render_seconds": 0.0,
+            "ocr_seconds": 0.0,
+        }
+        # Per-page timings of recent documents
+        self.documents = deque(maxlen=50)
+
+    def extract_pdf(self, file_path: str) -> Tuple[str, List[Dict[str, Any]]]:
+        """Text of a PDF and per-page timings (method, chars, seconds)"""
+        if not OCR_AVAILABLE:
+            raise RuntimeError("OCR libraries not available")
+
+        texts: Dict[int, str] = {}
+        pages: Dict[int, Dict[str, Any]] = {}
+        to_ocr: List[int] = []
+
+        with fitz.open(file_path) as doc:
+            for number, page in enumerate(doc):
+                started = time.perf_counter()
+                texts[number] = page.get_text()
+                pages[number] = {
+                    "page": number,
+                    "method": "text",
+                    "seconds": time.perf_counter() - started,
+                }
+                if len(texts[number].strip()) < self.min_text_chars:
+                    to_ocr.append(number)
+            results = self._ocr(file_path, doc, to_ocr)
+
+        for result in results:
+            number = result["page"]
+            entry = pages[number]
+            if "error" in result:
+                entry["error"] = result["error"]
+                continue
+            # Keep a short text layer when OCR finds nothing better
+            if result["text"].strip():
+                texts[number] = result["text"]
+            entry["method"] = "ocr"
+            entry["render_seconds"] = result["render_seconds"]
+            entry["ocr_seconds"] = result["ocr_seconds"]
+            entry["seconds"] += result["render_seconds"] + result["ocr_seconds"]
+
+        ordered = [pages[number] for number in sorted(pages)]
+        for entry in ordered:
+            entry["chars"] = len(texts[entry["page"]].strip())
+        self._record(file_path, ordered)
+        return "\n".join(texts[number] for number in sorted(texts)), ordered
+
+    def _ocr(
+        self, file_path: str, doc, page_numbers: List[int]
+    ) -> List[Dict[str, Any]]:
+        if not page_numbers:
+            return []
+        args = (self.dpi, self.grayscale)
+        if self.processes <= 1 or len(page_numbers) == 1:
+            return [
+                self._run_inline(file_path, doc, number, args)
+                for number in page_numbers
+            ]
+
+        futures = [
+            (number, self._get_pool().submit(ocr_page, file_path, number, *args))
+            for number in page_numbers
+        ]
+        results = []
+        for number, future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                logger.warning(f"OCR failed for page {number} of {file_path}: {e}")
+                results.append({"page": number, "error": str(e)})
+        return results
+
+    @staticmethod
+    def _run_inline(file_path: str, doc, number: int, args) -> Dict[str, Any]:
+        try:
+            return _ocr_page(doc, number, *args)
+        except Exception as e:
+            logger.warning(f"OCR failed for page {number} of {file_path}: {e}")
+            return {"page": number, "error": str(e)}
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                import multiprocessing
+
+                # spawn: the server process has threads that must not be forked
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._pool
+
+    def _record(self, file_path: str, pages: List[Dict[str, Any]]):
+        with self._lock:
+            self.stats["documents"] += 1
+            for entry in pages:
+                if entry["method"] == "ocr":
+                    self.stats["pages_ocr"] += 1
+                    self.stats["render_seconds"] += entry["render_seconds"]
+                    self.stats["ocr_seconds"] += entry["ocr_seconds"]
+                else:
+                    self.stats["pages_text"] += 1
+                if "error" in entry:
+                    self.stats["ocr_failures"] += 1
+            self.documents.append({"file": os.path.basename(file_path), "pages": pages})
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["recent_documents"] = list(self.documents)[-10:]
+        ocr_pages = stats["pages_ocr"]
+        stats["ocr_seconds_per_page"] = (
+            (stats["render_seconds"] + stats["ocr_seconds"]) / ocr_pages
+            if ocr_pages
+            else 0.0
+        )
+        stats.update(
+            dpi=self.dpi, grayscale=self.grayscale, processes=self.processes
+        )
+        return stats
+
+
+# Global OCR pipeline
+ocr_pipeline = OCRPipeline()
@@ -16,6 +16,7 @@ from sqlalchemy.orm import Session
 from ..auth import AuthService
 from ..config import settings
 from ..models.user_models import UserCreate, UserDB, UserResponse, UserUpdate
+from ..utils.token_cache import token_cache
 
 logger = logging.getLogger(__name__)
 
@@ -208,6 +209,8 @@ class UserService:
 
             self.db.commit()
             self.db.refresh(db_user)
+            # Cached principals carry the old role/status; drop them everywhere
+            token_cache.invalidate_user(user_id)
 
             logger.info(f"Updated user: {db_user.username}")
             return db_user
@@ -241,6 +244,7 @@ class UserService:
 
             self.db.delete(db_user)
             self.db.commit()
+            token_cache.invalidate_user(user_id)
 
             logger.info(f"Deleted user: {db_user.username}")
             return True
@@ -9,10 +9,14 @@ import logging
 from typing import Optional
 
 from .config import settings
+from .database import pools
 from .services.local_llm_service import local_llm_service
 
 logger = logging.getLogger(__name__)
 
+# Background model warm-up started at startup (referenced so it is not collected)
+_preload_task: Optional[asyncio.Task] = None
+
 
 async def initialize_services():
     """Initialize all backend services"""
@@ -55,6 +59,7 @@ async def initialize_database():
 
 async def initialize_local_llm():
     """Initialize local LLM service"""
+    global _preload_task
     try:
         logger.info("Initializing local LLM service...")
 
@@ -63,18 +68,9 @@ async def initialize_local_llm():
             logger.info("Local LLM service disabled in settings")
             return
 
-        # Initialize models
-        await local_llm_service.initialize_models()
-
-        # Get hardware status
-        hardware_status = await local_llm_service.get_hardware_status()
-        logger.info(f"Hardware status: {hardware_status}")
-
-        # Get performance metrics
-        metrics = await local_llm_service.get_performance_metrics()
-        logger.info(
-            f"Performance profile: {metrics.get('hardware', {}).get('performance_profile', 'unknown')}"
-        )
+        # Models load on first use; warm the configured ones in the background
+        # so startup does not wait for weights to be read
+        _preload_task = asyncio.create_task(local_llm_service.preload_models())
 
         logger.info("Local LLM service initialized successfully")
 
@@ -98,6 +94,7 @@ async def health_check():
                 health_status["services"]["local_llm"] = {
                     "status": "healthy",
                     "models_loaded": len(local_llm_service.models),
+                    "models": local_llm_service.model_pool.get_status()["models"],
                     "hardware": hardware_status,
                 }
             else:
@@ -108,6 +105,9 @@ async def health_check():
                 "error": str(e),
             }
 
+        # Report shared connection pool utilisation
+        health_status["services"]["connection_pools"] = pools.get_stats()
+
         return health_status
 
     except Exception as e:
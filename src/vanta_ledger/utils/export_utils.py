@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Export Utilities
+Constant-memory JSON Lines, JSON array and CSV encoders over async cursors
+
+Rows are encoded one at a time into chunks of roughly ``chunk_size`` bytes;
+each chunk is yielded to the ASGI server before the next batch is pulled from
+the cursor, so a slow client slows the cursor down instead of growing a buffer.
+"""
+
+import csv
+import io
+import json
+import zlib
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Optional
+
+EXPORT_FORMATS = ("json", "jsonl", "csv")
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "jsonl": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+def _lookup(row: Dict[str, Any], column: str) -> Any:
+    """Resolve a dotted column name such as ``extracted_data.amount``"""
+    value: Any = row
+    for part in column.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=str)
+    return value
+
+
+class _Encoder:
+    """Incremental encoder for one export format"""
+
+    def __init__(self, fmt: str, columns: Optional[List[str]] = None):
+        self.fmt = fmt
+        self.columns = columns
+        self.rows = 0
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer) if fmt == "csv" else None
+
+    def header(self) -> str:
+        if self.fmt == "json":
+            return "["
+        if self.fmt == "csv":
+            self._writer.writerow(self.columns)
+            return self._drain()
+        return ""
+
+    def encode(self, row: Dict[str, Any]) -> str:
+        self.rows += 1
+        if self.fmt == "csv":
+            self._writer.writerow(
+                [_csv_value(_lookup(row, column)) for column in self.columns]
+            )
+            return self._drain()
+        if self.columns:
+            row = {column: _lookup(row, column) for column in self.columns}
+        line = json.dumps(row, default=str)
+        if self.fmt == "json":
+            return ("\n" if self.rows == 1 else ",\n") + line
+        return line + "\n"
+
+    def footer(self) -> str:
+        if self.fmt == "json":
+            return "\n]\n" if self.rows else "]\n"
+        return ""
+
+    def _drain(self) -> str:
+        text = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return text
+
+
+async def stream_export(
+    rows: AsyncIterable[Dict[str, Any]],
+    fmt: str,
+    columns: Optional[List[str]] = None,
+    compress: bool = False,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> AsyncIterator[bytes]:
+    """
+    Encode ``rows`` as ``fmt`` and yield byte chunks
+
+    ``columns`` fixes the CSV header (required for CSV) and, for the JSON
+    formats, projects each row onto the same dotted columns. With
+    ``compress`` the chunks form a single gzip stream.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if fmt == "csv" and not columns:
+        raise ValueError("CSV exports need an explicit column list")
+
+    encoder = _Encoder(fmt, columns)
+    # wbits=31 selects the gzip container
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    def output(data: bytes) -> bytes:
+        return compressor.compress(data) if compressor else data
+
+    pending: List[str] = [encoder.header()]
+    pending_size = len(pending[0])
+
+    async for row in rows:
+        if "_id" in row:
+            row["_id"] = str(row["_id"])
+        text = encoder.encode(row)
+        pending.append(text)
+        pending_size += len(text)
+        if pending_size >= chunk_size:
+            chunk = output("".join(pending).encode("utf-8"))
+            pending, pending_size = [], 0
+            if chunk:
+                yield chunk
+
+    pending.append(encoder.footer())
+    tail = output("".join(pending).encode("utf-8"))
+    if compressor:
+        tail += compressor.flush()
+    if tail:
+        yield tail
@@ -8,9 +8,10 @@ import hashlib
 import logging
 import mimetypes
 import os
+import tempfile
 import uuid
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import List, NamedTuple, Optional, Tuple
 
 import magic
 from fastapi import HTTPException, UploadFile, status
@@ -20,6 +21,16 @@ from ..config import settings
 logger = logging.getLogger(__name__)
 
 
+class StoredUpload(NamedTuple):
+    """An upload written to content-addressed storage"""
+
+    path: Path
+    sha256: str
+    size: int
+    # False when identical content was already stored
+    created: bool
+
+
 class SecureFileHandler:
     """Secure file upload and handling utilities"""
 
@@ -59,33 +70,37 @@ class SecureFileHandler:
             content = file.file.read(2048)  # Read first 2KB for magic number detection
             file.file.seek(0)  # Reset file pointer
 
-            # Validate MIME type using python-magic
-            try:
-                detected_mime = magic.from_buffer(content, mime=True)
-                if detected_mime not in self.allowed_mime_types:
-                    return False, f"MIME type '{detected_mime}' is not allowed"
-
-                # Double-check extension matches MIME type
-                expected_extension = self.allowed_mime_types[detected_mime]
-                if file_extension != expected_extension:
-                    return (
-                        False,
-                        f"File extension '{file_extension}' does not match detected MIME type '{detected_mime}'",
-                    )
-
-            except Exception as e:
-                logger.warning(
-                    f"Could not detect MIME type for file {file.filename}: {str(e)}"
-                )
-                # Fallback to extension-only validation
-                pass
-
-            return True, "File validation successful"
+            return self._validate_content_type(content, file.filename)
 
         except Exception as e:
             logger.error(f"File validation error: {str(e)}")
             return False, f"File validation failed: {str(e)}"
 
+    def _validate_content_type(self, content: bytes, filename: str) -> Tuple[bool, str]:
+        """Check the magic bytes at the start of a file against its extension"""
+        file_extension = Path(filename).suffix.lower()
+
+        # Validate MIME type using python-magic
+        try:
+            detected_mime = magic.from_buffer(content, mime=True)
+            if detected_mime not in self.allowed_mime_types:
+                return False, f"MIME type '{detected_mime}' is not allowed"
+
+            # Double-check extension matches MIME type
+            expected_extension = self.allowed_mime_types[detected_mime]
+            if file_extension != expected_extension:
+                return (
+                    False,
+                    f"File extension '{file_extension}' does not match detected MIME type '{detected_mime}'",
+                )
+
+        except Exception as e:
+            logger.warning(f"Could not detect MIME type for file {filename}: {str(e)}")
+            # Fallback to extension-only validation
+            pass
+
+        return True, "File validation successful"
+
     def generate_secure_filename(self, original_filename: str, user_id: str) -> str:
         """Generate a secure, unique filename"""
         # Get file extension
@@ -159,6 +174,82 @@ class SecureFileHandler:
                 detail="Failed to save file",
             )
 
+    def store_upload(self, file: UploadFile, store_dir: str) -> StoredUpload:
+        """
+        Stream an upload into content-addressed storage in one pass
+
+        The file is read ``UPLOAD_CHUNK_SIZE`` bytes at a time: magic bytes
+        are checked on the first chunk, every chunk is hashed (SHA-256) and
+        written as it arrives, and the upload is rejected as soon as it
+        passes ``MAX_FILE_SIZE``. The data goes to a temporary file in
+        ``store_dir`` that is renamed to ``<sha256><extension>`` once the
+        hash is known, so the whole file is never held in memory or copied.
+        """
+        if file.size and file.size > self.max_file_size:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File size exceeds maximum allowed size of {self.max_file_size} bytes",
+            )
+
+        file_extension = Path(file.filename).suffix.lower()
+        if file_extension not in self.allowed_extensions:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"File extension '{file_extension}' is not allowed",
+            )
+
+        store_path = Path(store_dir)
+        store_path.mkdir(parents=True, exist_ok=True)
+        chunk_size = settings.UPLOAD_CHUNK_SIZE
+        digest = hashlib.sha256()
+        size = 0
+
+        chunk = file.file.read(chunk_size)
+        is_valid, message = self._validate_content_type(chunk[:2048], file.filename)
+        if not is_valid:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=message)
+
+        # Same directory as the final path, so the rename below is atomic
+        fd, partial = tempfile.mkstemp(dir=store_path, suffix=".part")
+        partial_path = Path(partial)
+        try:
+            with os.fdopen(fd, "wb") as buffer:
+                while chunk:
+                    size += len(chunk)
+                    if size > self.max_file_size:
+                        raise HTTPException(
+                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                            detail=f"File size exceeds maximum allowed size of {self.max_file_size} bytes",
+                        )
+                    digest.update(chunk)
+                    buffer.write(chunk)
+                    chunk = file.file.read(chunk_size)
+
+            content_hash = digest.hexdigest()
+            final_path = self.get_safe_upload_path(
+                f"{content_hash}{file_extension}", store_dir
+            )
+            if final_path.exists():
+                # Identical content is already stored
+                partial_path.unlink()
+                created = False
+            else:
+                os.replace(partial_path, final_path)
+                created = True
+        except HTTPException:
+            partial_path.unlink(missing_ok=True)
+            raise
+        except Exception as e:
+            partial_path.unlink(missing_ok=True)
+            logger.error(f"Error storing upload: {str(e)}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Failed to save file",
+            )
+
+        logger.info(f"Upload stored: {final_path} ({size} bytes)")
+        return StoredUpload(final_path, content_hash, size, created)
+
     def cleanup_temp_file(self, file_path: Path) -> bool:
         """Safely cleanup temporary file"""
         try:
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter
+Sliding-window counter rate limiting shared across workers through Redis
+
+Each window (per minute, per hour) keeps two counters per client: the current
+fixed bucket and the previous one. The request rate is estimated as
+``previous * (1 - elapsed_fraction) + current``, which approximates a true
+sliding log in O(1) time and memory. In Redis the check-and-increment is one
+Lua script call; when Redis is unavailable the limiter falls back to the same
+algorithm over a bounded in-process table.
+"""
+
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "rate_limit"
+
+# KEYS: (current, previous) bucket pairs, one pair per window
+# ARGV: now, then (window seconds, limit) per window
+# Returns {allowed, retry_after, exhausted window, remaining per window...}
+SLIDING_WINDOW_LUA = """
+local now = tonumber(ARGV[1])
+local remaining = {}
+for i = 1, #KEYS, 2 do
+    local window = tonumber(ARGV[i + 1])
+    local limit = tonumber(ARGV[i + 2])
+    local elapsed = (now % window) / window
+    local current = tonumber(redis.call('GET', KEYS[i]) or '0')
+    local previous = tonumber(redis.call('GET', KEYS[i + 1]) or '0')
+    local estimate = math.floor(previous * (1 - elapsed) + current)
+    if estimate >= limit then
+        local result = {0, math.ceil(window - (now % window)), window}
+        for j = 1, #KEYS / 2 do
+            result[#result + 1] = 0
+        end
+        return result
+    end
+    remaining[#remaining + 1] = limit - estimate - 1
+end
+for i = 1, #KEYS, 2 do
+    redis.call('INCR', KEYS[i])
+    redis.call('EXPIRE', KEYS[i], tonumber(ARGV[i + 1]) * 2)
+end
+local result = {1, 0, 0}
+for _, value in ipairs(remaining) do
+    result[#result + 1] = value
+end
+return result
+"""
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    # Seconds until the exhausted window rolls over (0 when allowed)
+    retry_after: int
+    # Length in seconds of the exhausted window (0 when allowed)
+    window: int
+    # Requests left in each window, in the order the limits were given
+    remaining: Tuple[int, ...]
+
+
+def default_limits() -> List[Tuple[int, int]]:
+    """``(window_seconds, limit)`` pairs from settings"""
+    return [
+        (60, settings.RATE_LIMIT_PER_MINUTE),
+        (3600, settings.RATE_LIMIT_PER_HOUR),
+    ]
+
+
+class LocalRateLimiter:
+    """
+    In-process sliding-window counters
+
+    Holds a fixed number of counters per client and at most ``max_clients``
+    clients, evicting the least recently seen.
+    """
+
+    def __init__(self, limits: Sequence[Tuple[int, int]], max_clients: int):
+        self.limits = list(limits)
+        self.max_clients = max_clients
+        # client -> per window [bucket, current, previous]
+        self._clients: "OrderedDict[str, List[List[int]]]" = OrderedDict()
+
+    def hit(self, client: str, now: Optional[float] = None) -> RateLimitResult:
+        now = time.time() if now is None else now
+        counters = self._clients.get(client)
+        if counters is None:
+            counters = [[0, 0, 0] for _ in self.limits]
+            self._clients[client] = counters
+            if len(self._clients) > self.max_clients:
+                self._clients.popitem(last=False)
+        else:
+            self._clients.move_to_end(client)
+
+        remaining = []
+        for (window, limit), counter in zip(self.limits, counters):
+            bucket = int(now // window)
+            if counter[0] != bucket:
+                # Roll forward; a gap of more than one bucket empties both
+                counter[2] = counter[1] if bucket - counter[0] == 1 else 0
+                counter[0], counter[1] = bucket, 0
+            elapsed = (now % window) / window
+            estimate = int(counter[2] * (1 - elapsed) + counter[1])
+            if estimate >= limit:
+                retry_after = math.ceil(window - (now % window))
+                return RateLimitResult(
+                    False, retry_after, window, (0,) * len(self.limits)
+                )
+            remaining.append(limit - estimate - 1)
+
+        for counter in counters:
+            counter[1] += 1
+        return RateLimitResult(True, 0, 0, tuple(remaining))
+
+
+class RateLimiter:
+    """Redis-backed sliding-window limiter with an in-process fallback"""
+
+    def __init__(
+        self,
+        limits: Optional[Sequence[Tuple[int, int]]] = None,
+        max_clients: Optional[int] = None,
+    ):
+        self.limits = list(limits or default_limits())
+        self.local = LocalRateLimiter(
+            self.limits, max_clients or settings.RATE_LIMIT_MAX_CLIENTS
+        )
+        self._script = None
+        # After a Redis failure, use the local table until this time
+        self._redis_retry_at = 0.0
+        self.stats = {"redis": 0, "local": 0, "rejected": 0, "redis_errors": 0}
+
+    def _keys(self, client: str, now: float) -> List[str]:
+        keys = []
+        for window, _ in self.limits:
+            bucket = int(now // window)
+            # Hash tag keeps a client's keys in one cluster slot
+            keys.append(f"{KEY_PREFIX}:{{{client}}}:{window}:{bucket}")
+            keys.append(f"{KEY_PREFIX}:{{{client}}}:{window}:{bucket - 1}")
+        return keys
+
+    async def hit(self, client: str, redis=None) -> RateLimitResult:
+        """
+        Count one request for ``client`` and report whether it is allowed
+
+        ``redis`` is a ``redis.asyncio`` client; without one (or while it is
+        failing) the in-process counters are used.
+        """
+        now = time.time()
+        result = None
+        if redis is not None and now >= self._redis_retry_at:
+            try:
+                if self._script is None:
+                    self._script = redis.register_script(SLIDING_WINDOW_LUA)
+                args = [now]
+                for window, limit in self.limits:
+                    args.extend([window, limit])
+                reply = await self._script(
+                    keys=self._keys(client, now), args=args, client=redis
+                )
+                result = RateLimitResult(
+                    bool(int(reply[0])),
+                    int(reply[1]),
+                    int(reply[2]),
+                    tuple(int(value) for value in reply[3:]),
+                )
+                self.stats["redis"] += 1
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                self._redis_retry_at = now + settings.RATE_LIMIT_REDIS_RETRY
+                logger.warning(f"Redis rate limiter unavailable, using local: {e}")
+
+        if result is None:
+            result = self.local.hit(client, now)
+            self.stats["local"] += 1
+        if not result.allowed:
+            self.stats["rejected"] += 1
+        return result
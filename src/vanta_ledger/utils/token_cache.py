@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Token Cache
+Short-lived, in-process cache of verified JWT principals keyed by ``jti``
+
+A cached entry records that the token was not blacklisted and, once
+``get_current_user`` has loaded it, the token's user, so repeat requests skip
+the Redis blacklist check and the user lookup. Revocation is pushed to every
+process over Redis pub/sub (``blacklist_token``, user updates and deletes);
+while the subscription is down the cache is bypassed, so a missed message can
+never keep a revoked token alive. Entries also expire after
+``AUTH_CACHE_TTL`` seconds or at the token's own ``exp``, whichever is first.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from ..config import settings
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "auth_cache:invalidate"
+
+
+class _Principal:
+    __slots__ = ("payload", "user", "expires_at")
+
+    def __init__(self, payload, expires_at):
+        self.payload = payload
+        self.user = None
+        self.expires_at = expires_at
+
+
+class TokenCache:
+    """Bounded LRU of verified token principals"""
+
+    def __init__(self, ttl: Optional[int] = None, max_entries: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else settings.AUTH_CACHE_TTL
+        self.max_entries = max_entries or settings.AUTH_CACHE_SIZE
+        self.redis = None
+        # True only while subscribed to invalidations
+        self.listening = False
+
+        self._entries: "OrderedDict[str, _Principal]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Bumped by every invalidation; see ``put``
+        self.generation = 0
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def get(self, jti: Optional[str]) -> Optional[_Principal]:
+        """Return the cached principal for ``jti`` if it is still valid"""
+        if not jti or not self.listening:
+            return None
+        with self._lock:
+            entry = self._entries.get(jti)
+            if entry is None or entry.expires_at <= time.time():
+                if entry is not None:
+                    del self._entries[jti]
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(jti)
+            self.stats["hits"] += 1
+            return entry
+
+    def put(self, payload: Dict[str, Any], generation: int):
+        """
+        Cache a verified, non-blacklisted token payload
+
+        ``generation`` is the value read before the blacklist check; if an
+        invalidation arrived since, the check may be stale and nothing is cached.
+        """
+        jti = payload.get("jti")
+        if not jti or not self.listening:
+            return
+        expires_at = time.time() + self.ttl
+        if payload.get("exp"):
+            expires_at = min(expires_at, float(payload["exp"]))
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[jti] = _Principal(payload, expires_at)
+            self._entries.move_to_end(jti)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def set_user(self, jti: Optional[str], user: Any):
+        """Attach the loaded user to a cached principal"""
+        with self._lock:
+            entry = self._entries.get(jti)
+            if entry is not None:
+                entry.user = user
+
+    # ------------------------------------------------------------------
+    # Invalidation
+    # ------------------------------------------------------------------
+
+    def _drop(self, jti: Optional[str] = None, user_id: Optional[str] = None):
+        with self._lock:
+            self.generation += 1
+            if jti is not None:
+                self._entries.pop(jti, None)
+            if user_id is not None:
+                stale = [
+                    key
+                    for key, entry in self._entries.items()
+                    if str(entry.payload.get("user_id")) == user_id
+                ]
+                for key in stale:
+                    del self._entries[key]
+            self.stats["invalidations"] += 1
+
+    def _publish(self, message: Dict[str, str]):
+        self._drop(**message)
+        if self.redis is None:
+            return
+        try:
+            self.redis.publish(INVALIDATION_CHANNEL, json.dumps(message))
+        except Exception as e:
+            # Redis is unreachable, so subscribers lose their subscription and
+            # clear their caches as well
+            logger.error(f"❌ Token cache invalidation publish failed: {e}")
+
+    def invalidate_token(self, jti: str):
+        """Drop a revoked token everywhere"""
+        self._publish({"jti": jti})
+
+    def invalidate_user(self, user_id: Any):
+        """Drop every token of an updated, deactivated or deleted user"""
+        self._publish({"user_id": str(user_id)})
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    # ------------------------------------------------------------------
+    # Subscription
+    # ------------------------------------------------------------------
+
+    def start(self, redis_client):
+        """Subscribe to invalidations on a background thread"""
+        self.redis = redis_client
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._listen, name="token-cache-listener", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self.listening = False
+        self.clear()
+        self._thread = None
+
+    def _listen(self):
+        while not self._stop.is_set():
+            pubsub = None
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                self.listening = True
+                while not self._stop.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get("type") == "message":
+                        self._drop(**json.loads(message["data"]))
+            except Exception as e:
+                self.listening = False
+                self.clear()
+                logger.warning(f"Token cache listener reconnecting: {e}")
+                self._stop.wait(5)
+            finally:
+                # Messages may be missed while unsubscribed
+                self.listening = False
+                self.clear()
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "entries": len(self._entries),
+            "listening": self.listening,
+        }
+
+
+# Global token cache
+token_cache = TokenCache()
@@ -0,0 +1,182 @@
+"""Tests for the single-pass analytics engine."""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+from src.vanta_ledger.config import settings
+from src.vanta_ledger.services.analytics_dashboard import AnalyticsDashboard
+from src.vanta_ledger.services.analytics_engine import (
+    AnalyticsEngine,
+    MetricAccumulator,
+    analytics_engine,
+)
+
+ROWS = [
+    {
+        "company": "ACME",
+        "day": "2024-01-01",
+        "documents": 2,
+        "status": {"success": 2},
+        "with_tax": 2,
+        "amount_total": 100.0,
+        "amount_count": 2,
+        "amount_max": 80.0,
+        "amount_min": 20.0,
+        "risk": {"low": 2},
+        "company_risk": {"low": 2},
+        "tax_numbers": ["A", "B"],
+    },
+    {
+        "company": "Globex",
+        "day": "2024-01-02",
+        "documents": 1,
+        "status": {"failed": 1},
+        "with_issues": 1,
+        "large_amounts": 1,
+        "amount_total": 20_000_000.0,
+        "amount_count": 1,
+        "amount_max": 20_000_000.0,
+        "amount_min": 20_000_000.0,
+        "risk": {"high": 1},
+        "company_risk": {"high": 1},
+        "tax_numbers": ["B"],
+    },
+]
+
+
+class _Cursor:
+    """Minimal async cursor that records how often it was iterated."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.passes = 0
+
+    def __aiter__(self):
+        self.passes += 1
+        return self._iterate()
+
+    async def _iterate(self):
+        for row in self.rows:
+            yield row
+
+
+def test_all_metrics_share_one_pass():
+    """Every registered accumulator is fed from a single cursor pass."""
+    cursor = _Cursor(ROWS)
+
+    results = asyncio.run(analytics_engine.run(cursor))
+
+    assert cursor.passes == 1
+    assert results["financial"]["largest"] == 20_000_000.0
+    assert results["compliance"]["documents_with_tax_info"] == 2
+    assert results["processing"]["success_rate"] == 2 / 3 * 100
+    assert results["trends"]["trend_dates"] == ["2024-01-01", "2024-01-02"]
+    assert {alert["type"] for alert in results["alerts"]} == {
+        "compliance_risk",
+        "large_transaction",
+        "processing_failure",
+    }
+    assert results["top_performers"]["top_by_amount"][0]["company"] == "Globex"
+    assert results["risk"]["overall_risk_level"] == "HIGH"
+    assert results["company_risk"]["overall_risk_level"] == "HIGH"
+
+
+def test_engine_runs_only_requested_metrics():
+    """Endpoints can ask for a subset of the registered metrics."""
+    results = asyncio.run(analytics_engine.run(_Cursor(ROWS), ["compliance"]))
+
+    assert list(results) == ["compliance"]
+
+
+def test_failing_accumulator_does_not_break_other_metrics():
+    """A broken metric reports an error without hiding the others."""
+
+    class Broken(MetricAccumulator):
+        def add(self, row):
+            pass
+
+        def result(self):
+            raise ValueError("boom")
+
+    engine = AnalyticsEngine()
+    engine.register("broken", Broken)
+    engine.register("risk", analytics_engine._factories["risk"])
+
+    results = asyncio.run(engine.run(_Cursor(ROWS)))
+
+    assert "error" in results["broken"]
+    assert results["risk"]["high_risk_documents"] == 1
+
+
+def test_trends_window_stays_bounded():
+    """Only the most recent days are kept while streaming."""
+    rows = [{"day": f"2024-01-{day:02d}", "documents": 1} for day in range(1, 31)]
+
+    results = asyncio.run(analytics_engine.run(_Cursor(rows), ["trends"]))
+
+    assert results["trends"]["trend_dates"][0] == "2024-01-24"
+    assert len(results["trends"]["document_trend"]) == 7
+
+
+DISTINCT_COUNTS = {
+    "total_tax_numbers": 2,
+    "total_compliance_issues": 0,
+    "total_certificates": 0,
+}
+
+
+def test_compliance_totals_are_counted_by_mongodb():
+    """Distinct entity totals come from a server-side count, not the row pass."""
+    mongo_db = MagicMock()
+    rollups = mongo_db.__getitem__.return_value
+    rollups.find.return_value = _Cursor(ROWS)
+    rollups.aggregate.return_value = _Cursor([DISTINCT_COUNTS])
+
+    with patch.object(settings, "ANALYTICS_ROLLUPS_ENABLED", True):
+        results = asyncio.run(
+            AnalyticsDashboard().compute_metrics(mongo_db, ["compliance"])
+        )
+
+    pipeline = rollups.aggregate.call_args.args[0]
+    assert pipeline[-2]["$facet"]["tax_numbers"][0] == {"$unwind": "$tax_numbers"}
+    assert results["compliance"]["total_tax_numbers"] == 2
+    assert results["compliance"]["documents_with_tax_info"] == 2
+
+
+def test_compliance_reports_an_error_when_the_count_fails():
+    mongo_db = MagicMock()
+    rollups = mongo_db.__getitem__.return_value
+    rollups.find.return_value = _Cursor(ROWS)
+    rollups.aggregate.side_effect = RuntimeError("connection reset")
+
+    with patch.object(settings, "ANALYTICS_ROLLUPS_ENABLED", True):
+        results = asyncio.run(
+            AnalyticsDashboard().compute_metrics(mongo_db, ["compliance", "risk"])
+        )
+
+    assert "error" in results["compliance"]
+    assert results["risk"]["high_risk_documents"] == 1
+
+
+@patch.object(settings, "ANALYTICS_ROLLUPS_ENABLED", True)
+def test_company_dashboard_uses_engine_results():
+    """The company dashboard is assembled from one pass over its rows."""
+    mongo_db = MagicMock()
+    mongo_db.__getitem__.return_value.find.return_value = _Cursor(ROWS[:1])
+    mongo_db.__getitem__.return_value.aggregate.return_value = _Cursor(
+        [DISTINCT_COUNTS]
+    )
+    recent = mongo_db.processed_documents.find.return_value.sort.return_value
+    recent.limit.return_value.to_list.side_effect = lambda length: asyncio.sleep(
+        0, result=[{"filename": "a.pdf", "entities": {"amount_values": [5.0, 7.0]}}]
+    )
+
+    dashboard = asyncio.run(
+        AnalyticsDashboard().get_company_dashboard("ACME", mongo_db, None)
+    )
+
+    assert dashboard["document_count"] == 2
+    assert dashboard["financial_summary"]["largest_transaction"] == 80.0
+    assert dashboard["compliance_status"]["status"] == "COMPLIANT"
+    assert dashboard["risk_assessment"]["overall_risk_level"] == "LOW"
+    assert dashboard["recent_activity"][0]["total_amount"] == 12.0
@@ -0,0 +1,65 @@
+"""Tests for the analytics aggregation pipelines and amount normalization."""
+
+from src.vanta_ledger.services.analytics_pipelines import (
+    distinct_entities_pipeline,
+    normalize_amounts,
+    parse_amount,
+    rollup_rows_pipeline,
+    with_amount_values,
+)
+
+
+def test_parse_amount_handles_currency_strings():
+    """Currency prefixes and thousands separators are stripped."""
+    assert parse_amount("KSh 1,234.56") == 1234.56
+    assert parse_amount("$500") == 500.0
+    assert parse_amount(42) == 42.0
+    assert parse_amount("n/a") is None
+    assert parse_amount(None) is None
+
+
+def test_with_amount_values_keeps_raw_amounts():
+    """Normalized values are stored next to the extracted strings."""
+    entities = {"amounts": ["KSh 1,000", "junk", "2,500.50"], "tax_numbers": []}
+
+    stored = with_amount_values(entities)
+
+    assert stored["amounts"] == entities["amounts"]
+    assert stored["amount_values"] == [1000.0, 2500.5]
+    assert normalize_amounts(None) == []
+
+
+def test_rollup_rows_pipeline_groups_by_company_and_day():
+    """The fallback pipeline emits rows shaped like the rollup collection."""
+    pipeline = rollup_rows_pipeline({"company": "ACME"})
+
+    assert pipeline[0] == {"$match": {"company": "ACME"}}
+    group = next(stage["$group"] for stage in pipeline if "$group" in stage)
+    assert group["_id"] == {"company": "$company", "day": "$_day"}
+    row = pipeline[-1]["$project"]
+    assert {"company", "day", "status", "risk"} <= set(row)
+    # Distinct entities are counted separately, not shipped with every row
+    assert "tax_numbers" not in row
+
+
+def test_distinct_entities_are_grouped_on_the_server():
+    """Each entity list is unwound and grouped; only the counts come back."""
+    pipeline = distinct_entities_pipeline({"company": "ACME"})
+
+    assert pipeline[0] == {"$match": {"company": "ACME"}}
+    assert pipeline[-2]["$facet"]["certificates"] == [
+        {"$unwind": "$entities.certificates"},
+        {"$group": {"_id": "$entities.certificates"}},
+        {"$count": "n"},
+    ]
+    assert set(pipeline[-1]["$project"]) == {
+        "total_tax_numbers",
+        "total_compliance_issues",
+        "total_certificates",
+    }
+    rollup_pipeline = distinct_entities_pipeline(prefix="")
+    assert rollup_pipeline[0]["$project"] == {
+        "tax_numbers": 1,
+        "compliance_issues": 1,
+        "certificates": 1,
+    }
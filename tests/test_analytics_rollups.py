@@ -0,0 +1,138 @@
+"""Tests for the incrementally maintained dashboard rollups."""
+
+from unittest.mock import MagicMock
+
+from pymongo.errors import BulkWriteError
+
+from src.vanta_ledger.services.analytics_rollups import (
+    MARKER_COLLECTION,
+    ROLLUP_COLLECTION,
+    rebuild_rollups,
+    record_document,
+    record_documents,
+    rollup_update,
+)
+
+
+def _document(**overrides):
+    document = {
+        "_id": "doc-1",
+        "company": "ACME",
+        "processing_date": "2024-01-02T10:00:00",
+        "processing_status": "success",
+        "document_type": "invoice",
+        "processing_time": 2.5,
+        "entities": {
+            "amounts": ["KSh 2,000,000", "500"],
+            "tax_numbers": ["P051234567X"],
+            "compliance_issues": [],
+        },
+    }
+    document.update(overrides)
+    return document
+
+
+def test_rollup_update_targets_company_day_row():
+    """A document increments the counters of its company/day row."""
+    key, update = rollup_update(_document())
+
+    assert key == {"company": "ACME", "day": "2024-01-02"}
+    assert update["$inc"]["documents"] == 1
+    assert update["$inc"]["status.success"] == 1
+    assert update["$inc"]["document_types.invoice"] == 1
+    assert update["$inc"]["amount_total"] == 2000500.0
+    assert update["$inc"]["processing_time_histogram.lt_5s"] == 1
+    assert update["$inc"]["company_risk.medium"] == 1
+    assert update["$max"] == {"amount_max": 2000000.0}
+    assert update["$addToSet"] == {"tax_numbers": {"$each": ["P051234567X"]}}
+
+
+def test_record_document_upserts_and_never_raises():
+    """Rollup failures are logged instead of breaking ingestion."""
+    db = MagicMock()
+
+    assert record_document(db, _document()) is True
+    db[MARKER_COLLECTION].insert_many.assert_called_once_with(
+        [{"_id": "doc-1", "company": "ACME"}], ordered=False
+    )
+    db[ROLLUP_COLLECTION].bulk_write.assert_called_once()
+    assert db[ROLLUP_COLLECTION].bulk_write.call_args.kwargs["ordered"] is False
+
+    db[ROLLUP_COLLECTION].bulk_write.side_effect = RuntimeError("down")
+    assert record_document(db, _document()) is False
+
+
+def _duplicate(*indexes):
+    return BulkWriteError(
+        {"writeErrors": [{"index": index, "code": 11000} for index in indexes]}
+    )
+
+
+def test_documents_already_folded_in_are_skipped():
+    """A document whose marker exists is not counted again."""
+    db = MagicMock()
+    db[MARKER_COLLECTION].insert_many.side_effect = _duplicate(0)
+    documents = [_document(_id="doc-1"), _document(_id="doc-2")]
+
+    assert record_documents(db, documents) is True
+
+    (updates,) = db[ROLLUP_COLLECTION].bulk_write.call_args.args
+    assert len(updates) == 1
+
+
+def test_nothing_is_written_when_every_document_was_folded_in():
+    db = MagicMock()
+    db[MARKER_COLLECTION].insert_many.side_effect = _duplicate(0)
+
+    assert record_document(db, _document()) is True
+    db[ROLLUP_COLLECTION].bulk_write.assert_not_called()
+
+
+def test_concurrently_created_rows_are_retried_once():
+    """Two writers creating the same company/day row both end up counted."""
+    db = MagicMock()
+    rollups = db[ROLLUP_COLLECTION]
+    rollups.bulk_write.side_effect = [_duplicate(1), None]
+    documents = [_document(_id="doc-1"), _document(_id="doc-2")]
+
+    assert record_documents(db, documents) is True
+
+    first, retry = (call.args[0] for call in rollups.bulk_write.call_args_list)
+    assert len(first) == 2
+    assert retry == [first[1]]
+
+
+def test_other_write_errors_are_reported():
+    db = MagicMock()
+    db[ROLLUP_COLLECTION].bulk_write.side_effect = BulkWriteError(
+        {"writeErrors": [{"index": 0, "code": 121}]}
+    )
+
+    assert record_documents(db, [_document()]) is False
+
+    db[ROLLUP_COLLECTION].bulk_write.side_effect = [_duplicate(0), _duplicate(0)]
+    assert record_documents(db, [_document()]) is False
+
+
+def test_rebuild_reads_the_documents_ingest_records():
+    """A rebuild clears rows and markers, then folds processed_documents."""
+    collections = {ROLLUP_COLLECTION: MagicMock(), MARKER_COLLECTION: MagicMock()}
+    db = MagicMock()
+    db.__getitem__.side_effect = collections.__getitem__
+    rollups = db[ROLLUP_COLLECTION]
+    db[MARKER_COLLECTION].insert_many.side_effect = _duplicate(1)
+    db.processed_documents.find.return_value = [
+        _document(_id="doc-1"),
+        _document(_id="doc-2"),
+    ]
+
+    # doc-2 was recorded by ingest after the markers were cleared
+    assert rebuild_rollups(db, "ACME") == 1
+
+    rollups.delete_many.assert_called_once_with({"company": "ACME"})
+    db[MARKER_COLLECTION].delete_many.assert_called_once_with({"company": "ACME"})
+    query, projection = db.processed_documents.find.call_args.args
+    assert query == {"company": "ACME"}
+    assert projection["_id"] == 1
+    (updates,) = rollups.bulk_write.call_args.args
+    assert len(updates) == 1
@@ -0,0 +1,169 @@
+"""Tests for the batched writer used by the ingestion scripts."""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent / "database"))
+
+import bulk_writer  # noqa: E402
+from bulk_writer import BulkWriter, Stage, insert_many_idempotent  # noqa: E402
+
+
+class RecordingStage:
+    """Stage write that fails a set number of times before succeeding"""
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = []
+        self.undone = []
+
+    def write(self, rows):
+        self.calls.append(list(rows))
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("connection reset")
+
+    def undo(self, rows):
+        self.undone.append(list(rows))
+
+
+class FakeCollection:
+    def __init__(self, error=None):
+        self.error = error
+        self.inserted = []
+
+    def insert_many(self, documents, ordered):
+        assert ordered is False
+        self.inserted.append(list(documents))
+        if self.error:
+            raise self.error
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(bulk_writer.time, "sleep", delays.append)
+    return delays
+
+
+def test_failed_stage_is_retried_with_backoff(sleeps):
+    """Only the failing stage is repeated, with exponential backoff."""
+    postgres, mongo = RecordingStage(), RecordingStage(failures=2)
+    writer = BulkWriter(
+        [Stage("postgres", postgres.write), Stage("mongo", mongo.write)],
+        batch_size=10,
+        max_delay=0,
+        retry_backoff=0.5,
+    )
+
+    writer.extend({"n": n} for n in range(3))
+    writer.close()
+
+    assert len(postgres.calls) == 1
+    assert len(mongo.calls) == 3
+    assert sleeps == [0.5, 1.0]
+    assert writer.stats["rows_written"] == 3
+    assert writer.stats["retries"] == 2
+
+
+def test_batches_flush_by_size(sleeps):
+    """A batch is written each time batch_size rows are buffered."""
+    stage = RecordingStage()
+    writer = BulkWriter([Stage("postgres", stage.write)], batch_size=3, max_delay=0)
+
+    writer.extend({"n": n} for n in range(7))
+
+    assert [len(rows) for rows in stage.calls] == [3, 3]
+    assert writer.get_stats()["pending"] == 1
+
+    writer.close()
+
+    assert [len(rows) for rows in stage.calls] == [3, 3, 1]
+
+
+def test_partial_batch_flushes_after_max_delay():
+    """A batch that never fills is written once its oldest row is max_delay old."""
+    stage = RecordingStage()
+    writer = BulkWriter([Stage("postgres", stage.write)], batch_size=100, max_delay=0.1)
+
+    writer.add({"n": 1})
+    deadline = time.time() + 2
+    while not stage.calls and time.time() < deadline:
+        time.sleep(0.02)
+    writer.close()
+
+    assert stage.calls == [[{"n": 1}]]
+
+
+def test_failed_required_stage_undoes_committed_stages(sleeps):
+    """When Mongo never succeeds the Postgres rows are removed again."""
+    postgres = RecordingStage()
+    mongo = RecordingStage(failures=10)
+    rollups = RecordingStage()
+    writer = BulkWriter(
+        [
+            Stage("postgres", postgres.write, undo=postgres.undo),
+            Stage("mongo", mongo.write, undo=mongo.undo),
+            Stage("rollups", rollups.write),
+        ],
+        batch_size=10,
+        max_delay=0,
+        max_retries=2,
+    )
+
+    writer.extend({"n": n} for n in range(2))
+    writer.close()
+
+    assert len(mongo.calls) == 3
+    assert postgres.undone == [[{"n": 0}, {"n": 1}]]
+    assert mongo.undone == []
+    assert rollups.calls == []
+    assert writer.stats["rows_failed"] == 2
+    assert writer.stats["undone"] == 1
+
+
+def test_optional_stage_failure_keeps_the_batch(sleeps):
+    """A non-required stage failing neither fails nor undoes the batch."""
+    postgres = RecordingStage()
+    rollups = RecordingStage(failures=1)
+    writer = BulkWriter(
+        [
+            Stage("postgres", postgres.write, undo=postgres.undo),
+            Stage("rollups", rollups.write, retry=False, required=False),
+        ],
+        max_delay=0,
+    )
+
+    writer.add({"n": 1})
+    writer.close()
+
+    assert postgres.undone == []
+    assert writer.stats["rows_written"] == 1
+
+
+def test_insert_many_ignores_duplicate_keys_from_a_retry():
+    """A repeated insert_many only reports duplicates, which are ignored."""
+    from pymongo.errors import BulkWriteError
+
+    documents = [{"n": 1}, {"n": 2}]
+    duplicate = BulkWriteError({"writeErrors": [{"index": 0, "code": 11000}]})
+    collection = FakeCollection(error=duplicate)
+
+    insert_many_idempotent(collection, documents)
+    ids = [document["_id"] for document in documents]
+    insert_many_idempotent(collection, documents)
+
+    # The same _id values are sent both times
+    assert [document["_id"] for document in collection.inserted[1]] == ids
+
+
+def test_insert_many_raises_other_write_errors():
+    from pymongo.errors import BulkWriteError
+
+    error = BulkWriteError({"writeErrors": [{"index": 0, "code": 121}]})
+
+    with pytest.raises(BulkWriteError):
+        insert_many_idempotent(FakeCollection(error=error), [{"n": 1}])
@@ -0,0 +1,118 @@
+"""Tests for the shared connection pool registry."""
+
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.vanta_ledger import database
+from src.vanta_ledger.database import ConnectionPools, PoolExhaustedError
+
+
+@patch("src.vanta_ledger.database.pymongo.MongoClient")
+def test_mongo_client_is_shared(mock_client_cls):
+    """Every accessor call returns the same MongoClient instance."""
+    registry = ConnectionPools()
+
+    first = registry.mongo_client
+    second = registry.mongo_client
+
+    assert first is second
+    mock_client_cls.assert_called_once()
+
+
+@patch("src.vanta_ledger.database.pg_pool.ThreadedConnectionPool")
+def test_postgres_connection_is_returned_to_pool(mock_pool_cls):
+    """Borrowed connections are rolled back and handed back to the pool."""
+    conn = MagicMock(closed=0)
+    mock_pool = mock_pool_cls.return_value
+    mock_pool.getconn.return_value = conn
+    registry = ConnectionPools()
+
+    with registry.postgres_connection() as borrowed:
+        assert borrowed is conn
+        assert registry.postgres_in_use == 1
+
+    conn.rollback.assert_called_once()
+    mock_pool.putconn.assert_called_once_with(conn, close=False)
+    assert registry.postgres_in_use == 0
+    assert registry.get_stats()["postgres"]["checkouts"] == 1
+
+
+@patch("src.vanta_ledger.database.pg_pool.ThreadedConnectionPool")
+def test_postgres_checkout_times_out_when_saturated(mock_pool_cls):
+    """A saturated pool raises instead of opening extra connections."""
+    mock_pool_cls.return_value.getconn.return_value = MagicMock(closed=0)
+    registry = ConnectionPools()
+
+    with patch.object(database.settings, "POSTGRES_POOL_MAX_SIZE", 1), patch.object(
+        database.settings, "POSTGRES_POOL_TIMEOUT", 0.01
+    ):
+        with registry.postgres_connection():
+            with pytest.raises(PoolExhaustedError):
+                with registry.postgres_connection():
+                    pass
+
+    assert registry.postgres_timeouts == 1
+
+
+@patch("src.vanta_ledger.database.pymongo.MongoClient")
+def test_services_use_the_reopened_client_after_close(mock_client_cls, monkeypatch):
+    """Service collections are looked up on use, never from a closed client."""
+    closed, reopened = MagicMock(name="closed"), MagicMock(name="reopened")
+    mock_client_cls.side_effect = [closed, reopened]
+    registry = ConnectionPools()
+    monkeypatch.setattr(database, "pools", registry)
+
+    class Service:
+        db = database.MongoDatabase()
+        invoices = database.MongoCollection("invoices")
+
+    service = Service()
+    assert service.invoices is closed[database.settings.DATABASE_NAME]["invoices"]
+
+    registry.close()
+
+    closed.close.assert_called_once()
+    assert service.db is reopened[database.settings.DATABASE_NAME]
+    assert service.invoices is reopened[database.settings.DATABASE_NAME]["invoices"]
+
+
+@patch("src.vanta_ledger.database.pg_pool.ThreadedConnectionPool")
+def test_postgres_counters_are_consistent_across_threads(mock_pool_cls):
+    """Concurrent checkouts neither lose nor double count a connection."""
+    mock_pool_cls.return_value.getconn.side_effect = lambda: MagicMock(closed=0)
+    registry = ConnectionPools()
+
+    def borrow():
+        for _ in range(200):
+            with registry.postgres_connection():
+                pass
+
+    threads = [threading.Thread(target=borrow) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = registry.get_stats()["postgres"]
+    assert stats["checkouts"] == 1600
+    assert stats["in_use"] == 0
+
+
+@patch("src.vanta_ledger.database.redis.ConnectionPool.from_url")
+@patch("src.vanta_ledger.database.pymongo.MongoClient")
+@patch("src.vanta_ledger.database.pg_pool.ThreadedConnectionPool")
+def test_open_survives_an_unreachable_postgres(
+    mock_pool_cls, mock_client_cls, mock_from_url, monkeypatch
+):
+    """Startup continues without PostgreSQL; the pool is retried on first use."""
+    monkeypatch.setattr(database.settings, "POSTGRES_URI", "postgresql://db/app")
+    mock_pool_cls.side_effect = [Exception("connection refused"), MagicMock()]
+    registry = ConnectionPools()
+
+    registry.open()
+
+    assert registry._postgres_pool is None
+    assert registry._mongo_client is mock_client_cls.return_value
+    assert registry.postgres_pool is not None
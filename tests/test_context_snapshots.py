@@ -0,0 +1,105 @@
+"""Tests for versioned company context snapshots."""
+
+import json
+
+from src.vanta_ledger.services.llm.context_snapshots import (
+    GLOBAL_VERSION_KEY,
+    ContextSnapshotCache,
+)
+
+CONTEXT = {"company_id": "acme", "company_name": "Acme", "prompt_context": "Acme"}
+
+
+class FakeRedis:
+    """Just the string commands the snapshot cache uses"""
+
+    def __init__(self):
+        self.data = {}
+        self.reads = 0
+
+    def mget(self, *keys):
+        self.reads += 1
+        return [self.data.get(key) for key in keys]
+
+    def get(self, key):
+        self.reads += 1
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+
+
+def _cache(redis, recheck=60):
+    return ContextSnapshotCache(
+        max_entries=10, recheck=recheck, ttl=60, redis_client=redis
+    )
+
+
+def test_snapshots_are_served_in_process_between_version_checks():
+    """A fresh snapshot is returned without touching Redis."""
+    redis = FakeRedis()
+    cache = _cache(redis)
+    context, version = cache.get("acme")
+    assert context is None
+    cache.put("acme", CONTEXT, version)
+
+    reads = redis.reads
+    assert cache.get("acme") == (CONTEXT, version)
+    assert redis.reads == reads
+    assert cache.stats["l1_hits"] == 1
+
+
+def test_other_workers_pick_up_snapshots_from_redis():
+    """A snapshot built by one worker is an L2 hit for another."""
+    redis = FakeRedis()
+    writer = _cache(redis)
+    _, version = writer.get("acme")
+    writer.put("acme", CONTEXT, version)
+
+    context, _ = _cache(redis).get("acme")
+
+    assert context == CONTEXT
+    stored = json.loads(redis.data["company_context:snapshot:acme"])
+    assert stored["version"] == version
+
+
+def test_invalidation_makes_snapshots_stale_everywhere():
+    """A version bump from any worker turns the next recheck into a miss."""
+    redis = FakeRedis()
+    reader = _cache(redis, recheck=0)
+    _, version = reader.get("acme")
+    reader.put("acme", CONTEXT, version)
+
+    _cache(redis).invalidate("acme")
+    context, new_version = reader.get("acme")
+    assert context is None
+    assert new_version != version
+
+    reader.put("acme", CONTEXT, new_version)
+    _cache(redis).invalidate()
+    assert redis.data[GLOBAL_VERSION_KEY] == "1"
+    assert reader.get("acme")[0] is None
+
+
+def test_invalidation_never_raises_without_redis():
+    """Writes are not failed by a cache outage; local versions still move."""
+
+    class DownRedis:
+        def __getattr__(self, name):
+            def fail(*args, **kwargs):
+                raise ConnectionError("redis down")
+
+            return fail
+
+    cache = _cache(DownRedis(), recheck=0)
+    _, version = cache.get("acme")
+    cache.put("acme", CONTEXT, version)
+
+    cache.invalidate("acme")
+
+    assert cache.peek("acme") is None
+    assert cache.get("acme") == (None, "local0:1")
+    assert cache.stats["errors"] > 0
@@ -0,0 +1,161 @@
+"""Tests for the two-tier dashboard payload cache."""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+from src.vanta_ledger.services.dashboard_cache import (
+    ALL_TAG,
+    GLOBAL_TAG,
+    DashboardCache,
+    cache_key,
+    company_tag,
+    invalidate_dashboards,
+    invalidation_tags,
+)
+
+
+def _counting(payload):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return payload
+
+    return compute, calls
+
+
+def test_fresh_entries_are_served_from_l1():
+    """A second lookup within the TTL does not recompute."""
+    cache = DashboardCache(ttl=60, stale_ttl=60, max_entries=10)
+    compute, calls = _counting({"total": 1})
+
+    async def run():
+        first = await cache.get_or_compute("overview:admin:-", [GLOBAL_TAG], compute)
+        second = await cache.get_or_compute("overview:admin:-", [GLOBAL_TAG], compute)
+        return first, second
+
+    assert asyncio.run(run()) == ({"total": 1}, {"total": 1})
+    assert len(calls) == 1
+    assert cache.stats["misses"] == 1
+    assert cache.stats["l1_hits"] == 1
+
+
+def test_concurrent_misses_share_one_computation():
+    """Requests racing on a cold key wait for the same computation."""
+    cache = DashboardCache(ttl=60, stale_ttl=60, max_entries=10)
+    compute, calls = _counting({"total": 1})
+
+    async def run():
+        return await asyncio.gather(
+            *[cache.get_or_compute("k", [GLOBAL_TAG], compute) for _ in range(5)]
+        )
+
+    assert asyncio.run(run()) == [{"total": 1}] * 5
+    assert len(calls) == 1
+
+
+def test_stale_entries_are_served_while_refreshing():
+    """An expired entry is returned immediately and refreshed in the background."""
+    cache = DashboardCache(ttl=0, stale_ttl=60, max_entries=10)
+    payloads = iter([{"version": 1}, {"version": 2}])
+
+    async def compute():
+        return next(payloads)
+
+    async def run():
+        await cache.get_or_compute("k", [GLOBAL_TAG], compute)
+        stale = await cache.get_or_compute("k", [GLOBAL_TAG], compute)
+        await asyncio.gather(*cache._refreshing.values())
+        return stale, cache._l1["k"].payload
+
+    stale, refreshed = asyncio.run(run())
+
+    assert stale == {"version": 1}
+    assert refreshed == {"version": 2}
+    assert cache.stats["stale_hits"] == 1
+    assert cache.stats["refreshes"] == 1
+
+
+def test_error_payloads_are_not_cached():
+    """Service error dicts are recomputed on the next request."""
+    cache = DashboardCache(ttl=60, stale_ttl=60, max_entries=10)
+    compute, calls = _counting({"error": "An internal error has occurred."})
+
+    async def run():
+        await cache.get_or_compute("k", [GLOBAL_TAG], compute)
+        await cache.get_or_compute("k", [GLOBAL_TAG], compute)
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+def test_payloads_with_a_failed_section_are_not_cached():
+    """An overview whose health check failed is recomputed, not pinned."""
+    cache = DashboardCache(ttl=60, stale_ttl=60, max_entries=10)
+    compute, calls = _counting(
+        {"financial_metrics": {"total": 10}, "system_health": {"error": "down"}}
+    )
+
+    async def run():
+        await cache.get_or_compute("k", [GLOBAL_TAG], compute)
+        await cache.get_or_compute("k", [GLOBAL_TAG], compute)
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+def test_company_invalidation_keeps_other_companies():
+    """A write for one company drops its dashboards and the global payloads."""
+    cache = DashboardCache(ttl=60, stale_ttl=60, max_entries=10)
+
+    async def run():
+        for key, tags in [
+            ("overview", [GLOBAL_TAG]),
+            ("company:ACME", [company_tag("ACME")]),
+            ("company:OTHER", [company_tag("OTHER")]),
+        ]:
+            await cache.get_or_compute(key, tags, _counting({"key": key})[0])
+        await cache.invalidate("ACME")
+
+    asyncio.run(run())
+    assert list(cache._l1) == ["company:OTHER"]
+    assert cache.stats["invalidations"] == 1
+
+
+def test_l1_is_bounded():
+    """The least recently used entry is evicted past ``max_entries``."""
+    cache = DashboardCache(ttl=60, stale_ttl=60, max_entries=2)
+
+    async def run():
+        for key in ["a", "b", "c"]:
+            await cache.get_or_compute(key, [GLOBAL_TAG], _counting(key)[0])
+
+    asyncio.run(run())
+    assert list(cache._l1) == ["b", "c"]
+
+
+def test_sync_invalidation_deletes_tagged_redis_keys():
+    """Sync writers delete indexed Redis entries and notify other workers."""
+    redis_client = MagicMock()
+    redis_client.smembers.return_value = {"dashboard_cache:company:ACME:-:-"}
+
+    with patch(
+        "src.vanta_ledger.services.dashboard_cache.get_redis_client",
+        return_value=redis_client,
+    ):
+        invalidate_dashboards("ACME")
+
+    redis_client.delete.assert_any_call("dashboard_cache:company:ACME:-:-")
+    redis_client.publish.assert_called_once()
+    assert invalidation_tags() == [ALL_TAG]
+    assert cache_key("overview", "admin", None) == "overview:admin:-"
+
+
+def test_sync_invalidation_never_raises():
+    """A Redis outage must not fail the write that triggered invalidation."""
+    with patch(
+        "src.vanta_ledger.services.dashboard_cache.get_redis_client",
+        side_effect=ConnectionError("down"),
+    ):
+        invalidate_dashboards("ACME")
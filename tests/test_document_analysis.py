@@ -0,0 +1,95 @@
+"""Tests for single-parse document analysis in DocumentProcessor."""
+
+from types import SimpleNamespace
+
+from src.vanta_ledger.services import document_processor as module
+from src.vanta_ledger.services.document_processor import DocumentProcessor
+
+TEXT = (
+    "Invoice from Acme Fuel Ltd for Project Thika Road. Total amount due is "
+    "$1,200.00 plus 16% VAT, payable within thirty days of the invoice date. "
+    "A second line of $1,200.00 covers delivery."
+)
+
+
+class FakeNLP:
+    """Counts parses and returns a fixed set of entities and noun chunks"""
+
+    def __init__(self):
+        self.parses = 0
+        self.piped = []
+
+    def _doc(self, text):
+        return SimpleNamespace(
+            text=text,
+            ents=[
+                SimpleNamespace(text="Acme Fuel Ltd", label_="ORG"),
+                SimpleNamespace(text="Thika Road", label_="GPE"),
+            ],
+            noun_chunks=[SimpleNamespace(text="Total amount")],
+        )
+
+    def __call__(self, text):
+        self.parses += 1
+        return self._doc(text)
+
+    def pipe(self, items, as_tuples, n_process, batch_size):
+        self.piped.append((n_process, batch_size))
+        for text, context in items:
+            yield self._doc(text), context
+
+
+def _processor(tmp_path, monkeypatch):
+    nlp = FakeNLP()
+    monkeypatch.setattr(module, "nlp", nlp, raising=False)
+    monkeypatch.setattr(module, "NLP_AVAILABLE", True)
+    processor = DocumentProcessor(
+        upload_dir=str(tmp_path / "uploads"),
+        processed_dir=str(tmp_path / "processed"),
+    )
+    return processor, nlp
+
+
+def test_each_document_is_parsed_once(tmp_path, monkeypatch):
+    """Keywords, companies and entities all read the same spaCy parse."""
+    processor, nlp = _processor(tmp_path, monkeypatch)
+
+    analysis = processor._analyze_document(TEXT, "doc-1")
+
+    assert nlp.parses == 1
+    assert analysis["companies"] == ["Acme Fuel Ltd"]
+    assert analysis["entities"]["GPE"] == ["Thika Road"]
+    assert "acme fuel ltd" in analysis["keywords"]
+
+
+def test_batch_analysis_parses_through_pipe(tmp_path, monkeypatch):
+    """Batch mode parses with nlp.pipe and keeps documents in input order."""
+    processor, nlp = _processor(tmp_path, monkeypatch)
+
+    analyses = list(
+        processor.analyze_texts(
+            [(TEXT, "doc-1"), ("Receipt for cash purchase", "doc-2")],
+            n_process=2,
+            batch_size=8,
+        )
+    )
+
+    assert [analysis["doc_id"] for analysis in analyses] == ["doc-1", "doc-2"]
+    assert nlp.parses == 0
+    assert nlp.piped == [(2, 8)]
+
+
+def test_financial_context_follows_each_match(tmp_path, monkeypatch):
+    """Repeated amounts get the context around their own occurrence."""
+    processor, _ = _processor(tmp_path, monkeypatch)
+
+    amounts = [
+        item
+        for item in processor._extract_financial_data(TEXT)
+        if item["type"] == "amount"
+    ]
+
+    assert [item["value"] for item in amounts] == ["$1,200.00", "$1,200.00"]
+    assert "due is" in amounts[0]["context"]
+    assert "covers delivery" in amounts[1]["context"]
+    assert "due is" not in amounts[1]["context"]
@@ -0,0 +1,55 @@
+"""Tests for the company entity index."""
+
+from src.vanta_ledger.services.llm.entity_index import (
+    EntityIndex,
+    EntityIndexCache,
+    normalize_name,
+)
+
+CUSTOMERS = [
+    {"code": "C-001", "name": "Acme Industries Ltd"},
+    {"code": "C-002", "name": "Nairobi Hardware Supplies"},
+    {"code": "C-003", "name": "Café Mocha Limited"},
+]
+
+
+def test_names_are_normalized_before_lookup():
+    """Case, accents, punctuation and legal suffixes do not affect matches."""
+    assert normalize_name("ACME Industries, Ltd.") == "acme industries"
+    assert normalize_name("Café Mocha Limited") == "cafe mocha"
+
+    index = EntityIndex(CUSTOMERS)
+    assert index.match("acme industries limited")[0]["code"] == "C-001"
+    assert index.match("CAFE MOCHA")[0]["code"] == "C-003"
+    assert index.match("c-002")[0]["code"] == "C-002"
+
+
+def test_partial_and_misspelled_names_are_matched_fuzzily():
+    """Abbreviated or misspelled names resolve; unrelated names do not."""
+    index = EntityIndex(CUSTOMERS)
+
+    record, score = index.match("Nairobi Hardware")
+    assert record["code"] == "C-002" and score >= 0.9
+    assert index.match("Acme Industires")[0]["code"] == "C-001"
+    assert index.match("Mombasa Fisheries", threshold=0.6)[0] is None
+
+
+def test_large_indexes_only_score_candidates_sharing_trigrams():
+    """Lookups over many counterparties still find the right record."""
+    records = [{"code": f"V{i:05d}", "name": f"Vendor {i:05d}"} for i in range(20000)]
+    records.append({"code": "V-KPLC", "name": "Kenya Power and Lighting Co"})
+    index = EntityIndex(records)
+
+    assert index.match("Kenya Power & Lighting")[0]["code"] == "V-KPLC"
+    assert index.lookup_code("v 12345")["name"] == "Vendor 12345"
+
+
+def test_indexes_are_reused_per_snapshot_version():
+    """The same snapshot version shares one index; a new version rebuilds."""
+    cache = EntityIndexCache(max_entries=4)
+    context = {"company_id": "acme", "snapshot_version": "0:1", "customers": CUSTOMERS}
+
+    first = cache.for_context(context)
+    assert cache.for_context(dict(context)) is first
+    assert cache.for_context({**context, "snapshot_version": "0:2"}) is not first
+    assert cache.stats == {"hits": 1, "builds": 2}
@@ -0,0 +1,115 @@
+"""Tests for the single-prompt fused extraction mode."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from src.vanta_ledger.services.llm.fused_extraction import (
+    FUSED_SCHEMA,
+    parse_fused_response,
+)
+from src.vanta_ledger.services.local_llm_service import local_llm_service
+
+FUSED_OUTPUT = {
+    "document_type": "invoice",
+    "summary": " Invoice from Acme for fuel. ",
+    "entities": {
+        field: [] for field in FUSED_SCHEMA["properties"]["entities"]["required"]
+    },
+    "financial_data": {
+        "total_amount": "1160",
+        "tax_amount": "160",
+        "due_date": "",
+        "invoice_number": "INV-7",
+        "customer_name": "Acme",
+        "account_codes": ["4000", "9999"],
+    },
+}
+
+
+class FakeExecutor:
+    """Runs submitted jobs inline on a model that replays canned completions"""
+
+    def __init__(self, *texts):
+        self.texts = list(texts)
+        self.calls = []
+
+    def model(self, prompt, **kwargs):
+        self.calls.append((prompt, kwargs))
+        text = self.texts.pop(0) if self.texts else ""
+        return {"choices": [{"text": text}]}
+
+    async def submit(self, name, fn, *args, **kwargs):
+        return fn(self.model, *args, **kwargs)
+
+
+def _context(mode):
+    context = local_llm_service.company_context_manager._get_default_context()
+    context.update(
+        extraction_mode=mode,
+        customers=[{"code": "C1", "name": "Acme"}],
+        financial_accounts=[{"code": "4000", "name": "Sales"}],
+    )
+    return context
+
+
+def _process(executor, mode):
+    models = local_llm_service.hardware_config["recommended_models"]
+    loaded = {models[role]["name"]: object() for role in ("primary", "secondary")}
+    document = SimpleNamespace(extracted_text="INVOICE INV-7 Acme KSh 1,160")
+
+    with (
+        patch.object(local_llm_service, "executor", executor),
+        patch.object(local_llm_service, "models", loaded),
+    ):
+        return asyncio.run(
+            local_llm_service._process_with_company_context(document, _context(mode))
+        )
+
+
+def test_parse_drops_absent_financial_fields():
+    """Empty strings from the schema mean the value was not in the document."""
+    data = parse_fused_response(json.dumps(FUSED_OUTPUT))
+
+    assert data["summary"] == "Invoice from Acme for fuel."
+    assert "due_date" not in data["financial_data"]
+    with pytest.raises(ValueError):
+        parse_fused_response(json.dumps({"summary": "cut off"}))
+
+
+def test_fused_mode_makes_one_constrained_generation():
+    """All four results come from a single prompt sent once."""
+    executor = FakeExecutor(json.dumps(FUSED_OUTPUT))
+
+    results = _process(executor, "fused")
+
+    assert len(executor.calls) == 1
+    prompt, kwargs = executor.calls[0]
+    assert prompt.count("Company: Default Company") == 1
+    assert "grammar" in kwargs
+    assert results["classification"]["type"] == "invoice"
+    assert results["financial_data"]["account_codes"] == ["4000"]
+    assert results["financial_data"]["customer_name"] == "Acme"
+
+
+def test_unparseable_fused_output_falls_back_to_separate_calls():
+    """A truncated response is never returned half-parsed."""
+    executor = FakeExecutor('{"document_type": "invoice", "summ', "invoice")
+
+    results = _process(executor, "fused")
+
+    assert len(executor.calls) == 5
+    assert results["classification"]["type"] == "invoice"
+
+
+def test_separate_mode_is_unchanged():
+    """Companies that have not opted in keep the four generations."""
+    executor = FakeExecutor("receipt")
+
+    results = _process(executor, "separate")
+
+    assert len(executor.calls) == 4
+    assert results["classification"]["type"] == "receipt"
@@ -0,0 +1,198 @@
+"""Tests for incremental, resumable ingestion in DocumentProcessingPipeline."""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent / "database"))
+
+module = pytest.importorskip("document_processing_pipeline")
+
+
+class FakeCollection:
+    def __init__(self, documents=()):
+        self.documents = list(documents)
+        self.inserted = []
+
+    def find(self, query, projection):
+        return iter(self.documents)
+
+    def insert_one(self, document):
+        self.inserted.append(document)
+
+
+class FakeMongoClient:
+    def __init__(self, stored_hashes=()):
+        self.vanta_ledger = type("FakeDB", (), {})()
+        self.vanta_ledger.documents = FakeCollection(
+            {"file_hash": file_hash} for file_hash in stored_hashes
+        )
+        self.vanta_ledger.document_processing = FakeCollection()
+
+
+def _no_models(*args, **kwargs):
+    raise OSError("models are not loaded in tests")
+
+
+def _pipeline(monkeypatch, tmp_path, stored_hashes=(), batch_size=500):
+    monkeypatch.setattr(module.spacy, "load", _no_models)
+    monkeypatch.setattr(module, "pipeline", _no_models)
+    pipeline = module.DocumentProcessingPipeline(
+        None,
+        FakeMongoClient(stored_hashes),
+        tmp_path / "data",
+        batch_size=batch_size,
+        manifest_path=str(tmp_path / "manifest.sqlite"),
+    )
+    pipeline.writer.max_delay = 0
+    pipeline.get_company_id_by_name = lambda name: 1
+    pipeline.written = []
+    pipeline.writer.stages[0].write = lambda batch: pipeline.written.extend(
+        document["filename"] for document in batch
+    )
+    pipeline.writer.stages[0].undo = None
+    pipeline.writer.stages[1].write = lambda batch: None
+    pipeline.writer.stages[1].undo = None
+    return pipeline
+
+
+def _write(tmp_path, name, content):
+    path = tmp_path / "data" / "Acme_Ltd" / "financial" / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    return path
+
+
+def test_plan_file_detects_each_action(tmp_path, monkeypatch):
+    """Unchanged files are not hashed; copies of written content are duplicates."""
+    invoice = _write(tmp_path, "invoice.txt", "Invoice 0042")
+    pipeline = _pipeline(monkeypatch, tmp_path)
+
+    assert pipeline.plan_file(invoice)[0] == "new"
+
+    pipeline.run_complete_processing()
+    real_hash_file = module.hash_file
+    hashed = []
+    monkeypatch.setattr(
+        module, "hash_file", lambda path: hashed.append(path) or real_hash_file(path)
+    )
+    assert pipeline.plan_file(invoice)[0] == "unchanged"
+    assert hashed == []
+
+    stat = invoice.stat()
+    os.utime(invoice, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert pipeline.plan_file(invoice)[0] == "unchanged"
+    assert hashed == [invoice]
+
+    copy = _write(tmp_path, "copy.txt", "Invoice 0042")
+    assert pipeline.plan_file(copy)[0] == "duplicate"
+
+    invoice.write_text("Invoice 0042, corrected")
+    assert pipeline.plan_file(invoice)[0] == "changed"
+
+
+def test_failed_copy_does_not_mark_later_copies_duplicate(tmp_path, monkeypatch):
+    """Content only counts as ingested once written; a failed copy releases it."""
+    _write(tmp_path, "a.txt", "Receipt 17")
+    _write(tmp_path, "b.txt", "Receipt 17")
+    pipeline = _pipeline(monkeypatch, tmp_path)
+    process = pipeline.process_single_document
+    calls = []
+
+    def fail_first(path, *args):
+        calls.append(path)
+        return {} if len(calls) == 1 else process(path, *args)
+
+    monkeypatch.setattr(pipeline, "process_single_document", fail_first)
+
+    summary = pipeline.run_complete_processing()
+
+    assert pipeline.written == [calls[1].name]
+    assert summary["duplicate_documents"] == 0
+    assert pipeline.manifest.get_stats()["files"] == {"failed": 1, "ingested": 1}
+
+
+def test_failed_batch_releases_content_for_pending_copies(tmp_path, monkeypatch):
+    """A copy waiting on a batch that fails to write is processed, not skipped."""
+    _write(tmp_path, "a.txt", "Receipt 17")
+    _write(tmp_path, "b.txt", "Receipt 17")
+    pipeline = _pipeline(monkeypatch, tmp_path)
+    pipeline.writer.max_retries = 0
+    write = pipeline.writer.stages[0].write
+    attempts = []
+
+    def fail_first_batch(batch):
+        attempts.append([document["filename"] for document in batch])
+        if len(attempts) == 1:
+            raise RuntimeError("connection reset")
+        write(batch)
+
+    pipeline.writer.stages[0].write = fail_first_batch
+
+    summary = pipeline.run_complete_processing()
+
+    assert len(attempts) == 2
+    assert pipeline.written == attempts[1]
+    assert attempts[0] != attempts[1]
+    assert summary["duplicate_documents"] == 0
+    assert pipeline.manifest.get_stats()["files"] == {"ingested": 1}
+
+
+def test_copies_in_one_run_are_written_once(tmp_path, monkeypatch):
+    """A copy found while its content is queued is settled after the write."""
+    _write(tmp_path, "a.txt", "Receipt 17")
+    _write(tmp_path, "b.txt", "Receipt 17")
+    pipeline = _pipeline(monkeypatch, tmp_path)
+
+    summary = pipeline.run_complete_processing()
+
+    assert len(pipeline.written) == 1
+    assert summary["processed_documents"] == 1
+    assert summary["duplicate_documents"] == 1
+
+
+def test_interrupted_run_resumes_after_last_written_batch(tmp_path, monkeypatch):
+    """Files from written batches are skipped next run; the rest are processed."""
+    for n in range(4):
+        _write(tmp_path, f"doc{n}.txt", f"Document {n}")
+    pipeline = _pipeline(monkeypatch, tmp_path, batch_size=1)
+    process = pipeline.process_single_document
+    calls = []
+
+    def interrupt_third(path, *args):
+        calls.append(path)
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        return process(path, *args)
+
+    monkeypatch.setattr(pipeline, "process_single_document", interrupt_third)
+
+    with pytest.raises(KeyboardInterrupt):
+        pipeline.run_complete_processing()
+    done = list(pipeline.written)
+    assert len(done) == 2
+
+    resumed = _pipeline(monkeypatch, tmp_path)
+    summary = resumed.run_complete_processing()
+
+    assert summary["unchanged_documents"] == 2
+    assert sorted(done + resumed.written) == [f"doc{n}.txt" for n in range(4)]
+
+
+def test_dry_run_writes_nothing(tmp_path, monkeypatch):
+    """A dry run reports what would be processed without touching any store."""
+    stored = module.hash_file(_write(tmp_path, "old.txt", "Stored before"))
+    _write(tmp_path, "new.txt", "Not stored yet")
+    pipeline = _pipeline(monkeypatch, tmp_path, stored_hashes=[stored])
+
+    report = pipeline.run_complete_processing(dry_run=True)
+
+    assert [entry["action"] for entry in report["files"]] == ["new"]
+    assert report["duplicate_documents"] == 1
+    assert pipeline.written == []
+    assert pipeline.mongo_db.document_processing.inserted == []
+    assert pipeline.manifest.get_stats()["files"] == {}
+    assert pipeline.manifest.get_stats()["hashes"] == 0
+    assert not pipeline.manifest.is_seeded("mongo.documents")
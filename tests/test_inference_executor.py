@@ -0,0 +1,225 @@
+"""Tests for the per-model inference executor."""
+
+import asyncio
+import threading
+
+import pytest
+
+from src.vanta_ledger.services.llm.inference_executor import (
+    BACKGROUND,
+    InferenceDeadlineExceeded,
+    InferenceExecutor,
+    InferenceQueueFull,
+    inference_priority,
+)
+
+
+class FakeLlama:
+    """Callable stand-in for ``Llama`` that records how it was called"""
+
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.calls = []
+        self.threads = set()
+        self.active = 0
+        self.max_active = 0
+
+    def __call__(self, prompt, **kwargs):
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        self.threads.add(threading.current_thread().name)
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.calls.append(prompt)
+        self.active -= 1
+        return {"choices": [{"text": prompt.upper()}]}
+
+
+def _executor(model, queue_size=4):
+    executor = InferenceExecutor(queue_size=queue_size)
+    executor.register("fake", model)
+    return executor
+
+
+def test_generation_runs_on_the_model_worker():
+    """Completions run on the model's own thread, never the event loop's."""
+    model = FakeLlama()
+    executor = _executor(model)
+
+    async def run():
+        return await asyncio.gather(
+            *[executor.generate("fake", f"p{i}", max_tokens=5) for i in range(4)]
+        )
+
+    try:
+        responses = asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    assert [r["choices"][0]["text"] for r in responses] == ["P0", "P1", "P2", "P3"]
+    assert model.threads == {"llm-inference-fake"}
+    assert model.max_active == 1
+
+
+def test_full_queue_rejects_new_work():
+    """Admission control rejects jobs beyond the queue size."""
+    gate = threading.Event()
+    model = FakeLlama(gate)
+    executor = _executor(model, queue_size=2)
+
+    async def run():
+        running = asyncio.ensure_future(executor.generate("fake", "running"))
+        # Wait until the first job has left the queue
+        while not model.active:
+            await asyncio.sleep(0.01)
+        queued = [
+            asyncio.ensure_future(executor.generate("fake", "q")) for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        with pytest.raises(InferenceQueueFull):
+            await executor.generate("fake", "rejected")
+        gate.set()
+        await asyncio.gather(running, *queued)
+
+    try:
+        asyncio.run(run())
+        stats = executor.get_stats()["fake"]
+    finally:
+        executor.shutdown()
+
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 3
+    assert "rejected" not in model.calls
+
+
+def test_cancelled_jobs_are_skipped():
+    """A caller that goes away before its job starts costs no inference."""
+    gate = threading.Event()
+    model = FakeLlama(gate)
+    executor = _executor(model)
+
+    async def run():
+        running = asyncio.ensure_future(executor.generate("fake", "running"))
+        while not model.active:
+            await asyncio.sleep(0.01)
+        abandoned = asyncio.ensure_future(executor.generate("fake", "abandoned"))
+        await asyncio.sleep(0)
+        abandoned.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await abandoned
+        gate.set()
+        await running
+        await executor.generate("fake", "after")
+
+    try:
+        asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    assert model.calls == ["running", "after"]
+
+
+def test_errors_are_raised_to_the_caller():
+    """Exceptions from the model surface at the awaiting call site."""
+
+    def broken(model, text):
+        raise ValueError(text)
+
+    executor = _executor(FakeLlama())
+
+    try:
+        with pytest.raises(ValueError, match="bad page"):
+            asyncio.run(executor.submit("fake", broken, "bad page"))
+        with pytest.raises(KeyError):
+            asyncio.run(executor.generate("missing", "prompt"))
+        assert executor.get_stats()["fake"]["failed"] == 1
+    finally:
+        executor.shutdown()
+
+
+def _blocked(executor, model, gate):
+    """Start a job that holds the worker until ``gate`` is set"""
+    running = asyncio.ensure_future(executor.generate("fake", "running"))
+
+    async def wait():
+        while not model.active:
+            await asyncio.sleep(0.01)
+        return running
+
+    return wait()
+
+
+def test_interactive_jobs_run_before_background_jobs():
+    """Background work queued first still yields to interactive requests."""
+    gate = threading.Event()
+    model = FakeLlama(gate)
+    executor = _executor(model)
+
+    async def run():
+        running = await _blocked(executor, model, gate)
+        with inference_priority(BACKGROUND):
+            background = asyncio.ensure_future(executor.generate("fake", "batch"))
+            await asyncio.sleep(0)
+        interactive = asyncio.ensure_future(executor.generate("fake", "user"))
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(running, background, interactive)
+
+    try:
+        asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    assert model.calls == ["running", "user", "batch"]
+
+
+def test_jobs_sharing_a_prefix_are_grouped():
+    """Same-affinity jobs run back to back, up to the group size."""
+    gate = threading.Event()
+    model = FakeLlama(gate)
+    executor = InferenceExecutor(queue_size=8)
+    executor.register("fake", model, max_group=2)
+
+    async def run():
+        running = await _blocked(executor, model, gate)
+        jobs = [running]
+        for prompt in ["a1", "b1", "a2", "b2", "a3"]:
+            jobs.append(
+                asyncio.ensure_future(
+                    executor.generate("fake", prompt, affinity=prompt[0])
+                )
+            )
+            await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(*jobs)
+
+    try:
+        asyncio.run(run())
+    finally:
+        executor.shutdown()
+
+    assert model.calls == ["running", "a1", "a2", "b1", "b2", "a3"]
+
+
+def test_jobs_past_their_deadline_never_run():
+    """A job that cannot start in time fails instead of running late."""
+    gate = threading.Event()
+    model = FakeLlama(gate)
+    executor = _executor(model)
+
+    async def run():
+        running = await _blocked(executor, model, gate)
+        with inference_priority(BACKGROUND, timeout=0.05):
+            with pytest.raises(InferenceDeadlineExceeded):
+                await executor.generate("fake", "late")
+        gate.set()
+        await running
+
+    try:
+        asyncio.run(run())
+        stats = executor.get_stats()["fake"]
+    finally:
+        executor.shutdown()
+
+    assert model.calls == ["running"]
+    assert stats["expired"] + stats["cancelled"] == 1
@@ -0,0 +1,172 @@
+"""Tests for the process-pool ingestion engine."""
+
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "database"))
+
+import ingestion_engine  # noqa: E402
+from ingestion_engine import IngestionEngine, measure_scaling  # noqa: E402
+
+# Set in each worker process by _stub_init_worker
+_worker_ready = False
+
+
+def _stub_init_worker():
+    """Stands in for loading the models"""
+    global _worker_ready
+    _worker_ready = True
+
+
+def _stub_process(file_path):
+    """Stands in for processing one document; names starting 'corrupt' fail"""
+    if not _worker_ready:
+        raise RuntimeError("worker was not initialized")
+    if Path(file_path).name.startswith("corrupt"):
+        raise ValueError(f"cannot parse {file_path}")
+    time.sleep(0.05)
+    return {"file_path": file_path, "worker_id": os.getpid()}
+
+
+def _engine(**options):
+    return IngestionEngine(
+        initializer=_stub_init_worker, task=_stub_process, **options
+    )
+
+
+def _paths(count, prefix="doc"):
+    return [Path(f"/data/{prefix}{n}.pdf") for n in range(count)]
+
+
+def test_in_flight_work_is_bounded():
+    """Paths are handed out lazily, never more than max_pending at a time."""
+    engine = _engine(max_workers=2, max_pending=3)
+    consumed = []
+    in_flight = []
+
+    def paths():
+        for path in _paths(12):
+            consumed.append(path)
+            yield path
+
+    def on_result(result):
+        stats = engine.stats
+        # The result being handled was in flight too
+        in_flight.append(stats["submitted"] - stats["processed"] - stats["failed"] + 1)
+
+    stats = engine.run(paths(), on_result=on_result)
+
+    assert stats["processed"] == 12
+    assert stats["submitted"] == 12
+    assert max(in_flight) <= 3
+    assert len(consumed) == 12
+
+
+def test_drain_finishes_in_flight_work_and_skips_the_rest():
+    """After drain() nothing new starts; documents already submitted complete."""
+    engine = _engine(max_workers=2, max_pending=2)
+    results = []
+
+    def on_result(result):
+        results.append(result["file_path"])
+        engine.drain()
+
+    stats = engine.run(_paths(20), on_result=on_result)
+
+    assert engine.draining.is_set()
+    assert stats["submitted"] < 20
+    assert stats["processed"] + stats["failed"] == stats["submitted"]
+    assert stats["skipped"] == 20 - stats["submitted"]
+    assert len(results) == stats["processed"]
+
+
+def test_failing_task_is_reported_to_on_error():
+    """A task that raises calls on_error with its path; the others still finish."""
+    engine = _engine(max_workers=2)
+    paths = _paths(3) + [Path("/data/corrupt.pdf")]
+    results, errors = [], []
+
+    stats = engine.run(
+        paths,
+        on_result=lambda result: results.append(result["file_path"]),
+        on_error=lambda path, error: errors.append((path, error)),
+    )
+
+    assert sorted(results) == sorted(str(path) for path in paths[:3])
+    assert [path for path, _ in errors] == [Path("/data/corrupt.pdf")]
+    assert isinstance(errors[0][1], ValueError)
+    assert stats["processed"] == 3
+    assert stats["failed"] == 1
+
+
+def test_result_handler_errors_do_not_stop_the_run():
+    engine = _engine(max_workers=1)
+
+    def on_result(result):
+        raise RuntimeError("database unavailable")
+
+    stats = engine.run(_paths(3), on_result=on_result)
+
+    assert stats["processed"] == 3
+    assert stats["failed"] == 0
+
+
+def test_throughput_is_measured_after_the_first_result():
+    """Model loading before the first result is excluded from docs/sec."""
+    engine = IngestionEngine(max_workers=1)
+    assert engine.throughput() == 0.0
+
+    engine.stats.update(processed=1, first_result_at=100.0, finished_at=102.0)
+    assert engine.throughput() == 0.0
+
+    engine.stats.update(processed=5)
+    assert engine.throughput() == 2.0
+
+
+def test_throughput_of_a_run():
+    """One worker at 50ms per document cannot exceed 20 docs/sec."""
+    engine = _engine(max_workers=1)
+
+    engine.run(_paths(6), on_result=lambda result: None)
+
+    assert engine.stats["first_result_at"] <= engine.stats["finished_at"]
+    assert 0 < engine.throughput() <= 20
+
+
+def test_measure_scaling_reports_each_worker_count():
+    results = measure_scaling(
+        _paths(4),
+        [1, 2],
+        initializer=_stub_init_worker,
+        task=_stub_process,
+    )
+
+    assert [result["workers"] for result in results] == [1, 2]
+    assert all(result["documents"] == 4 for result in results)
+    for result in results:
+        assert result["docs_per_second_per_worker"] == (
+            result["docs_per_second"] / result["workers"]
+        )
+
+
+def test_default_worker_loads_the_document_processor(monkeypatch):
+    """The real initializer builds one processor per worker."""
+    created = []
+
+    class StubProcessor:
+        def __init__(self):
+            created.append(self)
+
+    stub_module = type(sys)("enhanced_document_processor")
+    stub_module.EnhancedDocumentProcessor = StubProcessor
+    monkeypatch.setitem(sys.modules, "enhanced_document_processor", stub_module)
+    monkeypatch.setattr(ingestion_engine, "_processor", None)
+
+    # Keep the test process's own signal handlers
+    monkeypatch.setattr(signal, "signal", lambda *args: None)
+    ingestion_engine._init_worker()
+
+    assert created == [ingestion_engine._processor]
@@ -0,0 +1,76 @@
+"""Tests for the batched LayoutLMv3 layout pipeline."""
+
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from src.vanta_ledger.services.llm import layout_pipeline as module
+from src.vanta_ledger.services.llm.layout_pipeline import LayoutPipeline
+
+
+class FakePage:
+    """Rendered page with the PIL attributes the pipeline hashes"""
+
+    mode = "RGB"
+    size = (10, 10)
+
+    def __init__(self, content):
+        self.content = content
+
+    def tobytes(self):
+        return self.content.encode()
+
+
+def _layoutlm(version="v1"):
+    return {"device": SimpleNamespace(type="cpu"), "version": version}
+
+
+def _analyze(pipeline, contents, layoutlm=None):
+    batches = []
+
+    def infer(layoutlm, images):
+        batches.append([image.content for image in images])
+        return [
+            {
+                "label": "table" if image.content.startswith("t") else "text",
+                "confidence": 0.9,
+                "text_regions": 3,
+            }
+            for image in images
+        ]
+
+    pages = [FakePage(content) for content in contents]
+    with (
+        patch.object(module, "iter_pages", lambda *args: iter(pages)),
+        patch.object(module, "_infer", infer),
+    ):
+        result = pipeline.analyze(layoutlm or _layoutlm(), "contract.pdf")
+    return result, batches
+
+
+def test_pages_are_run_in_batches():
+    """A long document is split into batch_size forward passes, in page order."""
+    pipeline = LayoutPipeline(batch_size=2, dpi=72, max_pages=50, cache_size=100)
+
+    result, batches = _analyze(pipeline, ["p1", "t2", "p3", "p4", "p5"])
+
+    assert batches == [["p1", "t2"], ["p3", "p4"], ["p5"]]
+    assert [page["page"] for page in result["pages"]] == [1, 2, 3, 4, 5]
+    assert result["page_count"] == 5
+    assert result["text_regions"] == 15
+    assert result["has_table"] is True
+    assert result["layout_type"] == "structured"
+
+
+def test_repeated_pages_are_served_from_the_page_cache():
+    """Pages already analysed by the same model version skip the model."""
+    pipeline = LayoutPipeline(batch_size=4, dpi=72, max_pages=50, cache_size=100)
+    _analyze(pipeline, ["terms", "p1"])
+
+    result, batches = _analyze(pipeline, ["terms", "p2"])
+
+    assert batches == [["p2"]]
+    assert [page["page"] for page in result["pages"]] == [1, 2]
+    assert pipeline.stats["cached_pages"] == 1
+
+    _, batches = _analyze(pipeline, ["terms"], layoutlm=_layoutlm("v2"))
+    assert batches == [["terms"]]
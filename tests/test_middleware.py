@@ -0,0 +1,111 @@
+"""Tests for the pure ASGI middleware stack."""
+
+import asyncio
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from src.vanta_ledger.middleware import (
+    REQUEST_COUNT,
+    LoggingMiddleware,
+    RateLimitMiddleware,
+    SecurityHeadersMiddleware,
+    _with_headers,
+)
+from src.vanta_ledger.utils.rate_limiter import RateLimitResult
+
+
+def _app():
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        return {"item_id": item_id}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk-{i}\n"
+
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app.add_middleware(SecurityHeadersMiddleware)
+    app.add_middleware(RateLimitMiddleware)
+    app.add_middleware(LoggingMiddleware)
+    return app
+
+
+@patch("src.vanta_ledger.middleware.settings.RATE_LIMIT_REDIS_ENABLED", False)
+def test_headers_are_added_without_buffering_streams():
+    """Security and rate limit headers reach both plain and streamed responses."""
+    client = TestClient(_app())
+
+    response = client.get("/items/1")
+    streamed = client.get("/stream")
+
+    assert response.json() == {"item_id": 1}
+    assert response.headers["x-frame-options"] == "DENY"
+    assert "x-ratelimit-remaining-minute" in response.headers
+    assert streamed.text == "chunk-0\nchunk-1\nchunk-2\n"
+    assert streamed.headers["content-security-policy"].startswith("default-src")
+
+
+def test_headers_set_by_the_app_are_replaced_not_duplicated():
+    """A response that sets its own X-Frame-Options sends a single value."""
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    wrapped = _with_headers(send, SecurityHeadersMiddleware.DEFAULT_HEADERS)
+    asyncio.run(
+        wrapped(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"X-Frame-Options", b"SAMEORIGIN"),
+                    (b"content-type", b"text/plain"),
+                ],
+            }
+        )
+    )
+
+    names = [name.lower() for name, _ in sent[0]["headers"]]
+    assert names.count(b"x-frame-options") == 1
+    assert names.count(b"content-security-policy") == 1
+    assert (b"x-frame-options", b"DENY") in sent[0]["headers"]
+    assert (b"content-type", b"text/plain") in sent[0]["headers"]
+
+
+@patch("src.vanta_ledger.middleware.settings.RATE_LIMIT_REDIS_ENABLED", False)
+def test_requests_are_counted_by_route_template():
+    """Metrics use the route path, not the concrete URL."""
+    client = TestClient(_app())
+    counter = REQUEST_COUNT.labels("GET", "/items/{item_id}", "200")
+    before = counter._value.get()
+
+    client.get("/items/1")
+    client.get("/items/2")
+
+    assert counter._value.get() == before + 2
+
+
+@patch("src.vanta_ledger.middleware.settings.RATE_LIMIT_REDIS_ENABLED", False)
+def test_rate_limited_requests_get_429():
+    """A rejected request short-circuits with Retry-After."""
+    app = _app()
+    client = TestClient(app)
+
+    with patch(
+        "src.vanta_ledger.middleware.RateLimiter.hit",
+        return_value=RateLimitResult(False, 12, 3600, (0, 0)),
+    ):
+        response = client.get("/items/1")
+
+    assert response.status_code == 429
+    assert response.json() == {"detail": "Hourly rate limit exceeded"}
+    assert response.headers["retry-after"] == "12"
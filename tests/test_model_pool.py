@@ -0,0 +1,113 @@
+"""Tests for on-demand model loading and memory-aware eviction."""
+
+import asyncio
+
+from src.vanta_ledger.services.llm.model_pool import (
+    FAILED,
+    READY,
+    UNLOADED,
+    ModelPool,
+)
+
+GB = 1024**3
+
+
+class FakeHost:
+    """Loads fake models into a fixed amount of RAM"""
+
+    def __init__(self, ram, sizes, busy=()):
+        self.ram = ram
+        self.sizes = sizes
+        self.busy = set(busy)
+        self.loaded = {}
+        self.loads = []
+
+    async def load(self, name):
+        await asyncio.sleep(0)
+        self.loads.append(name)
+        if name not in self.sizes:
+            return False
+        self.loaded[name] = self.sizes[name]
+        return True
+
+    def unload(self, name):
+        self.loaded.pop(name)
+
+    def available(self):
+        return self.ram - sum(self.loaded.values())
+
+    def pool(self, **kwargs):
+        return ModelPool(
+            load=self.load,
+            unload=self.unload,
+            size_of=lambda name: self.sizes.get(name, 0),
+            available_memory=self.available,
+            is_idle=lambda name: name not in self.busy,
+            reserve_bytes=0,
+            max_loaded=0,
+            evict_grace=0,
+            **kwargs,
+        )
+
+
+def test_models_load_once_on_first_use():
+    """Concurrent first requests share a single background load."""
+    host = FakeHost(8 * GB, {"phi3_mini": 2 * GB})
+    pool = host.pool()
+
+    async def run():
+        assert pool.state("phi3_mini") == UNLOADED
+        return await asyncio.gather(*[pool.ensure("phi3_mini") for _ in range(3)])
+
+    assert asyncio.run(run()) == [True, True, True]
+    assert host.loads == ["phi3_mini"]
+    assert pool.state("phi3_mini") == READY
+
+
+def test_least_recently_used_model_is_evicted_when_ram_is_short():
+    """Loading a model that does not fit unloads the idle LRU model."""
+    host = FakeHost(5 * GB, {"a": 2 * GB, "b": 2 * GB, "c": 2 * GB})
+    pool = host.pool()
+
+    async def run():
+        await pool.ensure("a")
+        await pool.ensure("b")
+        await pool.ensure("a")
+        await pool.ensure("c")
+
+    asyncio.run(run())
+
+    assert set(host.loaded) == {"a", "c"}
+    assert pool.state("b") == UNLOADED
+    assert pool.stats["evictions"] == 1
+
+
+def test_busy_models_are_not_evicted():
+    """A model with queued or running jobs stays loaded."""
+    host = FakeHost(5 * GB, {"a": 2 * GB, "b": 2 * GB, "c": 2 * GB}, busy={"a"})
+    pool = host.pool()
+
+    async def run():
+        await pool.ensure("a")
+        await pool.ensure("b")
+        await pool.ensure("c")
+
+    asyncio.run(run())
+
+    assert set(host.loaded) == {"a", "c"}
+
+
+def test_failed_loads_are_reported_and_retried():
+    """A model that cannot load is marked failed and tried again on next use."""
+    host = FakeHost(8 * GB, {})
+    pool = host.pool()
+
+    async def run():
+        first = await pool.ensure("missing")
+        second = await pool.ensure("missing")
+        return first, second
+
+    assert asyncio.run(run()) == (False, False)
+    assert pool.state("missing") == FAILED
+    assert host.loads == ["missing", "missing"]
+    assert pool.get_status()["models"]["missing"]["state"] == FAILED
@@ -0,0 +1,122 @@
+"""Tests for page-level OCR in the OCR pipeline."""
+
+from types import SimpleNamespace
+
+from src.vanta_ledger.services import ocr_pipeline as module
+from src.vanta_ledger.services.ocr_pipeline import OCRPipeline
+
+TEXT_LAYER = "Invoice 0042 from Acme Fuel Ltd, total due KES 21,600.00"
+
+
+class FakePage:
+    def __init__(self, number, text):
+        self.number = number
+        self.text = text
+        self.rendered = []
+
+    def get_text(self):
+        return self.text
+
+    def get_pixmap(self, dpi, colorspace, alpha):
+        self.rendered.append((dpi, colorspace, alpha))
+        return SimpleNamespace(
+            width=2, height=1, samples=bytes([self.number, 0]), stride=2
+        )
+
+
+class FakeDoc:
+    def __init__(self, pages):
+        self.pages = pages
+        self.name = "contract.pdf"
+
+    def __iter__(self):
+        return iter(self.pages)
+
+    def __getitem__(self, number):
+        return self.pages[number]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+def _pipeline(monkeypatch, texts, **kwargs):
+    pages = [FakePage(number, text) for number, text in enumerate(texts)]
+    ocred = []
+
+    def image_to_string(image):
+        ocred.append(image)
+        return f"scanned page {image.samples[0]}"
+
+    fake_fitz = SimpleNamespace(
+        open=lambda file_path: FakeDoc(pages), csGRAY="gray", csRGB="rgb"
+    )
+    fake_image = SimpleNamespace(
+        frombuffer=lambda mode, size, samples, *args: SimpleNamespace(
+            mode=mode, size=size, samples=samples
+        )
+    )
+    monkeypatch.setattr(module, "fitz", fake_fitz, raising=False)
+    monkeypatch.setattr(module, "Image", fake_image, raising=False)
+    monkeypatch.setattr(
+        module,
+        "pytesseract",
+        SimpleNamespace(image_to_string=image_to_string),
+        raising=False,
+    )
+    monkeypatch.setattr(module, "OCR_AVAILABLE", True)
+    return OCRPipeline(processes=1, **kwargs), pages, ocred
+
+
+def test_only_pages_without_text_layer_are_ocred(monkeypatch):
+    """Pages with a text layer are used as is; scans and near-empty pages are OCRed."""
+    pipeline, pages, ocred = _pipeline(
+        monkeypatch, [TEXT_LAYER, "", "  3  "], min_text_chars=16
+    )
+
+    text, timings = pipeline.extract_pdf("contract.pdf")
+
+    assert [page.rendered != [] for page in pages] == [False, True, True]
+    assert len(ocred) == 2
+    assert TEXT_LAYER in text
+    assert "scanned page 1" in text and "scanned page 2" in text
+    assert [timing["method"] for timing in timings] == ["text", "ocr", "ocr"]
+    assert all("ocr_seconds" in timing for timing in timings[1:])
+    stats = pipeline.get_stats()
+    assert stats["pages_text"] == 1
+    assert stats["pages_ocr"] == 2
+
+
+def test_pages_are_rasterized_with_configured_dpi_and_colour(monkeypatch):
+    """Rendering uses the pipeline's DPI and grayscale settings, one page at a time."""
+    pipeline, pages, ocred = _pipeline(monkeypatch, [""], dpi=200, grayscale=True)
+
+    pipeline.extract_pdf("scan.pdf")
+
+    assert pages[0].rendered == [(200, "gray", False)]
+    assert ocred[0].mode == "L"
+
+    pipeline, pages, ocred = _pipeline(monkeypatch, [""], dpi=150, grayscale=False)
+
+    pipeline.extract_pdf("scan.pdf")
+
+    assert pages[0].rendered == [(150, "rgb", False)]
+    assert ocred[0].mode == "RGB"
+
+
+def test_failed_page_keeps_the_rest_of_the_document(monkeypatch):
+    """An OCR error on one page is recorded and the other pages still come back."""
+    pipeline, pages, _ = _pipeline(monkeypatch, ["", TEXT_LAYER])
+
+    def broken_pixmap(**kwargs):
+        raise RuntimeError("corrupt image stream")
+
+    pages[0].get_pixmap = broken_pixmap
+
+    text, timings = pipeline.extract_pdf("contract.pdf")
+
+    assert TEXT_LAYER in text
+    assert timings[0]["error"] == "corrupt image stream"
+    assert pipeline.get_stats()["ocr_failures"] == 1
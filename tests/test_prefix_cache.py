@@ -0,0 +1,122 @@
+"""Tests for the saved prompt-prefix states."""
+
+from types import SimpleNamespace
+
+from src.vanta_ledger.services.llm.prefix_cache import PromptPrefixCache
+
+
+class FakeLlama:
+    """
+    Character-level model with llama.cpp's prefix reuse
+
+    Like ``Llama.generate``, a completion only evaluates the tokens after the
+    longest common prefix with the tokens already in the context.
+    """
+
+    def __init__(self):
+        self.input_ids = []
+        self.evaluated = 0
+        self.loads = 0
+
+    @property
+    def n_tokens(self):
+        return len(self.input_ids)
+
+    def tokenize(self, text, special=False):
+        return [0] + list(text)
+
+    def reset(self):
+        self.input_ids = []
+
+    def eval(self, tokens):
+        self.input_ids = self.input_ids + list(tokens)
+        self.evaluated += len(tokens)
+
+    def save_state(self):
+        ids = list(self.input_ids)
+        return SimpleNamespace(input_ids=ids, llama_state_size=len(ids))
+
+    def load_state(self, state):
+        self.input_ids = list(state.input_ids)
+        self.loads += 1
+
+    def __call__(self, prompt, **kwargs):
+        tokens = self.tokenize(prompt.encode("utf-8"))
+        common = 0
+        for cached, token in zip(self.input_ids, tokens):
+            if cached != token:
+                break
+            common += 1
+        self.input_ids = self.input_ids[:common]
+        self.eval(tokens[common:])
+        return {"choices": [{"text": "ok"}]}
+
+
+PREFIX = "Company: Acme | Currency: KES\nDocument:\n"
+
+
+def _complete(cache, model, company, prefix, suffix, task="classify"):
+    key = cache.key("phi3_mini", company, task, prefix)
+    return cache.complete(model, key, prefix, suffix)
+
+
+def test_prefix_is_evaluated_once_per_company():
+    """Interleaved tasks restore their prefix instead of re-evaluating it."""
+    cache = PromptPrefixCache(max_bytes=10_000)
+    model = FakeLlama()
+    other = "Company: Beta | Currency: USD\nDocument:\n"
+
+    _complete(cache, model, "acme", PREFIX, "invoice one")
+    _complete(cache, model, "beta", other, "receipt")
+    evaluated = model.evaluated
+    _complete(cache, model, "acme", PREFIX, "invoice two")
+
+    assert model.loads == 1
+    assert model.evaluated - evaluated == len("invoice two")
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_resident_prefix_skips_the_state_copy():
+    """Back-to-back documents for one company reuse the live context."""
+    cache = PromptPrefixCache(max_bytes=10_000)
+    model = FakeLlama()
+
+    for suffix in ["a", "b", "c"]:
+        _complete(cache, model, "acme", PREFIX, suffix)
+
+    assert model.loads == 0
+    assert cache.get_stats()["resident"] == 2
+
+
+def test_changed_context_never_reuses_a_stale_state():
+    """The key covers the prefix text, so new context means a new state."""
+    cache = PromptPrefixCache(max_bytes=10_000)
+    changed = PREFIX.replace("KES", "USD")
+
+    assert cache.key("m", "acme", "t", PREFIX) != cache.key("m", "acme", "t", changed)
+    cache.invalidate(company_id="acme")
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_states_are_bounded_by_bytes():
+    """Least recently used states are evicted to stay within the budget."""
+    cache = PromptPrefixCache(max_bytes=2 * (len(PREFIX) + 1))
+    model = FakeLlama()
+
+    for company in ["a", "b", "c"]:
+        _complete(cache, model, company, PREFIX, "doc")
+
+    stats = cache.get_stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= stats["max_bytes"]
+
+
+def test_models_without_state_support_run_the_full_prompt():
+    """Plain callables (and a disabled cache) just see the joined prompt."""
+    calls = []
+    cache = PromptPrefixCache(max_bytes=10_000)
+
+    _complete(cache, lambda prompt, **kw: calls.append(prompt), "acme", PREFIX, "x")
+
+    assert calls == [PREFIX + "x"]
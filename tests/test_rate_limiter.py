@@ -0,0 +1,73 @@
+"""Tests for the sliding-window rate limiter."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from src.vanta_ledger.utils.rate_limiter import LocalRateLimiter, RateLimiter
+
+
+def test_local_limiter_rejects_past_the_limit():
+    """The request after the limit is rejected with a retry hint."""
+    limiter = LocalRateLimiter([(60, 3)], max_clients=10)
+
+    results = [limiter.hit("1.2.3.4", now=120.0) for _ in range(4)]
+
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert [r.remaining for r in results[:3]] == [(2,), (1,), (0,)]
+    assert results[-1].retry_after == 60
+    assert results[-1].window == 60
+
+
+def test_local_limiter_weights_the_previous_window():
+    """Half way through a window, half of the previous count still applies."""
+    limiter = LocalRateLimiter([(60, 4)], max_clients=10)
+    for _ in range(4):
+        limiter.hit("client", now=60.0)
+
+    assert limiter.hit("client", now=150.0).remaining == (1,)
+    assert limiter.hit("client", now=150.0).allowed
+    assert not limiter.hit("client", now=150.0).allowed
+    # Two buckets later the old count no longer applies
+    assert limiter.hit("client", now=250.0).remaining == (3,)
+
+
+def test_local_limiter_is_bounded():
+    """Idle clients are evicted once ``max_clients`` are tracked."""
+    limiter = LocalRateLimiter([(60, 1)], max_clients=2)
+    for client in ["a", "b", "c"]:
+        limiter.hit(client, now=0.0)
+
+    assert list(limiter._clients) == ["b", "c"]
+    assert limiter.hit("a", now=0.0).allowed
+
+
+def test_redis_reply_is_used_when_available():
+    """The Lua script result decides the request."""
+    script = AsyncMock(return_value=[0, 42, 3600, 0, 0])
+    redis = MagicMock()
+    redis.register_script.return_value = script
+    limiter = RateLimiter([(60, 100), (3600, 1000)], max_clients=10)
+
+    result = asyncio.run(limiter.hit("client", redis))
+
+    assert not result.allowed
+    assert (result.retry_after, result.window) == (42, 3600)
+    keys = script.call_args.kwargs["keys"]
+    assert len(keys) == 4 and all("{client}" in key for key in keys)
+    assert limiter.stats["redis"] == 1
+
+
+def test_redis_failure_falls_back_to_local_counters():
+    """A Redis error is not fatal and later requests skip Redis for a while."""
+    redis = MagicMock()
+    redis.register_script.return_value = AsyncMock(side_effect=ConnectionError)
+    limiter = RateLimiter([(60, 100)], max_clients=10)
+
+    async def run():
+        return [await limiter.hit("client", redis) for _ in range(2)]
+
+    results = asyncio.run(run())
+
+    assert all(r.allowed for r in results)
+    assert limiter.stats["redis_errors"] == 1
+    assert limiter.stats["local"] == 2
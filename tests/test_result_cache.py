@@ -0,0 +1,143 @@
+"""Tests for the content-addressed LLM result cache."""
+
+import json
+import time
+from unittest.mock import MagicMock
+
+from src.vanta_ledger.services.llm.result_cache import (
+    BYTES_KEY,
+    KEY_PREFIX,
+    LRU_KEY,
+    SIZES_KEY,
+    LLMResultCache,
+    company_tag,
+    content_digest,
+    context_version,
+    model_tag,
+)
+
+CONTEXT = {"company_id": "acme", "company_name": "Acme", "currency": "KES"}
+
+
+def _redis(stored=None):
+    """Redis mock whose scripts are MagicMocks keyed by registration order"""
+    redis = MagicMock()
+    redis.get.return_value = stored
+    redis.getset.return_value = None
+    scripts = []
+
+    def register(source):
+        script = MagicMock(return_value=0)
+        scripts.append(script)
+        return script
+
+    redis.register_script.side_effect = register
+    redis.scripts = scripts
+    return redis
+
+
+def _key(text, model_id="phi3_mini:a.gguf", context=CONTEXT):
+    return LLMResultCache.key(content_digest(text), model_id, context_version(context))
+
+
+def test_keys_follow_content_not_upload_metadata():
+    """Same text shares a key; other text, models or contexts do not."""
+    assert _key("Invoice 42") == _key("Invoice 42")
+    assert _key("Invoice 42") != _key("Invoice 43")
+    assert _key("Invoice 42") != _key("Invoice 42", model_id="phi3_mini:b.gguf")
+    assert _key("Invoice 42") != _key("Invoice 42", context={**CONTEXT, "currency": "USD"})
+
+
+def test_results_are_served_from_l1_after_put():
+    """A stored result is returned without another Redis read."""
+    redis = _redis()
+    cache = LLMResultCache(l1_size=10, max_bytes=1024, ttl=60, redis_client=redis)
+    key = _key("Invoice 42")
+
+    cache.put(key, {"summary": "ok"}, [company_tag("acme")])
+
+    assert cache.get(key) == {"summary": "ok"}
+    assert cache.stats["l1_hits"] == 1
+    redis.get.assert_not_called()
+
+
+def test_redis_entries_fill_l1():
+    """An L2 hit is promoted to L1 and touched in the LRU index."""
+    key = _key("Invoice 42")
+    stored = json.dumps(
+        {
+            "result": {"summary": "ok"},
+            "tags": [company_tag("acme")],
+            "stored_at": time.time(),
+        }
+    )
+    redis = _redis(stored)
+    cache = LLMResultCache(l1_size=10, max_bytes=1024, ttl=60, redis_client=redis)
+
+    assert cache.get(key) == {"summary": "ok"}
+    assert cache.get(key) == {"summary": "ok"}
+    assert cache.stats["l2_hits"] == 1
+    assert cache.stats["l1_hits"] == 1
+    redis.zadd.assert_called_once()
+
+
+def test_writes_are_bounded_by_bytes():
+    """The store script receives the byte budget; oversize results skip Redis."""
+    redis = _redis()
+    cache = LLMResultCache(l1_size=10, max_bytes=200, ttl=60, redis_client=redis)
+
+    cache.put(_key("small"), {"summary": "ok"}, [company_tag("acme")])
+    cache.put(_key("large"), {"summary": "x" * 500}, [company_tag("acme")])
+
+    store = redis.scripts[0]
+    assert store.call_count == 1
+    kwargs = store.call_args.kwargs
+    assert kwargs["args"][2:] == [200]
+    assert "stored_at" in json.loads(kwargs["args"][0])
+    assert BYTES_KEY in kwargs["keys"]
+    assert f"{KEY_PREFIX}:index:{company_tag('acme')}" in kwargs["keys"]
+
+
+def test_expired_entries_are_removed_with_their_accounting():
+    """An entry past the TTL is a miss and leaves the LRU index and byte count."""
+    key = _key("Invoice 42")
+    stored = json.dumps(
+        {"result": {"summary": "ok"}, "tags": [], "stored_at": time.time() - 120}
+    )
+    redis = _redis(stored)
+    cache = LLMResultCache(l1_size=10, max_bytes=1024, ttl=60, redis_client=redis)
+
+    assert cache.get(key) is None
+
+    (remove,) = redis.scripts
+    assert remove.call_args.kwargs["keys"] == [key, LRU_KEY, SIZES_KEY, BYTES_KEY]
+    assert cache.stats["misses"] == 1
+    assert key not in cache._l1
+    redis.zadd.assert_not_called()
+
+
+def test_invalidating_a_company_keeps_other_companies():
+    """Only entries tagged with the company are dropped from L1."""
+    cache = LLMResultCache(l1_size=10, max_bytes=1024, ttl=60, redis_client=_redis())
+    acme, other = _key("a"), _key("b")
+    cache.put(acme, {"summary": "a"}, [company_tag("acme"), model_tag("phi3_mini")])
+    cache.put(other, {"summary": "b"}, [company_tag("other"), model_tag("phi3_mini")])
+
+    cache.invalidate(company_id="acme")
+
+    assert acme not in cache._l1
+    assert other in cache._l1
+
+
+def test_a_new_model_version_drops_its_results():
+    """Recording a changed model version invalidates what the old one produced."""
+    cache = LLMResultCache(l1_size=10, max_bytes=1024, ttl=60, redis_client=_redis())
+    key = _key("a")
+    cache.note_version("model", "phi3_mini", "phi3_mini:a.gguf:1:1")
+    cache.put(key, {"summary": "a"}, [model_tag("phi3_mini")])
+
+    cache.note_version("model", "phi3_mini", "phi3_mini:a.gguf:1:1")
+    assert key in cache._l1
+
+    cache.note_version("model", "phi3_mini", "phi3_mini:a.gguf:2:2")
+    assert key not in cache._l1
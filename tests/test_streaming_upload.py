@@ -0,0 +1,94 @@
+"""Tests for streaming uploads into content-addressed storage."""
+
+import hashlib
+import io
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from src.vanta_ledger.config import settings
+from src.vanta_ledger.utils import file_utils as module
+from src.vanta_ledger.utils.file_utils import SecureFileHandler
+
+CONTENT = b"Invoice 0042\nTotal due: KES 21,600.00\n" * 100
+
+
+class CountingFile(io.BytesIO):
+    """Records the size of every read"""
+
+    def __init__(self, content):
+        super().__init__(content)
+        self.reads = []
+
+    def read(self, size=-1):
+        self.reads.append(size)
+        return super().read(size)
+
+
+def _handler(monkeypatch, max_file_size=1024 * 1024):
+    monkeypatch.setattr(
+        module,
+        "magic",
+        SimpleNamespace(
+            from_buffer=lambda content, mime: (
+                "application/x-dosexec" if content.startswith(b"MZ") else "text/plain"
+            )
+        ),
+    )
+    monkeypatch.setattr(settings, "UPLOAD_CHUNK_SIZE", 256)
+    handler = SecureFileHandler()
+    handler.max_file_size = max_file_size
+    return handler
+
+
+def _upload(content, filename="invoice.txt"):
+    return UploadFile(file=CountingFile(content), filename=filename)
+
+
+def test_upload_is_stored_under_its_hash_in_chunks(tmp_path, monkeypatch):
+    """Content is read in chunks and stored once under its SHA-256."""
+    handler = _handler(monkeypatch)
+    upload = _upload(CONTENT)
+
+    stored = handler.store_upload(upload, str(tmp_path))
+
+    sha256 = hashlib.sha256(CONTENT).hexdigest()
+    assert stored.sha256 == sha256
+    assert stored.path == tmp_path / f"{sha256}.txt"
+    assert stored.path.read_bytes() == CONTENT
+    assert stored.size == len(CONTENT)
+    assert stored.created
+    assert set(upload.file.reads) == {256}
+
+    again = handler.store_upload(_upload(CONTENT), str(tmp_path))
+
+    assert again.path == stored.path
+    assert not again.created
+    assert sorted(path.name for path in tmp_path.iterdir()) == [f"{sha256}.txt"]
+
+
+def test_oversized_upload_is_rejected_mid_stream(tmp_path, monkeypatch):
+    """An upload without a declared size stops once it passes MAX_FILE_SIZE."""
+    handler = _handler(monkeypatch, max_file_size=1000)
+    upload = _upload(CONTENT)
+
+    with pytest.raises(HTTPException) as error:
+        handler.store_upload(upload, str(tmp_path))
+
+    assert error.value.status_code == 413
+    assert upload.file.tell() < len(CONTENT)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_content_type_is_checked_before_anything_is_written(tmp_path, monkeypatch):
+    """A disallowed type is rejected from the first chunk."""
+    handler = _handler(monkeypatch)
+    upload = _upload(b"MZ\x90\x00" + CONTENT)
+
+    with pytest.raises(HTTPException) as error:
+        handler.store_upload(upload, str(tmp_path))
+
+    assert error.value.status_code == 400
+    assert upload.file.reads == [256]
+    assert list(tmp_path.iterdir()) == []
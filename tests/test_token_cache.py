@@ -0,0 +1,100 @@
+"""Tests for the verified-token cache used by the auth dependencies."""
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+from fastapi.security import HTTPAuthorizationCredentials
+
+from src.vanta_ledger.auth import AuthService, User, get_current_user
+from src.vanta_ledger.utils.token_cache import TokenCache
+
+
+def _listening_cache(**kwargs):
+    cache = TokenCache(ttl=kwargs.get("ttl", 30), max_entries=kwargs.get("size", 10))
+    cache.listening = True
+    return cache
+
+
+def _payload(jti="jti-1", user_id="u1"):
+    return {"jti": jti, "user_id": user_id, "exp": time.time() + 600}
+
+
+def test_cache_is_bypassed_until_subscribed():
+    """Without a live invalidation subscription nothing is cached."""
+    cache = TokenCache(ttl=30, max_entries=10)
+
+    cache.put(_payload(), cache.generation)
+
+    assert cache.get("jti-1") is None
+
+
+def test_invalidation_during_verification_is_not_overwritten():
+    """A revocation that races the blacklist check wins."""
+    cache = _listening_cache()
+    generation = cache.generation
+
+    cache.invalidate_token("jti-1")
+    cache.put(_payload(), generation)
+
+    assert cache.get("jti-1") is None
+
+
+def test_user_invalidation_drops_all_of_their_tokens():
+    """Updating or deactivating a user revokes every cached token of theirs."""
+    cache = _listening_cache()
+    for jti, user_id in [("a", "u1"), ("b", "u1"), ("c", "u2")]:
+        cache.put(_payload(jti, user_id), cache.generation)
+
+    cache.invalidate_user("u1")
+
+    assert cache.get("a") is None and cache.get("b") is None
+    assert cache.get("c") is not None
+
+
+def test_entries_expire_and_are_bounded():
+    """Entries never outlive the TTL and the LRU stays within its size."""
+    cache = _listening_cache(ttl=0, size=2)
+    cache.put(_payload("a"), cache.generation)
+    assert cache.get("a") is None
+
+    cache.ttl = 30
+    for jti in ["a", "b", "c"]:
+        cache.put(_payload(jti), cache.generation)
+    assert list(cache._entries) == ["b", "c"]
+
+
+def test_verify_token_skips_blacklist_check_when_cached():
+    """The second verification of a token makes no Redis call."""
+    cache = _listening_cache()
+    token = AuthService.create_access_token({"sub": "alice", "user_id": "u1"})
+
+    with patch("src.vanta_ledger.auth.token_cache", cache), patch(
+        "src.vanta_ledger.auth.redis_client"
+    ) as redis_client:
+        redis_client.exists.return_value = 0
+        AuthService.verify_token(token)
+        AuthService.verify_token(token)
+
+    assert redis_client.exists.call_count == 1
+
+
+def test_get_current_user_loads_user_once_per_token():
+    """The user lookup is cached alongside the verified token."""
+    cache = _listening_cache()
+    token = AuthService.create_access_token({"sub": "alice", "user_id": "u1"})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    user = User(id="u1", username="alice", email="a@example.com", hashed_password="")
+    lookup = MagicMock(return_value=user)
+
+    async def run():
+        return [await get_current_user(credentials) for _ in range(3)]
+
+    with patch("src.vanta_ledger.auth.token_cache", cache), patch(
+        "src.vanta_ledger.auth.redis_client"
+    ) as redis_client, patch("src.vanta_ledger.auth.get_user_by_id", lookup):
+        redis_client.exists.return_value = 0
+        users = asyncio.run(run())
+
+    assert users == [user] * 3
+    assert lookup.call_count == 1